@@ -0,0 +1,186 @@
+"""
+accounting_overhead.py
+
+Measures what per-RPC byte accounting costs. Two parts:
+
+- record: the cost of accounting for one call, outside any server. "legacy"
+  is what every handler used to do (serialize the request and the response
+  again, then open the CSV file and append a line); "usage_log" is
+  UsageLog.record, with the write left to its flusher thread.
+- latency: the latency of Heartbeat and of a GetConversation page of --limit
+  messages against an in-process single-node server, served without and
+  with the AccountingInterceptor.
+
+Example:
+
+    python benchmarks/accounting_overhead.py --calls 2000 --limit 100
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import bench_utils  # noqa: F401 (puts system_main on the path)
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+from compression_policy import CompressionPolicy
+from local_server import LocalServer, seed_inbox
+from wire_accounting import UsageLog
+
+
+def legacy_log(path, method_name, request, response):
+    """
+    The synchronous per-call logging the handlers used to run.
+    """
+    request_size = len(request.SerializeToString())
+    response_size = len(response.SerializeToString())
+    if not os.path.exists(path):
+        with open(path, "w") as f:
+            f.write("method_name,request_size,response_size\n")
+    with open(path, "a") as f:
+        f.write(f"{method_name},{request_size},{response_size}\n")
+
+
+def time_per_call(call, num_calls):
+    """
+    :return: Mean microseconds per call.
+    """
+    start = time.perf_counter()
+    for _ in range(num_calls):
+        call()
+    return (time.perf_counter() - start) * 1e6 / num_calls
+
+
+def measure_record(temp_dir, payloads, num_calls):
+    """
+    Time legacy_log against UsageLog.record for every payload.
+
+    :return: A list of result dicts.
+    """
+    results = []
+    for payload, (method, request, response) in payloads.items():
+        legacy_path = os.path.join(temp_dir, f"legacy_{payload}.log")
+        usage_log = UsageLog(os.path.join(temp_dir, f"usage_{payload}.log")).start()
+        legacy_us = time_per_call(lambda: legacy_log(legacy_path, method, request, response), num_calls)
+        record_us = time_per_call(lambda: usage_log.record(method, request, response), num_calls)
+        flush_start = time.perf_counter()
+        usage_log.close()
+        results.append({
+            "payload": payload,
+            "legacy_us_per_call": legacy_us,
+            "usage_log_us_per_call": record_us,
+            "flusher_us_per_record": (time.perf_counter() - flush_start) * 1e6 / num_calls,
+        })
+    return results
+
+
+def serve(db_path, limit, usage_log):
+    """
+    Start a server on a seeded database and log in the reader.
+
+    :return: (server, channel, calls) where calls maps call names to (method, request, function).
+    """
+    server = LocalServer(db_path, compression_policy=CompressionPolicy("none"), usage_log=usage_log)
+    channel = grpc.insecure_channel(server.address)
+    stub = chat_pb2_grpc.ChatServiceStub(channel)
+    stub.Login(chat_pb2.LoginRequest(username="reader", hashed_password="bench"), timeout=20)
+    heartbeat = chat_pb2.HeartbeatRequest(username="reader")
+    conversation = chat_pb2.GetConversationRequest(username="reader", peer="writer", limit=limit)
+    return server, channel, {
+        "heartbeat": ("Heartbeat", heartbeat, lambda: stub.Heartbeat(heartbeat, timeout=20)),
+        f"conversation_{limit}": ("GetConversation", conversation,
+                                  lambda: stub.GetConversation(conversation, timeout=60)),
+    }
+
+
+def measure_calls(calls, num_calls):
+    """
+    Time every call against one server, after a warm-up.
+
+    :return: A dict mapping call names to lists of latencies in microseconds.
+    """
+    latencies = {}
+    for name, (_, _, call) in calls.items():
+        for _ in range(min(num_calls, 100)):
+            call()
+        latencies[name] = []
+        for _ in range(num_calls):
+            start = time.perf_counter()
+            call()
+            latencies[name].append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def summarize(values):
+    """
+    :return: The mean, median and 99th percentile of a list of latencies.
+    """
+    values = sorted(values)
+    return {
+        "mean_us": statistics.fmean(values),
+        "p50_us": values[len(values) // 2],
+        "p99_us": values[int(len(values) * 0.99)],
+    }
+
+
+def run(num_calls, limit, content_bytes):
+    """
+    Run both parts of the benchmark. The servers are measured in the order
+    off, interceptor, interceptor, off so drift in the machine's load hits
+    both modes alike (one process can only serve one grpc.aio server at a time).
+
+    :return: A dict with the settings and the results.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="bench_accounting_")
+    cwd = os.getcwd()
+    os.chdir(temp_dir)  # keep the data-usage logs out of the repository
+    try:
+        usage_log = UsageLog(os.path.join(temp_dir, "server_usage.log")).start()
+        record = None
+        latencies = {"off": {}, "interceptor": {}}
+        for phase, mode in enumerate(("off", "interceptor", "interceptor", "off")):
+            db_path = os.path.join(temp_dir, f"phase{phase}.db")
+            seed_inbox(db_path, limit, content_bytes)
+            server, channel, calls = serve(db_path, limit, usage_log if mode == "interceptor" else None)
+            if record is None:
+                # Account for the real messages of both calls
+                payloads = {name: (method, request, call()) for name, (method, request, call) in calls.items()}
+                record = measure_record(temp_dir, payloads, num_calls)
+            for name, values in measure_calls(calls, num_calls // 2).items():
+                latencies[mode].setdefault(name, []).extend(values)
+            channel.close()
+            server.stop()
+        usage_log.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(temp_dir)
+
+    latency = {mode: {name: summarize(values) for name, values in by_call.items()}
+               for mode, by_call in latencies.items()}
+    overhead = {name: latency["interceptor"][name]["mean_us"] - latency["off"][name]["mean_us"]
+                for name in latency["off"]}
+    return {"calls": num_calls, "limit": limit, "record": record, "latency": latency,
+            "interceptor_overhead_us": overhead, "records_written": usage_log.written}
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Per-call cost of RPC byte accounting")
+    parser.add_argument("--calls", type=int, default=2000, help="Calls per measurement")
+    parser.add_argument("--limit", type=int, default=100, help="Messages per GetConversation page (and seeded inbox size)")
+    parser.add_argument("--content-bytes", type=int, default=64, help="Length of each seeded message")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.calls, args.limit, args.content_bytes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+bench_utils.py
+
+Shared helpers for the benchmark scripts: import path setup for the
+`system_main` modules and latency summaries.
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SYSTEM_MAIN = os.path.join(PROJECT_ROOT, "system_main")
+
+# The generated gRPC modules import each other by bare name (`import chat_pb2`),
+# so system_main itself has to be on the path.
+if SYSTEM_MAIN not in sys.path:
+    sys.path.insert(0, SYSTEM_MAIN)
+
+
+def percentile(sorted_values, pct):
+    """
+    Return the pct-th percentile of an already sorted list (nearest-rank).
+
+    :param sorted_values: A sorted list of numbers.
+    :param pct: Percentile in [0, 100].
+    :return: The percentile value, or 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+def summarize(values, percentiles=(50, 95, 99)):
+    """
+    Summarize a list of latencies.
+
+    :param values: Latency samples (any unit).
+    :param percentiles: Percentiles to report.
+    :return: A dict with count, mean, max and one "pNN" key per percentile.
+    """
+    ordered = sorted(values)
+    summary = {
+        "count": len(ordered),
+        "mean": (sum(ordered) / len(ordered)) if ordered else 0.0,
+        "max": ordered[-1] if ordered else 0.0,
+    }
+    for pct in percentiles:
+        key = "p" + str(pct).replace(".", "")
+        summary[key] = percentile(ordered, pct)
+    return summary
@@ -0,0 +1,121 @@
+"""
+compression_sizes.py
+
+Measures what the response compression policy costs and saves across payload
+sizes. For each policy an in-process single-node server is started behind a
+TCP proxy that counts the bytes crossing the connection, and the same calls
+are made for every payload size:
+
+- heartbeat:      a tiny Heartbeat response
+- read_N:         ReadMessages with limit=N over a seeded inbox
+
+The report gives, per policy and payload, the serialized response size, the
+bytes on the wire per call (both directions, including HTTP/2 framing) and
+the process CPU time per call (server and client share the process).
+
+Example:
+
+    python benchmarks/compression_sizes.py --sizes 1,10,100,1000,10000 --calls 50
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import bench_utils  # noqa: F401 (puts system_main on the path)
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+from compression_policy import CompressionPolicy, ALWAYS
+from local_server import CountingProxy, LocalServer, seed_inbox
+
+POLICIES = {
+    "none": lambda threshold: CompressionPolicy("none"),
+    "gzip_always": lambda threshold: CompressionPolicy("gzip", ALWAYS),
+    "gzip_threshold": lambda threshold: CompressionPolicy("gzip", threshold),
+}
+
+
+def measure(proxy, call, num_calls):
+    """
+    Run a call num_calls times.
+
+    :return: (serialized response bytes, wire bytes per call, CPU ms per call)
+    """
+    response = call()  # warm up
+    wire_before = proxy.bytes
+    cpu_before = time.process_time()
+    for _ in range(num_calls):
+        call()
+    cpu = time.process_time() - cpu_before
+    time.sleep(0.05)  # let the proxy count the last frames
+    return response.ByteSize(), (proxy.bytes - wire_before) / num_calls, cpu * 1000.0 / num_calls
+
+
+def run_policy(name, policy, sizes, num_calls, content_bytes):
+    """
+    Measure every payload size against a server using one policy.
+
+    :return: A list of result dicts.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="bench_compression_")
+    cwd = os.getcwd()
+    os.chdir(temp_dir)  # keep the data-usage log out of the repository
+    try:
+        db_path = os.path.join(temp_dir, "node.db")
+        seed_inbox(db_path, max(sizes), content_bytes)
+        server = LocalServer(db_path, compression_policy=policy)
+        proxy = CountingProxy(server.port)
+        channel = grpc.insecure_channel(f"127.0.0.1:{proxy.port}")
+        stub = chat_pb2_grpc.ChatServiceStub(channel)
+        stub.Login(chat_pb2.LoginRequest(username="reader", hashed_password="bench"), timeout=20)
+
+        calls = {"heartbeat": lambda: stub.Heartbeat(chat_pb2.HeartbeatRequest(username="reader"), timeout=20)}
+        for size in sizes:
+            calls[f"read_{size}"] = (lambda limit: lambda: stub.ReadMessages(
+                chat_pb2.ReadMessagesRequest(username="reader", limit=limit), timeout=60))(size)
+
+        results = []
+        for payload, call in calls.items():
+            response_bytes, wire_bytes, cpu_ms = measure(proxy, call, num_calls)
+            results.append({
+                "policy": name,
+                "payload": payload,
+                "response_bytes": response_bytes,
+                "wire_bytes_per_call": wire_bytes,
+                "cpu_ms_per_call": cpu_ms,
+            })
+        channel.close()
+        proxy.stop()
+        server.stop()
+        return results
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(temp_dir)
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Wire bytes and CPU of response compression policies")
+    parser.add_argument("--sizes", default="1,10,100,1000,10000", help="Comma-separated ReadMessages limits")
+    parser.add_argument("--calls", type=int, default=50, help="Calls per payload")
+    parser.add_argument("--threshold", type=int, default=1024, help="Threshold of the gzip_threshold policy")
+    parser.add_argument("--content-bytes", type=int, default=64, help="Length of each seeded message")
+    parser.add_argument("--policies", default=",".join(POLICIES), help="Comma-separated policies to run")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    results = []
+    for name in args.policies.split(","):
+        results.extend(run_policy(name, POLICIES[name](args.threshold), sizes, args.calls, args.content_bytes))
+    print(json.dumps({"calls": args.calls, "threshold": args.threshold, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
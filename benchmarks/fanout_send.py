@@ -0,0 +1,162 @@
+"""
+fanout_send.py
+
+Compares sending one message to N users one SendMessage call at a time with
+a single multi-recipient SendMessage (explicit receiver list, and a ListUsers
+pattern). Each multi-recipient send is one Raft entry and one transaction.
+A few of the receivers hold Subscribe streams, so the report also shows how
+long the fan-out pushes take to arrive.
+
+Example (after `python start_cluster.py --servers 3`):
+
+    python benchmarks/fanout_send.py --server 127.0.0.1:50051 --receivers 500
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+
+import bench_utils
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+from session_client import ChatSession
+
+
+def create_users(channel, usernames):
+    """
+    Create (and log in) users, pipelined over one Session stream.
+
+    :param channel: A grpc.Channel to the server.
+    :param usernames: Usernames to create.
+    """
+    session = ChatSession(channel)
+    creates = [session.submit("create_user", chat_pb2.CreateUserRequest(
+        username=name, hashed_password="bench", display_name=name)) for name in usernames]
+    for future in creates:
+        future.result(60)
+    logins = [session.submit("login", chat_pb2.LoginRequest(username=name, hashed_password="bench"))
+              for name in usernames]
+    for future in logins:
+        future.result(60)
+    session.close()
+
+
+class PushWatcher:
+    """
+    Holds Subscribe streams for some receivers and records when each push arrives.
+    """
+
+    def __init__(self, stub, usernames):
+        self.arrivals = {}  # content -> list of arrival times
+        self.lock = threading.Lock()
+        self.calls = [stub.Subscribe(chat_pb2.SubscribeRequest(username=name)) for name in usernames]
+        self.threads = [threading.Thread(target=self._consume, args=(call,), daemon=True) for call in self.calls]
+        for t in self.threads:
+            t.start()
+
+    def _consume(self, call):
+        try:
+            for incoming in call:
+                with self.lock:
+                    self.arrivals.setdefault(incoming.content, []).append(time.perf_counter())
+        except grpc.RpcError:
+            pass
+
+    def wait_for(self, content, count, timeout=30):
+        """
+        :return: Arrival times of content once count streams got it (or on timeout).
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self.lock:
+                times = list(self.arrivals.get(content, []))
+            if len(times) >= count:
+                return times
+            time.sleep(0.01)
+        return times
+
+    def close(self):
+        for call in self.calls:
+            call.cancel()
+
+
+def run(server, num_receivers, num_subscribers):
+    """
+    Run the one-by-one and multi-recipient sends against the server.
+
+    :return: A dict with the timing of each path.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    sender = f"fan_{suffix}_sender"
+    receivers = [f"fan_{suffix}_{i:05d}" for i in range(num_receivers)]
+
+    channel = grpc.insecure_channel(server)
+    stub = chat_pb2_grpc.ChatServiceStub(channel)
+    setup_start = time.perf_counter()
+    create_users(channel, [sender] + receivers)
+    setup_seconds = time.perf_counter() - setup_start
+
+    watcher = PushWatcher(stub, receivers[:num_subscribers])
+    time.sleep(0.5)  # let the streams register
+
+    results = {"receivers": num_receivers, "subscribers": num_subscribers, "setup_seconds": setup_seconds}
+
+    def timed(name, send):
+        content = f"{name}-{suffix}"
+        start = time.perf_counter()
+        delivered = send(content)
+        elapsed = time.perf_counter() - start
+        arrivals = watcher.wait_for(content, num_subscribers)
+        results[name] = {
+            "seconds": elapsed,
+            "delivered": delivered,
+            "messages_per_sec": delivered / elapsed if elapsed else 0.0,
+            "push_ms_after_send_start": bench_utils.summarize([(t - start) * 1000.0 for t in arrivals]),
+        }
+
+    def one_by_one(content):
+        delivered = 0
+        for receiver in receivers:
+            resp = stub.SendMessage(chat_pb2.SendMessageRequest(
+                sender=sender, receiver=receiver, content=content), timeout=30)
+            delivered += resp.status == "success"
+        return delivered
+
+    def multi_list(content):
+        resp = stub.SendMessage(chat_pb2.SendMessageRequest(
+            sender=sender, receivers=receivers, content=content), timeout=60)
+        return resp.delivered_count
+
+    def multi_pattern(content):
+        resp = stub.SendMessage(chat_pb2.SendMessageRequest(
+            sender=sender, receiver_pattern=f"fan_{suffix}_0*", content=content), timeout=60)
+        return resp.delivered_count
+
+    timed("multi_list", multi_list)
+    timed("multi_pattern", multi_pattern)
+    timed("one_by_one", one_by_one)
+
+    watcher.close()
+    channel.close()
+    return results
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Multi-recipient send vs one-by-one sends")
+    parser.add_argument("--server", default="127.0.0.1:50051", help="Server to send through")
+    parser.add_argument("--receivers", type=int, default=200, help="Number of receivers")
+    parser.add_argument("--subscribers", type=int, default=20, help="Receivers holding a Subscribe stream")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.server, args.receivers, min(args.subscribers, args.receivers)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""
+load_generator.py
+
+Drives a running cluster with a chat-like workload. N users are created,
+spread round-robin over the given nodes, logged in on their node and kept
+subscribed there, with heartbeats keeping their sessions alive. Operations
+are then drawn from a weighted mix:
+
+- send: SendMessage from a random user to another random user.
+- read: ReadMessages of a user's unread messages (up to --read-limit).
+- list: ListUsers with a prefix pattern matching every load user.
+
+In closed-loop mode (the default) --concurrency workers each issue one
+operation after another. With --rate, operations arrive as a Poisson process
+at that many per second whether or not earlier ones have finished, and each
+latency is measured from the moment the operation was due, so a stalled node
+shows up as latency instead of as a lower request rate. Every message sent is
+also timed until the receiver's Subscribe stream delivers it.
+
+Example (after `python start_cluster.py --servers 3`):
+
+    python benchmarks/load_generator.py --servers 127.0.0.1:50051,127.0.0.1:50052,127.0.0.1:50053 \\
+        --users 100 --mix send=70,read=20,list=10 --rate 200 --duration 30
+"""
+
+import argparse
+import collections
+import json
+import random
+import threading
+import time
+import uuid
+from concurrent import futures
+
+import bench_utils
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+
+OPERATIONS = ("send", "read", "list")
+DEFAULT_MIX = "send=70,read=20,list=10"
+PERCENTILES = (50, 99, 99.9)
+HEARTBEAT_INTERVAL = 10.0  # seconds between heartbeats, until a node reports its session TTL
+MAX_ERROR_SAMPLES = 5  # distinct error messages kept per operation
+
+
+def parse_mix(text):
+    """
+    :param text: Comma-separated weights, e.g. "send=70,read=20,list=10".
+    :return: A dict mapping operation names to their weights.
+    :raises ValueError: If an operation is unknown or no weight is positive.
+    """
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}'; expected one of {', '.join(OPERATIONS)}.")
+        mix[name] = float(weight or 1)
+        if mix[name] < 0:
+            raise ValueError(f"Weight of '{name}' must not be negative.")
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("At least one operation needs a positive weight.")
+    return mix
+
+
+class LoadUser:
+    """
+    A logged-in load user: its node, stub and Subscribe stream.
+    """
+
+    def __init__(self, username, server, stub):
+        self.username = username
+        self.server = server
+        self.stub = stub
+        self.stream = None
+
+
+class Recorder:
+    """
+    Collects latencies, errors and push deliveries from every thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {name: [] for name in OPERATIONS}
+        self.errors = collections.Counter()
+        self.error_samples = collections.defaultdict(set)
+        self.pending = {}  # message content -> (time the send was due, whether it is measured)
+        self.pushes = []  # push delivery latencies in ms
+        self.measuring = False  # False during warm-up
+
+    def record(self, name, latency, error, measured):
+        """
+        Record one finished operation, unless it started during warm-up.
+
+        :param name: The operation name.
+        :param latency: Seconds from when the operation was due to its response.
+        :param error: The error message if the operation failed, else None.
+        :param measured: Whether the operation started after warm-up.
+        """
+        if not measured:
+            return
+        with self.lock:
+            if error is None:
+                self.latencies[name].append(latency * 1000.0)
+            else:
+                self.errors[name] += 1
+                if len(self.error_samples[name]) < MAX_ERROR_SAMPLES:
+                    self.error_samples[name].add(error)
+
+    def expect_push(self, content, due, measured):
+        """
+        Remember a message about to be sent so its push can be timed. The push
+        may arrive before the SendMessage response does.
+        """
+        with self.lock:
+            self.pending[content] = (due, measured)
+
+    def delivered(self, content, now):
+        """
+        Time the push of a message, if it was sent by this generator.
+        """
+        with self.lock:
+            entry = self.pending.pop(content, None)
+            if entry is not None and entry[1]:
+                self.pushes.append((now - entry[0]) * 1000.0)
+
+    def cancel_push(self, content):
+        """
+        Forget a message whose send failed.
+        """
+        with self.lock:
+            self.pending.pop(content, None)
+
+
+def ensure_logged_in(stub, username):
+    """
+    Create (if needed) and log in a load user.
+
+    :param stub: A ChatServiceStub.
+    :param username: The username to create and log in.
+    """
+    stub.CreateUser(chat_pb2.CreateUserRequest(
+        username=username, hashed_password="bench", display_name=username), timeout=20)
+    resp = stub.Login(chat_pb2.LoginRequest(username=username, hashed_password="bench"), timeout=20)
+    if resp.status != "success":
+        raise RuntimeError(f"Login failed for {username}: {resp.message}")
+
+
+def subscribe(user, recorder):
+    """
+    Open the user's Subscribe stream and time every push on a daemon thread.
+    """
+    user.stream = user.stub.Subscribe(chat_pb2.SubscribeRequest(username=user.username))
+
+    def consume():
+        try:
+            for incoming in user.stream:
+                recorder.delivered(incoming.content, time.perf_counter())
+        except grpc.RpcError:
+            pass  # cancelled at the end of the run, or the node went away
+
+    threading.Thread(target=consume, name=f"subscribe-{user.username}", daemon=True).start()
+
+
+def heartbeat(users, stop):
+    """
+    Keep every user's session alive until stop is set, at a third of the TTL
+    the nodes report.
+    """
+    interval = HEARTBEAT_INTERVAL
+    while not stop.wait(interval):
+        for user in users:
+            try:
+                resp = user.stub.Heartbeat(chat_pb2.HeartbeatRequest(username=user.username), timeout=5)
+                if resp.ttl_seconds > 0:
+                    interval = max(resp.ttl_seconds / 3.0, 1.0)
+            except grpc.RpcError:
+                pass  # counted by the operations that fail on the same node
+
+
+class Workload:
+    """
+    Picks and runs operations of the mix for random users.
+    """
+
+    def __init__(self, users, mix, pattern, read_limit, content_bytes, recorder, seed):
+        self.users = users
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.pattern = pattern
+        self.read_limit = read_limit
+        self.content_bytes = content_bytes
+        self.recorder = recorder
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.sequence = 0
+
+    def next_operation(self):
+        """
+        :return: (operation name, user, peer, message content) of the next operation.
+        """
+        with self.rng_lock:
+            name = self.rng.choices(self.names, self.weights)[0]
+            user, peer = self.rng.sample(self.users, 2) if len(self.users) > 1 else (self.users[0],) * 2
+            self.sequence += 1
+            content = f"load-{self.sequence} ".ljust(self.content_bytes, "x")
+        return name, user, peer, content
+
+    def run_one(self, due=None):
+        """
+        Run one operation and record its latency.
+
+        :param due: perf_counter time the operation was scheduled for (open
+                    loop); latency is measured from it. None for closed loop.
+        """
+        name, user, peer, content = self.next_operation()
+        start = time.perf_counter() if due is None else due
+        measured = self.recorder.measuring
+        error = None
+        try:
+            if name == "send":
+                self.recorder.expect_push(content, start, measured)
+                resp = user.stub.SendMessage(chat_pb2.SendMessageRequest(
+                    sender=user.username, receiver=peer.username, content=content), timeout=20)
+                if resp.status != "success":
+                    self.recorder.cancel_push(content)
+            elif name == "read":
+                resp = user.stub.ReadMessages(chat_pb2.ReadMessagesRequest(
+                    username=user.username, only_unread=True, limit=self.read_limit), timeout=20)
+            else:
+                resp = user.stub.ListUsers(chat_pb2.ListUsersRequest(
+                    username=user.username, pattern=self.pattern), timeout=20)
+            if resp.status != "success":
+                error = resp.message
+        except grpc.RpcError as e:
+            if name == "send":
+                self.recorder.cancel_push(content)
+            error = f"{e.code().name}: {e.details()}"
+        self.recorder.record(name, time.perf_counter() - start, error, measured)
+
+
+def run_closed_loop(workload, concurrency, deadline):
+    """
+    Run concurrency workers that each issue operations back to back until the deadline.
+    """
+    def worker():
+        while time.perf_counter() < deadline:
+            workload.run_one()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open_loop(workload, rate, concurrency, deadline, seed):
+    """
+    Submit operations at Poisson arrivals of the given rate until the deadline,
+    to at most concurrency threads, then wait for the backlog. Operations that
+    wait for a thread count the wait in their latency.
+
+    :return: The number of operations submitted after warm-up.
+    """
+    rng = random.Random(seed + 1)
+    submitted = 0
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        due = time.perf_counter()
+        while due < deadline:
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(workload.run_one, due)
+            submitted += workload.recorder.measuring
+            due += rng.expovariate(rate)
+    return submitted
+
+
+def run(servers, num_users, mix, duration, warmup, rate, concurrency, read_limit, content_bytes, drain, seed):
+    """
+    Set up the users, run the workload and wait for outstanding pushes.
+
+    :return: A dict with the settings, offered and achieved throughput, per-operation latency
+             summaries (ms), errors and push delivery latencies (ms).
+    """
+    suffix = uuid.uuid4().hex[:8]
+    channels = {server: grpc.insecure_channel(server) for server in servers}
+    stubs = {server: chat_pb2_grpc.ChatServiceStub(channel) for server, channel in channels.items()}
+    users = [LoadUser(f"load_{suffix}_{i}", servers[i % len(servers)], None) for i in range(num_users)]
+    for user in users:
+        user.stub = stubs[user.server]
+
+    recorder = Recorder()
+    stop = threading.Event()
+    setup_started = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=min(32, num_users)) as executor:
+        list(executor.map(lambda user: ensure_logged_in(user.stub, user.username), users))
+    for user in users:
+        subscribe(user, recorder)
+    time.sleep(0.5)  # let the streams register on their nodes
+    setup_seconds = time.perf_counter() - setup_started
+    threading.Thread(target=heartbeat, args=(users, stop), daemon=True).start()
+
+    workload = Workload(users, mix, f"load_{suffix}_*", read_limit, content_bytes, recorder, seed)
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+    warmed_up = threading.Timer(warmup, lambda: setattr(recorder, "measuring", True))
+    warmed_up.daemon = True
+    warmed_up.start()
+    submitted = None
+    if rate > 0:
+        submitted = run_open_loop(workload, rate, concurrency, deadline, seed)
+    else:
+        run_closed_loop(workload, concurrency, deadline)
+    elapsed = time.perf_counter() - measure_from  # longer than duration if an open loop fell behind
+
+    pushes_expected = len(recorder.latencies["send"])
+    drain_deadline = time.perf_counter() + drain
+    while time.perf_counter() < drain_deadline:
+        with recorder.lock:
+            if len(recorder.pushes) >= pushes_expected:
+                break
+        time.sleep(0.05)
+    recorder.measuring = False
+    stop.set()
+    for user in users:
+        user.stream.cancel()
+    for channel in channels.values():
+        channel.close()
+
+    operations = {}
+    for name in mix:
+        latencies = recorder.latencies[name]
+        operations[name] = {
+            "ops_per_sec": len(latencies) / elapsed,
+            "errors": recorder.errors[name],
+            "error_samples": sorted(recorder.error_samples[name]),
+            "latency_ms": bench_utils.summarize(latencies, PERCENTILES),
+        }
+    completed = sum(len(values) for values in recorder.latencies.values())
+    return {
+        "servers": servers,
+        "users": num_users,
+        "mix": mix,
+        "mode": "open" if rate > 0 else "closed",
+        "target_rate": rate,
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "offered_ops_per_sec": submitted / duration if submitted is not None else None,
+        "setup_s": setup_seconds,
+        "ops_per_sec": completed / elapsed,
+        "errors": sum(recorder.errors.values()),
+        "operations": operations,
+        "push": {
+            "expected": pushes_expected,
+            "delivered": len(recorder.pushes),
+            "latency_ms": bench_utils.summarize(recorder.pushes, PERCENTILES),
+        },
+    }
+
+
+def main():
+    """
+    Parse command-line arguments, run the load and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Chat workload generator for a running cluster")
+    parser.add_argument("--servers", default="127.0.0.1:50051",
+                        help="Comma-separated node addresses, as printed by start_cluster.py")
+    parser.add_argument("--users", type=int, default=50, help="Load users to create and keep subscribed")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, e.g. send=70,read=20,list=10")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="Operations per second (open loop); 0 runs closed loop")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="Closed loop: workers; open loop: most operations in flight")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to measure")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of load before measuring")
+    parser.add_argument("--read-limit", type=int, default=20, help="Messages per ReadMessages call")
+    parser.add_argument("--content-bytes", type=int, default=64, help="Length of each message sent")
+    parser.add_argument("--drain", type=float, default=10.0, help="Longest wait for outstanding pushes")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the operation and arrival draws")
+    args = parser.parse_args()
+
+    servers = [server.strip() for server in args.servers.split(",") if server.strip()]
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.users < 1 or args.concurrency < 1:
+        parser.error("--users and --concurrency must be at least 1.")
+
+    report = run(servers, args.users, mix, args.duration, args.warmup, args.rate, args.concurrency,
+                 args.read_limit, args.content_bytes, args.drain, args.seed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
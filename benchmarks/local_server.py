@@ -0,0 +1,194 @@
+"""
+local_server.py
+
+A single-node chat server run inside the benchmark process, for benchmarks
+that seed their own data instead of using a cluster from start_cluster.py.
+It is served the way ft_server_grpc.serve() serves a node, minus the
+signal handling. CountingProxy sits in front of it to count the bytes on
+the wire.
+"""
+
+import asyncio
+import datetime
+import random
+import socket
+import sqlite3
+import threading
+import time
+
+import bench_utils  # noqa: F401 (puts system_main on the path)
+import grpc
+from concurrent import futures
+
+from compression_policy import CompressionInterceptor
+from ft_server_grpc import FaultTolerantChatServicer, add_chat_services
+from metrics import MetricsInterceptor
+from raft_db import RaftDB, DBHelper
+from tracing import TracingInterceptor
+from wire_accounting import AccountingInterceptor
+
+# Seeded messages are random words, so they compress roughly like chat text
+WORDS = ("the", "meeting", "moved", "to", "tomorrow", "at", "noon", "please", "bring", "notes", "and",
+         "slides", "lunch", "is", "on", "me", "see", "you", "later", "thanks", "for", "help", "with",
+         "deploy", "review", "branch", "merged", "tests", "pass", "ok", "sounds", "good", "why", "not")
+
+
+def get_free_port():
+    """
+    Ask the OS for a free TCP port on localhost.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def seed_inbox(db_path, size, content_bytes, password="bench", senders=1):
+    """
+    Create the user "reader" and give it `size` messages, written straight into
+    the SQLite file. With one sender the messages come from "writer"; with more
+    they come from "writer00", "writer01", ... in turn.
+
+    :param db_path: The SQLite file the server will open.
+    :param size: Number of messages in the reader's inbox.
+    :param content_bytes: Length of each message's content.
+    :param password: The stored password hash (clients send it as-is to log in).
+    :param senders: Number of distinct senders.
+    """
+    helper = DBHelper(db_path)  # creates the schema
+    helper.close()
+    now = datetime.datetime.now()
+    timestamp = now.isoformat()
+    created_ms = int(now.timestamp() * 1000)
+    rng = random.Random(size)
+    writers = ["writer"] if senders == 1 else [f"writer{i:02d}" for i in range(senders)]
+
+    def content(i):
+        text = f"{i:08d}"
+        while len(text) < content_bytes:
+            text += " " + rng.choice(WORDS)
+        return text[:content_bytes]
+
+    with sqlite3.connect(db_path) as conn:
+        # reader gets id 1, the writers ids 2, 3, ...
+        for name in ["reader"] + writers:
+            conn.execute("INSERT INTO users (username, password_hash, display_name) VALUES (?, ?, ?)",
+                         (name, password, name))
+        conn.executemany(
+            "INSERT INTO messages (sender_id, receiver_id, content, timestamp, read_status, created_ms) "
+            "VALUES (?, 1, ?, ?, 0, ?)",
+            ((2 + i % senders, content(i), timestamp, created_ms) for i in range(size)))
+
+
+class LocalServer:
+    """
+    A single-node RaftDB served by grpc.aio on a background thread.
+    """
+
+    def __init__(self, db_path, compression_policy=None, max_workers=8, usage_log=None, metrics=None,
+                 tracer=None):
+        """
+        Start the node and wait until it leads and serves.
+
+        :param db_path: The node's SQLite file.
+        :param compression_policy: Optional CompressionPolicy for the servicer.
+        :param max_workers: Threads running the synchronous handlers.
+        :param usage_log: Optional UsageLog recording every call, as a deployed node does.
+        :param metrics: Optional MetricsRegistry recording call and Raft latencies, as a deployed node does.
+        :param tracer: Optional Tracer tracing calls through Raft and SQLite, as a deployed node does.
+        """
+        self.raft_db = RaftDB(f"127.0.0.1:{get_free_port()}", [], db_path, metrics=metrics, tracer=tracer)
+        while self.raft_db.getStatus()["state"] != 2:
+            time.sleep(0.1)
+        self.servicer = FaultTolerantChatServicer(self.raft_db, compression_policy=compression_policy, tracer=tracer)
+        self.port = get_free_port()
+        ready = threading.Event()
+
+        async def serve():
+            self.loop = asyncio.get_running_loop()
+            self.servicer.hub.bind(self.loop)
+            self.servicer.executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+            interceptors = [CompressionInterceptor(self.servicer.compression)]
+            if usage_log is not None:
+                interceptors.insert(0, AccountingInterceptor(usage_log))
+            if metrics is not None:
+                interceptors.insert(0, MetricsInterceptor(metrics))
+            if tracer is not None:
+                interceptors.insert(0, TracingInterceptor(tracer))
+            self.server = grpc.aio.server(
+                migration_thread_pool=self.servicer.executor,
+                compression=self.servicer.compression.grpc_algorithm,
+                interceptors=interceptors,
+            )
+            add_chat_services(self.servicer, self.server)
+            self.server.add_insecure_port(f"127.0.0.1:{self.port}")
+            await self.server.start()
+            ready.set()
+            await self.server.wait_for_termination()
+
+        self.thread = threading.Thread(target=lambda: asyncio.run(serve()), daemon=True)
+        self.thread.start()
+        ready.wait(10)
+
+    @property
+    def address(self):
+        return f"127.0.0.1:{self.port}"
+
+    def stop(self):
+        """
+        Stop the gRPC server and the Raft node.
+        """
+        asyncio.run_coroutine_threadsafe(self.server.stop(0), self.loop).result(5)
+        self.thread.join(5)
+        self.raft_db.destroy()
+        self.raft_db.close()
+
+
+class CountingProxy:
+    """
+    A TCP forwarder on its own event loop that counts the bytes it relays.
+    """
+
+    def __init__(self, target_port):
+        self.target_port = target_port
+        self.port = get_free_port()
+        self.bytes = 0
+        ready = threading.Event()
+
+        async def pipe(reader, writer):
+            try:
+                while True:
+                    data = await reader.read(65536)
+                    if not data:
+                        break
+                    self.bytes += len(data)
+                    writer.write(data)
+                    await writer.drain()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+            finally:
+                writer.close()
+
+        async def handle(client_reader, client_writer):
+            try:
+                server_reader, server_writer = await asyncio.open_connection("127.0.0.1", self.target_port)
+                await asyncio.gather(pipe(client_reader, server_writer), pipe(server_reader, client_writer))
+            except asyncio.CancelledError:
+                client_writer.close()  # proxy shutting down
+
+        async def run():
+            self.loop = asyncio.get_running_loop()
+            self.stopped = asyncio.Event()
+            server = await asyncio.start_server(handle, "127.0.0.1", self.port)
+            ready.set()
+            async with server:
+                await self.stopped.wait()
+
+        self.thread = threading.Thread(target=lambda: asyncio.run(run()), daemon=True)
+        self.thread.start()
+        ready.wait(5)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.stopped.set)
+        self.thread.join(5)
@@ -0,0 +1,150 @@
+"""
+metrics_overhead.py
+
+Measures what recording metrics costs, without a network in the way:
+
+- observe: Histogram.observe from 1 and from N threads at once, next to a
+  histogram that guards its counts with a lock (the usual thread-safe
+  alternative to per-thread shards).
+- handler: a no-op unary handler called directly and through the
+  MetricsInterceptor wrapper (latency histogram, in-flight gauge and the
+  error check), so the difference is the per-call cost of the interceptor.
+- scrape: the time to render the registry once it holds every method's series.
+
+Example:
+
+    python benchmarks/metrics_overhead.py --ops 200000 --threads 8
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import threading
+import time
+
+import bench_utils  # noqa: F401 (puts system_main on the path)
+import grpc
+
+import chat_pb2
+from metrics import MetricsRegistry, MetricsInterceptor, LATENCY_BUCKETS
+
+
+class LockedHistogram:
+    """
+    A histogram whose counts are shared by all threads and guarded by one lock.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.sum += value
+
+
+def ns_per_op(record, num_ops, num_threads):
+    """
+    Run record(value) num_ops times on each of num_threads threads at once.
+
+    :return: Wall-clock nanoseconds per recorded value, across all threads.
+    """
+    start_gate = threading.Barrier(num_threads + 1)
+
+    def work():
+        start_gate.wait()
+        for i in range(num_ops):
+            record(0.0005 * (i % 7))
+
+    threads = [threading.Thread(target=work) for _ in range(num_threads)]
+    for t in threads:
+        t.start()
+    start_gate.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    return (time.perf_counter() - started) * 1e9 / (num_ops * num_threads)
+
+
+def measure_handler(num_ops):
+    """
+    :return: Nanoseconds per call of a no-op unary handler, bare and wrapped by MetricsInterceptor.
+    """
+    response = chat_pb2.HeartbeatResponse(status="success")
+
+    def heartbeat(request, context):
+        return response
+
+    async def wrap():
+        async def continuation(details):
+            return grpc.unary_unary_rpc_method_handler(heartbeat)
+        details = grpc.HandlerCallDetails()
+        details.method = "/chat.ChatService/Heartbeat"
+        return await MetricsInterceptor(MetricsRegistry()).intercept_service(continuation, details)
+
+    wrapped = asyncio.run(wrap()).unary_unary
+    results = {}
+    for name, call in (("bare", heartbeat), ("interceptor", wrapped)):
+        started = time.perf_counter()
+        for _ in range(num_ops):
+            call(None, None)
+        results[f"{name}_ns_per_call"] = (time.perf_counter() - started) * 1e9 / num_ops
+    results["overhead_ns_per_call"] = results["interceptor_ns_per_call"] - results["bare_ns_per_call"]
+    return results
+
+
+def measure_scrape(num_methods, repeats=20):
+    """
+    :return: Milliseconds to render a registry with num_methods methods recorded.
+    """
+    registry = MetricsRegistry()
+    interceptor = MetricsInterceptor(registry)
+    for i in range(num_methods):
+        interceptor.duration.labels("chat.ChatService", f"Method{i}").observe(0.001)
+        interceptor.in_flight.labels("chat.ChatService", f"Method{i}").inc()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        text = registry.render()
+    return {"methods": num_methods, "bytes": len(text), "ms": (time.perf_counter() - started) * 1000 / repeats}
+
+
+def run(num_ops, num_threads):
+    """
+    :return: A dict with the settings and the results of every part.
+    """
+    registry = MetricsRegistry()
+    sharded = registry.histogram("bench_seconds", "Benchmark.").labels()
+    locked = LockedHistogram(LATENCY_BUCKETS)
+    observe = []
+    for threads in sorted({1, num_threads}):
+        observe.append({
+            "threads": threads,
+            "sharded_ns_per_op": ns_per_op(sharded.observe, num_ops // threads, threads),
+            "locked_ns_per_op": ns_per_op(locked.observe, num_ops // threads, threads),
+        })
+    return {
+        "ops": num_ops,
+        "observe": observe,
+        "handler": measure_handler(num_ops),
+        "scrape": measure_scrape(32),
+    }
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Per-call cost of recording metrics")
+    parser.add_argument("--ops", type=int, default=200000, help="Observations (and handler calls) per measurement")
+    parser.add_argument("--threads", type=int, default=8, help="Threads recording at once in the contended run")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.ops, args.threads), indent=2))
+
+
+if __name__ == "__main__":
+    main()
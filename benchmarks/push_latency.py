@@ -0,0 +1,130 @@
+"""
+push_latency.py
+
+Measures end-to-end push latency across nodes of a running cluster. A sender
+logs in on one node and sends messages; the receiver is subscribed on a
+different node, so every push has to travel through Raft replication and the
+receiving node's apply before it is streamed out.
+
+Example (after `python start_cluster.py --servers 3`):
+
+    python benchmarks/push_latency.py --send-server 127.0.0.1:50051 \\
+        --subscribe-server 127.0.0.1:50052 --messages 200
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+
+import bench_utils
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+
+
+def ensure_logged_in(stub, username):
+    """
+    Create (if needed) and log in a benchmark user.
+
+    :param stub: A ChatServiceStub.
+    :param username: The username to create and log in.
+    """
+    stub.CreateUser(chat_pb2.CreateUserRequest(
+        username=username, hashed_password="bench", display_name=username), timeout=20)
+    resp = stub.Login(chat_pb2.LoginRequest(username=username, hashed_password="bench"), timeout=20)
+    if resp.status != "success":
+        raise RuntimeError(f"Login failed for {username}: {resp.message}")
+
+
+def run(send_server, subscribe_server, num_messages, interval):
+    """
+    Send num_messages messages through send_server and time their arrival on
+    a Subscribe stream held on subscribe_server.
+
+    :return: A dict with client-measured and server-stamped latency summaries (ms).
+    """
+    suffix = uuid.uuid4().hex[:8]
+    sender = f"bench_sender_{suffix}"
+    receiver = f"bench_receiver_{suffix}"
+
+    send_channel = grpc.insecure_channel(send_server)
+    sub_channel = grpc.insecure_channel(subscribe_server)
+    send_stub = chat_pb2_grpc.ChatServiceStub(send_channel)
+    sub_stub = chat_pb2_grpc.ChatServiceStub(sub_channel)
+
+    ensure_logged_in(send_stub, sender)
+    ensure_logged_in(sub_stub, receiver)
+
+    send_times = {}
+    client_latencies = []
+    server_latencies = []
+    done = threading.Event()
+
+    stream = sub_stub.Subscribe(chat_pb2.SubscribeRequest(username=receiver))
+
+    def consume():
+        """Record the arrival time of every pushed message."""
+        try:
+            for incoming in stream:
+                now = time.time()
+                sent = send_times.get(incoming.content)
+                if sent is not None:
+                    client_latencies.append((now - sent) * 1000.0)
+                if incoming.sent_at_ms:
+                    server_latencies.append(now * 1000.0 - incoming.sent_at_ms)
+                if len(client_latencies) >= num_messages:
+                    break
+        except grpc.RpcError:
+            pass
+        finally:
+            done.set()
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    time.sleep(0.5)  # let the stream register on the subscribe node
+
+    for i in range(num_messages):
+        content = f"bench-{i}"
+        send_times[content] = time.time()
+        resp = send_stub.SendMessage(chat_pb2.SendMessageRequest(
+            sender=sender, receiver=receiver, content=content), timeout=20)
+        if resp.status != "success":
+            raise RuntimeError(f"SendMessage failed: {resp.message}")
+        if interval > 0:
+            time.sleep(interval)
+
+    done.wait(timeout=30)
+    stream.cancel()
+    send_channel.close()
+    sub_channel.close()
+
+    return {
+        "send_server": send_server,
+        "subscribe_server": subscribe_server,
+        "sent": num_messages,
+        "delivered": len(client_latencies),
+        "client_latency_ms": bench_utils.summarize(client_latencies),
+        "server_stamped_latency_ms": bench_utils.summarize(server_latencies),
+    }
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Cross-node push latency benchmark")
+    parser.add_argument("--send-server", default="127.0.0.1:50051", help="Node that accepts SendMessage")
+    parser.add_argument("--subscribe-server", default="127.0.0.1:50052", help="Node holding the Subscribe stream")
+    parser.add_argument("--messages", type=int, default=100, help="Number of messages to send")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between sends")
+    args = parser.parse_args()
+
+    report = run(args.send_server, args.subscribe_server, args.messages, args.interval)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
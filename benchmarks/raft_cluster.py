@@ -0,0 +1,221 @@
+"""
+raft_cluster.py
+
+Measures replicated-write throughput and latency of an in-process RaftDB
+cluster across pysyncobj settings. For every combination of
+--append-periods (appendEntriesPeriod), --tick-periods (autoTickPeriod) and
+--batching (appendEntriesUseBatch), N nodes are started on loopback ports in
+this process, and the benchmark waits until they agree on a leader that is
+connected to every follower. Then, for each batch size, --writes
+create_message commands are submitted in batches: a batch is submitted
+without waiting, and the next batch starts once every command of the current
+one has been applied on the submitting node.
+
+Each row of the result is one (settings, batch size) pair with the write
+throughput and the per-command latency from submit to result. All nodes share
+this process and its GIL, so absolute numbers are lower than on separate
+machines; the differences between settings are what the sweep is for.
+
+Example:
+
+    python benchmarks/raft_cluster.py --nodes 3 --batch-sizes 1,10,100 \\
+        --append-periods 0.05,0.01 --tick-periods 0.05,0.005 --batching on,off --table
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import bench_utils
+from local_server import get_free_port
+from pysyncobj import FAIL_REASON
+from raft_db import RaftDB, raft_conf
+
+TABLE_COLUMNS = (("append_period", "append", "{:g}"), ("tick_period", "tick", "{:g}"), ("batching", "batch", "{}"),
+                 ("batch_size", "size", "{}"), ("ops_per_sec", "ops/s", "{:.0f}"), ("p50_ms", "p50 ms", "{:.1f}"),
+                 ("p99_ms", "p99 ms", "{:.1f}"), ("failures", "fail", "{}"), ("ready_s", "ready s", "{:.2f}"))
+
+
+class RaftCluster:
+    """
+    N RaftDB nodes on loopback ports, each with its own SQLite file.
+    """
+
+    def __init__(self, size, directory, **conf_overrides):
+        """
+        :param size: Number of nodes.
+        :param directory: Where the nodes' database files are created.
+        :param conf_overrides: SyncObjConf options passed to raft_conf() for every node.
+        """
+        addresses = [f"127.0.0.1:{get_free_port()}" for _ in range(size)]
+        self.nodes = [RaftDB(address, [other for other in addresses if other != address],
+                             os.path.join(directory, f"node{i}.db"), conf=raft_conf(**conf_overrides))
+                      for i, address in enumerate(addresses)]
+
+    def wait_ready(self, timeout=60.0, poll=0.01):
+        """
+        Wait until one node leads, every node names it as leader and has
+        caught up with the log, and the leader is connected to every follower.
+
+        :return: Seconds waited.
+        :raises TimeoutError: If the cluster is not ready within timeout.
+        """
+        started = time.perf_counter()
+        while time.perf_counter() - started < timeout:
+            statuses = [node.getStatus() for node in self.nodes]
+            leaders = [status for status in statuses if status["state"] == 2]
+            if len(leaders) == 1 and all(node.isReady() for node in self.nodes):
+                leader = leaders[0]
+                agreed = all(status["leader"] == leader["self"] for status in statuses)
+                connected = all(value == 2 for key, value in leader.items()
+                                if key.startswith("partner_node_status_server_"))
+                if agreed and connected:
+                    return time.perf_counter() - started
+            time.sleep(poll)
+        raise TimeoutError(f"Cluster of {len(self.nodes)} nodes not ready after {timeout:g}s")
+
+    def leader(self):
+        """
+        :return: The node that currently leads.
+        """
+        return next(node for node in self.nodes if node.getStatus()["state"] == 2)
+
+    def follower(self):
+        """
+        :return: A node that does not lead (the leader for a one-node cluster).
+        """
+        return next((node for node in self.nodes if node.getStatus()["state"] != 2), self.leader())
+
+    def stop(self):
+        """
+        Stop every node and close its database.
+        """
+        for node in self.nodes:
+            # destroy() alone only flags the tick thread, which may still apply a
+            # command; wait for it so the database is not reopened after close()
+            node.destroy_synchronous()
+            node.close()
+
+
+def measure_writes(node, batch_size, num_writes, timeout=60.0):
+    """
+    Submit num_writes create_message commands to node in batches of batch_size.
+
+    :return: (seconds taken, per-command latencies in ms, failed commands).
+    """
+    latencies = []
+    failures = 0
+    lock = threading.Lock()
+    started = time.perf_counter()
+    for first in range(0, num_writes, batch_size):
+        count = min(batch_size, num_writes - first)
+        remaining = [count]
+        done = threading.Event()
+
+        def on_result(result, error, submitted):
+            nonlocal failures
+            with lock:
+                if error == FAIL_REASON.SUCCESS and result:
+                    latencies.append((time.perf_counter() - submitted) * 1000.0)
+                else:
+                    failures += 1
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+
+        for i in range(first, first + count):
+            submitted = time.perf_counter()
+            node.create_message("bench_sender", "bench_receiver", f"write {i}", int(time.time() * 1000),
+                                callback=lambda result, error, submitted=submitted: on_result(result, error, submitted))
+        if not done.wait(timeout):
+            raise TimeoutError(f"Batch of {count} writes not applied after {timeout:g}s")
+    return time.perf_counter() - started, latencies, failures
+
+
+def run_settings(num_nodes, append_period, tick_period, batching, batch_sizes, num_writes, submit_to):
+    """
+    Start a cluster with one combination of settings and measure every batch size on it.
+
+    :return: A list of result rows, one per batch size.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="bench_raft_")
+    cluster = RaftCluster(num_nodes, temp_dir, appendEntriesPeriod=append_period, autoTickPeriod=tick_period,
+                          appendEntriesUseBatch=batching)
+    rows = []
+    try:
+        ready_seconds = cluster.wait_ready()
+        node = cluster.leader() if submit_to == "leader" else cluster.follower()
+        for username in ("bench_sender", "bench_receiver"):
+            node.create_user(username, "bench", username, sync=True, timeout=30)
+        measure_writes(node, 10, 20)  # warm up the connections
+        for batch_size in batch_sizes:
+            seconds, latencies, failures = measure_writes(node, batch_size, num_writes)
+            summary = bench_utils.summarize(latencies)
+            rows.append({
+                "nodes": num_nodes, "append_period": append_period, "tick_period": tick_period,
+                "batching": "on" if batching else "off", "batch_size": batch_size, "writes": num_writes,
+                "ops_per_sec": len(latencies) / seconds, "mean_ms": summary["mean"], "p50_ms": summary["p50"],
+                "p99_ms": summary["p99"], "max_ms": summary["max"], "failures": failures, "ready_s": ready_seconds,
+            })
+    finally:
+        cluster.stop()
+        shutil.rmtree(temp_dir)
+    return rows
+
+
+def format_table(rows):
+    """
+    :return: The rows as an aligned text table.
+    """
+    cells = [[label for _, label, _ in TABLE_COLUMNS]]
+    cells += [[fmt.format(row[key]) for key, _, fmt in TABLE_COLUMNS] for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(TABLE_COLUMNS))]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in cells)
+
+
+def parse_list(text, convert):
+    return [convert(item.strip()) for item in text.split(",") if item.strip()]
+
+
+def main():
+    """
+    Parse command-line arguments, run the sweep and print the results as
+    JSON, or as a table with --table.
+    """
+    parser = argparse.ArgumentParser(description="Replicated-write sweep over an in-process RaftDB cluster")
+    parser.add_argument("--nodes", type=int, default=3, help="Nodes in the cluster")
+    parser.add_argument("--batch-sizes", default="1,10,100", help="Comma-separated commands submitted per batch")
+    parser.add_argument("--writes", type=int, default=500, help="Writes measured per batch size")
+    parser.add_argument("--append-periods", default="0.05", help="Comma-separated appendEntriesPeriod values (s)")
+    parser.add_argument("--tick-periods", default="0.05", help="Comma-separated autoTickPeriod values (s)")
+    parser.add_argument("--batching", default="on", help="Comma-separated appendEntriesUseBatch values: on, off")
+    parser.add_argument("--submit-to", choices=("leader", "follower"), default="leader",
+                        help="Node the writes are submitted to (a follower forwards them)")
+    parser.add_argument("--table", action="store_true", help="Print a text table instead of JSON")
+    args = parser.parse_args()
+
+    batching = parse_list(args.batching, str.lower)
+    if set(batching) - {"on", "off"}:
+        parser.error("--batching takes on and/or off.")
+    batch_sizes = parse_list(args.batch_sizes, int)
+    if args.nodes < 1 or args.writes < 1 or min(batch_sizes) < 1:
+        parser.error("--nodes, --writes and every batch size must be at least 1.")
+
+    rows = []
+    for append_period, tick_period, batch in itertools.product(parse_list(args.append_periods, float),
+                                                               parse_list(args.tick_periods, float), batching):
+        rows.extend(run_settings(args.nodes, append_period, tick_period, batch == "on", batch_sizes, args.writes,
+                                 args.submit_to))
+    if args.table:
+        print(format_table(rows))
+    else:
+        print(json.dumps({"nodes": args.nodes, "submit_to": args.submit_to, "rows": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
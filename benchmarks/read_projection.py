@@ -0,0 +1,108 @@
+"""
+read_projection.py
+
+Measures how much of a ReadMessages response the v2 read options save. An
+inbox with a few distinct senders is seeded into an in-process single-node
+server and read back with compression off, once per mode:
+
+- v1:           the v1 ReadMessagesResponse
+- v2:           the v2 response with every field
+- v2_senders:   sender_table on (sender names sent once, messages carry an index)
+- v2_headers:   sender_table on and read_mask "id,sender_username,sent_at_ms"
+
+For every mode the report gives the serialized response bytes, the bytes
+per message and the size relative to v1.
+
+Example:
+
+    python benchmarks/read_projection.py --messages 1000 --senders 5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import bench_utils  # noqa: F401 (puts system_main on the path)
+import grpc
+from google.protobuf import field_mask_pb2
+
+import chat_pb2
+import chat_pb2_grpc
+import chat_v2_pb2
+import chat_v2_pb2_grpc
+from compression_policy import CompressionPolicy
+from local_server import LocalServer, seed_inbox
+
+HEADER_FIELDS = ["id", "sender_username", "sent_at_ms"]
+
+
+def read_modes(channel):
+    """
+    :return: A dict mapping mode names to calls returning a ReadMessages response.
+    """
+    v1 = chat_pb2_grpc.ChatServiceStub(channel)
+    v2 = chat_v2_pb2_grpc.ChatServiceStub(channel)
+
+    def read_v2(**options):
+        return v2.ReadMessages(chat_v2_pb2.ReadMessagesRequest(username="reader", **options), timeout=60)
+
+    return {
+        "v1": lambda: v1.ReadMessages(chat_pb2.ReadMessagesRequest(username="reader"), timeout=60),
+        "v2": lambda: read_v2(),
+        "v2_senders": lambda: read_v2(sender_table=True),
+        "v2_headers": lambda: read_v2(sender_table=True, read_mask=field_mask_pb2.FieldMask(paths=HEADER_FIELDS)),
+    }
+
+
+def run(num_messages, num_senders, content_bytes):
+    """
+    Seed one inbox and read it back in every mode.
+
+    :return: A dict with the settings and one result per mode.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="bench_read_projection_")
+    cwd = os.getcwd()
+    os.chdir(temp_dir)  # keep the data-usage log out of the repository
+    try:
+        db_path = os.path.join(temp_dir, "node.db")
+        seed_inbox(db_path, num_messages, content_bytes, senders=num_senders)
+        server = LocalServer(db_path, compression_policy=CompressionPolicy("none"))
+        channel = grpc.insecure_channel(server.address)
+        chat_pb2_grpc.ChatServiceStub(channel).Login(
+            chat_pb2.LoginRequest(username="reader", hashed_password="bench"), timeout=20)
+
+        results = {}
+        for mode, read in read_modes(channel).items():
+            response = read()
+            if len(response.messages) != num_messages:
+                raise RuntimeError(f"{mode}: read {len(response.messages)} of {num_messages} messages")
+            size = response.ByteSize()
+            results[mode] = {"response_bytes": size, "bytes_per_message": size / num_messages}
+        for result in results.values():
+            result["vs_v1"] = result["response_bytes"] / results["v1"]["response_bytes"]
+
+        channel.close()
+        server.stop()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(temp_dir)
+    return {"messages": num_messages, "senders": num_senders, "content_bytes": content_bytes, "results": results}
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="ReadMessages response size per read mode")
+    parser.add_argument("--messages", type=int, default=1000, help="Messages in the inbox")
+    parser.add_argument("--senders", type=int, default=5, help="Distinct senders of the messages")
+    parser.add_argument("--content-bytes", type=int, default=64, help="Length of each message")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.messages, args.senders, args.content_bytes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
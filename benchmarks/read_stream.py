@@ -0,0 +1,135 @@
+"""
+read_stream.py
+
+Compares the unary ReadMessages call with ReadMessagesStream for inboxes of
+growing size. Each inbox is seeded straight into the SQLite file of an
+in-process single-node server, then read back both ways. For every size the
+report shows the time until the first message arrives, the total time, the
+largest single response on the wire and the peak Python allocation during
+the call (server and client share the process).
+
+Example:
+
+    python benchmarks/read_stream.py --sizes 1000,10000,100000 --chunk-size 100
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import bench_utils  # noqa: F401 (puts system_main on the path)
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+from local_server import LocalServer, seed_inbox
+
+
+def read_unary(stub):
+    """
+    :return: (seconds to first message, total seconds, messages, largest response bytes)
+    """
+    start = time.perf_counter()
+    resp = stub.ReadMessages(chat_pb2.ReadMessagesRequest(username="reader"), timeout=600)
+    elapsed = time.perf_counter() - start
+    if resp.status == "error":
+        raise RuntimeError(resp.message)
+    return elapsed, elapsed, len(resp.messages), resp.ByteSize()
+
+
+def read_stream(stub, chunk_size):
+    """
+    :return: (seconds to first message, total seconds, messages, largest response bytes)
+    """
+    start = time.perf_counter()
+    first = None
+    count = 0
+    largest = 0
+    for chunk in stub.ReadMessagesStream(chat_pb2.ReadMessagesRequest(
+            username="reader", chunk_size=chunk_size), timeout=600):
+        if chunk.status == "error":
+            raise RuntimeError(chunk.message)
+        if first is None and chunk.messages:
+            first = time.perf_counter() - start
+        count += len(chunk.messages)
+        largest = max(largest, chunk.ByteSize())
+    return first, time.perf_counter() - start, count, largest
+
+
+def measure(read):
+    """
+    Run a read once for timing, and once more under tracemalloc for the allocation peak.
+
+    :return: The result dict of one mode.
+    """
+    try:
+        first, total, count, largest = read()
+        tracemalloc.start()
+        read()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    except (grpc.RpcError, RuntimeError) as e:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        details = e.details() if isinstance(e, grpc.RpcError) else str(e)
+        return {"error": details}
+    return {
+        "first_message_ms": first * 1000.0 if first is not None else None,
+        "total_ms": total * 1000.0,
+        "messages": count,
+        "largest_response_bytes": largest,
+        "peak_alloc_kb": peak / 1024.0,
+    }
+
+
+def run(sizes, chunk_size, content_bytes):
+    """
+    Seed and read one inbox per size.
+
+    :return: A dict with the settings and one result per size.
+    """
+    results = []
+    for size in sizes:
+        temp_dir = tempfile.mkdtemp(prefix="bench_read_stream_")
+        cwd = os.getcwd()
+        os.chdir(temp_dir)  # keep the data-usage log out of the repository
+        try:
+            db_path = os.path.join(temp_dir, "node.db")
+            seed_inbox(db_path, size, content_bytes)
+            server = LocalServer(db_path)
+            channel = grpc.insecure_channel(server.address)
+            stub = chat_pb2_grpc.ChatServiceStub(channel)
+            stub.Login(chat_pb2.LoginRequest(username="reader", hashed_password="bench"), timeout=20)
+            results.append({
+                "inbox": size,
+                "unary": measure(lambda: read_unary(stub)),
+                "stream": measure(lambda: read_stream(stub, chunk_size)),
+            })
+            channel.close()
+            server.stop()
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(temp_dir)
+    return {"chunk_size": chunk_size, "content_bytes": content_bytes, "results": results}
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Unary ReadMessages vs ReadMessagesStream")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated inbox sizes")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Messages per stream chunk")
+    parser.add_argument("--content-bytes", type=int, default=64, help="Length of each message")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    print(json.dumps(run(sizes, args.chunk_size, args.content_bytes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
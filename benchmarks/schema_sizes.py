@@ -0,0 +1,164 @@
+"""
+schema_sizes.py
+
+Compares the bytes per RPC of the v1 (chat.proto) and v2 (chat_v2.proto)
+wire schemas. The same scripted session runs once through each schema's
+stub against an in-process single-node server with compression off, so
+the numbers reflect the encoding alone. The session is: create two users,
+log in, list users, send messages, heartbeat, read the inbox, receive
+pushes, delete messages and log out.
+
+For every method the report gives the serialized request and response
+bytes per call, and for each schema the total bytes on the wire, measured
+by a counting proxy.
+
+Example:
+
+    python benchmarks/schema_sizes.py --messages 20
+"""
+
+import argparse
+import collections
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import bench_utils  # noqa: F401 (puts system_main on the path)
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+import chat_v2_pb2
+import chat_v2_pb2_grpc
+from compression_policy import CompressionPolicy
+from local_server import CountingProxy, LocalServer
+
+SCHEMAS = {
+    "v1": (chat_pb2, chat_pb2_grpc),
+    "v2": (chat_v2_pb2, chat_v2_pb2_grpc),
+}
+
+
+class Recorder:
+    """
+    Calls RPCs on a stub and adds up the serialized size of every request and response.
+    """
+
+    def __init__(self, stub):
+        self.stub = stub
+        self.sizes = collections.defaultdict(lambda: {"calls": 0, "request_bytes": 0, "response_bytes": 0})
+
+    def call(self, method, request):
+        response = getattr(self.stub, method)(request, timeout=20)
+        entry = self.sizes[method]
+        entry["calls"] += 1
+        entry["request_bytes"] += request.ByteSize()
+        entry["response_bytes"] += response.ByteSize()
+        return response
+
+    def stream(self, method, request, count=None):
+        """
+        Collect `count` messages (or all of them) from a server-streaming call.
+        """
+        entry = self.sizes[method]
+        entry["calls"] += 1
+        entry["request_bytes"] += request.ByteSize()
+        call = getattr(self.stub, method)(request, timeout=20)
+        received = []
+        for response in call:
+            entry["response_bytes"] += response.ByteSize()
+            received.append(response)
+            if count is not None and len(received) == count:
+                call.cancel()
+                break
+        return received
+
+
+def run_session(pb2, stub, prefix, num_messages):
+    """
+    Run the scripted session through one schema.
+
+    :return: The Recorder with the per-method sizes.
+    """
+    rec = Recorder(stub)
+    alice, bob = f"{prefix}_alice", f"{prefix}_bob"
+    for name in (alice, bob):
+        rec.call("CreateUser", pb2.CreateUserRequest(username=name, hashed_password="0" * 64, display_name=name))
+    rec.call("Login", pb2.LoginRequest(username=alice, hashed_password="0" * 64))
+    login = rec.call("Login", pb2.LoginRequest(username=bob, hashed_password="0" * 64))
+    rec.call("ListUsers", pb2.ListUsersRequest(username=alice, pattern=f"{prefix}_*"))
+
+    subscribe = pb2.SubscribeRequest(username=bob, resume_from=login.push_seq)
+    pushes = stub.Subscribe(subscribe)
+    for i in range(num_messages):
+        rec.call("SendMessage", pb2.SendMessageRequest(sender=alice, receiver=bob, content=f"message number {i}"))
+        rec.call("Heartbeat", pb2.HeartbeatRequest(username=alice))
+    for push in pushes:
+        rec.sizes["Subscribe"]["response_bytes"] += push.ByteSize()
+        if push.seq >= login.push_seq + num_messages:
+            break
+    pushes.cancel()
+    rec.sizes["Subscribe"]["calls"] += 1
+    rec.sizes["Subscribe"]["request_bytes"] += subscribe.ByteSize()
+
+    read = rec.call("ReadMessages", pb2.ReadMessagesRequest(username=bob))
+    rec.stream("ReadMessagesStream", pb2.ReadMessagesRequest(username=bob, chunk_size=10))
+    rec.call("DeleteMessages", pb2.DeleteMessagesRequest(username=bob, message_ids=[m.id for m in read.messages]))
+    for name in (alice, bob):
+        rec.call("Logout", pb2.LogoutRequest(username=name))
+    return rec
+
+
+def run(num_messages):
+    """
+    Run the session through both schemas.
+
+    :return: A dict with the per-method sizes and the wire totals of each schema.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="bench_schema_")
+    cwd = os.getcwd()
+    os.chdir(temp_dir)  # keep the data-usage log out of the repository
+    try:
+        server = LocalServer(os.path.join(temp_dir, "node.db"), compression_policy=CompressionPolicy("none"))
+        proxy = CountingProxy(server.port)
+        results = {"messages": num_messages, "methods": {}, "totals": {}}
+        for version, (pb2, pb2_grpc) in SCHEMAS.items():
+            channel = grpc.insecure_channel(f"127.0.0.1:{proxy.port}")
+            grpc.channel_ready_future(channel).result(10)
+            wire_before = proxy.bytes
+            rec = run_session(pb2, pb2_grpc.ChatServiceStub(channel), f"schema_{version}", num_messages)
+            channel.close()
+            time.sleep(0.2)  # let the proxy count the last frames
+            for method, entry in rec.sizes.items():
+                per_call = {
+                    "request_bytes": entry["request_bytes"] / entry["calls"],
+                    "response_bytes": entry["response_bytes"] / entry["calls"],
+                }
+                results["methods"].setdefault(method, {})[version] = per_call
+            results["totals"][version] = {
+                "serialized_bytes": sum(e["request_bytes"] + e["response_bytes"] for e in rec.sizes.values()),
+                "wire_bytes": proxy.bytes - wire_before,
+            }
+        proxy.stop()
+        server.stop()
+        return results
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(temp_dir)
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Bytes per RPC of the v1 and v2 wire schemas")
+    parser.add_argument("--messages", type=int, default=20, help="Messages sent in the scripted session")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.messages), indent=2))
+
+
+if __name__ == "__main__":
+    main()
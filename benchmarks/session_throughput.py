@@ -0,0 +1,172 @@
+"""
+session_throughput.py
+
+Compares operation throughput of the unary ChatService API with the
+bidirectional Session stream on a running server. The same operation is run
+four ways:
+
+- unary:            one unary call at a time
+- unary_threads:    unary calls from --concurrency threads sharing a channel
+- session:          one operation at a time over a Session stream
+- session_pipelined: up to --window operations in flight on one Session stream
+
+Example (after `python start_cluster.py --servers 3`):
+
+    python benchmarks/session_throughput.py --server 127.0.0.1:50051 --op heartbeat --ops 5000
+"""
+
+import argparse
+import collections
+import json
+import threading
+import time
+import uuid
+
+import bench_utils
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+from session_client import ChatSession
+
+# Operation -> (unary method name, request factory taking (sender, receiver, i))
+OPERATIONS = {
+    "heartbeat": ("Heartbeat", lambda sender, receiver, i: chat_pb2.HeartbeatRequest(username=sender)),
+    "list_users": ("ListUsers", lambda sender, receiver, i: chat_pb2.ListUsersRequest(
+        username=sender, pattern="bench_*")),
+    "send_message": ("SendMessage", lambda sender, receiver, i: chat_pb2.SendMessageRequest(
+        sender=sender, receiver=receiver, content=f"bench-{i}")),
+}
+
+
+def ensure_logged_in(stub, username):
+    """
+    Create (if needed) and log in a benchmark user.
+
+    :param stub: A ChatServiceStub.
+    :param username: The username to create and log in.
+    """
+    stub.CreateUser(chat_pb2.CreateUserRequest(
+        username=username, hashed_password="bench", display_name=username), timeout=20)
+    resp = stub.Login(chat_pb2.LoginRequest(username=username, hashed_password="bench"), timeout=20)
+    if resp.status != "success":
+        raise RuntimeError(f"Login failed for {username}: {resp.message}")
+
+
+def report(name, num_ops, elapsed, latencies):
+    """
+    :return: The result dict of one mode.
+    """
+    return {
+        "mode": name,
+        "ops": num_ops,
+        "seconds": elapsed,
+        "ops_per_sec": num_ops / elapsed if elapsed else 0.0,
+        "latency_ms": bench_utils.summarize(latencies),
+    }
+
+
+def run_unary(stub, method, make_request, num_ops, concurrency):
+    """
+    Run num_ops unary calls spread over `concurrency` threads.
+    """
+    rpc = getattr(stub, method)
+    latencies = []
+    counter = iter(range(num_ops))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            rpc(make_request(i), timeout=20)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies
+
+
+def run_session(session, op, make_request, num_ops, window):
+    """
+    Run num_ops operations over a Session stream with at most `window` in flight.
+    """
+    latencies = []
+    in_flight = collections.deque()
+    start = time.perf_counter()
+    for i in range(num_ops):
+        if len(in_flight) >= window:
+            sent, future = in_flight.popleft()
+            future.result(20)
+            latencies.append((time.perf_counter() - sent) * 1000.0)
+        in_flight.append((time.perf_counter(), session.submit(op, make_request(i))))
+    while in_flight:
+        sent, future = in_flight.popleft()
+        future.result(20)
+        latencies.append((time.perf_counter() - sent) * 1000.0)
+    return time.perf_counter() - start, latencies
+
+
+def run(server, op, num_ops, concurrency, window):
+    """
+    Run every mode against the server.
+
+    :return: A dict with the settings and one result per mode.
+    """
+    method, factory = OPERATIONS[op]
+    suffix = uuid.uuid4().hex[:8]
+    sender = f"bench_sender_{suffix}"
+    receiver = f"bench_receiver_{suffix}"
+
+    channel = grpc.insecure_channel(server)
+    stub = chat_pb2_grpc.ChatServiceStub(channel)
+    ensure_logged_in(stub, sender)
+    ensure_logged_in(stub, receiver)
+
+    def make_request(i):
+        return factory(sender, receiver, i)
+
+    # Warm up the channel and the server's handler path
+    run_unary(stub, method, make_request, min(num_ops, 50), 1)
+
+    results = []
+    elapsed, latencies = run_unary(stub, method, make_request, num_ops, 1)
+    results.append(report("unary", num_ops, elapsed, latencies))
+    elapsed, latencies = run_unary(stub, method, make_request, num_ops, concurrency)
+    results.append(report(f"unary_threads_{concurrency}", num_ops, elapsed, latencies))
+
+    session = ChatSession(channel)
+    elapsed, latencies = run_session(session, op, make_request, num_ops, 1)
+    results.append(report("session", num_ops, elapsed, latencies))
+    elapsed, latencies = run_session(session, op, make_request, num_ops, window)
+    results.append(report(f"session_pipelined_{window}", num_ops, elapsed, latencies))
+    session.close()
+    channel.close()
+
+    return {"server": server, "op": op, "results": results}
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Unary vs Session stream throughput")
+    parser.add_argument("--server", default="127.0.0.1:50051", help="Server to benchmark")
+    parser.add_argument("--op", choices=sorted(OPERATIONS), default="heartbeat", help="Operation to run")
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per mode")
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads for the unary_threads mode")
+    parser.add_argument("--window", type=int, default=32, help="In-flight operations for the pipelined mode")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.server, args.op, args.ops, args.concurrency, args.window), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+storage_bench.py
+
+Micro-benchmarks of the SQLite layer: DBHelper (raft_db.py), which every
+node applies commands through, and the module-level functions of db.py. Each
+backend is seeded with the same synthetic dataset per size, then every
+operation is timed call by call:
+
+- insert_message: one message and its commit.
+- get_messages, get_messages_limit, get_messages_unread,
+  get_messages_unread_limit: a random user's inbox, whole or capped at
+  --limit, all messages or only unread ones.
+- get_messages_heavy, get_messages_heavy_limit: the same on the heavy user,
+  who receives --heavy-share of all messages.
+- list_users_all, list_users_prefix, list_users_exact, list_users_suffix:
+  ListUsers patterns "*", "user0001*", one full name and "*7".
+- get_unread_count: a random user's unread count.
+- delete_user: deleting a user whose messages cascade with it.
+
+--save writes the report as a JSON baseline. --compare reads one and lists
+every operation whose latency (--metric, p50 by default) grew by more than
+--threshold over it; the script then exits with status 1, so it can gate a
+change in CI. Baselines are only comparable on the same machine.
+
+Example:
+
+    python benchmarks/storage_bench.py --users 1000 --messages 10000,100000 --save storage_baseline.json
+    python benchmarks/storage_bench.py --users 1000 --messages 10000,100000 --compare storage_baseline.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import bench_utils
+import db
+from local_server import WORDS
+from raft_db import DBHelper
+
+BACKENDS = ("DBHelper", "db.py")
+LIST_PATTERNS = {"list_users_all": "*", "list_users_prefix": "user0001*", "list_users_exact": "user000042",
+                 "list_users_suffix": "*7"}
+METRICS = ("mean", "p50", "p95", "p99")
+
+
+class Dataset:
+    """
+    The shape of one synthetic dataset. Users are "user000000", ...; user 0
+    is the heavy user. The "victim" users, one per delete_user call, each
+    send and receive victim_messages messages.
+    """
+
+    def __init__(self, users, messages, victims, victim_messages, unread_fraction, heavy_share, content_bytes):
+        self.users = users
+        self.messages = messages
+        self.victims = victims
+        self.victim_messages = victim_messages
+        self.unread_fraction = unread_fraction
+        self.heavy_share = heavy_share
+        self.content_bytes = content_bytes
+
+    @property
+    def name(self):
+        return f"{self.users}u_{self.messages}m"
+
+    def usernames(self):
+        return [f"user{i:06d}" for i in range(self.users)] + [f"victim{i:04d}" for i in range(self.victims)]
+
+
+def populate(db_path, dataset, has_created_ms):
+    """
+    Write the dataset straight into an SQLite file whose schema already exists.
+    Messages go through the schema's triggers as any insert does.
+
+    :param db_path: The SQLite file.
+    :param dataset: The Dataset to write.
+    :param has_created_ms: True for the DBHelper schema, whose messages have a created_ms column.
+    """
+    rng = random.Random(dataset.messages)
+    now = datetime.datetime.now()
+    timestamp = now.isoformat()
+    created_ms = int(now.timestamp() * 1000)
+
+    def content(i):
+        text = f"{i:08d}"
+        while len(text) < dataset.content_bytes:
+            text += " " + rng.choice(WORDS)
+        return text[:dataset.content_bytes]
+
+    def rows():
+        # user i has id i + 1, victim v has id users + v + 1
+        for i in range(dataset.messages):
+            receiver = 1 if rng.random() < dataset.heavy_share else rng.randint(1, dataset.users)
+            read = 0 if rng.random() < dataset.unread_fraction else 1
+            yield rng.randint(1, dataset.users), receiver, content(i), read
+        for victim in range(dataset.users + 1, dataset.users + dataset.victims + 1):
+            for i in range(dataset.victim_messages):
+                peer = rng.randint(1, dataset.users)
+                yield (victim, peer, content(i), 0) if i % 2 else (peer, victim, content(i), 0)
+
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO users (username, password_hash, display_name) VALUES (?, ?, ?)",
+                         ((name, "bench", name) for name in dataset.usernames()))
+        if has_created_ms:
+            conn.executemany(
+                "INSERT INTO messages (sender_id, receiver_id, content, timestamp, read_status, created_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((sender, receiver, text, timestamp, read, created_ms) for sender, receiver, text, read in rows()))
+        else:
+            conn.executemany(
+                "INSERT INTO messages (sender_id, receiver_id, content, timestamp, read_status) VALUES (?, ?, ?, ?, ?)",
+                ((sender, receiver, text, timestamp, read) for sender, receiver, text, read in rows()))
+
+
+class HelperBackend:
+    """
+    DBHelper over a seeded file. Users are passed by ID, as the Raft apply does.
+    """
+
+    def __init__(self, db_path, dataset):
+        DBHelper(db_path).close()  # creates the schema
+        populate(db_path, dataset, has_created_ms=True)
+        self.helper = DBHelper(db_path)
+        self.users = dataset.users
+
+    def user(self, index):
+        return index + 1
+
+    def victim(self, index):
+        return self.users + index + 1
+
+    def insert_message(self, sender, receiver, content):
+        self.helper.insert_message(sender, receiver, content)
+
+    def get_messages(self, user, only_unread, limit):
+        self.helper.get_messages_for_user(user, only_unread=only_unread, limit=limit)
+
+    def list_users(self, pattern):
+        self.helper.list_users(pattern)
+
+    def get_unread_count(self, user):
+        self.helper.get_unread_count(user)
+
+    def delete_user(self, user):
+        self.helper.delete_user(user)
+
+    def close(self):
+        self.helper.close()
+
+
+class LegacyBackend:
+    """
+    The functions of db.py over a seeded file. Users are passed by username.
+    """
+
+    def __init__(self, db_path, dataset):
+        db.close_db()
+        os.environ["CHAT_DB_PATH"] = db_path
+        db.init_db()
+        db.close_db()
+        populate(db_path, dataset, has_created_ms=False)
+        self.names = dataset.usernames()
+        self.users = dataset.users
+
+    def user(self, index):
+        return self.names[index]
+
+    def victim(self, index):
+        return self.names[self.users + index]
+
+    def insert_message(self, sender, receiver, content):
+        db.create_message(sender, receiver, content)
+
+    def get_messages(self, user, only_unread, limit):
+        db.get_messages_for_user(user, only_unread=only_unread, limit=limit)
+
+    def list_users(self, pattern):
+        db.list_users(pattern)
+
+    def get_unread_count(self, user):
+        db.get_num_unread_messages(user)
+
+    def delete_user(self, user):
+        db.delete_user(user)
+
+    def close(self):
+        db.close_db()
+
+
+def operations(backend, dataset, limit, rng):
+    """
+    :return: A list of (name, call) pairs in the order they are timed, each
+             call doing one operation on a user drawn from rng. Reads come
+             first, so the writes do not change the data they see.
+    """
+    def random_user():
+        return backend.user(rng.randrange(dataset.users))
+
+    ops = [
+        ("get_messages", lambda: backend.get_messages(random_user(), False, None)),
+        ("get_messages_limit", lambda: backend.get_messages(random_user(), False, limit)),
+        ("get_messages_unread", lambda: backend.get_messages(random_user(), True, None)),
+        ("get_messages_unread_limit", lambda: backend.get_messages(random_user(), True, limit)),
+        ("get_messages_heavy", lambda: backend.get_messages(backend.user(0), False, None)),
+        ("get_messages_heavy_limit", lambda: backend.get_messages(backend.user(0), False, limit)),
+    ]
+    ops += [(name, lambda pattern=pattern: backend.list_users(pattern)) for name, pattern in LIST_PATTERNS.items()]
+    ops += [
+        ("get_unread_count", lambda: backend.get_unread_count(random_user())),
+        ("insert_message", lambda: backend.insert_message(random_user(), random_user(), "bench message")),
+    ]
+    return ops
+
+
+def time_calls(call, repeat, warmup):
+    """
+    :return: Latencies of repeat calls in microseconds, after warmup untimed calls.
+    """
+    for _ in range(warmup):
+        call()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def summary(latencies):
+    """
+    :return: A latency summary (microseconds) with the calls per second it implies.
+    """
+    result = bench_utils.summarize(latencies)
+    result["ops_per_sec"] = 1e6 * len(latencies) / sum(latencies) if latencies else 0.0
+    return result
+
+
+def run_backend(backend_name, db_path, dataset, repeat, limit):
+    """
+    Seed one backend with a dataset and time every operation on it.
+
+    :return: A dict mapping operation names to latency summaries.
+    """
+    backend = (HelperBackend if backend_name == "DBHelper" else LegacyBackend)(db_path, dataset)
+    rng = random.Random(0)
+    results = {}
+    try:
+        for name, call in operations(backend, dataset, limit, rng):
+            results[name] = summary(time_calls(call, repeat, min(10, repeat)))
+        victims = iter(range(dataset.victims))
+        results["delete_user"] = summary(time_calls(lambda: backend.delete_user(backend.victim(next(victims))),
+                                                    dataset.victims, 0))
+    finally:
+        backend.close()
+    return results
+
+
+def compare(baseline, current, metric, threshold, min_delta_us):
+    """
+    Compare two reports operation by operation.
+
+    :param baseline: A report written by --save.
+    :param current: The report of this run.
+    :param metric: The summary key compared, e.g. "p50".
+    :param threshold: Relative growth above which an operation counts as a regression (0.2 for 20%).
+    :param min_delta_us: Changes smaller than this many microseconds are never flagged.
+    :return: A dict listing the regressions and improvements, and the operations missing from the baseline.
+    """
+    regressions, improvements, missing = [], [], []
+    for backend, datasets in current["results"].items():
+        for dataset, ops in datasets.items():
+            for name, stats in ops.items():
+                old = baseline.get("results", {}).get(backend, {}).get(dataset, {}).get(name)
+                if old is None:
+                    missing.append(f"{backend}/{dataset}/{name}")
+                    continue
+                before, after = old[metric], stats[metric]
+                change = (after - before) / before if before else 0.0
+                entry = {"backend": backend, "dataset": dataset, "operation": name,
+                         "baseline_us": before, "current_us": after, "change": change}
+                if abs(after - before) < min_delta_us:
+                    continue
+                if change > threshold:
+                    regressions.append(entry)
+                elif change < -threshold:
+                    improvements.append(entry)
+    return {"metric": metric, "threshold": threshold, "regressions": regressions,
+            "improvements": improvements, "missing_from_baseline": missing}
+
+
+def run(backends, users, message_counts, repeat, limit, victims, victim_messages, unread_fraction, heavy_share,
+        content_bytes):
+    """
+    Time every backend on one dataset per message count.
+
+    :return: A report with the settings and a results dict keyed by backend, dataset and operation.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="bench_storage_")
+    results = {name: {} for name in backends}
+    try:
+        for messages in message_counts:
+            dataset = Dataset(users, messages, victims, victim_messages, unread_fraction, heavy_share,
+                              content_bytes)
+            for name in backends:
+                db_path = os.path.join(temp_dir, f"{name.replace('.', '_')}_{dataset.name}.db")
+                results[name][dataset.name] = run_backend(name, db_path, dataset, repeat, limit)
+                os.remove(db_path)
+    finally:
+        shutil.rmtree(temp_dir)
+    return {
+        "settings": {"users": users, "messages": message_counts, "repeat": repeat, "limit": limit,
+                     "victims": victims, "victim_messages": victim_messages, "unread_fraction": unread_fraction,
+                     "heavy_share": heavy_share, "content_bytes": content_bytes},
+        "results": results,
+    }
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmarks, save or compare the
+    baseline and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="SQLite layer micro-benchmarks with baseline comparison")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated: DBHelper, db.py")
+    parser.add_argument("--users", type=int, default=1000, help="Users in each dataset")
+    parser.add_argument("--messages", default="10000,100000", help="Comma-separated message counts, one dataset each")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per operation")
+    parser.add_argument("--limit", type=int, default=50, help="Limit of the *_limit reads")
+    parser.add_argument("--victims", type=int, default=50, help="Users deleted by delete_user, one per call")
+    parser.add_argument("--victim-messages", type=int, default=100, help="Messages cascading with each deleted user")
+    parser.add_argument("--unread-fraction", type=float, default=0.3, help="Share of messages left unread")
+    parser.add_argument("--heavy-share", type=float, default=0.1, help="Share of messages sent to the heavy user")
+    parser.add_argument("--content-bytes", type=int, default=100, help="Length of each message")
+    parser.add_argument("--save", help="Write the report to this file as a baseline")
+    parser.add_argument("--compare", help="Baseline file to compare this run against")
+    parser.add_argument("--metric", default="p50", choices=METRICS, help="Latency compared against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative growth flagged as a regression")
+    parser.add_argument("--min-delta-us", type=float, default=5.0, help="Smallest change ever flagged, in microseconds")
+    args = parser.parse_args()
+
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"Unknown backend(s): {', '.join(sorted(unknown))}")
+    if args.users < 1 or args.repeat < 1:
+        parser.error("--users and --repeat must be at least 1.")
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = run(backends, args.users, [int(count) for count in args.messages.split(",")], args.repeat, args.limit,
+                 args.victims, args.victim_messages, args.unread_fraction, args.heavy_share, args.content_bytes)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if baseline is not None:
+        report["comparison"] = compare(baseline, report, args.metric, args.threshold, args.min_delta_us)
+    print(json.dumps(report, indent=2))
+    if baseline is not None and report["comparison"]["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+subscribe_streams.py
+
+Measures what idle Subscribe streams cost a single node. A one-node server
+runs in a child process; the parent opens N Subscribe streams spread over a
+few channels and asks the server for its resident memory, CPU time, thread
+count and open-stream count before and after. The report gives the memory
+cost per stream and the idle CPU usage with and without the streams open.
+
+With --flood, the server then pushes that many messages to every stream while
+the clients never read, and reports memory and the overflow counters, which
+should stay bounded by --stream-buffer whatever the flood size.
+
+Example:
+
+    python benchmarks/subscribe_streams.py --streams 20000
+    python benchmarks/subscribe_streams.py --streams 2000 --flood 500 --overflow-policy coalesce
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+import bench_utils
+import grpc
+from concurrent import futures
+
+import chat_pb2
+import chat_pb2_grpc
+from subscription_hub import DEFAULT_MAX_DEPTH, OVERFLOW_DROP_OLDEST, OVERFLOW_POLICIES
+
+
+def get_free_port():
+    """
+    Ask the OS for a free TCP port on localhost.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def read_rss_kb():
+    """
+    :return: Resident set size of the current process in KiB (Linux), or 0 if unknown.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def server_process(grpc_port, raft_port, num_users, conn, stream_buffer, overflow_policy):
+    """
+    Child process: run a single-node server with num_users logged-in users and
+    answer "stats" and ("flood", count, size) requests on conn until "stop" is
+    received.
+    """
+    from raft_db import RaftDB
+    from ft_server_grpc import FaultTolerantChatServicer
+
+    work_dir = tempfile.mkdtemp(prefix="bench_streams_")
+    os.chdir(work_dir)
+    raft_db = RaftDB(f"127.0.0.1:{raft_port}", [], "bench.db")
+    while raft_db.getStatus()["state"] != 2:
+        time.sleep(0.1)
+
+    # Session TTL far beyond the benchmark so no stream is expired mid-run
+    servicer = FaultTolerantChatServicer(raft_db, session_ttl=3600.0,
+                                         stream_buffer=stream_buffer, overflow_policy=overflow_policy)
+    for i in range(num_users):
+        raft_db.user_login(f"idle_{i}", raft_db.node_address)
+    while raft_db.get_online_count() < num_users:
+        time.sleep(0.1)
+
+    def stats():
+        return {
+            "rss_kb": read_rss_kb(),
+            "cpu_seconds": time.process_time(),
+            "threads": threading.active_count(),
+            "streams": servicer.hub.stream_count(),
+            "hub": servicer.hub.totals(),
+        }
+
+    def flood(count, size):
+        for i in range(count):
+            servicer.hub.publish_many(
+                (f"idle_{u}", ("bench", f"{u}:{i}:".ljust(size, "x"), i, 0)) for u in range(num_users))
+
+    async def serve():
+        loop = asyncio.get_running_loop()
+        servicer.hub.bind(loop)
+        server = grpc.aio.server(migration_thread_pool=futures.ThreadPoolExecutor(max_workers=10))
+        chat_pb2_grpc.add_ChatServiceServicer_to_server(servicer, server)
+        server.add_insecure_port(f"127.0.0.1:{grpc_port}")
+        await server.start()
+        conn.send("ready")
+        while True:
+            command = await loop.run_in_executor(None, conn.recv)
+            if command == "stop":
+                break
+            if command[0] == "flood":
+                await loop.run_in_executor(None, flood, command[1], command[2])
+                # Let the loop drain the queued deliveries before reporting
+                await asyncio.sleep(1.0)
+            conn.send(stats())
+        await server.stop(0)
+
+    asyncio.run(serve())
+    raft_db.destroy()
+    raft_db.close()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def request_stats(conn):
+    """
+    Ask the server process for a stats snapshot.
+    """
+    conn.send("stats")
+    return conn.recv()
+
+
+def hold_streams(grpc_port, num_streams, num_channels, conn, idle_seconds, flood_count, flood_size):
+    """
+    Open num_streams Subscribe streams, wait until the server has registered
+    them all, then measure memory and idle CPU, and optionally memory after
+    flooding the streams that nobody reads.
+
+    :return: A dict with the before/after snapshots and derived costs.
+    """
+    # Leave the server alone briefly so the baseline is not skewed by startup work
+    time.sleep(1.0)
+    before = request_stats(conn)
+    time.sleep(idle_seconds)
+    before_idle = request_stats(conn)
+
+    channels = [grpc.insecure_channel(f"127.0.0.1:{grpc_port}") for _ in range(num_channels)]
+    stubs = [chat_pb2_grpc.ChatServiceStub(ch) for ch in channels]
+    calls = []
+    open_start = time.time()
+    for i in range(num_streams):
+        stub = stubs[i % num_channels]
+        calls.append(stub.Subscribe(chat_pb2.SubscribeRequest(username=f"idle_{i}")))
+
+    # Wait until the server has registered every stream
+    while True:
+        snapshot = request_stats(conn)
+        if snapshot["streams"] >= num_streams or time.time() - open_start > 120:
+            break
+        time.sleep(0.5)
+    open_seconds = time.time() - open_start
+
+    time.sleep(1.0)
+    after = request_stats(conn)
+    time.sleep(idle_seconds)
+    after_idle = request_stats(conn)
+
+    flooded = None
+    if flood_count:
+        conn.send(("flood", flood_count, flood_size))
+        flooded = conn.recv()
+
+    for call in calls:
+        call.cancel()
+    for ch in channels:
+        ch.close()
+
+    opened = after["streams"]
+    report = {
+        "streams_requested": num_streams,
+        "streams_open": opened,
+        "open_seconds": open_seconds,
+        "server_threads_before": before["threads"],
+        "server_threads_after": after["threads"],
+        "rss_kb_before": before["rss_kb"],
+        "rss_kb_after": after["rss_kb"],
+        "bytes_per_stream": ((after["rss_kb"] - before["rss_kb"]) * 1024 / opened) if opened else 0,
+        "idle_cpu_pct_without_streams": 100.0 * (before_idle["cpu_seconds"] - before["cpu_seconds"]) / idle_seconds,
+        "idle_cpu_pct_with_streams": 100.0 * (after_idle["cpu_seconds"] - after["cpu_seconds"]) / idle_seconds,
+    }
+    if flooded is not None:
+        report["flood_messages_per_stream"] = flood_count
+        report["flood_bytes_per_stream"] = flood_count * flood_size
+        report["rss_kb_after_flood"] = flooded["rss_kb"]
+        report["bytes_per_stream_after_flood"] = (
+            ((flooded["rss_kb"] - before["rss_kb"]) * 1024 / opened) if opened else 0)
+        report["hub_after_flood"] = flooded["hub"]
+    return report
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Idle Subscribe stream cost on a single node")
+    parser.add_argument("--streams", type=int, default=10000, help="Number of Subscribe streams to open")
+    parser.add_argument("--channels", type=int, default=16, help="Client channels to spread streams over")
+    parser.add_argument("--idle-seconds", type=float, default=10.0, help="Idle window for CPU measurement")
+    parser.add_argument("--flood", type=int, default=0, help="Messages pushed to every (unread) stream afterwards")
+    parser.add_argument("--flood-size", type=int, default=200, help="Content size of each flood message in bytes")
+    parser.add_argument("--stream-buffer", type=int, default=DEFAULT_MAX_DEPTH, help="Server buffer per stream")
+    parser.add_argument("--overflow-policy", choices=OVERFLOW_POLICIES, default=OVERFLOW_DROP_OLDEST,
+                        help="Server overflow policy")
+    args = parser.parse_args()
+
+    grpc_port = get_free_port()
+    raft_port = get_free_port()
+    parent_conn, child_conn = multiprocessing.Pipe()
+    proc = multiprocessing.Process(
+        target=server_process,
+        args=(grpc_port, raft_port, args.streams, child_conn, args.stream_buffer, args.overflow_policy),
+        daemon=True)
+    proc.start()
+    if parent_conn.recv() != "ready":
+        raise RuntimeError("Server process failed to start")
+
+    try:
+        report = hold_streams(grpc_port, args.streams, args.channels, parent_conn, args.idle_seconds,
+                              args.flood, args.flood_size)
+    finally:
+        parent_conn.send("stop")
+        proc.join(timeout=10)
+        if proc.is_alive():
+            proc.terminate()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
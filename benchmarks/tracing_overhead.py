@@ -0,0 +1,148 @@
+"""
+tracing_overhead.py
+
+Measures what request tracing costs and shows where a write's time goes:
+
+- span: nanoseconds to open and close one child span when the trace is
+  sampled, when it is only recorded in case it turns out slow, and when no
+  trace is current (the cost every untraced call pays).
+- send: SendMessage latency against an in-process single-node server with
+  tracing off, with tail-only tracing (nothing sampled, slow calls kept) and
+  with every call traced.
+- phases: the mean time per span name over the fully traced SendMessage
+  calls, i.e. how a write splits into queueing, replication, apply, SQLite
+  commit and push.
+
+Example:
+
+    python benchmarks/tracing_overhead.py --calls 500
+"""
+
+import argparse
+import collections
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import bench_utils  # noqa: F401 (puts system_main on the path)
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+from local_server import LocalServer, seed_inbox
+from tracing import Tracer
+
+# Tracer settings per mode: (sample rate, slow threshold in seconds)
+MODES = {"tail": (0.0, 0.5), "all": (1.0, None)}
+
+
+def measure_spans(num_ops):
+    """
+    :return: Nanoseconds per child span for each way a span can be recorded.
+    """
+    results = {}
+    for name, sample_rate in (("sampled", 1.0), ("tail_only", 0.0)):
+        tracer = Tracer(os.devnull, sample_rate=sample_rate, slow_threshold=60.0, capacity=num_ops + 1)
+        with tracer.start_trace("bench"):
+            started = time.perf_counter()
+            for _ in range(num_ops):
+                with tracer.span("child"):
+                    pass
+            results[f"{name}_ns_per_span"] = (time.perf_counter() - started) * 1e9 / num_ops
+    tracer = Tracer(os.devnull)
+    started = time.perf_counter()
+    for _ in range(num_ops):
+        with tracer.span("child"):
+            pass
+    results["no_trace_ns_per_span"] = (time.perf_counter() - started) * 1e9 / num_ops
+    return results
+
+
+def measure_sends(db_path, num_calls, tracer):
+    """
+    Send num_calls messages from writer to reader after a warm-up.
+
+    :return: A list of latencies in microseconds.
+    """
+    server = LocalServer(db_path, tracer=tracer)
+    channel = grpc.insecure_channel(server.address)
+    stub = chat_pb2_grpc.ChatServiceStub(channel)
+    stub.Login(chat_pb2.LoginRequest(username="writer", hashed_password="bench"), timeout=20)
+
+    def send(i):
+        return stub.SendMessage(chat_pb2.SendMessageRequest(sender="writer", receiver="reader",
+                                                            content=f"message {i}"), timeout=20)
+
+    for i in range(min(num_calls, 20)):
+        send(i)
+    if tracer is not None:
+        tracer.spans.clear()  # keep only the measured calls for the phase breakdown
+    latencies = []
+    for i in range(num_calls):
+        start = time.perf_counter()
+        send(i)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    channel.close()
+    server.stop()
+    return latencies
+
+
+def phase_breakdown(spans):
+    """
+    :return: A dict mapping span names to their count and mean milliseconds,
+             over the traces whose root is a SendMessage call.
+    """
+    traces = {span.trace for span in spans if span.name == "SendMessage"}
+    durations = collections.defaultdict(list)
+    for span in spans:
+        if span.trace in traces:
+            durations[span.name].append((span.end - span.start) * 1000)
+    return {name: {"count": len(values), "mean_ms": sum(values) / len(values)}
+            for name, values in sorted(durations.items(), key=lambda item: -sum(item[1]))}
+
+
+def run(num_calls, num_ops):
+    """
+    Run every part. The servers are measured in the order off, tail, all,
+    all, tail, off so drift in the machine's load hits every mode alike.
+
+    :return: A dict with the settings and the results.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="bench_tracing_")
+    latencies = {"off": [], "tail": [], "all": []}
+    spans = []
+    try:
+        for phase, mode in enumerate(("off", "tail", "all", "all", "tail", "off")):
+            db_path = os.path.join(temp_dir, f"phase{phase}.db")
+            seed_inbox(db_path, 0, 0)
+            tracer = None
+            if mode != "off":
+                sample_rate, slow_threshold = MODES[mode]
+                tracer = Tracer(os.path.join(temp_dir, f"trace{phase}.json"), sample_rate=sample_rate,
+                                slow_threshold=slow_threshold, capacity=num_calls * 16)
+            latencies[mode].extend(measure_sends(db_path, num_calls // 2, tracer))
+            if mode == "all":
+                spans.extend(tracer.spans)
+    finally:
+        shutil.rmtree(temp_dir)
+
+    send = {mode: bench_utils.summarize(values) for mode, values in latencies.items()}
+    return {"calls": num_calls, "span": measure_spans(num_ops), "send_us": send, "phases": phase_breakdown(spans)}
+
+
+def main():
+    """
+    Parse command-line arguments, run the benchmark and print the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Cost of request tracing and the phases of a traced write")
+    parser.add_argument("--calls", type=int, default=500, help="SendMessage calls per tracing mode")
+    parser.add_argument("--ops", type=int, default=200000, help="Spans per in-process measurement")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.calls, args.ops), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nchat.proto\x12\x04\x63hat\"T\n\x11\x43reateUserRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x17\n\x0fhashed_password\x18\x02 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x03 \x01(\t\"G\n\x12\x43reateUserResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x10\n\x08username\x18\x03 \x01(\t\"9\n\x0cLoginRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x17\n\x0fhashed_password\x18\x02 \x01(\t\"X\n\rLoginResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x14\n\x0cunread_count\x18\x03 \x01(\x05\x12\x10\n\x08username\x18\x04 \x01(\t\"!\n\rLogoutRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"1\n\x0eLogoutResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\"5\n\x10ListUsersRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0f\n\x07pattern\x18\x02 \x01(\t\"2\n\x08UserInfo\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x02 \x01(\t\"d\n\x11ListUsersResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x1d\n\x05users\x18\x03 \x03(\x0b\x32\x0e.chat.UserInfo\x12\x0f\n\x07pattern\x18\x04 \x01(\t\"G\n\x12SendMessageRequest\x12\x0e\n\x06sender\x18\x01 \x01(\t\x12\x10\n\x08receiver\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\"6\n\x13SendMessageResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\"K\n\x13ReadMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x13\n\x0bonly_unread\x18\x02 \x01(\x08\x12\r\n\x05limit\x18\x03 \x01(\x05\"k\n\x0b\x43hatMessage\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x17\n\x0fsender_username\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x11\n\ttimestamp\x18\x04 \x01(\t\x12\x13\n\x0bread_status\x18\x05 \x01(\x05\"\\\n\x14ReadMessagesResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12#\n\x08messages\x18\x03 \x03(\x0b\x32\x11.chat.ChatMessage\">\n\x15\x44\x65leteMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x13\n\x0bmessage_ids\x18\x02 \x03(\x05\"P\n\x16\x44\x65leteMessagesResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x15\n\rdeleted_count\x18\x03 \x01(\x05\"%\n\x11\x44\x65leteUserRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"5\n\x12\x44\x65leteUserResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\"$\n\x10SubscribeRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"2\n\x0fIncomingMessage\x12\x0e\n\x06sender\x18\x01 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x02 \x01(\t2\xca\x04\n\x0b\x43hatService\x12?\n\nCreateUser\x12\x17.chat.CreateUserRequest\x1a\x18.chat.CreateUserResponse\x12\x30\n\x05Login\x12\x12.chat.LoginRequest\x1a\x13.chat.LoginResponse\x12\x33\n\x06Logout\x12\x13.chat.LogoutRequest\x1a\x14.chat.LogoutResponse\x12<\n\tListUsers\x12\x16.chat.ListUsersRequest\x1a\x17.chat.ListUsersResponse\x12\x42\n\x0bSendMessage\x12\x18.chat.SendMessageRequest\x1a\x19.chat.SendMessageResponse\x12\x45\n\x0cReadMessages\x12\x19.chat.ReadMessagesRequest\x1a\x1a.chat.ReadMessagesResponse\x12K\n\x0e\x44\x65leteMessages\x12\x1b.chat.DeleteMessagesRequest\x1a\x1c.chat.DeleteMessagesResponse\x12?\n\nDeleteUser\x12\x17.chat.DeleteUserRequest\x1a\x18.chat.DeleteUserResponse\x12<\n\tSubscribe\x12\x16.chat.SubscribeRequest\x1a\x15.chat.IncomingMessage0\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nchat.proto\x12\x04\x63hat\"T\n\x11\x43reateUserRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x17\n\x0fhashed_password\x18\x02 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x03 \x01(\t\"G\n\x12\x43reateUserResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x10\n\x08username\x18\x03 \x01(\t\"9\n\x0cLoginRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x17\n\x0fhashed_password\x18\x02 \x01(\t\"\x7f\n\rLoginResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x14\n\x0cunread_count\x18\x03 \x01(\x05\x12\x10\n\x08username\x18\x04 \x01(\t\x12\x10\n\x08push_seq\x18\x05 \x01(\x03\x12\x13\n\x0bsync_cursor\x18\x06 \x01(\x03\"!\n\rLogoutRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"1\n\x0eLogoutResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\"5\n\x10ListUsersRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0f\n\x07pattern\x18\x02 \x01(\t\"2\n\x08UserInfo\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x02 \x01(\t\"d\n\x11ListUsersResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x1d\n\x05users\x18\x03 \x03(\x0b\x32\x0e.chat.UserInfo\x12\x0f\n\x07pattern\x18\x04 \x01(\t\"t\n\x12SendMessageRequest\x12\x0e\n\x06sender\x18\x01 \x01(\t\x12\x10\n\x08receiver\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x11\n\treceivers\x18\x04 \x03(\t\x12\x18\n\x10receiver_pattern\x18\x05 \x01(\t\"j\n\x13SendMessageResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x17\n\x0f\x64\x65livered_count\x18\x03 \x01(\x05\x12\x19\n\x11unknown_receivers\x18\x04 \x03(\t\"\x98\x01\n\x13ReadMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x13\n\x0bonly_unread\x18\x02 \x01(\x08\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x12\n\nchunk_size\x18\x04 \x01(\x05\x12\x13\n\x0b\x66rom_sender\x18\x05 \x01(\t\x12\x10\n\x08since_ms\x18\x06 \x01(\x03\x12\x10\n\x08until_ms\x18\x07 \x01(\x03\"\x86\x01\n\x0b\x43hatMessage\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x17\n\x0fsender_username\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x11\n\ttimestamp\x18\x04 \x01(\t\x12\x13\n\x0bread_status\x18\x05 \x01(\x05\x12\x19\n\x11receiver_username\x18\x06 \x01(\t\"\\\n\x14ReadMessagesResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12#\n\x08messages\x18\x03 \x03(\x0b\x32\x11.chat.ChatMessage\"Y\n\x11ReadMessagesChunk\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12#\n\x08messages\x18\x03 \x03(\x0b\x32\x11.chat.ChatMessage\">\n\x15\x44\x65leteMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x13\n\x0bmessage_ids\x18\x02 \x03(\x05\"P\n\x16\x44\x65leteMessagesResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x15\n\rdeleted_count\x18\x03 \x01(\x05\"%\n\x11\x44\x65leteUserRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"5\n\x12\x44\x65leteUserResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\"K\n\x18ListConversationsRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0e\n\x06\x62\x65\x66ore\x18\x02 \x01(\x03\x12\r\n\x05limit\x18\x03 \x01(\x05\"}\n\x10\x43onversationInfo\x12\x0c\n\x04peer\x18\x01 \x01(\t\x12\x17\n\x0flast_message_id\x18\x02 \x01(\x03\x12\x16\n\x0elast_timestamp\x18\x03 \x01(\t\x12\x14\n\x0clast_content\x18\x04 \x01(\t\x12\x14\n\x0cunread_count\x18\x05 \x01(\x05\"\x80\x01\n\x19ListConversationsResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12-\n\rconversations\x18\x03 \x03(\x0b\x32\x16.chat.ConversationInfo\x12\x13\n\x0bnext_before\x18\x04 \x01(\x03\"J\n\x17ListSentMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0e\n\x06\x63ursor\x18\x02 \x01(\x03\x12\r\n\x05limit\x18\x03 \x01(\x05\"u\n\x18ListSentMessagesResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12#\n\x08messages\x18\x03 \x03(\x0b\x32\x11.chat.ChatMessage\x12\x13\n\x0bnext_cursor\x18\x04 \x01(\x03\"W\n\x16GetConversationRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0c\n\x04peer\x18\x02 \x01(\t\x12\x0e\n\x06\x63ursor\x18\x03 \x01(\x03\x12\r\n\x05limit\x18\x04 \x01(\x05\"t\n\x17GetConversationResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12#\n\x08messages\x18\x03 \x03(\x0b\x32\x11.chat.ChatMessage\x12\x13\n\x0bnext_cursor\x18\x04 \x01(\x03\"C\n\x10SyncSinceRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0e\n\x06\x63ursor\x18\x02 \x01(\x03\x12\r\n\x05limit\x18\x03 \x01(\x05\"\x83\x02\n\x11SyncSinceResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0e\n\x06\x63ursor\x18\x03 \x01(\x03\x12\r\n\x05reset\x18\x04 \x01(\x08\x12\x10\n\x08has_more\x18\x05 \x01(\x08\x12\'\n\x0cnew_messages\x18\x06 \x03(\x0b\x32\x11.chat.ChatMessage\x12\x10\n\x08read_ids\x18\x07 \x03(\x05\x12\x13\n\x0b\x64\x65leted_ids\x18\x08 \x03(\x05\x12!\n\tnew_users\x18\t \x03(\x0b\x32\x0e.chat.UserInfo\x12\x15\n\rdeleted_users\x18\n \x03(\t\x12\x12\n\nread_up_to\x18\x0b \x01(\x03\"N\n\x10SubscribeRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x18\n\x0bresume_from\x18\x02 \x01(\x03H\x00\x88\x01\x01\x42\x0e\n\x0c_resume_from\"\x80\x01\n\x0fIncomingMessage\x12\x0e\n\x06sender\x18\x01 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x02 \x01(\t\x12\x12\n\nmessage_id\x18\x03 \x01(\x03\x12\x12\n\nsent_at_ms\x18\x04 \x01(\x03\x12\x17\n\x0f\x63oalesced_count\x18\x05 \x01(\x05\x12\x0b\n\x03seq\x18\x06 \x01(\x03\"$\n\x10HeartbeatRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"_\n\x11HeartbeatResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x14\n\x0conline_count\x18\x03 \x01(\x05\x12\x13\n\x0bttl_seconds\x18\x04 \x01(\x05\"\x13\n\x11RaftStatusRequest\"d\n\x08RaftPeer\x12\x0f\n\x07\x61\x64\x64ress\x18\x01 \x01(\t\x12\x11\n\tconnected\x18\x02 \x01(\x08\x12\x13\n\x0bmatch_index\x18\x03 \x01(\x03\x12\x12\n\nnext_index\x18\x04 \x01(\x03\x12\x0b\n\x03lag\x18\x05 \x01(\x03\"m\n\x0eLatencySummary\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x03\x12\x13\n\x0bp50_seconds\x18\x03 \x01(\x01\x12\x13\n\x0bp99_seconds\x18\x04 \x01(\x01\x12\x14\n\x0cmean_seconds\x18\x05 \x01(\x01\"\xbc\x02\n\x12RaftStatusResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0c\n\x04node\x18\x03 \x01(\t\x12\x0c\n\x04role\x18\x04 \x01(\t\x12\x0e\n\x06leader\x18\x05 \x01(\t\x12\x0c\n\x04term\x18\x06 \x01(\x03\x12\x14\n\x0c\x63ommit_index\x18\x07 \x01(\x03\x12\x14\n\x0clast_applied\x18\x08 \x01(\x03\x12\x13\n\x0blog_entries\x18\n \x01(\x03\x12\x1d\n\x05peers\x18\x0e \x03(\x0b\x32\x0e.chat.RaftPeer\x12\'\n\tlatencies\x18\x0f \x03(\x0b\x32\x14.chat.LatencySummaryJ\x04\x08\t\x10\nJ\x04\x08\x0b\x10\x0eR\x0elast_log_indexR\tlog_bytesR\x0bqueue_depthR\x0equeue_capacity\"c\n\x0eProfileRequest\x12\x0c\n\x04mode\x18\x01 \x01(\t\x12\x0f\n\x07seconds\x18\x02 \x01(\x01\x12\x0e\n\x06method\x18\x03 \x01(\t\x12\r\n\x05\x63\x61lls\x18\x04 \x01(\x05\x12\x13\n\x0binterval_ms\x18\x05 \x01(\x01\"@\n\x0fProfileResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0c\n\x04path\x18\x03 \x01(\t\"\xdf\x05\n\x0eSessionRequest\x12\x12\n\nrequest_id\x18\x01 \x01(\x04\x12.\n\x0b\x63reate_user\x18\x02 \x01(\x0b\x32\x17.chat.CreateUserRequestH\x00\x12#\n\x05login\x18\x03 \x01(\x0b\x32\x12.chat.LoginRequestH\x00\x12%\n\x06logout\x18\x04 \x01(\x0b\x32\x13.chat.LogoutRequestH\x00\x12,\n\nlist_users\x18\x05 \x01(\x0b\x32\x16.chat.ListUsersRequestH\x00\x12\x30\n\x0csend_message\x18\x06 \x01(\x0b\x32\x18.chat.SendMessageRequestH\x00\x12\x32\n\rread_messages\x18\x07 \x01(\x0b\x32\x19.chat.ReadMessagesRequestH\x00\x12\x36\n\x0f\x64\x65lete_messages\x18\x08 \x01(\x0b\x32\x1b.chat.DeleteMessagesRequestH\x00\x12.\n\x0b\x64\x65lete_user\x18\t \x01(\x0b\x32\x17.chat.DeleteUserRequestH\x00\x12+\n\theartbeat\x18\n \x01(\x0b\x32\x16.chat.HeartbeatRequestH\x00\x12+\n\tsubscribe\x18\x0b \x01(\x0b\x32\x16.chat.SubscribeRequestH\x00\x12,\n\nsync_since\x18\x0c \x01(\x0b\x32\x16.chat.SyncSinceRequestH\x00\x12<\n\x12list_conversations\x18\r \x01(\x0b\x32\x1e.chat.ListConversationsRequestH\x00\x12\x38\n\x10get_conversation\x18\x0e \x01(\x0b\x32\x1c.chat.GetConversationRequestH\x00\x12;\n\x12list_sent_messages\x18\x0f \x01(\x0b\x32\x1d.chat.ListSentMessagesRequestH\x00\x42\x04\n\x02op\"\xfc\x05\n\x0fSessionResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\x04\x12/\n\x0b\x63reate_user\x18\x02 \x01(\x0b\x32\x18.chat.CreateUserResponseH\x00\x12$\n\x05login\x18\x03 \x01(\x0b\x32\x13.chat.LoginResponseH\x00\x12&\n\x06logout\x18\x04 \x01(\x0b\x32\x14.chat.LogoutResponseH\x00\x12-\n\nlist_users\x18\x05 \x01(\x0b\x32\x17.chat.ListUsersResponseH\x00\x12\x31\n\x0csend_message\x18\x06 \x01(\x0b\x32\x19.chat.SendMessageResponseH\x00\x12\x33\n\rread_messages\x18\x07 \x01(\x0b\x32\x1a.chat.ReadMessagesResponseH\x00\x12\x37\n\x0f\x64\x65lete_messages\x18\x08 \x01(\x0b\x32\x1c.chat.DeleteMessagesResponseH\x00\x12/\n\x0b\x64\x65lete_user\x18\t \x01(\x0b\x32\x18.chat.DeleteUserResponseH\x00\x12,\n\theartbeat\x18\n \x01(\x0b\x32\x17.chat.HeartbeatResponseH\x00\x12%\n\x04push\x18\x0b \x01(\x0b\x32\x15.chat.IncomingMessageH\x00\x12\x0f\n\x05\x65rror\x18\x0c \x01(\tH\x00\x12-\n\nsync_since\x18\r \x01(\x0b\x32\x17.chat.SyncSinceResponseH\x00\x12=\n\x12list_conversations\x18\x0e \x01(\x0b\x32\x1f.chat.ListConversationsResponseH\x00\x12\x39\n\x10get_conversation\x18\x0f \x01(\x0b\x32\x1d.chat.GetConversationResponseH\x00\x12<\n\x12list_sent_messages\x18\x10 \x01(\x0b\x32\x1e.chat.ListSentMessagesResponseH\x00\x42\x08\n\x06result2\xc8\t\n\x0b\x43hatService\x12?\n\nCreateUser\x12\x17.chat.CreateUserRequest\x1a\x18.chat.CreateUserResponse\x12\x30\n\x05Login\x12\x12.chat.LoginRequest\x1a\x13.chat.LoginResponse\x12\x33\n\x06Logout\x12\x13.chat.LogoutRequest\x1a\x14.chat.LogoutResponse\x12<\n\tListUsers\x12\x16.chat.ListUsersRequest\x1a\x17.chat.ListUsersResponse\x12\x42\n\x0bSendMessage\x12\x18.chat.SendMessageRequest\x1a\x19.chat.SendMessageResponse\x12\x45\n\x0cReadMessages\x12\x19.chat.ReadMessagesRequest\x1a\x1a.chat.ReadMessagesResponse\x12J\n\x12ReadMessagesStream\x12\x19.chat.ReadMessagesRequest\x1a\x17.chat.ReadMessagesChunk0\x01\x12K\n\x0e\x44\x65leteMessages\x12\x1b.chat.DeleteMessagesRequest\x1a\x1c.chat.DeleteMessagesResponse\x12?\n\nDeleteUser\x12\x17.chat.DeleteUserRequest\x1a\x18.chat.DeleteUserResponse\x12<\n\tSubscribe\x12\x16.chat.SubscribeRequest\x1a\x15.chat.IncomingMessage0\x01\x12<\n\tHeartbeat\x12\x16.chat.HeartbeatRequest\x1a\x17.chat.HeartbeatResponse\x12<\n\tSyncSince\x12\x16.chat.SyncSinceRequest\x1a\x17.chat.SyncSinceResponse\x12T\n\x11ListConversations\x12\x1e.chat.ListConversationsRequest\x1a\x1f.chat.ListConversationsResponse\x12N\n\x0fGetConversation\x12\x1c.chat.GetConversationRequest\x1a\x1d.chat.GetConversationResponse\x12Q\n\x10ListSentMessages\x12\x1d.chat.ListSentMessagesRequest\x1a\x1e.chat.ListSentMessagesResponse\x12\x42\n\rGetRaftStatus\x12\x17.chat.RaftStatusRequest\x1a\x18.chat.RaftStatusResponse\x12;\n\x0cStartProfile\x12\x14.chat.ProfileRequest\x1a\x15.chat.ProfileResponse\x12:\n\x07Session\x12\x14.chat.SessionRequest\x1a\x15.chat.SessionResponse(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -38,39 +38,79 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_LOGINREQUEST']._serialized_start=179
   _globals['_LOGINREQUEST']._serialized_end=236
   _globals['_LOGINRESPONSE']._serialized_start=238
-  _globals['_LOGINRESPONSE']._serialized_end=326
-  _globals['_LOGOUTREQUEST']._serialized_start=328
-  _globals['_LOGOUTREQUEST']._serialized_end=361
-  _globals['_LOGOUTRESPONSE']._serialized_start=363
-  _globals['_LOGOUTRESPONSE']._serialized_end=412
-  _globals['_LISTUSERSREQUEST']._serialized_start=414
-  _globals['_LISTUSERSREQUEST']._serialized_end=467
-  _globals['_USERINFO']._serialized_start=469
-  _globals['_USERINFO']._serialized_end=519
-  _globals['_LISTUSERSRESPONSE']._serialized_start=521
-  _globals['_LISTUSERSRESPONSE']._serialized_end=621
-  _globals['_SENDMESSAGEREQUEST']._serialized_start=623
-  _globals['_SENDMESSAGEREQUEST']._serialized_end=694
-  _globals['_SENDMESSAGERESPONSE']._serialized_start=696
-  _globals['_SENDMESSAGERESPONSE']._serialized_end=750
-  _globals['_READMESSAGESREQUEST']._serialized_start=752
-  _globals['_READMESSAGESREQUEST']._serialized_end=827
-  _globals['_CHATMESSAGE']._serialized_start=829
-  _globals['_CHATMESSAGE']._serialized_end=936
-  _globals['_READMESSAGESRESPONSE']._serialized_start=938
-  _globals['_READMESSAGESRESPONSE']._serialized_end=1030
-  _globals['_DELETEMESSAGESREQUEST']._serialized_start=1032
-  _globals['_DELETEMESSAGESREQUEST']._serialized_end=1094
-  _globals['_DELETEMESSAGESRESPONSE']._serialized_start=1096
-  _globals['_DELETEMESSAGESRESPONSE']._serialized_end=1176
-  _globals['_DELETEUSERREQUEST']._serialized_start=1178
-  _globals['_DELETEUSERREQUEST']._serialized_end=1215
-  _globals['_DELETEUSERRESPONSE']._serialized_start=1217
-  _globals['_DELETEUSERRESPONSE']._serialized_end=1270
-  _globals['_SUBSCRIBEREQUEST']._serialized_start=1272
-  _globals['_SUBSCRIBEREQUEST']._serialized_end=1308
-  _globals['_INCOMINGMESSAGE']._serialized_start=1310
-  _globals['_INCOMINGMESSAGE']._serialized_end=1360
-  _globals['_CHATSERVICE']._serialized_start=1363
-  _globals['_CHATSERVICE']._serialized_end=1949
+  _globals['_LOGINRESPONSE']._serialized_end=365
+  _globals['_LOGOUTREQUEST']._serialized_start=367
+  _globals['_LOGOUTREQUEST']._serialized_end=400
+  _globals['_LOGOUTRESPONSE']._serialized_start=402
+  _globals['_LOGOUTRESPONSE']._serialized_end=451
+  _globals['_LISTUSERSREQUEST']._serialized_start=453
+  _globals['_LISTUSERSREQUEST']._serialized_end=506
+  _globals['_USERINFO']._serialized_start=508
+  _globals['_USERINFO']._serialized_end=558
+  _globals['_LISTUSERSRESPONSE']._serialized_start=560
+  _globals['_LISTUSERSRESPONSE']._serialized_end=660
+  _globals['_SENDMESSAGEREQUEST']._serialized_start=662
+  _globals['_SENDMESSAGEREQUEST']._serialized_end=778
+  _globals['_SENDMESSAGERESPONSE']._serialized_start=780
+  _globals['_SENDMESSAGERESPONSE']._serialized_end=886
+  _globals['_READMESSAGESREQUEST']._serialized_start=889
+  _globals['_READMESSAGESREQUEST']._serialized_end=1041
+  _globals['_CHATMESSAGE']._serialized_start=1044
+  _globals['_CHATMESSAGE']._serialized_end=1178
+  _globals['_READMESSAGESRESPONSE']._serialized_start=1180
+  _globals['_READMESSAGESRESPONSE']._serialized_end=1272
+  _globals['_READMESSAGESCHUNK']._serialized_start=1274
+  _globals['_READMESSAGESCHUNK']._serialized_end=1363
+  _globals['_DELETEMESSAGESREQUEST']._serialized_start=1365
+  _globals['_DELETEMESSAGESREQUEST']._serialized_end=1427
+  _globals['_DELETEMESSAGESRESPONSE']._serialized_start=1429
+  _globals['_DELETEMESSAGESRESPONSE']._serialized_end=1509
+  _globals['_DELETEUSERREQUEST']._serialized_start=1511
+  _globals['_DELETEUSERREQUEST']._serialized_end=1548
+  _globals['_DELETEUSERRESPONSE']._serialized_start=1550
+  _globals['_DELETEUSERRESPONSE']._serialized_end=1603
+  _globals['_LISTCONVERSATIONSREQUEST']._serialized_start=1605
+  _globals['_LISTCONVERSATIONSREQUEST']._serialized_end=1680
+  _globals['_CONVERSATIONINFO']._serialized_start=1682
+  _globals['_CONVERSATIONINFO']._serialized_end=1807
+  _globals['_LISTCONVERSATIONSRESPONSE']._serialized_start=1810
+  _globals['_LISTCONVERSATIONSRESPONSE']._serialized_end=1938
+  _globals['_LISTSENTMESSAGESREQUEST']._serialized_start=1940
+  _globals['_LISTSENTMESSAGESREQUEST']._serialized_end=2014
+  _globals['_LISTSENTMESSAGESRESPONSE']._serialized_start=2016
+  _globals['_LISTSENTMESSAGESRESPONSE']._serialized_end=2133
+  _globals['_GETCONVERSATIONREQUEST']._serialized_start=2135
+  _globals['_GETCONVERSATIONREQUEST']._serialized_end=2222
+  _globals['_GETCONVERSATIONRESPONSE']._serialized_start=2224
+  _globals['_GETCONVERSATIONRESPONSE']._serialized_end=2340
+  _globals['_SYNCSINCEREQUEST']._serialized_start=2342
+  _globals['_SYNCSINCEREQUEST']._serialized_end=2409
+  _globals['_SYNCSINCERESPONSE']._serialized_start=2412
+  _globals['_SYNCSINCERESPONSE']._serialized_end=2671
+  _globals['_SUBSCRIBEREQUEST']._serialized_start=2673
+  _globals['_SUBSCRIBEREQUEST']._serialized_end=2751
+  _globals['_INCOMINGMESSAGE']._serialized_start=2754
+  _globals['_INCOMINGMESSAGE']._serialized_end=2882
+  _globals['_HEARTBEATREQUEST']._serialized_start=2884
+  _globals['_HEARTBEATREQUEST']._serialized_end=2920
+  _globals['_HEARTBEATRESPONSE']._serialized_start=2922
+  _globals['_HEARTBEATRESPONSE']._serialized_end=3017
+  _globals['_RAFTSTATUSREQUEST']._serialized_start=3019
+  _globals['_RAFTSTATUSREQUEST']._serialized_end=3038
+  _globals['_RAFTPEER']._serialized_start=3040
+  _globals['_RAFTPEER']._serialized_end=3140
+  _globals['_LATENCYSUMMARY']._serialized_start=3142
+  _globals['_LATENCYSUMMARY']._serialized_end=3251
+  _globals['_RAFTSTATUSRESPONSE']._serialized_start=3254
+  _globals['_RAFTSTATUSRESPONSE']._serialized_end=3570
+  _globals['_PROFILEREQUEST']._serialized_start=3572
+  _globals['_PROFILEREQUEST']._serialized_end=3671
+  _globals['_PROFILERESPONSE']._serialized_start=3673
+  _globals['_PROFILERESPONSE']._serialized_end=3737
+  _globals['_SESSIONREQUEST']._serialized_start=3740
+  _globals['_SESSIONREQUEST']._serialized_end=4475
+  _globals['_SESSIONRESPONSE']._serialized_start=4478
+  _globals['_SESSIONRESPONSE']._serialized_end=5242
+  _globals['_CHATSERVICE']._serialized_start=5245
+  _globals['_CHATSERVICE']._serialized_end=6469
 # @@protoc_insertion_point(module_scope)
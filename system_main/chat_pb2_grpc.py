@@ -68,6 +68,11 @@ class ChatServiceStub(object):
                 request_serializer=chat__pb2.ReadMessagesRequest.SerializeToString,
                 response_deserializer=chat__pb2.ReadMessagesResponse.FromString,
                 _registered_method=True)
+        self.ReadMessagesStream = channel.unary_stream(
+                '/chat.ChatService/ReadMessagesStream',
+                request_serializer=chat__pb2.ReadMessagesRequest.SerializeToString,
+                response_deserializer=chat__pb2.ReadMessagesChunk.FromString,
+                _registered_method=True)
         self.DeleteMessages = channel.unary_unary(
                 '/chat.ChatService/DeleteMessages',
                 request_serializer=chat__pb2.DeleteMessagesRequest.SerializeToString,
@@ -83,6 +88,46 @@ class ChatServiceStub(object):
                 request_serializer=chat__pb2.SubscribeRequest.SerializeToString,
                 response_deserializer=chat__pb2.IncomingMessage.FromString,
                 _registered_method=True)
+        self.Heartbeat = channel.unary_unary(
+                '/chat.ChatService/Heartbeat',
+                request_serializer=chat__pb2.HeartbeatRequest.SerializeToString,
+                response_deserializer=chat__pb2.HeartbeatResponse.FromString,
+                _registered_method=True)
+        self.SyncSince = channel.unary_unary(
+                '/chat.ChatService/SyncSince',
+                request_serializer=chat__pb2.SyncSinceRequest.SerializeToString,
+                response_deserializer=chat__pb2.SyncSinceResponse.FromString,
+                _registered_method=True)
+        self.ListConversations = channel.unary_unary(
+                '/chat.ChatService/ListConversations',
+                request_serializer=chat__pb2.ListConversationsRequest.SerializeToString,
+                response_deserializer=chat__pb2.ListConversationsResponse.FromString,
+                _registered_method=True)
+        self.GetConversation = channel.unary_unary(
+                '/chat.ChatService/GetConversation',
+                request_serializer=chat__pb2.GetConversationRequest.SerializeToString,
+                response_deserializer=chat__pb2.GetConversationResponse.FromString,
+                _registered_method=True)
+        self.ListSentMessages = channel.unary_unary(
+                '/chat.ChatService/ListSentMessages',
+                request_serializer=chat__pb2.ListSentMessagesRequest.SerializeToString,
+                response_deserializer=chat__pb2.ListSentMessagesResponse.FromString,
+                _registered_method=True)
+        self.GetRaftStatus = channel.unary_unary(
+                '/chat.ChatService/GetRaftStatus',
+                request_serializer=chat__pb2.RaftStatusRequest.SerializeToString,
+                response_deserializer=chat__pb2.RaftStatusResponse.FromString,
+                _registered_method=True)
+        self.StartProfile = channel.unary_unary(
+                '/chat.ChatService/StartProfile',
+                request_serializer=chat__pb2.ProfileRequest.SerializeToString,
+                response_deserializer=chat__pb2.ProfileResponse.FromString,
+                _registered_method=True)
+        self.Session = channel.stream_stream(
+                '/chat.ChatService/Session',
+                request_serializer=chat__pb2.SessionRequest.SerializeToString,
+                response_deserializer=chat__pb2.SessionResponse.FromString,
+                _registered_method=True)
 
 
 class ChatServiceServicer(object):
@@ -126,6 +171,13 @@ class ChatServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ReadMessagesStream(self, request, context):
+        """Streams a large inbox in fixed-size chunks instead of one response
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def DeleteMessages(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -145,6 +197,62 @@ class ChatServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def Heartbeat(self, request, context):
+        """Keeps a logged-in session alive; sessions without heartbeats expire
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SyncSince(self, request, context):
+        """Returns only what changed for the user after a change cursor, for clients catching up after a reconnect
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListConversations(self, request, context):
+        """The user's conversations, most recent first, with the last message and unread count of each
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetConversation(self, request, context):
+        """One page of the messages exchanged with a peer, both directions interleaved
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListSentMessages(self, request, context):
+        """One page of the messages the user has sent, e.g. to find ids for DeleteMessages
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetRaftStatus(self, request, context):
+        """This node's Raft role, commit progress, log size, queue depth, follower lag and latencies
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StartProfile(self, request, context):
+        """Profiles this node for a while, or for its next calls of a method, and writes the result to a file
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Session(self, request_iterator, context):
+        """Carries any of the operations above, plus pushes, over one long-lived stream
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ChatServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -178,6 +286,11 @@ def add_ChatServiceServicer_to_server(servicer, server):
                     request_deserializer=chat__pb2.ReadMessagesRequest.FromString,
                     response_serializer=chat__pb2.ReadMessagesResponse.SerializeToString,
             ),
+            'ReadMessagesStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.ReadMessagesStream,
+                    request_deserializer=chat__pb2.ReadMessagesRequest.FromString,
+                    response_serializer=chat__pb2.ReadMessagesChunk.SerializeToString,
+            ),
             'DeleteMessages': grpc.unary_unary_rpc_method_handler(
                     servicer.DeleteMessages,
                     request_deserializer=chat__pb2.DeleteMessagesRequest.FromString,
@@ -193,6 +306,46 @@ def add_ChatServiceServicer_to_server(servicer, server):
                     request_deserializer=chat__pb2.SubscribeRequest.FromString,
                     response_serializer=chat__pb2.IncomingMessage.SerializeToString,
             ),
+            'Heartbeat': grpc.unary_unary_rpc_method_handler(
+                    servicer.Heartbeat,
+                    request_deserializer=chat__pb2.HeartbeatRequest.FromString,
+                    response_serializer=chat__pb2.HeartbeatResponse.SerializeToString,
+            ),
+            'SyncSince': grpc.unary_unary_rpc_method_handler(
+                    servicer.SyncSince,
+                    request_deserializer=chat__pb2.SyncSinceRequest.FromString,
+                    response_serializer=chat__pb2.SyncSinceResponse.SerializeToString,
+            ),
+            'ListConversations': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListConversations,
+                    request_deserializer=chat__pb2.ListConversationsRequest.FromString,
+                    response_serializer=chat__pb2.ListConversationsResponse.SerializeToString,
+            ),
+            'GetConversation': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetConversation,
+                    request_deserializer=chat__pb2.GetConversationRequest.FromString,
+                    response_serializer=chat__pb2.GetConversationResponse.SerializeToString,
+            ),
+            'ListSentMessages': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListSentMessages,
+                    request_deserializer=chat__pb2.ListSentMessagesRequest.FromString,
+                    response_serializer=chat__pb2.ListSentMessagesResponse.SerializeToString,
+            ),
+            'GetRaftStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetRaftStatus,
+                    request_deserializer=chat__pb2.RaftStatusRequest.FromString,
+                    response_serializer=chat__pb2.RaftStatusResponse.SerializeToString,
+            ),
+            'StartProfile': grpc.unary_unary_rpc_method_handler(
+                    servicer.StartProfile,
+                    request_deserializer=chat__pb2.ProfileRequest.FromString,
+                    response_serializer=chat__pb2.ProfileResponse.SerializeToString,
+            ),
+            'Session': grpc.stream_stream_rpc_method_handler(
+                    servicer.Session,
+                    request_deserializer=chat__pb2.SessionRequest.FromString,
+                    response_serializer=chat__pb2.SessionResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'chat.ChatService', rpc_method_handlers)
@@ -368,6 +521,33 @@ class ChatService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ReadMessagesStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/chat.ChatService/ReadMessagesStream',
+            chat__pb2.ReadMessagesRequest.SerializeToString,
+            chat__pb2.ReadMessagesChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def DeleteMessages(request,
             target,
@@ -448,3 +628,219 @@ class ChatService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def Heartbeat(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.ChatService/Heartbeat',
+            chat__pb2.HeartbeatRequest.SerializeToString,
+            chat__pb2.HeartbeatResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SyncSince(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.ChatService/SyncSince',
+            chat__pb2.SyncSinceRequest.SerializeToString,
+            chat__pb2.SyncSinceResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListConversations(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.ChatService/ListConversations',
+            chat__pb2.ListConversationsRequest.SerializeToString,
+            chat__pb2.ListConversationsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetConversation(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.ChatService/GetConversation',
+            chat__pb2.GetConversationRequest.SerializeToString,
+            chat__pb2.GetConversationResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListSentMessages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.ChatService/ListSentMessages',
+            chat__pb2.ListSentMessagesRequest.SerializeToString,
+            chat__pb2.ListSentMessagesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetRaftStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.ChatService/GetRaftStatus',
+            chat__pb2.RaftStatusRequest.SerializeToString,
+            chat__pb2.RaftStatusResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StartProfile(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.ChatService/StartProfile',
+            chat__pb2.ProfileRequest.SerializeToString,
+            chat__pb2.ProfileResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Session(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/chat.ChatService/Session',
+            chat__pb2.SessionRequest.SerializeToString,
+            chat__pb2.SessionResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
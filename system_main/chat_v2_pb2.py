@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: chat_v2.proto
+# Protobuf Python Version: 5.29.0
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    5,
+    29,
+    0,
+    '',
+    'chat_v2.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rchat_v2.proto\x12\x07\x63hat.v2\x1a google/protobuf/field_mask.proto\"T\n\x11\x43reateUserRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x17\n\x0fhashed_password\x18\x02 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x03 \x01(\t\"W\n\x12\x43reateUserResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x42\n\n\x08_message\"9\n\x0cLoginRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x17\n\x0fhashed_password\x18\x02 \x01(\t\"\x8f\x01\n\rLoginResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x14\n\x0cunread_count\x18\x03 \x01(\x05\x12\x10\n\x08push_seq\x18\x04 \x01(\x03\x12\x13\n\x0bsync_cursor\x18\x05 \x01(\x03\x42\n\n\x08_message\"!\n\rLogoutRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"S\n\x0eLogoutResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x42\n\n\x08_message\"5\n\x10ListUsersRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0f\n\x07pattern\x18\x02 \x01(\t\"2\n\x08UserInfo\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x02 \x01(\t\"x\n\x11ListUsersResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12 \n\x05users\x18\x03 \x03(\x0b\x32\x11.chat.v2.UserInfoB\n\n\x08_message\"t\n\x12SendMessageRequest\x12\x0e\n\x06sender\x18\x01 \x01(\t\x12\x10\n\x08receiver\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x11\n\treceivers\x18\x04 \x03(\t\x12\x18\n\x10receiver_pattern\x18\x05 \x01(\t\"\x8c\x01\n\x13SendMessageResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x17\n\x0f\x64\x65livered_count\x18\x03 \x01(\x05\x12\x19\n\x11unknown_receivers\x18\x04 \x03(\tB\n\n\x08_message\"\xdd\x01\n\x13ReadMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x13\n\x0bonly_unread\x18\x02 \x01(\x08\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x12\n\nchunk_size\x18\x04 \x01(\x05\x12\x14\n\x0csender_table\x18\x05 \x01(\x08\x12-\n\tread_mask\x18\x06 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\x12\x13\n\x0b\x66rom_sender\x18\x07 \x01(\t\x12\x10\n\x08since_ms\x18\x08 \x01(\x03\x12\x10\n\x08until_ms\x18\t \x01(\x03\"\x96\x01\n\x0b\x43hatMessage\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x17\n\x0fsender_username\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x12\n\nsent_at_ms\x18\x04 \x01(\x03\x12\x0c\n\x04read\x18\x05 \x01(\x08\x12\x14\n\x0csender_index\x18\x06 \x01(\x05\x12\x19\n\x11receiver_username\x18\x07 \x01(\t\"\x92\x01\n\x14ReadMessagesResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12&\n\x08messages\x18\x03 \x03(\x0b\x32\x14.chat.v2.ChatMessage\x12\x0f\n\x07senders\x18\x04 \x03(\tB\n\n\x08_message\"\x9e\x01\n\x11ReadMessagesChunk\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12&\n\x08messages\x18\x03 \x03(\x0b\x32\x14.chat.v2.ChatMessage\x12\r\n\x05total\x18\x04 \x01(\x05\x12\x0f\n\x07senders\x18\x05 \x03(\tB\n\n\x08_message\">\n\x15\x44\x65leteMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x13\n\x0bmessage_ids\x18\x02 \x03(\x03\"r\n\x16\x44\x65leteMessagesResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x15\n\rdeleted_count\x18\x03 \x01(\x05\x42\n\n\x08_message\"%\n\x11\x44\x65leteUserRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"W\n\x12\x44\x65leteUserResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x42\n\n\x08_message\"K\n\x18ListConversationsRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0e\n\x06\x62\x65\x66ore\x18\x02 \x01(\x03\x12\r\n\x05limit\x18\x03 \x01(\x05\"z\n\x0c\x43onversation\x12\x0c\n\x04peer\x18\x01 \x01(\t\x12\x17\n\x0flast_message_id\x18\x02 \x01(\x03\x12\x17\n\x0flast_sent_at_ms\x18\x03 \x01(\x03\x12\x14\n\x0clast_content\x18\x04 \x01(\t\x12\x14\n\x0cunread_count\x18\x05 \x01(\x05\"\xa1\x01\n\x19ListConversationsResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12,\n\rconversations\x18\x03 \x03(\x0b\x32\x15.chat.v2.Conversation\x12\x13\n\x0bnext_before\x18\x04 \x01(\x03\x42\n\n\x08_message\"J\n\x17ListSentMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0e\n\x06\x63ursor\x18\x02 \x01(\x03\x12\r\n\x05limit\x18\x03 \x01(\x05\"\x9a\x01\n\x18ListSentMessagesResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12&\n\x08messages\x18\x03 \x03(\x0b\x32\x14.chat.v2.ChatMessage\x12\x13\n\x0bnext_cursor\x18\x04 \x01(\x03\x42\n\n\x08_message\"W\n\x16GetConversationRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0c\n\x04peer\x18\x02 \x01(\t\x12\x0e\n\x06\x63ursor\x18\x03 \x01(\x03\x12\r\n\x05limit\x18\x04 \x01(\x05\"\x99\x01\n\x17GetConversationResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12&\n\x08messages\x18\x03 \x03(\x0b\x32\x14.chat.v2.ChatMessage\x12\x13\n\x0bnext_cursor\x18\x04 \x01(\x03\x42\n\n\x08_message\"C\n\x10SyncSinceRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0e\n\x06\x63ursor\x18\x02 \x01(\x03\x12\r\n\x05limit\x18\x03 \x01(\x05\"\xab\x02\n\x11SyncSinceResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x0e\n\x06\x63ursor\x18\x03 \x01(\x03\x12\r\n\x05reset\x18\x04 \x01(\x08\x12\x10\n\x08has_more\x18\x05 \x01(\x08\x12*\n\x0cnew_messages\x18\x06 \x03(\x0b\x32\x14.chat.v2.ChatMessage\x12\x10\n\x08read_ids\x18\x07 \x03(\x03\x12\x13\n\x0b\x64\x65leted_ids\x18\x08 \x03(\x03\x12$\n\tnew_users\x18\t \x03(\x0b\x32\x11.chat.v2.UserInfo\x12\x15\n\rdeleted_users\x18\n \x03(\t\x12\x12\n\nread_up_to\x18\x0b \x01(\x03\x42\n\n\x08_message\"N\n\x10SubscribeRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x18\n\x0bresume_from\x18\x02 \x01(\x03H\x00\x88\x01\x01\x42\x0e\n\x0c_resume_from\"\x80\x01\n\x0fIncomingMessage\x12\x0e\n\x06sender\x18\x01 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x02 \x01(\t\x12\x12\n\nmessage_id\x18\x03 \x01(\x03\x12\x12\n\nsent_at_ms\x18\x04 \x01(\x03\x12\x17\n\x0f\x63oalesced_count\x18\x05 \x01(\x05\x12\x0b\n\x03seq\x18\x06 \x01(\x03\"$\n\x10HeartbeatRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"\x81\x01\n\x11HeartbeatResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x14\n\x0conline_count\x18\x03 \x01(\x05\x12\x13\n\x0bttl_seconds\x18\x04 \x01(\x05\x42\n\n\x08_message\"\x13\n\x11RaftStatusRequest\"d\n\x08RaftPeer\x12\x0f\n\x07\x61\x64\x64ress\x18\x01 \x01(\t\x12\x11\n\tconnected\x18\x02 \x01(\x08\x12\x13\n\x0bmatch_index\x18\x03 \x01(\x03\x12\x12\n\nnext_index\x18\x04 \x01(\x03\x12\x0b\n\x03lag\x18\x05 \x01(\x03\"m\n\x0eLatencySummary\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x03\x12\x13\n\x0bp50_seconds\x18\x03 \x01(\x01\x12\x13\n\x0bp99_seconds\x18\x04 \x01(\x01\x12\x14\n\x0cmean_seconds\x18\x05 \x01(\x01\"\xe4\x02\n\x12RaftStatusResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x0c\n\x04node\x18\x03 \x01(\t\x12\x0c\n\x04role\x18\x04 \x01(\t\x12\x0e\n\x06leader\x18\x05 \x01(\t\x12\x0c\n\x04term\x18\x06 \x01(\x03\x12\x14\n\x0c\x63ommit_index\x18\x07 \x01(\x03\x12\x14\n\x0clast_applied\x18\x08 \x01(\x03\x12\x13\n\x0blog_entries\x18\n \x01(\x03\x12 \n\x05peers\x18\x0e \x03(\x0b\x32\x11.chat.v2.RaftPeer\x12*\n\tlatencies\x18\x0f \x03(\x0b\x32\x17.chat.v2.LatencySummaryB\n\n\x08_messageJ\x04\x08\t\x10\nJ\x04\x08\x0b\x10\x0eR\x0elast_log_indexR\tlog_bytesR\x0bqueue_depthR\x0equeue_capacity\"c\n\x0eProfileRequest\x12\x0c\n\x04mode\x18\x01 \x01(\t\x12\x0f\n\x07seconds\x18\x02 \x01(\x01\x12\x0e\n\x06method\x18\x03 \x01(\t\x12\r\n\x05\x63\x61lls\x18\x04 \x01(\x05\x12\x13\n\x0binterval_ms\x18\x05 \x01(\x01\"b\n\x0fProfileResponse\x12\x1f\n\x06status\x18\x01 \x01(\x0e\x32\x0f.chat.v2.Status\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x0c\n\x04path\x18\x03 \x01(\tB\n\n\x08_message*D\n\x06Status\x12\x06\n\x02OK\x10\x00\x12\t\n\x05\x45RROR\x10\x01\x12\x13\n\x0fPARTIAL_SUCCESS\x10\x02\x12\x12\n\x0e\x41LREADY_EXISTS\x10\x03\x32\xf2\t\n\x0b\x43hatService\x12\x45\n\nCreateUser\x12\x1a.chat.v2.CreateUserRequest\x1a\x1b.chat.v2.CreateUserResponse\x12\x36\n\x05Login\x12\x15.chat.v2.LoginRequest\x1a\x16.chat.v2.LoginResponse\x12\x39\n\x06Logout\x12\x16.chat.v2.LogoutRequest\x1a\x17.chat.v2.LogoutResponse\x12\x42\n\tListUsers\x12\x19.chat.v2.ListUsersRequest\x1a\x1a.chat.v2.ListUsersResponse\x12H\n\x0bSendMessage\x12\x1b.chat.v2.SendMessageRequest\x1a\x1c.chat.v2.SendMessageResponse\x12K\n\x0cReadMessages\x12\x1c.chat.v2.ReadMessagesRequest\x1a\x1d.chat.v2.ReadMessagesResponse\x12P\n\x12ReadMessagesStream\x12\x1c.chat.v2.ReadMessagesRequest\x1a\x1a.chat.v2.ReadMessagesChunk0\x01\x12Q\n\x0e\x44\x65leteMessages\x12\x1e.chat.v2.DeleteMessagesRequest\x1a\x1f.chat.v2.DeleteMessagesResponse\x12\x45\n\nDeleteUser\x12\x1a.chat.v2.DeleteUserRequest\x1a\x1b.chat.v2.DeleteUserResponse\x12\x42\n\tSubscribe\x12\x19.chat.v2.SubscribeRequest\x1a\x18.chat.v2.IncomingMessage0\x01\x12\x42\n\tHeartbeat\x12\x19.chat.v2.HeartbeatRequest\x1a\x1a.chat.v2.HeartbeatResponse\x12\x42\n\tSyncSince\x12\x19.chat.v2.SyncSinceRequest\x1a\x1a.chat.v2.SyncSinceResponse\x12Z\n\x11ListConversations\x12!.chat.v2.ListConversationsRequest\x1a\".chat.v2.ListConversationsResponse\x12T\n\x0fGetConversation\x12\x1f.chat.v2.GetConversationRequest\x1a .chat.v2.GetConversationResponse\x12W\n\x10ListSentMessages\x12 .chat.v2.ListSentMessagesRequest\x1a!.chat.v2.ListSentMessagesResponse\x12H\n\rGetRaftStatus\x12\x1a.chat.v2.RaftStatusRequest\x1a\x1b.chat.v2.RaftStatusResponse\x12\x41\n\x0cStartProfile\x12\x17.chat.v2.ProfileRequest\x1a\x18.chat.v2.ProfileResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'chat_v2_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_STATUS']._serialized_start=4434
+  _globals['_STATUS']._serialized_end=4502
+  _globals['_CREATEUSERREQUEST']._serialized_start=60
+  _globals['_CREATEUSERREQUEST']._serialized_end=144
+  _globals['_CREATEUSERRESPONSE']._serialized_start=146
+  _globals['_CREATEUSERRESPONSE']._serialized_end=233
+  _globals['_LOGINREQUEST']._serialized_start=235
+  _globals['_LOGINREQUEST']._serialized_end=292
+  _globals['_LOGINRESPONSE']._serialized_start=295
+  _globals['_LOGINRESPONSE']._serialized_end=438
+  _globals['_LOGOUTREQUEST']._serialized_start=440
+  _globals['_LOGOUTREQUEST']._serialized_end=473
+  _globals['_LOGOUTRESPONSE']._serialized_start=475
+  _globals['_LOGOUTRESPONSE']._serialized_end=558
+  _globals['_LISTUSERSREQUEST']._serialized_start=560
+  _globals['_LISTUSERSREQUEST']._serialized_end=613
+  _globals['_USERINFO']._serialized_start=615
+  _globals['_USERINFO']._serialized_end=665
+  _globals['_LISTUSERSRESPONSE']._serialized_start=667
+  _globals['_LISTUSERSRESPONSE']._serialized_end=787
+  _globals['_SENDMESSAGEREQUEST']._serialized_start=789
+  _globals['_SENDMESSAGEREQUEST']._serialized_end=905
+  _globals['_SENDMESSAGERESPONSE']._serialized_start=908
+  _globals['_SENDMESSAGERESPONSE']._serialized_end=1048
+  _globals['_READMESSAGESREQUEST']._serialized_start=1051
+  _globals['_READMESSAGESREQUEST']._serialized_end=1272
+  _globals['_CHATMESSAGE']._serialized_start=1275
+  _globals['_CHATMESSAGE']._serialized_end=1425
+  _globals['_READMESSAGESRESPONSE']._serialized_start=1428
+  _globals['_READMESSAGESRESPONSE']._serialized_end=1574
+  _globals['_READMESSAGESCHUNK']._serialized_start=1577
+  _globals['_READMESSAGESCHUNK']._serialized_end=1735
+  _globals['_DELETEMESSAGESREQUEST']._serialized_start=1737
+  _globals['_DELETEMESSAGESREQUEST']._serialized_end=1799
+  _globals['_DELETEMESSAGESRESPONSE']._serialized_start=1801
+  _globals['_DELETEMESSAGESRESPONSE']._serialized_end=1915
+  _globals['_DELETEUSERREQUEST']._serialized_start=1917
+  _globals['_DELETEUSERREQUEST']._serialized_end=1954
+  _globals['_DELETEUSERRESPONSE']._serialized_start=1956
+  _globals['_DELETEUSERRESPONSE']._serialized_end=2043
+  _globals['_LISTCONVERSATIONSREQUEST']._serialized_start=2045
+  _globals['_LISTCONVERSATIONSREQUEST']._serialized_end=2120
+  _globals['_CONVERSATION']._serialized_start=2122
+  _globals['_CONVERSATION']._serialized_end=2244
+  _globals['_LISTCONVERSATIONSRESPONSE']._serialized_start=2247
+  _globals['_LISTCONVERSATIONSRESPONSE']._serialized_end=2408
+  _globals['_LISTSENTMESSAGESREQUEST']._serialized_start=2410
+  _globals['_LISTSENTMESSAGESREQUEST']._serialized_end=2484
+  _globals['_LISTSENTMESSAGESRESPONSE']._serialized_start=2487
+  _globals['_LISTSENTMESSAGESRESPONSE']._serialized_end=2641
+  _globals['_GETCONVERSATIONREQUEST']._serialized_start=2643
+  _globals['_GETCONVERSATIONREQUEST']._serialized_end=2730
+  _globals['_GETCONVERSATIONRESPONSE']._serialized_start=2733
+  _globals['_GETCONVERSATIONRESPONSE']._serialized_end=2886
+  _globals['_SYNCSINCEREQUEST']._serialized_start=2888
+  _globals['_SYNCSINCEREQUEST']._serialized_end=2955
+  _globals['_SYNCSINCERESPONSE']._serialized_start=2958
+  _globals['_SYNCSINCERESPONSE']._serialized_end=3257
+  _globals['_SUBSCRIBEREQUEST']._serialized_start=3259
+  _globals['_SUBSCRIBEREQUEST']._serialized_end=3337
+  _globals['_INCOMINGMESSAGE']._serialized_start=3340
+  _globals['_INCOMINGMESSAGE']._serialized_end=3468
+  _globals['_HEARTBEATREQUEST']._serialized_start=3470
+  _globals['_HEARTBEATREQUEST']._serialized_end=3506
+  _globals['_HEARTBEATRESPONSE']._serialized_start=3509
+  _globals['_HEARTBEATRESPONSE']._serialized_end=3638
+  _globals['_RAFTSTATUSREQUEST']._serialized_start=3640
+  _globals['_RAFTSTATUSREQUEST']._serialized_end=3659
+  _globals['_RAFTPEER']._serialized_start=3661
+  _globals['_RAFTPEER']._serialized_end=3761
+  _globals['_LATENCYSUMMARY']._serialized_start=3763
+  _globals['_LATENCYSUMMARY']._serialized_end=3872
+  _globals['_RAFTSTATUSRESPONSE']._serialized_start=3875
+  _globals['_RAFTSTATUSRESPONSE']._serialized_end=4231
+  _globals['_PROFILEREQUEST']._serialized_start=4233
+  _globals['_PROFILEREQUEST']._serialized_end=4332
+  _globals['_PROFILERESPONSE']._serialized_start=4334
+  _globals['_PROFILERESPONSE']._serialized_end=4432
+  _globals['_CHATSERVICE']._serialized_start=4505
+  _globals['_CHATSERVICE']._serialized_end=5771
+# @@protoc_insertion_point(module_scope)
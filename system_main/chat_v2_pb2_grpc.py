@@ -0,0 +1,793 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+# #uncomment if running a testing file in unittests
+# from system_main import chat_v2_pb2 as chat__v2__pb2
+import chat_v2_pb2 as chat__v2__pb2
+
+GRPC_GENERATED_VERSION = '1.70.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + f' but the generated code in chat_v2_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class ChatServiceStub(object):
+    """---------- Service Definition ---------- //
+
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.CreateUser = channel.unary_unary(
+                '/chat.v2.ChatService/CreateUser',
+                request_serializer=chat__v2__pb2.CreateUserRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.CreateUserResponse.FromString,
+                _registered_method=True)
+        self.Login = channel.unary_unary(
+                '/chat.v2.ChatService/Login',
+                request_serializer=chat__v2__pb2.LoginRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.LoginResponse.FromString,
+                _registered_method=True)
+        self.Logout = channel.unary_unary(
+                '/chat.v2.ChatService/Logout',
+                request_serializer=chat__v2__pb2.LogoutRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.LogoutResponse.FromString,
+                _registered_method=True)
+        self.ListUsers = channel.unary_unary(
+                '/chat.v2.ChatService/ListUsers',
+                request_serializer=chat__v2__pb2.ListUsersRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.ListUsersResponse.FromString,
+                _registered_method=True)
+        self.SendMessage = channel.unary_unary(
+                '/chat.v2.ChatService/SendMessage',
+                request_serializer=chat__v2__pb2.SendMessageRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.SendMessageResponse.FromString,
+                _registered_method=True)
+        self.ReadMessages = channel.unary_unary(
+                '/chat.v2.ChatService/ReadMessages',
+                request_serializer=chat__v2__pb2.ReadMessagesRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.ReadMessagesResponse.FromString,
+                _registered_method=True)
+        self.ReadMessagesStream = channel.unary_stream(
+                '/chat.v2.ChatService/ReadMessagesStream',
+                request_serializer=chat__v2__pb2.ReadMessagesRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.ReadMessagesChunk.FromString,
+                _registered_method=True)
+        self.DeleteMessages = channel.unary_unary(
+                '/chat.v2.ChatService/DeleteMessages',
+                request_serializer=chat__v2__pb2.DeleteMessagesRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.DeleteMessagesResponse.FromString,
+                _registered_method=True)
+        self.DeleteUser = channel.unary_unary(
+                '/chat.v2.ChatService/DeleteUser',
+                request_serializer=chat__v2__pb2.DeleteUserRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.DeleteUserResponse.FromString,
+                _registered_method=True)
+        self.Subscribe = channel.unary_stream(
+                '/chat.v2.ChatService/Subscribe',
+                request_serializer=chat__v2__pb2.SubscribeRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.IncomingMessage.FromString,
+                _registered_method=True)
+        self.Heartbeat = channel.unary_unary(
+                '/chat.v2.ChatService/Heartbeat',
+                request_serializer=chat__v2__pb2.HeartbeatRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.HeartbeatResponse.FromString,
+                _registered_method=True)
+        self.SyncSince = channel.unary_unary(
+                '/chat.v2.ChatService/SyncSince',
+                request_serializer=chat__v2__pb2.SyncSinceRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.SyncSinceResponse.FromString,
+                _registered_method=True)
+        self.ListConversations = channel.unary_unary(
+                '/chat.v2.ChatService/ListConversations',
+                request_serializer=chat__v2__pb2.ListConversationsRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.ListConversationsResponse.FromString,
+                _registered_method=True)
+        self.GetConversation = channel.unary_unary(
+                '/chat.v2.ChatService/GetConversation',
+                request_serializer=chat__v2__pb2.GetConversationRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.GetConversationResponse.FromString,
+                _registered_method=True)
+        self.ListSentMessages = channel.unary_unary(
+                '/chat.v2.ChatService/ListSentMessages',
+                request_serializer=chat__v2__pb2.ListSentMessagesRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.ListSentMessagesResponse.FromString,
+                _registered_method=True)
+        self.GetRaftStatus = channel.unary_unary(
+                '/chat.v2.ChatService/GetRaftStatus',
+                request_serializer=chat__v2__pb2.RaftStatusRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.RaftStatusResponse.FromString,
+                _registered_method=True)
+        self.StartProfile = channel.unary_unary(
+                '/chat.v2.ChatService/StartProfile',
+                request_serializer=chat__v2__pb2.ProfileRequest.SerializeToString,
+                response_deserializer=chat__v2__pb2.ProfileResponse.FromString,
+                _registered_method=True)
+
+
+class ChatServiceServicer(object):
+    """---------- Service Definition ---------- //
+
+    """
+
+    def CreateUser(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Login(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Logout(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListUsers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SendMessage(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReadMessages(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReadMessagesStream(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DeleteMessages(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DeleteUser(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Subscribe(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Heartbeat(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SyncSince(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListConversations(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetConversation(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListSentMessages(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetRaftStatus(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StartProfile(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_ChatServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'CreateUser': grpc.unary_unary_rpc_method_handler(
+                    servicer.CreateUser,
+                    request_deserializer=chat__v2__pb2.CreateUserRequest.FromString,
+                    response_serializer=chat__v2__pb2.CreateUserResponse.SerializeToString,
+            ),
+            'Login': grpc.unary_unary_rpc_method_handler(
+                    servicer.Login,
+                    request_deserializer=chat__v2__pb2.LoginRequest.FromString,
+                    response_serializer=chat__v2__pb2.LoginResponse.SerializeToString,
+            ),
+            'Logout': grpc.unary_unary_rpc_method_handler(
+                    servicer.Logout,
+                    request_deserializer=chat__v2__pb2.LogoutRequest.FromString,
+                    response_serializer=chat__v2__pb2.LogoutResponse.SerializeToString,
+            ),
+            'ListUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListUsers,
+                    request_deserializer=chat__v2__pb2.ListUsersRequest.FromString,
+                    response_serializer=chat__v2__pb2.ListUsersResponse.SerializeToString,
+            ),
+            'SendMessage': grpc.unary_unary_rpc_method_handler(
+                    servicer.SendMessage,
+                    request_deserializer=chat__v2__pb2.SendMessageRequest.FromString,
+                    response_serializer=chat__v2__pb2.SendMessageResponse.SerializeToString,
+            ),
+            'ReadMessages': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReadMessages,
+                    request_deserializer=chat__v2__pb2.ReadMessagesRequest.FromString,
+                    response_serializer=chat__v2__pb2.ReadMessagesResponse.SerializeToString,
+            ),
+            'ReadMessagesStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.ReadMessagesStream,
+                    request_deserializer=chat__v2__pb2.ReadMessagesRequest.FromString,
+                    response_serializer=chat__v2__pb2.ReadMessagesChunk.SerializeToString,
+            ),
+            'DeleteMessages': grpc.unary_unary_rpc_method_handler(
+                    servicer.DeleteMessages,
+                    request_deserializer=chat__v2__pb2.DeleteMessagesRequest.FromString,
+                    response_serializer=chat__v2__pb2.DeleteMessagesResponse.SerializeToString,
+            ),
+            'DeleteUser': grpc.unary_unary_rpc_method_handler(
+                    servicer.DeleteUser,
+                    request_deserializer=chat__v2__pb2.DeleteUserRequest.FromString,
+                    response_serializer=chat__v2__pb2.DeleteUserResponse.SerializeToString,
+            ),
+            'Subscribe': grpc.unary_stream_rpc_method_handler(
+                    servicer.Subscribe,
+                    request_deserializer=chat__v2__pb2.SubscribeRequest.FromString,
+                    response_serializer=chat__v2__pb2.IncomingMessage.SerializeToString,
+            ),
+            'Heartbeat': grpc.unary_unary_rpc_method_handler(
+                    servicer.Heartbeat,
+                    request_deserializer=chat__v2__pb2.HeartbeatRequest.FromString,
+                    response_serializer=chat__v2__pb2.HeartbeatResponse.SerializeToString,
+            ),
+            'SyncSince': grpc.unary_unary_rpc_method_handler(
+                    servicer.SyncSince,
+                    request_deserializer=chat__v2__pb2.SyncSinceRequest.FromString,
+                    response_serializer=chat__v2__pb2.SyncSinceResponse.SerializeToString,
+            ),
+            'ListConversations': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListConversations,
+                    request_deserializer=chat__v2__pb2.ListConversationsRequest.FromString,
+                    response_serializer=chat__v2__pb2.ListConversationsResponse.SerializeToString,
+            ),
+            'GetConversation': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetConversation,
+                    request_deserializer=chat__v2__pb2.GetConversationRequest.FromString,
+                    response_serializer=chat__v2__pb2.GetConversationResponse.SerializeToString,
+            ),
+            'ListSentMessages': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListSentMessages,
+                    request_deserializer=chat__v2__pb2.ListSentMessagesRequest.FromString,
+                    response_serializer=chat__v2__pb2.ListSentMessagesResponse.SerializeToString,
+            ),
+            'GetRaftStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetRaftStatus,
+                    request_deserializer=chat__v2__pb2.RaftStatusRequest.FromString,
+                    response_serializer=chat__v2__pb2.RaftStatusResponse.SerializeToString,
+            ),
+            'StartProfile': grpc.unary_unary_rpc_method_handler(
+                    servicer.StartProfile,
+                    request_deserializer=chat__v2__pb2.ProfileRequest.FromString,
+                    response_serializer=chat__v2__pb2.ProfileResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'chat.v2.ChatService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('chat.v2.ChatService', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class ChatService(object):
+    """---------- Service Definition ---------- //
+
+    """
+
+    @staticmethod
+    def CreateUser(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/CreateUser',
+            chat__v2__pb2.CreateUserRequest.SerializeToString,
+            chat__v2__pb2.CreateUserResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Login(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/Login',
+            chat__v2__pb2.LoginRequest.SerializeToString,
+            chat__v2__pb2.LoginResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Logout(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/Logout',
+            chat__v2__pb2.LogoutRequest.SerializeToString,
+            chat__v2__pb2.LogoutResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/ListUsers',
+            chat__v2__pb2.ListUsersRequest.SerializeToString,
+            chat__v2__pb2.ListUsersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SendMessage(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/SendMessage',
+            chat__v2__pb2.SendMessageRequest.SerializeToString,
+            chat__v2__pb2.SendMessageResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReadMessages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/ReadMessages',
+            chat__v2__pb2.ReadMessagesRequest.SerializeToString,
+            chat__v2__pb2.ReadMessagesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReadMessagesStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/chat.v2.ChatService/ReadMessagesStream',
+            chat__v2__pb2.ReadMessagesRequest.SerializeToString,
+            chat__v2__pb2.ReadMessagesChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DeleteMessages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/DeleteMessages',
+            chat__v2__pb2.DeleteMessagesRequest.SerializeToString,
+            chat__v2__pb2.DeleteMessagesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DeleteUser(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/DeleteUser',
+            chat__v2__pb2.DeleteUserRequest.SerializeToString,
+            chat__v2__pb2.DeleteUserResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Subscribe(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/chat.v2.ChatService/Subscribe',
+            chat__v2__pb2.SubscribeRequest.SerializeToString,
+            chat__v2__pb2.IncomingMessage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Heartbeat(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/Heartbeat',
+            chat__v2__pb2.HeartbeatRequest.SerializeToString,
+            chat__v2__pb2.HeartbeatResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SyncSince(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/SyncSince',
+            chat__v2__pb2.SyncSinceRequest.SerializeToString,
+            chat__v2__pb2.SyncSinceResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListConversations(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/ListConversations',
+            chat__v2__pb2.ListConversationsRequest.SerializeToString,
+            chat__v2__pb2.ListConversationsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetConversation(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/GetConversation',
+            chat__v2__pb2.GetConversationRequest.SerializeToString,
+            chat__v2__pb2.GetConversationResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListSentMessages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/ListSentMessages',
+            chat__v2__pb2.ListSentMessagesRequest.SerializeToString,
+            chat__v2__pb2.ListSentMessagesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetRaftStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/GetRaftStatus',
+            chat__v2__pb2.RaftStatusRequest.SerializeToString,
+            chat__v2__pb2.RaftStatusResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StartProfile(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.v2.ChatService/StartProfile',
+            chat__v2__pb2.ProfileRequest.SerializeToString,
+            chat__v2__pb2.ProfileResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
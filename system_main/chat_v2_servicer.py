@@ -0,0 +1,367 @@
+"""
+chat_v2_servicer.py
+
+Serves the compact v2 wire schema (chat_v2.proto) next to v1 on the same
+server. The v2 servicer holds no state of its own: every call is handled by
+the node's FaultTolerantChatServicer, and only the encoding differs.
+
+- Calls whose v1 and v2 requests are wire-identical are decoded as v1
+  requests and passed to the v1 handler. The v1 response is then re-encoded:
+  the status string becomes an enum, and the message is kept only when the
+  status is not OK.
+- Calls that carry message ids or timestamps (ReadMessages,
+  ReadMessagesStream, DeleteMessages, Subscribe, SyncSince, ListConversations)
+  use the servicer's shared helpers directly. That way int64 ids never pass
+  through a v1 int32 field.
+
+ReadMessages and ReadMessagesStream can also trim their messages: a
+read_mask keeps only the listed ChatMessage fields, and sender_table sends
+each distinct sender name once, with messages referring to it by index.
+Together they let a client list message headers without the contents.
+"""
+
+import datetime
+
+# #uncomment if running a testing file in unittests
+# from system_main import chat_pb2
+# from system_main import chat_v2_pb2
+# from system_main import chat_v2_pb2_grpc
+import chat_pb2
+import chat_v2_pb2
+import chat_v2_pb2_grpc
+from raft_db import SYNC_CHANGES_LIMIT
+
+# v1 status strings -> v2 Status values
+STATUS_CODES = {
+    "success": chat_v2_pb2.OK,
+    "error": chat_v2_pb2.ERROR,
+    "partial_success": chat_v2_pb2.PARTIAL_SUCCESS,
+    "user_exists": chat_v2_pb2.ALREADY_EXISTS,
+}
+
+
+def timestamp_ms(value):
+    """
+    Convert a stored ISO-8601 message timestamp to epoch milliseconds.
+
+    :param value: The timestamp string from the messages table.
+    :return: Milliseconds since the epoch, or 0 if the value cannot be parsed.
+    """
+    try:
+        return int(datetime.datetime.fromisoformat(value).timestamp() * 1000)
+    except (TypeError, ValueError):
+        return 0
+
+
+def v1_request(request, v1_class):
+    """
+    Decode a v2 request as its v1 counterpart. Only used for request messages
+    whose field numbers and types are the same in both schemas.
+
+    :param request: The v2 request message.
+    :param v1_class: The matching chat_pb2 message class.
+    :return: The equivalent v1 request.
+    """
+    return v1_class.FromString(request.SerializeToString())
+
+
+def status_fields(v1_response):
+    """
+    :param v1_response: A v1 response with string status and message fields.
+    :return: A dict with the v2 status, plus the message unless the status is OK.
+    """
+    status = STATUS_CODES.get(v1_response.status, chat_v2_pb2.ERROR)
+    fields = {"status": status}
+    if status != chat_v2_pb2.OK and v1_response.message:
+        fields["message"] = v1_response.message
+    return fields
+
+
+MESSAGE_FIELDS = ("id", "sender_username", "content", "sent_at_ms", "read", "receiver_username")
+
+
+class MessageEncoder:
+    """
+    Builds the ChatMessages of one ReadMessages or ReadMessagesStream call,
+    following the request's read_mask and sender_table.
+    """
+
+    def __init__(self, request):
+        """
+        :param request: The v2 ReadMessagesRequest.
+        :raises ValueError: If the read_mask names a field ChatMessage does not have.
+        """
+        fields = set(request.read_mask.paths) or set(MESSAGE_FIELDS)
+        unknown = fields.difference(MESSAGE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown read_mask field(s): {', '.join(sorted(unknown))}.")
+        self.fields = fields
+        self.sender_table = request.sender_table
+        self.sender_indexes = {}  # sender username -> index in the call's sender table
+
+    def encode(self, rows):
+        """
+        :param rows: sqlite3.Rows from the messages queries.
+        :return: (list of v2 ChatMessages, list of senders added to the table by these rows)
+        """
+        fields = self.fields
+        new_senders = []
+        messages = []
+        for row in rows:
+            msg = chat_v2_pb2.ChatMessage()
+            if "id" in fields:
+                msg.id = row["id"]
+            if "sender_username" in fields:
+                sender = row["sender_username"]
+                if self.sender_table:
+                    index = self.sender_indexes.get(sender)
+                    if index is None:
+                        index = self.sender_indexes[sender] = len(self.sender_indexes)
+                        new_senders.append(sender)
+                    msg.sender_index = index
+                else:
+                    msg.sender_username = sender
+            if "content" in fields:
+                msg.content = row["content"]
+            if "sent_at_ms" in fields:
+                msg.sent_at_ms = timestamp_ms(row["timestamp"])
+            if "read" in fields:
+                msg.read = bool(row["read_status"])
+            if "receiver_username" in fields and "receiver_username" in row.keys():
+                msg.receiver_username = row["receiver_username"]
+            messages.append(msg)
+        return messages, new_senders
+
+
+def incoming_message(message):
+    """
+    :param message: A v1 IncomingMessage push.
+    :return: The v2 IncomingMessage with the same fields.
+    """
+    return chat_v2_pb2.IncomingMessage(
+        sender=message.sender,
+        content=message.content,
+        message_id=message.message_id,
+        sent_at_ms=message.sent_at_ms,
+        coalesced_count=message.coalesced_count,
+        seq=message.seq,
+    )
+
+
+class ChatServiceV2Servicer(chat_v2_pb2_grpc.ChatServiceServicer):
+    """
+    The chat.v2.ChatService API on top of a FaultTolerantChatServicer.
+    """
+
+    NOT_LOGGED_IN = "User not logged in."
+
+    def __init__(self, servicer):
+        """
+        :param servicer: The node's FaultTolerantChatServicer.
+        """
+        self.servicer = servicer
+
+    def CreateUser(self, request, context):
+        """
+        v2 CreateUser, handled by the v1 handler.
+        """
+        resp = self.servicer.CreateUser(v1_request(request, chat_pb2.CreateUserRequest), context)
+        return chat_v2_pb2.CreateUserResponse(**status_fields(resp))
+
+    def Login(self, request, context):
+        """
+        v2 Login, handled by the v1 handler.
+        """
+        resp = self.servicer.Login(v1_request(request, chat_pb2.LoginRequest), context)
+        return chat_v2_pb2.LoginResponse(unread_count=resp.unread_count, push_seq=resp.push_seq,
+                                         sync_cursor=resp.sync_cursor, **status_fields(resp))
+
+    def Logout(self, request, context):
+        """
+        v2 Logout, handled by the v1 handler.
+        """
+        resp = self.servicer.Logout(v1_request(request, chat_pb2.LogoutRequest), context)
+        return chat_v2_pb2.LogoutResponse(**status_fields(resp))
+
+    def ListUsers(self, request, context):
+        """
+        v2 ListUsers, handled by the v1 handler.
+        """
+        resp = self.servicer.ListUsers(v1_request(request, chat_pb2.ListUsersRequest), context)
+        users = [chat_v2_pb2.UserInfo(username=u.username, display_name=u.display_name) for u in resp.users]
+        return chat_v2_pb2.ListUsersResponse(users=users, **status_fields(resp))
+
+    def SendMessage(self, request, context):
+        """
+        v2 SendMessage, handled by the v1 handler.
+        """
+        resp = self.servicer.SendMessage(v1_request(request, chat_pb2.SendMessageRequest), context)
+        return chat_v2_pb2.SendMessageResponse(delivered_count=resp.delivered_count,
+                                               unknown_receivers=resp.unknown_receivers,
+                                               **status_fields(resp))
+
+    def ReadMessages(self, request, context):
+        """
+        v2 ReadMessages: the inbox as v2 ChatMessages, marked as read.
+        """
+        if not self.servicer.is_session_active(request.username):
+            return chat_v2_pb2.ReadMessagesResponse(status=chat_v2_pb2.ERROR, message=self.NOT_LOGGED_IN)
+        try:
+            encoder = MessageEncoder(request)
+        except ValueError as e:
+            return chat_v2_pb2.ReadMessagesResponse(status=chat_v2_pb2.ERROR, message=str(e))
+        limit = request.limit if request.limit > 0 else None
+        rows, all_marked = self.servicer.read_inbox(request.username, request.only_unread, limit,
+                                                    self.servicer.read_filters(request))
+        messages, senders = encoder.encode(rows)
+        resp = chat_v2_pb2.ReadMessagesResponse(messages=messages, senders=senders)
+        if not all_marked:
+            resp.status = chat_v2_pb2.PARTIAL_SUCCESS
+            resp.message = "Some messages could not be marked as read."
+        return resp
+
+    def ReadMessagesStream(self, request, context):
+        """
+        v2 ReadMessagesStream: the inbox in chunks, then a last chunk with the total.
+        """
+        if not self.servicer.is_session_active(request.username):
+            yield chat_v2_pb2.ReadMessagesChunk(status=chat_v2_pb2.ERROR, message=self.NOT_LOGGED_IN)
+            return
+        try:
+            encoder = MessageEncoder(request)
+        except ValueError as e:
+            yield chat_v2_pb2.ReadMessagesChunk(status=chat_v2_pb2.ERROR, message=str(e))
+            return
+        limit = request.limit if request.limit > 0 else None
+        outcome = {}
+        for rows in self.servicer.inbox_chunks(request.username, request.only_unread, limit,
+                                               request.chunk_size, outcome, self.servicer.read_filters(request)):
+            messages, senders = encoder.encode(rows)
+            yield chat_v2_pb2.ReadMessagesChunk(messages=messages, senders=senders)
+
+        last = chat_v2_pb2.ReadMessagesChunk(total=outcome["total"])
+        if not outcome["all_marked"]:
+            last.status = chat_v2_pb2.PARTIAL_SUCCESS
+            last.message = "Some messages could not be marked as read."
+        yield last
+
+    def DeleteMessages(self, request, context):
+        """
+        v2 DeleteMessages with int64 message ids.
+        """
+        if not self.servicer.is_session_active(request.username):
+            return chat_v2_pb2.DeleteMessagesResponse(status=chat_v2_pb2.ERROR, message=self.NOT_LOGGED_IN)
+        deleted_count = self.servicer.delete_messages(request.username, request.message_ids)
+        if deleted_count == 0:
+            return chat_v2_pb2.DeleteMessagesResponse(status=chat_v2_pb2.ERROR, message="No messages deleted.")
+        return chat_v2_pb2.DeleteMessagesResponse(deleted_count=deleted_count)
+
+    def DeleteUser(self, request, context):
+        """
+        v2 DeleteUser, handled by the v1 handler.
+        """
+        resp = self.servicer.DeleteUser(v1_request(request, chat_pb2.DeleteUserRequest), context)
+        return chat_v2_pb2.DeleteUserResponse(**status_fields(resp))
+
+    async def Subscribe(self, request, context):
+        """
+        v2 Subscribe: the same pushes as v1, written as v2 IncomingMessages.
+        """
+        resume_from = request.resume_from if request.HasField("resume_from") else None
+        await self.servicer.serve_subscription(request.username, resume_from, context, convert=incoming_message)
+
+    def Heartbeat(self, request, context):
+        """
+        v2 Heartbeat, handled by the v1 handler.
+        """
+        resp = self.servicer.Heartbeat(v1_request(request, chat_pb2.HeartbeatRequest), context)
+        return chat_v2_pb2.HeartbeatResponse(online_count=resp.online_count, ttl_seconds=resp.ttl_seconds,
+                                             **status_fields(resp))
+
+    def SyncSince(self, request, context):
+        """
+        v2 SyncSince: the changes after the client's cursor, with int64 ids.
+        """
+        if not self.servicer.is_session_active(request.username):
+            return chat_v2_pb2.SyncSinceResponse(status=chat_v2_pb2.ERROR, message=self.NOT_LOGGED_IN)
+        limit = request.limit if request.limit > 0 else SYNC_CHANGES_LIMIT
+        changes = self.servicer.raft_db.get_changes_since(request.username, request.cursor, limit)
+        if changes is None:
+            return chat_v2_pb2.SyncSinceResponse(status=chat_v2_pb2.ERROR, message="User not found.")
+        # Every ChatMessage field, with sender names inline
+        messages, _ = MessageEncoder(chat_v2_pb2.ReadMessagesRequest()).encode(changes["messages"])
+        return chat_v2_pb2.SyncSinceResponse(
+            cursor=changes["cursor"],
+            reset=changes["reset"],
+            has_more=changes["has_more"],
+            new_messages=messages,
+            read_up_to=changes["read_up_to"],
+            read_ids=changes["read_ids"],
+            deleted_ids=changes["deleted_ids"],
+            new_users=[chat_v2_pb2.UserInfo(username=u, display_name=d) for u, d in changes["users"]],
+            deleted_users=changes["deleted_users"],
+        )
+
+    def ListConversations(self, request, context):
+        """
+        v2 ListConversations with epoch-millisecond timestamps.
+        """
+        if not self.servicer.is_session_active(request.username):
+            return chat_v2_pb2.ListConversationsResponse(status=chat_v2_pb2.ERROR, message=self.NOT_LOGGED_IN)
+        rows, next_before = self.servicer.conversation_page(request.username, request.before, request.limit)
+        return chat_v2_pb2.ListConversationsResponse(
+            conversations=[chat_v2_pb2.Conversation(
+                peer=row["peer_username"],
+                last_message_id=row["last_message_id"],
+                last_sent_at_ms=timestamp_ms(row["last_timestamp"]),
+                last_content=row["last_content"],
+                unread_count=row["unread_count"],
+            ) for row in rows],
+            next_before=next_before,
+        )
+
+    def GetConversation(self, request, context):
+        """
+        v2 GetConversation: one page of the thread with a peer, with int64 ids.
+        """
+        if not self.servicer.is_session_active(request.username):
+            return chat_v2_pb2.GetConversationResponse(status=chat_v2_pb2.ERROR, message=self.NOT_LOGGED_IN)
+        page = self.servicer.conversation_history(request.username, request.peer, request.cursor, request.limit)
+        if page is None:
+            return chat_v2_pb2.GetConversationResponse(status=chat_v2_pb2.ERROR, message="User not found.")
+        rows, next_cursor = page
+        messages, _ = MessageEncoder(chat_v2_pb2.ReadMessagesRequest()).encode(rows)
+        return chat_v2_pb2.GetConversationResponse(messages=messages, next_cursor=next_cursor)
+
+    def ListSentMessages(self, request, context):
+        """
+        v2 ListSentMessages: one page of the user's sent messages, with int64 ids.
+        """
+        if not self.servicer.is_session_active(request.username):
+            return chat_v2_pb2.ListSentMessagesResponse(status=chat_v2_pb2.ERROR, message=self.NOT_LOGGED_IN)
+        page = self.servicer.sent_page(request.username, request.cursor, request.limit)
+        if page is None:
+            return chat_v2_pb2.ListSentMessagesResponse(status=chat_v2_pb2.ERROR, message="User not found.")
+        rows, next_cursor = page
+        messages, _ = MessageEncoder(chat_v2_pb2.ReadMessagesRequest()).encode(rows)
+        return chat_v2_pb2.ListSentMessagesResponse(messages=messages, next_cursor=next_cursor)
+
+    def GetRaftStatus(self, request, context):
+        """
+        v2 GetRaftStatus. The response's fields after status and message are
+        wire-identical to v1, so the v1 response is re-encoded whole.
+        """
+        resp = self.servicer.GetRaftStatus(v1_request(request, chat_pb2.RaftStatusRequest), context)
+        fields = status_fields(resp)
+        resp.ClearField("status")
+        resp.ClearField("message")
+        v2_resp = chat_v2_pb2.RaftStatusResponse.FromString(resp.SerializeToString())
+        v2_resp.MergeFrom(chat_v2_pb2.RaftStatusResponse(**fields))
+        return v2_resp
+
+    def StartProfile(self, request, context):
+        """
+        v2 StartProfile.
+        """
+        resp = self.servicer.StartProfile(v1_request(request, chat_pb2.ProfileRequest), context)
+        return chat_v2_pb2.ProfileResponse(path=resp.path, **status_fields(resp))
@@ -0,0 +1,213 @@
+"""
+compression_policy.py
+
+Size-aware gRPC message compression. Compressing a 30-byte Login response
+costs CPU and can make it bigger, while a ReadMessagesResponse with
+thousands of messages shrinks several-fold, so each message is compressed
+only if its serialized size reaches a threshold. The threshold can be set
+per method, and a method can be set to always or never compress.
+
+On the server the algorithm is the server's default compression. A
+CompressionInterceptor checks every unary response and every message
+yielded by a server-streaming handler, and calls
+disable_next_message_compression() on those below the threshold. Handlers
+that write to the stream themselves (Subscribe, Session) call
+CompressionPolicy.before_write. Compression is still negotiated: gRPC only
+compresses for peers that advertise the algorithm in grpc-accept-encoding.
+
+On the client a CompressionClientInterceptor applies the same policy to
+requests by choosing the compression of each call.
+"""
+
+import inspect
+
+import grpc
+
+from interceptors import ClientCallDetails, rewrap_handler, split_method
+
+COMPRESSION_ALGORITHMS = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+DEFAULT_COMPRESSION = "gzip"
+DEFAULT_COMPRESSION_THRESHOLD = 1024  # bytes; smaller messages are sent uncompressed
+
+ALWAYS = 0  # per-method threshold that compresses every message
+NEVER = None  # per-method threshold that compresses nothing
+
+
+def parse_method_thresholds(specs):
+    """
+    Parse per-method overrides of the form METHOD=BYTES, METHOD=always or METHOD=never.
+
+    :param specs: An iterable of override strings, e.g. ["Login=never", "ListUsers=256"].
+    :return: A dict mapping method names to thresholds (ALWAYS, NEVER or a byte count).
+    :raises ValueError: If a spec is malformed.
+    """
+    thresholds = {}
+    for spec in specs or []:
+        name, sep, value = spec.partition("=")
+        if not sep or not name:
+            raise ValueError(f"Expected METHOD=BYTES|always|never, got {spec!r}")
+        value = value.strip().lower()
+        if value == "always":
+            thresholds[name.strip()] = ALWAYS
+        elif value == "never":
+            thresholds[name.strip()] = NEVER
+        else:
+            thresholds[name.strip()] = int(value)
+    return thresholds
+
+
+class CompressionPolicy:
+    """
+    Decides, per method and message size, whether a message is compressed.
+    """
+
+    def __init__(self, algorithm=DEFAULT_COMPRESSION, threshold=DEFAULT_COMPRESSION_THRESHOLD,
+                 method_thresholds=None):
+        """
+        :param algorithm: "none", "gzip" or "deflate".
+        :param threshold: Smallest serialized size in bytes that gets compressed.
+        :param method_thresholds: Optional dict of per-method thresholds overriding
+                                  `threshold` (ALWAYS, NEVER or a byte count).
+        """
+        if algorithm not in COMPRESSION_ALGORITHMS:
+            raise ValueError(f"Unknown compression algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self.method_thresholds = dict(method_thresholds or {})
+
+    @property
+    def grpc_algorithm(self):
+        """
+        :return: The grpc.Compression value of the policy's algorithm.
+        """
+        return COMPRESSION_ALGORITHMS[self.algorithm]
+
+    @property
+    def enabled(self):
+        return self.algorithm != "none"
+
+    def threshold_for(self, method):
+        """
+        :param method: A bare method name, e.g. "ReadMessages".
+        :return: The method's threshold (ALWAYS, NEVER or a byte count).
+        """
+        return self.method_thresholds.get(method, self.threshold)
+
+    def should_compress(self, method, size):
+        """
+        :param method: A bare method name.
+        :param size: The serialized size of the message in bytes.
+        :return: True if a message of this size should be compressed.
+        """
+        if not self.enabled:
+            return False
+        threshold = self.threshold_for(method)
+        return threshold is not NEVER and size >= threshold
+
+    def before_write(self, context, method, message):
+        """
+        Called before a server handler writes a message: disable compression
+        for it if it is below the method's threshold.
+
+        :param context: The RPC's servicer context.
+        :param method: A bare method name.
+        :param message: The protobuf message about to be sent.
+        """
+        if self.enabled and not self.should_compress(method, message.ByteSize()):
+            context.disable_next_message_compression()
+
+    def call_compression(self, method, request):
+        """
+        :param method: A bare method name.
+        :param request: The request message of a client call.
+        :return: The grpc.Compression to send the request with.
+        """
+        if self.should_compress(method, request.ByteSize()):
+            return self.grpc_algorithm
+        return grpc.Compression.NoCompression
+
+
+class CompressionInterceptor(grpc.aio.ServerInterceptor):
+    """
+    Applies a CompressionPolicy to the responses of unary and server-streaming
+    handlers. Install it on a server whose default compression is the policy's
+    algorithm.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or not self.policy.enabled:
+            return handler
+        method = split_method(handler_call_details.method)[1]
+        if handler.unary_unary is not None:
+            return rewrap_handler(handler, lambda behavior: self._wrap_unary(method, behavior))
+        if handler.unary_stream is not None and (inspect.isgeneratorfunction(handler.unary_stream)
+                                                 or inspect.isasyncgenfunction(handler.unary_stream)):
+            return rewrap_handler(handler, lambda behavior: self._wrap_stream(method, behavior))
+        # Handlers that write to the stream themselves call policy.before_write
+        return handler
+
+    def _wrap_unary(self, method, behavior):
+        """
+        Internal method to wrap a unary handler, keeping it sync or async like the original.
+        """
+        policy = self.policy
+        if inspect.iscoroutinefunction(behavior):
+            async def unary(request, context):
+                response = await behavior(request, context)
+                policy.before_write(context, method, response)
+                return response
+        else:
+            def unary(request, context):
+                response = behavior(request, context)
+                policy.before_write(context, method, response)
+                return response
+        return unary
+
+    def _wrap_stream(self, method, behavior):
+        """
+        Internal method to wrap a response generator, keeping it sync or async like the original.
+        """
+        policy = self.policy
+        if inspect.isasyncgenfunction(behavior):
+            async def stream(request, context):
+                async for response in behavior(request, context):
+                    policy.before_write(context, method, response)
+                    yield response
+        else:
+            def stream(request, context):
+                for response in behavior(request, context):
+                    policy.before_write(context, method, response)
+                    yield response
+        return stream
+
+
+class CompressionClientInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor):
+    """
+    Applies a CompressionPolicy to the requests of a client channel, e.g.
+    `grpc.intercept_channel(channel, CompressionClientInterceptor(policy))`.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+
+    def _details(self, client_call_details, request):
+        """
+        Internal method to copy the call details with the request's compression.
+        """
+        method = split_method(client_call_details.method)[1]
+        return ClientCallDetails(client_call_details, compression=self.policy.call_compression(method, request))
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        return continuation(self._details(client_call_details, request), request)
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        return continuation(self._details(client_call_details, request), request)
+
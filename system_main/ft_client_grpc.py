@@ -9,8 +9,8 @@ import tkinter as tk
 import threading
 import grpc
 import argparse
-import os
 import time
+import datetime
 import random
 import queue
 
@@ -20,26 +20,15 @@ import queue
 import chat_pb2_grpc
 import chat_pb2
 
+from compression_policy import (
+    CompressionPolicy, CompressionClientInterceptor, COMPRESSION_ALGORITHMS, DEFAULT_COMPRESSION,
+    DEFAULT_COMPRESSION_THRESHOLD
+)
 from utils import hash_password
+from wire_accounting import UsageLog, AccountingClientInterceptor
 
 CLIENT_LOG_FILE = "client_data_usage.log"
-
-def log_data_usage(method_name: str, request_size: int, response_size: int):
-    """
-    Log data usage (request size and response size) for each gRPC call
-    to a local CSV file for monitoring or analytics.
-
-    :param method_name: The name of the gRPC method (e.g., "CreateUser", "Login").
-    :param request_size: The byte size of the serialized request message.
-    :param response_size: The byte size of the serialized response message.
-    """
-    file_exists = os.path.exists(CLIENT_LOG_FILE)
-    if not file_exists:
-        with open(CLIENT_LOG_FILE, "w") as f:
-            f.write("method_name,request_size,response_size\n")
-
-    with open(CLIENT_LOG_FILE, "a") as f:
-        f.write(f"{method_name},{request_size},{response_size}\n")
+DEFAULT_HEARTBEAT_INTERVAL = 10.0  # seconds, until the server reports its session TTL
 
 class FaultTolerantTkClientGRPC:
     """
@@ -51,13 +40,17 @@ class FaultTolerantTkClientGRPC:
     sending/reading messages, etc.
     """
 
-    def __init__(self, server_list):
+    def __init__(self, server_list, compression_policy=None):
         """
         Initialize the fault-tolerant client.
 
         :param server_list: List of server addresses in the format ["host:port", ...].
+        :param compression_policy: CompressionPolicy for requests (defaults to gzip above 1 KB).
         """
         self.server_list = server_list
+        self.compression = compression_policy or CompressionPolicy()
+        # Per-call request/response bytes, written to CLIENT_LOG_FILE in batches
+        self.usage_log = UsageLog(CLIENT_LOG_FILE).start()
         self.current_server_idx = 0
         self.channel = None
         self.stub = None
@@ -65,8 +58,12 @@ class FaultTolerantTkClientGRPC:
         self.backoff_base = 0.5  # Starting delay in seconds
         
         self.current_user = None
+        self.last_push_seq = 0  # newest push sequence number received; Subscribe resumes after it
+        self.sync_cursor = 0  # change cursor the client is up to date with; SyncSince resumes after it
         self.subscribe_thread = None
         self.subscribe_stop_event = threading.Event()
+        self.heartbeat_thread = None
+        self.heartbeat_stop_event = threading.Event()
         self.retry_lock = threading.Lock()
         
         # Track server failures to prioritize healthy servers
@@ -94,6 +91,8 @@ class FaultTolerantTkClientGRPC:
         tk.Button(self.btn_frame, text="Send", command=self.send_dialog).pack(side=tk.LEFT)
         tk.Button(self.btn_frame, text="List", command=self.list_accounts_dialog).pack(side=tk.LEFT)
         tk.Button(self.btn_frame, text="Read", command=self.read_messages_dialog).pack(side=tk.LEFT)
+        tk.Button(self.btn_frame, text="Chats", command=self.conversations_dialog).pack(side=tk.LEFT)
+        tk.Button(self.btn_frame, text="Sent", command=self.sent_messages_dialog).pack(side=tk.LEFT)
         tk.Button(self.btn_frame, text="Delete Msg", command=self.delete_msg_dialog).pack(side=tk.LEFT)
         tk.Button(self.btn_frame, text="Delete Account", command=self.delete_account).pack(side=tk.LEFT)
 
@@ -129,6 +128,10 @@ class FaultTolerantTkClientGRPC:
                     server_addr,
                     options=[('grpc.enable_retries', 1)]
                 )
+                if self.compression.enabled:
+                    self.channel = grpc.intercept_channel(
+                        self.channel, CompressionClientInterceptor(self.compression))
+                self.channel = grpc.intercept_channel(self.channel, AccountingClientInterceptor(self.usage_log))
                 self.stub = chat_pb2_grpc.ChatServiceStub(self.channel)
                 # Send a simple ping request to test connectivity
                 ping_request = chat_pb2.ListUsersRequest(username="ping", pattern="*")
@@ -218,6 +221,8 @@ class FaultTolerantTkClientGRPC:
         Start a background thread that continuously subscribes for incoming messages
         from the server. If the stream is broken, it attempts to reconnect using
         exponential backoff until the user logs out or the client shuts down.
+        Each resubscription resumes after the last push sequence number received,
+        so pushes missed while disconnected are replayed by the server.
         """
         if not self.current_user:
             return
@@ -236,15 +241,28 @@ class FaultTolerantTkClientGRPC:
                         self.log("No active connection for subscription. Reconnecting...")
                         if not self.connect():
                             raise Exception("Unable to reconnect for subscription")
-                    request = chat_pb2.SubscribeRequest(username=self.current_user)
+                    request = chat_pb2.SubscribeRequest(username=self.current_user,
+                                                        resume_from=self.last_push_seq)
                     stream_iter = self.stub.Subscribe(request)
+                    if consecutive_failures:
+                        # Reconnected: catch up on what changed while the stream was down
+                        self.sync_changes()
                     # Reset failure count on successful connection
                     consecutive_failures = 0
 
                     for incoming in stream_iter:
                         if self.subscribe_stop_event.is_set():
                             break
-                        self.log(f"[New Message] from={incoming.sender}: {incoming.content}")
+                        if incoming.coalesced_count:
+                            self.log(f"[New Messages] {incoming.coalesced_count} messages arrived while "
+                                     f"this client was behind; read them with ReadMessages")
+                            continue
+                        if incoming.seq:
+                            self.last_push_seq = max(self.last_push_seq, incoming.seq)
+                        latency = ""
+                        if incoming.sent_at_ms:
+                            latency = f" ({int(time.time() * 1000) - incoming.sent_at_ms} ms)"
+                        self.log(f"[New Message] from={incoming.sender}: {incoming.content}{latency}")
 
                 except grpc.RpcError as e:
                     self.log(f"Subscription RPC error: {e.details() if hasattr(e, 'details') else str(e)}")
@@ -263,6 +281,37 @@ class FaultTolerantTkClientGRPC:
         self.subscribe_thread = threading.Thread(target=run_stream, daemon=True)
         self.subscribe_thread.start()
 
+    def sync_changes(self):
+        """
+        Ask the server what changed since self.sync_cursor (messages received,
+        read or deleted, users created or deleted), log a summary and advance the
+        cursor. Only the changes are transferred, not the whole inbox and user list.
+        """
+        if not self.current_user:
+            return
+        has_more = True
+        while has_more:
+            req = chat_pb2.SyncSinceRequest(username=self.current_user, cursor=self.sync_cursor)
+            resp = self.try_rpc(self.stub.SyncSince, req)
+            if resp.status != "success":
+                self.log(f"[SYNC ERROR] {resp.message}")
+                return
+            self.sync_cursor = resp.cursor
+            has_more = resp.has_more
+            if resp.reset:
+                self.log("[Sync] Could not catch up from the last cursor; use Read and List to reload")
+                return
+            # The resumed Subscribe stream replays the new messages themselves
+            if resp.read_up_to:
+                self.log(f"[Sync] Messages up to ID={resp.read_up_to} were read elsewhere")
+            if resp.new_messages or resp.read_ids or resp.deleted_ids:
+                self.log(f"[Sync] {len(resp.new_messages)} new messages, {len(resp.read_ids)} read and "
+                         f"{len(resp.deleted_ids)} deleted elsewhere")
+            if resp.new_users:
+                self.log(f"[Sync] New users: {', '.join(u.username for u in resp.new_users)}")
+            if resp.deleted_users:
+                self.log(f"[Sync] Deleted users: {', '.join(resp.deleted_users)}")
+
     def stop_subscription_thread(self):
         """
         Signal the subscription thread to stop and wait briefly for it to join.
@@ -271,6 +320,52 @@ class FaultTolerantTkClientGRPC:
         if self.subscribe_thread:
             self.subscribe_thread.join(timeout=2)
 
+    # ------------------ Session Heartbeats ------------------ #
+
+    def start_heartbeat_thread(self):
+        """
+        Start a background thread that periodically sends Heartbeat RPCs so the
+        server keeps this user's session alive. The interval is a third of the
+        TTL reported by the server.
+        """
+        if not self.current_user:
+            return
+        self.heartbeat_stop_event.clear()
+
+        def run_heartbeats():
+            """
+            Send heartbeats until the user logs out or the session is reported expired.
+            """
+            interval = DEFAULT_HEARTBEAT_INTERVAL
+            while not self.heartbeat_stop_event.wait(interval):
+                username = self.current_user
+                if not username:
+                    break
+                try:
+                    if self.stub is None:
+                        continue
+                    req = chat_pb2.HeartbeatRequest(username=username)
+                    resp = self.stub.Heartbeat(req, timeout=5)
+                    if resp.ttl_seconds > 0:
+                        interval = max(resp.ttl_seconds / 3.0, 1.0)
+                    if resp.status != "success":
+                        self.log(f"[{resp.status.upper()}] {resp.message}")
+                        break
+                except grpc.RpcError as e:
+                    # Failover is handled by the subscription thread and try_rpc
+                    self.log(f"Heartbeat RPC error: {e.details() if hasattr(e, 'details') else str(e)}")
+
+        self.heartbeat_thread = threading.Thread(target=run_heartbeats, daemon=True)
+        self.heartbeat_thread.start()
+
+    def stop_heartbeat_thread(self):
+        """
+        Signal the heartbeat thread to stop and wait briefly for it to join.
+        """
+        self.heartbeat_stop_event.set()
+        if self.heartbeat_thread:
+            self.heartbeat_thread.join(timeout=2)
+
     # ------------------ Dialog & Command Implementations ------------------ #
 
     def create_account_dialog(self):
@@ -310,12 +405,8 @@ class FaultTolerantTkClientGRPC:
                 hashed_password=hashed_pw,
                 display_name=display
             )
-            req_size = len(req.SerializeToString())
             try:
                 resp = self.try_rpc(self.stub.CreateUser, req)
-                resp_size = len(resp.SerializeToString())
-                log_data_usage("CreateUser", req_size, resp_size)
-
                 self.log(f"[{resp.status.upper()}] {resp.message}")
             except Exception as e:
                 self.log(f"[ERROR] {str(e)}")
@@ -350,17 +441,16 @@ class FaultTolerantTkClientGRPC:
 
             hashed_pw = hash_password(password)
             req = chat_pb2.LoginRequest(username=username, hashed_password=hashed_pw)
-            req_size = len(req.SerializeToString())
             try:
                 resp = self.try_rpc(self.stub.Login, req)
-                resp_size = len(resp.SerializeToString())
-                log_data_usage("Login", req_size, resp_size)
-
                 self.log(f"[{resp.status.upper()}] {resp.message} (unread={resp.unread_count})")
                 if resp.status == "success":
                     self.preferred_server_idx = self.current_server_idx
                     self.current_user = resp.username
+                    self.last_push_seq = resp.push_seq
+                    self.sync_cursor = resp.sync_cursor
                     self.start_subscription_thread()
+                    self.start_heartbeat_thread()
             except Exception as e:
                 self.log(f"[ERROR] {str(e)}")
 
@@ -383,17 +473,15 @@ class FaultTolerantTkClientGRPC:
             """Sends Logout request with retry logic."""
             w.destroy()
             self.stop_subscription_thread()
+            self.stop_heartbeat_thread()
 
             # if not self.connect():
             #     self.log("[ERROR] Could not connect to any server")
             #     return
 
             req = chat_pb2.LogoutRequest(username=self.current_user)
-            req_size = len(req.SerializeToString())
             try:
                 resp = self.try_rpc(self.stub.Logout, req)
-                resp_size = len(resp.SerializeToString())
-                log_data_usage("Logout", req_size, resp_size)
                 self.log(f"[{resp.status.upper()}] {resp.message}")
                 
                 if resp.status == "success":
@@ -406,7 +494,8 @@ class FaultTolerantTkClientGRPC:
     def send_dialog(self):
         """
         Open a dialog to send a new message. Requests receiver username and content,
-        then calls SendMessage via gRPC.
+        then calls SendMessage via gRPC. Several comma-separated receivers, or a
+        ListUsers pattern containing * or ?, send one message to all of them.
         """
         if not self.current_user:
             self.log("[ERROR] You are not logged in.")
@@ -415,7 +504,7 @@ class FaultTolerantTkClientGRPC:
         w = tk.Toplevel(self.root)
         w.title("Send Message")
 
-        tk.Label(w, text="To User").pack()
+        tk.Label(w, text="To User(s) or pattern").pack()
         to_entry = tk.Entry(w)
         to_entry.pack()
 
@@ -433,18 +522,29 @@ class FaultTolerantTkClientGRPC:
             #     self.log("[ERROR] Could not connect to any server")
             #     return
 
-            req = chat_pb2.SendMessageRequest(
-                sender=self.current_user,
-                receiver=receiver,
-                content=content
-            )
-            req_size = len(req.SerializeToString())
+            if "*" in receiver or "?" in receiver:
+                req = chat_pb2.SendMessageRequest(
+                    sender=self.current_user,
+                    receiver_pattern=receiver,
+                    content=content
+                )
+            elif "," in receiver:
+                req = chat_pb2.SendMessageRequest(
+                    sender=self.current_user,
+                    receivers=[name.strip() for name in receiver.split(",") if name.strip()],
+                    content=content
+                )
+            else:
+                req = chat_pb2.SendMessageRequest(
+                    sender=self.current_user,
+                    receiver=receiver,
+                    content=content
+                )
             try:
                 resp = self.try_rpc(self.stub.SendMessage, req)
-                resp_size = len(resp.SerializeToString())
-                log_data_usage("SendMessage", req_size, resp_size)
-
                 self.log(f"[{resp.status.upper()}] {resp.message}")
+                if resp.unknown_receivers:
+                    self.log(f"Unknown receivers: {', '.join(resp.unknown_receivers)}")
             except Exception as e:
                 self.log(f"[ERROR] {str(e)}")
 
@@ -484,12 +584,8 @@ class FaultTolerantTkClientGRPC:
             #     return
 
             req = chat_pb2.ListUsersRequest(username=self.current_user, pattern=pat)
-            req_size = len(req.SerializeToString())
             try:
                 resp = self.try_rpc(self.stub.ListUsers, req)
-                resp_size = len(resp.SerializeToString())
-                log_data_usage("ListUsers", req_size, resp_size)
-
                 self.log(f"[{resp.status.upper()}] {resp.message}")
                 account_listbox.delete(0, tk.END)
                 for u in resp.users:
@@ -501,6 +597,148 @@ class FaultTolerantTkClientGRPC:
 
         tk.Button(w, text="OK", command=on_ok).pack()
 
+    def conversations_dialog(self):
+        """
+        Open a window listing the current user's conversations, most recent first,
+        with each peer's last message and unread count. "More" loads the next page;
+        double-clicking a conversation opens its thread.
+        """
+        if not self.current_user:
+            self.log("[ERROR] You are not logged in.")
+            return
+
+        w = tk.Toplevel(self.root)
+        w.title("Conversations")
+
+        list_frame = tk.Frame(w)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+
+        scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL)
+        conversation_listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, width=70, height=12)
+        scrollbar.config(command=conversation_listbox.yview)
+        conversation_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        page = {"before": 0}
+        peers = []
+
+        def load_page():
+            """Fetches the next page of conversations with retry logic."""
+            req = chat_pb2.ListConversationsRequest(username=self.current_user, before=page["before"])
+            try:
+                resp = self.try_rpc(self.stub.ListConversations, req)
+                if resp.status != "success":
+                    self.log(f"[{resp.status.upper()}] {resp.message}")
+                    return
+                for conv in resp.conversations:
+                    unread = f" [{conv.unread_count} unread]" if conv.unread_count else ""
+                    conversation_listbox.insert(tk.END, f"{conv.peer}{unread}: {conv.last_content[:40]}")
+                    peers.append(conv.peer)
+                page["before"] = resp.next_before
+                if not resp.next_before:
+                    more_button.config(state=tk.DISABLED)
+            except Exception as e:
+                self.log(f"[ERROR] {str(e)}")
+
+        def open_thread(event):
+            """Opens the thread of the double-clicked conversation."""
+            selection = conversation_listbox.curselection()
+            if selection:
+                self.thread_dialog(peers[selection[0]])
+
+        conversation_listbox.bind("<Double-Button-1>", open_thread)
+        more_button = tk.Button(w, text="More", command=load_page)
+        more_button.pack()
+        load_page()
+
+    def thread_dialog(self, peer):
+        """
+        Open a window with the messages exchanged with one peer, newest first.
+        "Older" loads the previous page. Opening a thread does not mark its
+        messages as read.
+
+        :param peer: The username of the other side of the conversation.
+        """
+        w = tk.Toplevel(self.root)
+        w.title(f"Conversation with {peer}")
+
+        list_frame = tk.Frame(w)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+
+        scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL)
+        message_listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, width=70, height=15)
+        scrollbar.config(command=message_listbox.yview)
+        message_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        page = {"cursor": 0}
+
+        def load_page():
+            """Fetches the next page of older messages with retry logic."""
+            req = chat_pb2.GetConversationRequest(username=self.current_user, peer=peer, cursor=page["cursor"])
+            try:
+                resp = self.try_rpc(self.stub.GetConversation, req)
+                if resp.status != "success":
+                    self.log(f"[{resp.status.upper()}] {resp.message}")
+                    return
+                for m in resp.messages:
+                    direction = "you" if m.sender_username == self.current_user else m.sender_username
+                    message_listbox.insert(tk.END, f"[{m.timestamp}] {direction}: {m.content}")
+                page["cursor"] = resp.next_cursor
+                if not resp.next_cursor:
+                    older_button.config(state=tk.DISABLED)
+            except Exception as e:
+                self.log(f"[ERROR] {str(e)}")
+
+        older_button = tk.Button(w, text="Older", command=load_page)
+        older_button.pack()
+        load_page()
+
+    def sent_messages_dialog(self):
+        """
+        Open a window listing the messages the current user has sent, newest first,
+        with their IDs (for "Delete Msg") and whether the receiver has read them.
+        "Older" loads the previous page.
+        """
+        if not self.current_user:
+            self.log("[ERROR] You are not logged in.")
+            return
+
+        w = tk.Toplevel(self.root)
+        w.title("Sent Messages")
+
+        list_frame = tk.Frame(w)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+
+        scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL)
+        message_listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, width=70, height=15)
+        scrollbar.config(command=message_listbox.yview)
+        message_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        page = {"cursor": 0}
+
+        def load_page():
+            """Fetches the next page of older sent messages with retry logic."""
+            req = chat_pb2.ListSentMessagesRequest(username=self.current_user, cursor=page["cursor"])
+            try:
+                resp = self.try_rpc(self.stub.ListSentMessages, req)
+                if resp.status != "success":
+                    self.log(f"[{resp.status.upper()}] {resp.message}")
+                    return
+                for m in resp.messages:
+                    seen = " (read)" if m.read_status else ""
+                    message_listbox.insert(tk.END, f"ID={m.id} to {m.receiver_username}{seen}: {m.content}")
+                page["cursor"] = resp.next_cursor
+                if not resp.next_cursor:
+                    older_button.config(state=tk.DISABLED)
+            except Exception as e:
+                self.log(f"[ERROR] {str(e)}")
+
+        older_button = tk.Button(w, text="Older", command=load_page)
+        older_button.pack()
+        load_page()
+
     def read_messages_dialog(self):
         """
         Open a dialog to retrieve messages for the current user (unread or all, up to a limit).
@@ -521,10 +759,25 @@ class FaultTolerantTkClientGRPC:
         limit_entry = tk.Entry(w)
         limit_entry.pack()
 
+        tk.Label(w, text="From (blank for anyone)").pack()
+        sender_entry = tk.Entry(w)
+        sender_entry.pack()
+
+        tk.Label(w, text="Since, e.g. 2025-03-01 09:00 (blank for any time)").pack()
+        since_entry = tk.Entry(w)
+        since_entry.pack()
+
+        tk.Label(w, text="Until (blank for now)").pack()
+        until_entry = tk.Entry(w)
+        until_entry.pack()
+
         def on_ok():
             """Reads messages with retry logic."""
             only_unread = unread_var.get()
             limit_str = limit_entry.get().strip()
+            from_sender = sender_entry.get().strip()
+            since_str = since_entry.get().strip()
+            until_str = until_entry.get().strip()
             w.destroy()
 
             limit_val = 0
@@ -535,6 +788,15 @@ class FaultTolerantTkClientGRPC:
                     self.log("[ERROR] Invalid integer for limit.")
                     return
 
+            # Local date/times to epoch milliseconds (0 for no bound)
+            bounds = []
+            for value in (since_str, until_str):
+                try:
+                    bounds.append(int(datetime.datetime.fromisoformat(value).timestamp() * 1000) if value else 0)
+                except ValueError:
+                    self.log(f"[ERROR] Invalid date/time: {value}")
+                    return
+
             # if not self.connect():
             #     self.log("[ERROR] Could not connect to any server")
             #     return
@@ -542,14 +804,13 @@ class FaultTolerantTkClientGRPC:
             req = chat_pb2.ReadMessagesRequest(
                 username=self.current_user,
                 only_unread=only_unread,
-                limit=limit_val
+                limit=limit_val,
+                from_sender=from_sender,
+                since_ms=bounds[0],
+                until_ms=bounds[1]
             )
-            req_size = len(req.SerializeToString())
             try:
                 resp = self.try_rpc(self.stub.ReadMessages, req)
-                resp_size = len(resp.SerializeToString())
-                log_data_usage("ReadMessages", req_size, resp_size)
-
                 self.log(f"[{resp.status.upper()}] {resp.message}")
                 for m in resp.messages:
                     self.log(f"  ID={m.id}, from={m.sender_username}, content={m.content}")
@@ -598,12 +859,8 @@ class FaultTolerantTkClientGRPC:
                 username=self.current_user,
                 message_ids=msg_ids
             )
-            req_size = len(req.SerializeToString())
             try:
                 resp = self.try_rpc(self.stub.DeleteMessages, req)
-                resp_size = len(resp.SerializeToString())
-                log_data_usage("DeleteMessages", req_size, resp_size)
-
                 self.log(f"[{resp.status.upper()}] {resp.message}, count={resp.deleted_count}")
             except Exception as e:
                 self.log(f"[ERROR] {str(e)}")
@@ -627,18 +884,15 @@ class FaultTolerantTkClientGRPC:
             """Deletes account with retry logic."""
             w.destroy()
             self.stop_subscription_thread()
+            self.stop_heartbeat_thread()
 
             # if not self.connect():
             #     self.log("[ERROR] Could not connect to any server")
             #     return
 
             req = chat_pb2.DeleteUserRequest(username=self.current_user)
-            req_size = len(req.SerializeToString())
             try:
                 resp = self.try_rpc(self.stub.DeleteUser, req)
-                resp_size = len(resp.SerializeToString())
-                log_data_usage("DeleteUser", req_size, resp_size)
-
                 self.log(f"[{resp.status.upper()}] {resp.message}")
                 if resp.status == "success":
                     self.current_user = None
@@ -659,6 +913,7 @@ class FaultTolerantTkClientGRPC:
             
         self.root.mainloop()
         self.stop_subscription_thread()
+        self.stop_heartbeat_thread()
         if self.channel:
             self.channel.close()
 
@@ -672,13 +927,17 @@ def main():
     parser = argparse.ArgumentParser(description="Fault-Tolerant gRPC Chat Client")
     parser.add_argument("--servers", default="127.0.0.1:50051,127.0.0.1:50052,127.0.0.1:50053",
                         help="Comma-separated list of server addresses (host:port)")
+    parser.add_argument("--compression", choices=sorted(COMPRESSION_ALGORITHMS), default=DEFAULT_COMPRESSION,
+                        help="Algorithm for requests at or above the compression threshold")
+    parser.add_argument("--compression-threshold", type=int, default=DEFAULT_COMPRESSION_THRESHOLD,
+                        help="Smallest request size in bytes that is compressed")
     args = parser.parse_args()
     
     # Parse server addresses
     server_list = args.servers.split(",")
     
     # Create and run client
-    gui = FaultTolerantTkClientGRPC(server_list)
+    gui = FaultTolerantTkClientGRPC(server_list, CompressionPolicy(args.compression, args.compression_threshold))
     gui.run()
 
 
@@ -6,43 +6,65 @@ Raft consensus to replicate state across multiple servers. It can tolerate
 up to f node failures in a 2f+1 node cluster.
 """
 
+import asyncio
+import collections
 import threading
-import queue
 import grpc
 from concurrent import futures
 import argparse
-import os
 import time
 import signal
-import sys
+from pysyncobj import FAIL_REASON
 
 # #uncomment if running a testing file in unittests
 # from system_main import chat_pb2
 # from system_main import chat_pb2_grpc
 import chat_pb2_grpc
 import chat_pb2
-
-from raft_db import RaftDB
+import chat_v2_pb2_grpc
+
+from raft_db import RaftDB, READ_STREAM_CHUNK, SQL_VARIABLE_CHUNK, SYNC_CHANGES_LIMIT, CONVERSATION_PAGE, \
+    HISTORY_PAGE, SENT_PAGE
+from presence import PresenceTracker
+from subscription_hub import (
+    SubscriptionHub, CoalescedNotice, DEFAULT_MAX_DEPTH, OVERFLOW_DROP_OLDEST, OVERFLOW_POLICIES
+)
+from compression_policy import (
+    CompressionPolicy, CompressionInterceptor, COMPRESSION_ALGORITHMS, DEFAULT_COMPRESSION,
+    DEFAULT_COMPRESSION_THRESHOLD, parse_method_thresholds
+)
+from chat_v2_servicer import ChatServiceV2Servicer
+from wire_accounting import UsageLog, AccountingInterceptor
+from metrics import REGISTRY, MetricsInterceptor, start_http_server
+from tracing import Tracer, TracingInterceptor, DEFAULT_SAMPLE_RATE, DEFAULT_SLOW_THRESHOLD
+from profiling import NodeProfiler, ProfilingInterceptor, DEFAULT_PROFILE_SECONDS, DEFAULT_SAMPLE_INTERVAL
 from utils import verify_password
 
 SERVER_LOG_FILE = "server_data_usage.log"
-
-def log_data_usage(method_name: str, request_size: int, response_size: int):
-    """
-    Log the data usage (request size, response size) for each gRPC call
-    to a local CSV file for analytical or monitoring purposes.
-
-    :param method_name: Name of the gRPC method (e.g. "CreateUser", "Login", etc.).
-    :param request_size: The byte size of the serialized gRPC request.
-    :param response_size: The byte size of the serialized gRPC response.
-    """
-    file_exists = os.path.exists(SERVER_LOG_FILE)
-    if not file_exists:
-        with open(SERVER_LOG_FILE, "w") as f:
-            f.write("method_name,request_size,response_size\n")
-
-    with open(SERVER_LOG_FILE, "a") as f:
-        f.write(f"{method_name},{request_size},{response_size}\n")
+METRICS_PORT_OFFSET = 1000  # a node's metrics endpoint defaults to its gRPC port plus this
+DEFAULT_METRICS_HOST = "127.0.0.1"  # the metrics endpoint is unauthenticated, so it stays local unless asked
+DEFAULT_STATUS_INTERVAL = 5.0  # seconds between the cluster status dumps a node prints
+DEFAULT_SESSION_TTL = 30.0  # seconds a session survives without a heartbeat
+SESSION_MAX_IN_FLIGHT = 64  # operations a single Session stream may have running at once
+READ_STREAM_MARKS_IN_FLIGHT = 8  # ReadMessagesStream chunks whose mark-read may still be replicating
+
+# Session operation (SessionRequest oneof field) -> unary handler it is served by.
+# The SessionResponse result field has the same name as the operation.
+SESSION_OPS = {
+    "create_user": "CreateUser",
+    "login": "Login",
+    "logout": "Logout",
+    "list_users": "ListUsers",
+    "send_message": "SendMessage",
+    "read_messages": "ReadMessages",
+    "delete_messages": "DeleteMessages",
+    "delete_user": "DeleteUser",
+    "heartbeat": "Heartbeat",
+    "sync_since": "SyncSince",
+    "list_conversations": "ListConversations",
+    "get_conversation": "GetConversation",
+    "list_sent_messages": "ListSentMessages",
+}
 
 class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
     """
@@ -51,51 +73,125 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
     ensuring consistency even if some nodes fail.
     """
 
-    def __init__(self, raft_db):
+    def __init__(self, raft_db, session_ttl=DEFAULT_SESSION_TTL,
+                 stream_buffer=DEFAULT_MAX_DEPTH, overflow_policy=OVERFLOW_DROP_OLDEST,
+                 compression_policy=None, tracer=None, profiler=None):
         """
         Constructor for FaultTolerantChatServicer.
 
         :param raft_db: An instance of RaftDB for replicated state operations.
+        :param session_ttl: Seconds a logged-in session survives without a heartbeat.
+        :param stream_buffer: Maximum pushes buffered per Subscribe stream.
+        :param overflow_policy: What to do when a stream's buffer is full
+                                ("drop_oldest", "coalesce" or "disconnect").
+        :param compression_policy: CompressionPolicy deciding which responses are
+                                   compressed (defaults to gzip above 1 KB).
+        :param tracer: Optional Tracer (see tracing.py); serve() traces calls with it,
+                       and each Session operation is traced as its own call.
+        :param profiler: Optional NodeProfiler run by StartProfile (disabled if None).
         """
         super().__init__()
         self.raft_db = raft_db
+        self.tracer = tracer
+        self.profiler = profiler
+
+        # Which responses are compressed; serve() installs it on the server
+        self.compression = compression_policy or CompressionPolicy()
         
-        # Structures for push notifications
-        self.subscribers = {}
-        self.subscribers_lock = threading.Lock()
+        # Open Subscribe streams, multiplexed on the server's event loop
+        self.hub = SubscriptionHub(max_depth=stream_buffer, policy=overflow_policy)
+
+        # Thread pool running Session operations; serve() shares the unary handlers' pool
+        self.executor = None
+
+        # Sessions owned by this node; expired sessions are logged out cluster-wide
+        self.presence = PresenceTracker(ttl=session_ttl, on_expire=self.on_session_expired)
+
+        # Every node applies create_message, so pushes fire wherever the receiver subscribed
+        self.raft_db.add_message_listener(self.on_message_applied)
 
-    def add_subscriber(self, username):
+    # ------------------ Session Presence ------------------
+
+    def touch_session(self, username):
+        """
+        Record activity for a logged-in user on this node. If the session was
+        previously owned by another node (client failover), ownership is
+        claimed asynchronously so the old node's expiry is ignored.
+
+        :param username: The username whose session should be kept alive.
+        """
+        if self.presence.touch(username):
+            if self.raft_db.get_session_owner(username) != self.raft_db.node_address:
+                self.raft_db.claim_session(username, self.raft_db.node_address)
+
+    def is_session_active(self, username):
         """
-        Create a subscription queue for a user if one does not already exist.
+        Check that a user is logged in and, if so, count the call as a heartbeat.
 
-        :param username: The username for which to create a subscription queue.
+        :param username: The username to check.
+        :return: True if the user is active in the cluster, False otherwise.
         """
-        with self.subscribers_lock:
-            if username not in self.subscribers:
-                self.subscribers[username] = queue.Queue()
+        if not self.raft_db.is_user_active(username):
+            return False
+        self.touch_session(username)
+        return True
+
+    def on_session_expired(self, username):
+        """
+        Called by the presence sweeper when a session misses its TTL. Releases
+        the local Subscribe stream and logs the user out of the cluster.
+
+        :param username: The username whose session expired.
+        """
+        print(f"[DEBUG] Session for {username} expired")
+        self.remove_subscriber(username)
+        self.raft_db.expire_session(username, self.raft_db.node_address)
+
+    def adopt_owned_sessions(self):
+        """
+        Start a session for every active user owned by this node that has no
+        local session yet (e.g. after a restart), so clients that never come
+        back are still expired after one TTL.
+        """
+        for username in self.raft_db.get_active_usernames():
+            if self.raft_db.get_session_owner(username) == self.raft_db.node_address:
+                if not self.presence.is_online(username):
+                    self.presence.touch(username)
 
     def remove_subscriber(self, username):
         """
-        Remove the subscription queue for a user if it exists.
+        Close the user's Subscribe stream on this node, if one is open.
 
-        :param username: The username whose subscription queue should be removed.
+        :param username: The username whose subscription should be released.
         """
-        with self.subscribers_lock:
-            if username in self.subscribers:
-                del self.subscribers[username]
+        self.hub.close_user(username)
 
-    def push_incoming_message(self, receiver_username, sender, content):
+    def push_incoming_message(self, receiver_username, sender, content, message_id=0, sent_at_ms=0, seq=0):
         """
-        Push an incoming message into the receiver's subscription queue.
+        Push an incoming message onto the receiver's Subscribe stream.
 
         :param receiver_username: The username of the message receiver.
         :param sender: The username of the message sender.
         :param content: The text content of the message.
+        :param message_id: The ID of the stored message.
+        :param sent_at_ms: Epoch milliseconds at which the message was submitted.
+        :param seq: The receiver's push sequence number for the message (0 if none).
+        """
+        self.hub.publish(receiver_username, (sender, content, message_id, sent_at_ms, seq))
+
+    def on_message_applied(self, messages):
         """
-        with self.subscribers_lock:
-            if receiver_username in self.subscribers:
-                q = self.subscribers[receiver_username]
-                q.put((sender, content))
+        Message listener registered with RaftDB. Runs on the Raft apply thread of
+        every node, so the node holding the receiver's Subscribe stream delivers
+        the push even if another node accepted the SendMessage call. A fan-out
+        send reaches the event loop in a single hop.
+
+        :param messages: A list of (receiver, sender, content, message_id, sent_at_ms, seq) tuples.
+        """
+        self.hub.publish_many(
+            (receiver_username, (sender, content, message_id, sent_at_ms, seq))
+            for receiver_username, sender, content, message_id, sent_at_ms, seq in messages
+        )
 
     # ------------------ RPC Methods with Data Usage Logging ------------------
 
@@ -107,8 +203,6 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
         :param context: gRPC context, can be used for metadata or cancellations.
         :return: CreateUserResponse indicating success or failure (user exists, DB error, etc.).
         """
-        req_size = len(request.SerializeToString())
-
         username = request.username
         hashed_password = request.hashed_password
         display_name = request.display_name
@@ -121,8 +215,6 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
                 message=f"User '{username}' already exists.",
                 username=username
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("CreateUser", req_size, resp_size)
             return resp
         
         if not self.raft_db.isReady():
@@ -138,8 +230,6 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
                 message="Could not create user (DB error or timeout).",
                 username=username
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("CreateUser", req_size, resp_size)
             return resp
 
         resp = chat_pb2.CreateUserResponse(
@@ -148,8 +238,6 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
             username=username
         )
 
-        resp_size = len(resp.SerializeToString())
-        log_data_usage("CreateUser", req_size, resp_size)
         return resp
 
     def Login(self, request, context):
@@ -161,8 +249,6 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
         :param context: gRPC context.
         :return: LoginResponse indicating success (with unread_count) or failure (error message).
         """
-        req_size = len(request.SerializeToString())
-
         username = request.username
         hashed_password = request.hashed_password
 
@@ -190,8 +276,6 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
                 unread_count=0,
                 username=username
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("Login", req_size, resp_size)
             return resp
 
         if not verify_password(hashed_password, user["password_hash"]):
@@ -201,14 +285,12 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
                 unread_count=0,
                 username=username
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("Login", req_size, resp_size)
             return resp
         
         # ---------------------------------------------------------
         # (A) Synchronous Raft replication with a 5s timeout
         # ---------------------------------------------------------
-        result = self.raft_db.user_login(username, sync=True, timeout=20.0)
+        result = self.raft_db.user_login(username, self.raft_db.node_address, sync=True, timeout=20.0)
         if result is None:
             print("[DEBUG] user_login(...) returned None => possibly forwarding or replication timed out.")
             # Possibly we're on a follower and didn't get the final result,
@@ -230,20 +312,19 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
                 unread_count=0,
                 username=username
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("Login", req_size, resp_size)
             return resp
 
+        self.presence.touch(username)
         unread_count = self.raft_db.get_num_unread_messages(username)
         resp = chat_pb2.LoginResponse(
             status="success",
             message="Login successful.",
             unread_count=unread_count,
-            username=username
+            username=username,
+            push_seq=self.raft_db.get_push_seq(username),
+            sync_cursor=self.raft_db.get_change_cursor()
         )
         
-        resp_size = len(resp.SerializeToString())
-        log_data_usage("Login", req_size, resp_size)
         return resp
 
     def Logout(self, request, context):
@@ -254,8 +335,6 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
         :param context: gRPC context.
         :return: LogoutResponse indicating success or failure.
         """
-        req_size = len(request.SerializeToString())
-
         username = request.username
         
         # Check if user is active
@@ -264,8 +343,6 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
                 status="error",
                 message="User is not logged in."
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("Logout", req_size, resp_size)
             return resp
         
         if not self.raft_db.isReady():
@@ -282,14 +359,13 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
             )
             return resp
 
+        self.presence.remove(username)
         self.remove_subscriber(username)
         resp = chat_pb2.LogoutResponse(
             status="success",
             message=f"User {username} is now logged out."
         )
         
-        resp_size = len(resp.SerializeToString())
-        log_data_usage("Logout", req_size, resp_size)
         return resp
 
     def ListUsers(self, request, context):
@@ -300,19 +376,15 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
         :param context: gRPC context.
         :return: ListUsersResponse with a list of matching users, or error if caller not logged in.
         """
-        req_size = len(request.SerializeToString())
-
         username = request.username
         
         # Check if user is active
-        if not self.raft_db.is_user_active(username):
+        if not self.is_session_active(username):
             resp = chat_pb2.ListUsersResponse(
                 status="error",
                 message="You are not logged in.",
                 pattern=request.pattern
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("ListUsers", req_size, resp_size)
             return resp
 
         # List users (read-only operation)
@@ -329,41 +401,41 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
             users=user_infos,
             pattern=pat
         )
-        resp_size = len(resp.SerializeToString())
-        log_data_usage("ListUsers", req_size, resp_size)
         return resp
 
     def SendMessage(self, request, context):
         """
-        RPC method to send a message from sender to receiver.
+        RPC method to send a message from sender to receiver. If receivers or
+        receiver_pattern is set, the message goes to all of them (plus receiver,
+        if given) as a single replicated command.
 
-        :param request: A SendMessageRequest containing sender, receiver, and content.
+        :param request: A SendMessageRequest containing sender, receiver(s), and content.
         :param context: gRPC context.
         :return: SendMessageResponse indicating success or failure.
         """
-        req_size = len(request.SerializeToString())
-
         sender = request.sender
         receiver = request.receiver
         content = request.content
 
         # Check if sender is active
-        if not self.raft_db.is_user_active(sender):
+        if not self.is_session_active(sender):
             resp = chat_pb2.SendMessageResponse(
                 status="error",
                 message="Sender is not logged in."
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("SendMessage", req_size, resp_size)
             return resp
         
         if not self.raft_db.isReady():
             # Block until ready
             self.raft_db.waitReady()
 
-        # Send message (replicated operation)
+        if request.receivers or request.receiver_pattern:
+            resp = self.send_to_many(request)
+            return resp
+
+        # Send message (replicated operation); the push fires when the entry is applied
         success = self.raft_db.create_message(
-            sender, receiver, content,
+            sender, receiver, content, int(time.time() * 1000),
             sync=True, timeout=20.0
         )
 
@@ -372,61 +444,71 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
                 status="error",
                 message="Could not send message (DB error or timeout)."
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("SendMessage", req_size, resp_size)
             return resp
         
-        self.push_incoming_message(receiver, sender, content)
         resp = chat_pb2.SendMessageResponse(
             status="success",
-            message="Message sent."
+            message="Message sent.",
+            delivered_count=1
         )
         
-        resp_size = len(resp.SerializeToString())
-        log_data_usage("SendMessage", req_size, resp_size)
         return resp
 
+    def send_to_many(self, request):
+        """
+        Send a multi-recipient message as one replicated create_messages command.
+
+        :param request: A SendMessageRequest with receivers and/or receiver_pattern set.
+        :return: SendMessageResponse with the delivered count and unknown receivers.
+        """
+        receivers = list(request.receivers)
+        if request.receiver:
+            receivers.insert(0, request.receiver)
+        result = self.raft_db.create_messages(
+            request.sender, receivers, request.receiver_pattern, request.content,
+            int(time.time() * 1000), sync=True, timeout=20.0
+        )
+        if not result:
+            return chat_pb2.SendMessageResponse(
+                status="error",
+                message="Could not send message (DB error or timeout)."
+            )
+        if not result["delivered"]:
+            return chat_pb2.SendMessageResponse(
+                status="error",
+                message="No matching receivers.",
+                unknown_receivers=result["unknown"]
+            )
+        return chat_pb2.SendMessageResponse(
+            status="success",
+            message=f"Message sent to {len(result['delivered'])} users.",
+            delivered_count=len(result["delivered"]),
+            unknown_receivers=result["unknown"]
+        )
+
     def ReadMessages(self, request, context):
         """
         RPC method to retrieve messages for the current user and mark them as read.
 
-        :param request: A ReadMessagesRequest containing username, only_unread, and limit.
+        :param request: A ReadMessagesRequest containing username, only_unread, limit and the optional
+                        from_sender, since_ms and until_ms filters.
         :param context: gRPC context.
         :return: ReadMessagesResponse with a list of messages and status.
         """
-        req_size = len(request.SerializeToString())
-
         username = request.username
         only_unread = request.only_unread
         limit = request.limit if request.limit > 0 else None
 
         # Check if user is active
-        if not self.raft_db.is_user_active(username):
+        if not self.is_session_active(username):
             resp = chat_pb2.ReadMessagesResponse(
                 status="error",
                 message="User not logged in.",
                 messages=[]
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("ReadMessages", req_size, resp_size)
             return resp
 
-        # Get messages (read-only operation)
-        msgs_db = self.raft_db.get_messages_for_user(username, only_unread=only_unread, limit=limit)
-
-        if not self.raft_db.isReady():
-            # Block until ready
-            self.raft_db.waitReady()
-        
-        # Mark messages as read (replicated operation)
-        all_marked = True
-        for m in msgs_db:
-            result = self.raft_db.mark_message_read(
-                m["id"], username,
-                sync=True, timeout=20.0
-            )
-            if not result:
-                all_marked = False
+        msgs_db, all_marked = self.read_inbox(username, only_unread, limit, self.read_filters(request))
 
         # Build response
         msg_list = []
@@ -451,10 +533,177 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
             message=message,
             messages=msg_list
         )
-        resp_size = len(resp.SerializeToString())
-        log_data_usage("ReadMessages", req_size, resp_size)
         return resp
 
+    def read_filters(self, request):
+        """
+        Collect the optional sender and time filters of a ReadMessagesRequest of
+        any schema version.
+
+        :param request: A v1 or v2 ReadMessagesRequest.
+        :return: A dict of keyword arguments for RaftDB.get_messages_for_user and
+                 RaftDB.iter_messages_for_user.
+        """
+        return {
+            "from_sender": request.from_sender or None,
+            "since_ms": request.since_ms or None,
+            "until_ms": request.until_ms or None,
+        }
+
+    def read_inbox(self, username, only_unread, limit, filters=None):
+        """
+        Fetch a user's messages and mark them as read. Shared by every schema
+        version of ReadMessages; the caller checks the session.
+
+        :param username: The receiver.
+        :param only_unread: If True, only unread messages are returned.
+        :param limit: Optional maximum number of messages.
+        :param filters: Optional sender and time filters, as returned by read_filters.
+        :return: (list of sqlite3.Row messages, True if all of them were marked as read)
+        """
+        filters = filters or {}
+        # Get messages (read-only operation)
+        msgs_db = self.raft_db.get_messages_for_user(username, only_unread=only_unread, limit=limit, **filters)
+
+        if not self.raft_db.isReady():
+            # Block until ready
+            self.raft_db.waitReady()
+
+        # Mark messages as read (one replicated operation). Without a sender filter the
+        # messages are the newest ones of a time window, which is an ID range, so every
+        # message in their ID range was returned or already read.
+        all_marked = True
+        if msgs_db and filters.get("from_sender"):
+            all_marked = bool(self.raft_db.mark_messages_read(
+                [row["id"] for row in msgs_db], username,
+                sync=True, timeout=20.0
+            ))
+        elif msgs_db:
+            all_marked = bool(self.raft_db.mark_read_range(
+                msgs_db[-1]["id"], msgs_db[0]["id"], username,
+                sync=True, timeout=20.0
+            ))
+        return msgs_db, all_marked
+
+    def mark_read_range_async(self, low_id, high_id, username):
+        """
+        Submit a replicated mark_read_range without blocking on its commit.
+
+        :param low_id: The smallest message ID of the range.
+        :param high_id: The largest message ID of the range.
+        :param username: The recipient marking the messages as read.
+        :return: A concurrent.futures.Future resolved with True if the range was
+                 marked (False if the operation could not be committed).
+        """
+        future = futures.Future()
+
+        def on_applied(result, error):
+            future.set_result(bool(result) if error == FAIL_REASON.SUCCESS else False)
+
+        self.raft_db.mark_read_range(low_id, high_id, username, callback=on_applied)
+        return future
+
+    def mark_messages_read_async(self, message_ids, username):
+        """
+        Submit a replicated mark_messages_read without blocking on its commit.
+
+        :param message_ids: The IDs of the messages to mark as read.
+        :param username: The recipient marking the messages as read.
+        :return: A concurrent.futures.Future resolved with True if the messages were
+                 marked (False if the operation could not be committed).
+        """
+        future = futures.Future()
+
+        def on_applied(result, error):
+            future.set_result(bool(result) if error == FAIL_REASON.SUCCESS else False)
+
+        self.raft_db.mark_messages_read(message_ids, username, callback=on_applied)
+        return future
+
+    def inbox_chunks(self, username, only_unread, limit, chunk_size, outcome, filters=None):
+        """
+        Generate a user's messages in chunks, newest first, marking each chunk as
+        read once the caller asks for the next one. Shared by every schema version
+        of ReadMessagesStream; the caller checks the session.
+
+        :param username: The receiver.
+        :param only_unread: If True, only unread messages are returned.
+        :param limit: Optional maximum number of messages in total.
+        :param chunk_size: Requested messages per chunk (0 for the default, capped at SQL_VARIABLE_CHUNK).
+        :param outcome: A dict that receives "total" and "all_marked" once the generator is exhausted.
+        :param filters: Optional sender and time filters, as returned by read_filters.
+        :return: A generator of lists of sqlite3.Row messages.
+        """
+        chunk_size = min(chunk_size if chunk_size > 0 else READ_STREAM_CHUNK, SQL_VARIABLE_CHUNK)
+        filters = filters or {}
+
+        if not self.raft_db.isReady():
+            # Block until ready
+            self.raft_db.waitReady()
+
+        total = 0
+        all_marked = True
+        marks = collections.deque()  # futures of mark-read operations still replicating
+        for rows in self.raft_db.iter_messages_for_user(username, only_unread, limit, chunk_size, **filters):
+            total += len(rows)
+            yield rows
+
+            # Mark the chunk as read (one replicated operation per chunk), without waiting
+            # for it to commit before reading the next chunk. A sender's messages are
+            # not an ID range of the inbox, so they are marked by ID.
+            if filters.get("from_sender"):
+                marks.append(self.mark_messages_read_async([row["id"] for row in rows], username))
+            else:
+                marks.append(self.mark_read_range_async(rows[-1]["id"], rows[0]["id"], username))
+            if len(marks) > READ_STREAM_MARKS_IN_FLIGHT:
+                all_marked = marks.popleft().result(20.0) and all_marked
+        for future in marks:
+            all_marked = future.result(20.0) and all_marked
+        outcome["total"] = total
+        outcome["all_marked"] = all_marked
+
+    def ReadMessagesStream(self, request, context):
+        """
+        RPC method to stream the current user's messages in chunks, newest first,
+        marking each chunk as read once it has been handed to gRPC. Only one chunk
+        is held in memory, so the first chunk arrives just as quickly for a huge
+        inbox as for a small one.
+
+        :param request: A ReadMessagesRequest containing username, only_unread, limit, chunk_size and
+                        the optional from_sender, since_ms and until_ms filters.
+        :param context: gRPC context.
+        :return: A generator of ReadMessagesChunk messages.
+        """
+        username = request.username
+        limit = request.limit if request.limit > 0 else None
+
+        if not self.is_session_active(username):
+            yield chat_pb2.ReadMessagesChunk(status="error", message="User not logged in.")
+            return
+
+        outcome = {}
+        for rows in self.inbox_chunks(username, request.only_unread, limit, request.chunk_size, outcome,
+                                      self.read_filters(request)):
+            yield chat_pb2.ReadMessagesChunk(status="success", messages=[
+                chat_pb2.ChatMessage(
+                    id=row["id"],
+                    sender_username=row["sender_username"],
+                    content=row["content"],
+                    timestamp=row["timestamp"],
+                    read_status=row["read_status"],
+                ) for row in rows
+            ])
+
+        total, all_marked = outcome["total"], outcome["all_marked"]
+        if all_marked:
+            resp = chat_pb2.ReadMessagesChunk(status="success", message=f"Retrieved {total} messages.")
+        else:
+            resp = chat_pb2.ReadMessagesChunk(
+                status="partial_success",
+                message=f"Retrieved {total} messages, but some messages could not be marked as read."
+            )
+        yield resp
+
     def DeleteMessages(self, request, context):
         """
         RPC method to delete one or more messages if the user is either the sender or the receiver.
@@ -463,34 +712,18 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
         :param context: gRPC context.
         :return: DeleteMessagesResponse indicating the number of messages successfully deleted.
         """
-        req_size = len(request.SerializeToString())
-
         username = request.username
         
         # Check if user is active
-        if not self.raft_db.is_user_active(username):
+        if not self.is_session_active(username):
             resp = chat_pb2.DeleteMessagesResponse(
                 status="error",
                 message="User not logged in.",
                 deleted_count=0
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("DeleteMessages", req_size, resp_size)
             return resp
         
-        if not self.raft_db.isReady():
-            # Block until ready
-            self.raft_db.waitReady()
-
-        # Delete messages (replicated operations)
-        deleted_count = 0
-        for mid in request.message_ids:
-            result = self.raft_db.delete_message(
-                mid, username,
-                sync=True, timeout=20.0
-            )
-            if result:
-                deleted_count += 1
+        deleted_count = self.delete_messages(username, request.message_ids)
 
         if deleted_count == 0:
             resp = chat_pb2.DeleteMessagesResponse(
@@ -505,10 +738,32 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
                 deleted_count=deleted_count
             )
 
-        resp_size = len(resp.SerializeToString())
-        log_data_usage("DeleteMessages", req_size, resp_size)
         return resp
 
+    def delete_messages(self, username, message_ids):
+        """
+        Delete messages the user sent or received. Shared by every schema
+        version of DeleteMessages; the caller checks the session.
+
+        :param username: The user deleting the messages.
+        :param message_ids: The IDs of the messages to delete.
+        :return: The number of messages deleted.
+        """
+        if not self.raft_db.isReady():
+            # Block until ready
+            self.raft_db.waitReady()
+
+        # Delete messages (replicated operations)
+        deleted_count = 0
+        for mid in message_ids:
+            result = self.raft_db.delete_message(
+                mid, username,
+                sync=True, timeout=20.0
+            )
+            if result:
+                deleted_count += 1
+        return deleted_count
+
     def DeleteUser(self, request, context):
         """
         RPC method to delete the current user from the database, along with their messages.
@@ -517,18 +772,14 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
         :param context: gRPC context.
         :return: DeleteUserResponse indicating success or failure.
         """
-        req_size = len(request.SerializeToString())
-
         username = request.username
         
         # Check if user is active
-        if not self.raft_db.is_user_active(username):
+        if not self.is_session_active(username):
             resp = chat_pb2.DeleteUserResponse(
                 status="error",
                 message="You are not logged in."
             )
-            resp_size = len(resp.SerializeToString())
-            log_data_usage("DeleteUser", req_size, resp_size)
             return resp
         
         if not self.raft_db.isReady():
@@ -549,58 +800,552 @@ class FaultTolerantChatServicer(chat_pb2_grpc.ChatServiceServicer):
             )
             return resp
         
+        self.presence.remove(username)
         self.remove_subscriber(username)
         resp = chat_pb2.DeleteUserResponse(
             status="success",
             message=f"User {username} deleted."
         )
 
-        resp_size = len(resp.SerializeToString())
-        log_data_usage("DeleteUser", req_size, resp_size)
         return resp
 
-    def Subscribe(self, request, context):
+    async def _push_messages(self, stream, resume_from=None):
         """
-        Streaming RPC that yields messages to the user in real-time. The user must be active
-        (logged in) to receive messages. As soon as they disconnect (context ends),
-        the subscription is removed.
+        Internal method producing the IncomingMessages of a subscription: first
+        the pushes replayed from the outbox after resume_from (if given), then
+        live pushes from the hub stream, de-duplicated by seq. Ends when the
+        stream is closed.
+
+        :param stream: The SubscriberStream registered for the user. It must be
+                       opened before this is called, so pushes applied during
+                       the replay are buffered, not lost.
+        :param resume_from: The last push seq the client has seen, or None for live only.
+        :return: An async generator of IncomingMessage objects.
+        """
+        username = stream.username
+        last_seq = resume_from or 0
+
+        replay = []
+        if resume_from is not None:
+            rows, oldest_seq = await asyncio.get_running_loop().run_in_executor(
+                None, self.raft_db.get_pushes_since, username, resume_from)
+            if oldest_seq > resume_from + 1:
+                # Part of the gap is older than the outbox retains
+                replay.append(CoalescedNotice(oldest_seq - resume_from - 1))
+            replay.extend(
+                (row["sender_username"], row["content"], row["message_id"], row["sent_at_ms"], row["seq"])
+                for row in rows
+            )
+            print(f"[DEBUG] Replaying {len(rows)} pushes to {username} after seq {resume_from}")
 
-        :param request: A SubscribeRequest containing the username.
-        :param context: gRPC context.
-        :return: A generator of IncomingMessage objects (streamed via gRPC).
+        pending = iter(replay)
+        while True:
+            item = None if stream.closed else next(pending, None)
+            if item is None:
+                item = await stream.get()
+            if item is None:
+                # Subscription released (logout, account deletion, expiry or overflow)
+                return
+            if isinstance(item, CoalescedNotice):
+                yield chat_pb2.IncomingMessage(
+                    content=f"{item.count} new messages",
+                    coalesced_count=item.count
+                )
+                continue
+            sender, content, message_id, sent_at_ms, seq = item
+            if seq:
+                if seq <= last_seq:
+                    # Already delivered by the replay
+                    continue
+                last_seq = seq
+            yield chat_pb2.IncomingMessage(
+                sender=sender,
+                content=content,
+                message_id=message_id,
+                sent_at_ms=sent_at_ms,
+                seq=seq
+            )
+
+    async def Subscribe(self, request, context):
+        """
+        Streaming RPC that writes messages to the user in real-time. The user must be active
+        (logged in) to receive messages. The call runs as a coroutine on the server's
+        event loop and sleeps until the hub hands it a message, so idle streams hold
+        no worker thread. When the client disconnects the call is cancelled, and
+        when the subscription is released (logout, expiry) the stream ends. A client
+        that falls further behind than the stream buffer gets the server's overflow
+        policy: old pushes dropped, a coalesced "N new messages" notice, or the call
+        aborted with RESOURCE_EXHAUSTED.
+
+        Every push carries the receiver's sequence number. A client that reconnects
+        with resume_from set to the last seq it saw first gets the pushes it missed,
+        replayed from the push outbox, then the live stream.
+
+        :param request: A SubscribeRequest containing the username and resume offset.
+        :param context: gRPC context, used to write IncomingMessage objects to the stream.
+        """
+        resume_from = request.resume_from if request.HasField("resume_from") else None
+        await self.serve_subscription(request.username, resume_from, context)
+
+    async def serve_subscription(self, username, resume_from, context, convert=None):
+        """
+        Write a user's pushes to a Subscribe call until it ends. Shared by every
+        schema version of Subscribe.
+
+        :param username: The subscribing user.
+        :param resume_from: The last push seq the client has seen, or None for live pushes only.
+        :param context: gRPC context of the Subscribe call.
+        :param convert: Optional function turning each IncomingMessage into the
+                        message written to the stream.
         """
-        username = request.username
-        
         # Check if user is active
-        if not self.raft_db.is_user_active(username):
+        if not self.is_session_active(username):
             return
 
-        # Add to subscribers (local operation)
-        self.add_subscriber(username)
-        q = self.subscribers[username]
+        # Register the stream with the hub (local operation)
+        stream = self.hub.open(username)
 
         # Stream messages
         try:
-            while True:
-                # Check if context is still active
-                if context.is_active():
-                    try:
-                        # Get message with timeout to periodically check context
-                        sender, content = q.get(block=True, timeout=1.0)
-                        yield chat_pb2.IncomingMessage(sender=sender, content=content)
-                    except queue.Empty:
-                        # Just continue if no message is available
-                        continue
+            async for message in self._push_messages(stream, resume_from):
+                if convert is not None:
+                    message = convert(message)
+                self.compression.before_write(context, "Subscribe", message)
+                if not await stream.send(context.write(message)):
+                    break
+
+            if stream.overflowed:
+                print(f"[DEBUG] Subscribe stream for {username} overflowed, disconnecting")
+                await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,
+                                    "Subscriber fell too far behind; resubscribe with resume_from to catch up.")
+        finally:
+            # Ensure we clean up subscription, including on cancellation
+            self.hub.unregister(stream)
+
+    async def Session(self, request_iterator, context):
+        """
+        Bidirectional streaming RPC carrying tagged operations over one long-lived
+        stream. Each SessionRequest names one ChatService operation; it runs on the
+        servicer's thread pool through the same handler as the unary RPC, and its
+        SessionResponse echoes the request_id as soon as it completes, so responses
+        to pipelined requests may arrive out of order. At most SESSION_MAX_IN_FLIGHT
+        operations run at once per session; further requests wait, which pushes back
+        on the client through flow control.
+
+        A subscribe operation starts pushes on the same stream: every pushed
+        IncomingMessage is sent with the subscribe request's request_id. The
+        session ends once the client half-closes its side and the operations
+        already accepted have been answered.
+
+        :param request_iterator: The client's stream of SessionRequest messages.
+        :param context: gRPC context, used to write SessionResponse messages.
+        """
+        loop = asyncio.get_running_loop()
+        outgoing = asyncio.Queue(maxsize=SESSION_MAX_IN_FLIGHT)
+        in_flight = asyncio.Semaphore(SESSION_MAX_IN_FLIGHT)
+        op_tasks = set()
+        subscription = {"stream": None, "task": None}
+
+        async def run_op(request_id, op, inner_request):
+            """Run one unary handler off the event loop and queue its response."""
+            try:
+                handler = getattr(self, SESSION_OPS[op])
+                if self.tracer is not None:
+                    result = await loop.run_in_executor(self.executor, self.tracer.call, f"Session/{SESSION_OPS[op]}",
+                                                        handler, inner_request, context)
                 else:
-                    # Context is no longer active, stop streaming
+                    result = await loop.run_in_executor(self.executor, handler, inner_request, context)
+                response = chat_pb2.SessionResponse(request_id=request_id, **{op: result})
+            except Exception as e:
+                print(f"[DEBUG] Session op {op} failed: {e}")
+                response = chat_pb2.SessionResponse(request_id=request_id, error=str(e))
+            finally:
+                in_flight.release()
+            await outgoing.put(response)
+
+        async def pump_pushes(request_id, stream, resume_from):
+            """Forward a subscription's pushes onto the session."""
+            async for message in self._push_messages(stream, resume_from):
+                response = chat_pb2.SessionResponse(request_id=request_id, push=message)
+                if not await stream.send(outgoing.put(response)):
+                    break
+            if stream.overflowed:
+                print(f"[DEBUG] Session pushes for {stream.username} overflowed, unsubscribing")
+                # Wait for room: finished operations may have filled the queue, and this
+                # notice is the client's only sign that the subscription ended
+                await outgoing.put(chat_pb2.SessionResponse(
+                    request_id=request_id,
+                    error="Subscriber fell too far behind; resubscribe with resume_from to catch up."))
+
+        async def subscribe(request_id, inner_request):
+            """Open (or replace) this session's push subscription."""
+            if not self.is_session_active(inner_request.username):
+                await outgoing.put(chat_pb2.SessionResponse(
+                    request_id=request_id, error="User is not logged in."))
+                return
+            if subscription["stream"] is not None:
+                self.hub.unregister(subscription["stream"])
+            stream = self.hub.open(inner_request.username)
+            resume_from = inner_request.resume_from if inner_request.HasField("resume_from") else None
+            subscription["stream"] = stream
+            subscription["task"] = asyncio.ensure_future(pump_pushes(request_id, stream, resume_from))
+
+        async def read_requests():
+            """Dispatch incoming requests until the client half-closes the stream."""
+            try:
+                async for request in request_iterator:
+                    await in_flight.acquire()
+                    op = request.WhichOneof("op")
+                    if op == "subscribe":
+                        in_flight.release()
+                        await subscribe(request.request_id, request.subscribe)
+                        continue
+                    if op not in SESSION_OPS:
+                        in_flight.release()
+                        await outgoing.put(chat_pb2.SessionResponse(
+                            request_id=request.request_id, error=f"Unknown session operation: {op}"))
+                        continue
+                    task = asyncio.ensure_future(run_op(request.request_id, op, getattr(request, op)))
+                    op_tasks.add(task)
+                    task.add_done_callback(op_tasks.discard)
+            except Exception as e:
+                print(f"[DEBUG] Session request stream failed: {e}")
+            # Finish the operations already accepted, then end the session
+            if op_tasks:
+                await asyncio.wait(list(op_tasks))
+            await outgoing.put(None)
+
+        reader = asyncio.ensure_future(read_requests())
+        try:
+            while True:
+                response = await outgoing.get()
+                if response is None:
                     break
-        except Exception:
-            pass
+                self.compression.before_write(context, "Session", response)
+                await context.write(response)
         finally:
-            # Ensure we clean up subscription
-            self.remove_subscriber(username)
+            reader.cancel()
+            for task in list(op_tasks):
+                task.cancel()
+            if subscription["task"] is not None:
+                subscription["task"].cancel()
+            if subscription["stream"] is not None:
+                self.hub.unregister(subscription["stream"])
+
+    def Heartbeat(self, request, context):
+        """
+        RPC method to keep a logged-in session alive. Sessions that miss
+        heartbeats for longer than the TTL are logged out automatically.
+
+        :param request: A HeartbeatRequest containing the username.
+        :param context: gRPC context.
+        :return: HeartbeatResponse with the cluster's online-user count and the session TTL.
+        """
+        username = request.username
+        ttl_seconds = int(self.presence.ttl)
+
+        if not self.is_session_active(username):
+            resp = chat_pb2.HeartbeatResponse(
+                status="error",
+                message="Session expired or user not logged in.",
+                online_count=self.raft_db.get_online_count(),
+                ttl_seconds=ttl_seconds
+            )
+            return resp
+
+        resp = chat_pb2.HeartbeatResponse(
+            status="success",
+            message="Session alive.",
+            online_count=self.raft_db.get_online_count(),
+            ttl_seconds=ttl_seconds
+        )
+        return resp
+
+    def SyncSince(self, request, context):
+        """
+        RPC method for a reconnecting client to catch up: returns only the messages
+        received, marked as read or deleted and the users created or deleted after
+        the client's change cursor. New messages are not marked as read.
+
+        :param request: A SyncSinceRequest containing username, cursor and limit.
+        :param context: gRPC context.
+        :return: SyncSinceResponse with the changes and the cursor to resume from.
+        """
+        username = request.username
+        if not self.is_session_active(username):
+            resp = chat_pb2.SyncSinceResponse(status="error", message="User not logged in.")
+            return resp
+
+        limit = request.limit if request.limit > 0 else SYNC_CHANGES_LIMIT
+        changes = self.raft_db.get_changes_since(username, request.cursor, limit)
+        if changes is None:
+            resp = chat_pb2.SyncSinceResponse(status="error", message="User not found.")
+            return resp
+
+        if changes["reset"]:
+            message = "Cursor cannot be resumed; reload messages and users."
+        else:
+            message = (f"{len(changes['messages'])} new, {len(changes['read_ids'])} read, "
+                       f"{len(changes['deleted_ids'])} deleted messages.")
+        resp = chat_pb2.SyncSinceResponse(
+            status="success",
+            message=message,
+            cursor=changes["cursor"],
+            reset=changes["reset"],
+            has_more=changes["has_more"],
+            new_messages=[chat_pb2.ChatMessage(
+                id=row["id"],
+                sender_username=row["sender_username"],
+                content=row["content"],
+                timestamp=row["timestamp"],
+                read_status=row["read_status"],
+            ) for row in changes["messages"]],
+            read_up_to=changes["read_up_to"],
+            read_ids=changes["read_ids"],
+            deleted_ids=changes["deleted_ids"],
+            new_users=[chat_pb2.UserInfo(username=u, display_name=d) for u, d in changes["users"]],
+            deleted_users=changes["deleted_users"],
+        )
+        return resp
+
+    def conversation_page(self, username, before, limit):
+        """
+        Fetch one page of a user's conversations, most recent first. Shared by every
+        schema version of ListConversations; the caller checks the session.
+
+        :param username: The user whose conversations are listed.
+        :param before: Continue below this last-message ID (0 starts from the most recent).
+        :param limit: Conversations per page (0 for the default).
+        :return: (list of sqlite3.Row conversations, `before` of the next page or 0 if none)
+        """
+        limit = limit if limit > 0 else CONVERSATION_PAGE
+        # One extra row tells whether another page follows
+        rows = self.raft_db.get_conversations(username, before if before > 0 else None, limit + 1)
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1]["last_message_id"]
+        return rows, 0
+
+    def ListConversations(self, request, context):
+        """
+        RPC method to list the current user's conversations, most recent first, each
+        with its last message and the number of unread messages from the peer. The
+        list is read from the conversations table, so its cost does not depend on
+        how many messages the user has.
+
+        :param request: A ListConversationsRequest containing username, before and limit.
+        :param context: gRPC context.
+        :return: ListConversationsResponse with one page of conversations.
+        """
+        if not self.is_session_active(request.username):
+            resp = chat_pb2.ListConversationsResponse(status="error", message="User not logged in.")
+            return resp
+
+        rows, next_before = self.conversation_page(request.username, request.before, request.limit)
+        resp = chat_pb2.ListConversationsResponse(
+            status="success",
+            message=f"Retrieved {len(rows)} conversations.",
+            conversations=[chat_pb2.ConversationInfo(
+                peer=row["peer_username"],
+                last_message_id=row["last_message_id"],
+                last_timestamp=row["last_timestamp"],
+                last_content=row["last_content"],
+                unread_count=row["unread_count"],
+            ) for row in rows],
+            next_before=next_before,
+        )
+        return resp
+
+    def conversation_history(self, username, peer, cursor, limit):
+        """
+        Fetch one page of the messages between a user and a peer, newest first.
+        Shared by every schema version of GetConversation; the caller checks the
+        session.
+
+        :param username: The user asking.
+        :param peer: The other side of the conversation.
+        :param cursor: Continue below this message ID (0 starts from the newest).
+        :param limit: Messages per page (0 for the default).
+        :return: (list of sqlite3.Row messages, cursor of the next page or 0 if none),
+                 or None if either user does not exist.
+        """
+        limit = limit if limit > 0 else HISTORY_PAGE
+        # One extra row tells whether another page follows
+        rows = self.raft_db.get_conversation(username, peer, cursor if cursor > 0 else None, limit + 1)
+        if rows is None:
+            return None
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1]["id"]
+        return rows, 0
+
+    def GetConversation(self, request, context):
+        """
+        RPC method to open the thread between the current user and a peer: the
+        messages sent in both directions, interleaved newest first and paged by
+        message ID. Pages are read through the pair index, so opening a thread costs
+        one page however long it is. Messages are not marked as read.
+
+        :param request: A GetConversationRequest containing username, peer, cursor and limit.
+        :param context: gRPC context.
+        :return: GetConversationResponse with one page of messages.
+        """
+        if not self.is_session_active(request.username):
+            resp = chat_pb2.GetConversationResponse(status="error", message="User not logged in.")
+            return resp
+
+        page = self.conversation_history(request.username, request.peer, request.cursor, request.limit)
+        if page is None:
+            resp = chat_pb2.GetConversationResponse(status="error", message="User not found.")
+            return resp
+
+        rows, next_cursor = page
+        resp = chat_pb2.GetConversationResponse(
+            status="success",
+            message=f"Retrieved {len(rows)} messages.",
+            messages=[chat_pb2.ChatMessage(
+                id=row["id"],
+                sender_username=row["sender_username"],
+                content=row["content"],
+                timestamp=row["timestamp"],
+                read_status=row["read_status"],
+            ) for row in rows],
+            next_cursor=next_cursor,
+        )
+        return resp
+
+    def sent_page(self, username, cursor, limit):
+        """
+        Fetch one page of the messages a user has sent, newest first. Shared by
+        every schema version of ListSentMessages; the caller checks the session.
+
+        :param username: The sender.
+        :param cursor: Continue below this message ID (0 starts from the newest).
+        :param limit: Messages per page (0 for the default).
+        :return: (list of sqlite3.Row messages, cursor of the next page or 0 if none),
+                 or None if the user does not exist.
+        """
+        limit = limit if limit > 0 else SENT_PAGE
+        # One extra row tells whether another page follows
+        rows = self.raft_db.get_sent_messages(username, cursor if cursor > 0 else None, limit + 1)
+        if rows is None:
+            return None
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1]["id"]
+        return rows, 0
+
+    def ListSentMessages(self, request, context):
+        """
+        RPC method to list the messages the current user has sent, newest first and
+        paged by message ID, with each message's receiver and whether the receiver
+        has read it. Pages are read through the sender index, so a page costs the
+        same however many messages the user has sent.
+
+        :param request: A ListSentMessagesRequest containing username, cursor and limit.
+        :param context: gRPC context.
+        :return: ListSentMessagesResponse with one page of messages.
+        """
+        if not self.is_session_active(request.username):
+            resp = chat_pb2.ListSentMessagesResponse(status="error", message="User not logged in.")
+            return resp
+
+        page = self.sent_page(request.username, request.cursor, request.limit)
+        if page is None:
+            resp = chat_pb2.ListSentMessagesResponse(status="error", message="User not found.")
+            return resp
+
+        rows, next_cursor = page
+        resp = chat_pb2.ListSentMessagesResponse(
+            status="success",
+            message=f"Retrieved {len(rows)} sent messages.",
+            messages=[chat_pb2.ChatMessage(
+                id=row["id"],
+                sender_username=row["sender_username"],
+                receiver_username=row["receiver_username"],
+                content=row["content"],
+                timestamp=row["timestamp"],
+                read_status=row["read_status"],
+            ) for row in rows],
+            next_cursor=next_cursor,
+        )
+        return resp
+
+    def GetRaftStatus(self, request, context):
+        """
+        RPC method to report this node's Raft state: its role and the leader,
+        commit and apply progress, the log's length, how far each follower lags
+        (on the leader) and summaries of the submit-to-apply and apply latencies.
+
+        :param request: A RaftStatusRequest (no fields).
+        :param context: gRPC context.
+        :return: RaftStatusResponse with the node's current Raft status.
+        """
+        status = self.raft_db.raft_status()
+        resp = chat_pb2.RaftStatusResponse(
+            status="success",
+            message=f"Node is {status['role']}.",
+            node=status["node"],
+            role=status["role"],
+            leader=status["leader"],
+            term=status["term"],
+            commit_index=status["commit_index"],
+            last_applied=status["last_applied"],
+            log_entries=status["log_entries"],
+            peers=[chat_pb2.RaftPeer(address=address, **peer) for address, peer in sorted(status["peers"].items())],
+            latencies=[chat_pb2.LatencySummary(name=name, count=count, p50_seconds=p50, p99_seconds=p99,
+                                               mean_seconds=mean)
+                       for name, count, p50, p99, mean in status["latencies"]],
+        )
+        return resp
+
+    def StartProfile(self, request, context):
+        """
+        RPC method to profile this node in place, in the background: sample
+        every thread's stack, run unary handlers under cProfile (for a while or
+        for the next calls of one method) or diff tracemalloc snapshots. The
+        profile is written to a file in the node's profile directory.
+
+        :param request: A ProfileRequest with the mode, length and, for cprofile, method and call limit.
+        :param context: gRPC context.
+        :return: ProfileResponse naming the file, or an error if profiling is
+                 disabled, the request is invalid or a profile is already running.
+        """
+        if self.profiler is None:
+            return chat_pb2.ProfileResponse(status="error", message="Profiling is disabled on this node.")
+        seconds = request.seconds or DEFAULT_PROFILE_SECONDS
+        interval = request.interval_ms / 1000 if request.interval_ms else DEFAULT_SAMPLE_INTERVAL
+        try:
+            path = self.profiler.start(request.mode, seconds, request.method or None, request.calls, interval)
+        except (ValueError, RuntimeError) as e:
+            return chat_pb2.ProfileResponse(status="error", message=str(e))
+        if request.calls:
+            target = f"the next {request.calls} {request.method or 'unary'} calls (at most {seconds:g}s)"
+        else:
+            target = f"{seconds:g}s"
+        print(f"[DEBUG] Profiling ({request.mode}) {target} into {path}")
+        return chat_pb2.ProfileResponse(status="success", message=f"Profiling {target}.", path=path)
 
-def run_server(host, port, node_id, raft_port, other_nodes=None):
+def raft_status_lines(node_id, status):
+    """
+    Format a RaftDB.raft_status() dict for the periodic status output.
+
+    :param node_id: The node's integer ID, as shown in the other [DEBUG] lines.
+    :param status: The raft_status() dict.
+    :return: A list of lines to print.
+    """
+    lines = [f"[DEBUG] Node {node_id} => raft term={status['term']}, commit={status['commit_index']}, "
+             f"applied={status['last_applied']}, log={status['log_entries']} entries"]
+    for address, peer in sorted(status["peers"].items()):
+        state = "connected" if peer["connected"] else "disconnected"
+        lines.append(f"    [DEBUG] peer {address} => {state}, match={peer['match_index']}, lag={peer['lag']}")
+    for name, count, p50, p99, mean in status["latencies"]:
+        lines.append(f"    [DEBUG] {name} => n={count}, p50={p50 * 1000:.2f}ms, p99={p99 * 1000:.2f}ms, "
+                     f"mean={mean * 1000:.2f}ms")
+    return lines
+
+def run_server(host, port, node_id, raft_port, other_nodes=None, session_ttl=DEFAULT_SESSION_TTL,
+               stream_buffer=DEFAULT_MAX_DEPTH, overflow_policy=OVERFLOW_DROP_OLDEST, compression_policy=None,
+               metrics_port=None, status_interval=DEFAULT_STATUS_INTERVAL, trace_file=None,
+               trace_sample=DEFAULT_SAMPLE_RATE, trace_slow=DEFAULT_SLOW_THRESHOLD, profile_dir=None,
+               metrics_host=DEFAULT_METRICS_HOST):
     """
     Run a fault-tolerant chat server node. This sets up the RaftDB instance,
     starts the gRPC server, and periodically prints cluster debug info.
@@ -611,6 +1356,20 @@ def run_server(host, port, node_id, raft_port, other_nodes=None):
     :param raft_port: Port used for Raft consensus communication.
     :param other_nodes: List of other nodes in the format ["host:raft_port", ...].
                        Defaults to an empty list if None.
+    :param session_ttl: Seconds a logged-in session survives without a heartbeat.
+    :param stream_buffer: Maximum pushes buffered per Subscribe stream.
+    :param overflow_policy: Policy applied when a Subscribe stream's buffer is full.
+    :param compression_policy: CompressionPolicy for responses (defaults to gzip above 1 KB).
+    :param metrics_port: Port of the Prometheus metrics endpoint (None for port + METRICS_PORT_OFFSET,
+                         0 to disable it).
+    :param status_interval: Seconds between the printed cluster and Raft status dumps.
+    :param trace_file: Chrome trace-event file the kept request traces are appended to
+                       (None or "" leaves tracing off).
+    :param trace_sample: Fraction of calls traced whatever their latency.
+    :param trace_slow: Seconds from which a call's trace is kept even if not sampled (None to disable).
+    :param profile_dir: Directory StartProfile and the profiling signals write to
+                        (None or "" leaves profiling off).
+    :param metrics_host: Interface the metrics endpoint binds to, independent of host.
     """
     # Create Raft address for this node
     self_addr = f"{host}:{raft_port}"
@@ -621,19 +1380,43 @@ def run_server(host, port, node_id, raft_port, other_nodes=None):
     print(f"[DEBUG] Starting node {node_id} at {host}:{port}, raft={host}:{raft_port}")
     print(f"[DEBUG] Other nodes: {other_nodes}")
     
+    # With a trace file, sampled and slow calls are traced through Raft and SQLite into it
+    tracer = None
+    if trace_file:
+        tracer = Tracer(trace_file, sample_rate=trace_sample, slow_threshold=trace_slow,
+                        process_name=f"node {node_id}").start()
+        print(f"[DEBUG] Node {node_id} traces to {trace_file} (sample={trace_sample}, slow={trace_slow}s)")
+
+    # Profiles started by StartProfile or a signal are written here
+    profiler = NodeProfiler(profile_dir, name=f"node{node_id}") if profile_dir else None
+
     # Create RaftDB instance
-    raft_db = RaftDB(self_addr, other_nodes or [], db_path)
+    raft_db = RaftDB(self_addr, other_nodes or [], db_path, metrics=REGISTRY, tracer=tracer)
+
+    # Serve call and Raft latencies for Prometheus on a local port
+    if metrics_port is None:
+        metrics_port = port + METRICS_PORT_OFFSET
+    if metrics_port:
+        start_http_server(REGISTRY, metrics_host, metrics_port)
+        print(f"[DEBUG] Node {node_id} metrics at http://{metrics_host}:{metrics_port}/metrics")
     
     # Wait for initial Raft consensus
     time.sleep(5)  # Give Raft time to establish leadership
 
+    # Create the servicer; the gRPC server itself runs on an asyncio event loop
+    servicer = FaultTolerantChatServicer(raft_db, session_ttl=session_ttl,
+                                         stream_buffer=stream_buffer, overflow_policy=overflow_policy,
+                                         compression_policy=compression_policy, tracer=tracer,
+                                         profiler=profiler)
+
     def debug_print_cluster():
         """
         Continuously print debug information about the cluster's status,
-        including leadership info, quorum presence, and partner nodes.
+        including leadership info, quorum presence, partner nodes and the
+        Raft log, queue, follower lag and latency figures of raft_status().
         """
         while True:
-            time.sleep(5)
+            time.sleep(status_interval)
             status = raft_db.getStatus()
             if status is not None:
                 # status is a dict containing various info like 'state', 'leader', 'has_quorum', etc.
@@ -654,26 +1437,98 @@ def run_server(host, port, node_id, raft_port, other_nodes=None):
                 print(f"[DEBUG] Node {node_id} => role={role_str}, leader={leader}, "
                       f"has_quorum={has_quorum}, partners={partner_count}")
 
-                for k, v in status.items():
-                    if 'partner_node_status_server_' in k:
-                        print(f"    [DEBUG] {k} => {v}")
+                for line in raft_status_lines(node_id, raft_db.raft_status()):
+                    print(line)
+
+                totals = servicer.hub.totals()
+                print(f"[DEBUG] Node {node_id} => streams={totals['streams']}, queued={totals['queued']}, "
+                      f"max_depth={totals['max_depth']}, dropped={totals['dropped']}, "
+                      f"coalesced={totals['coalesced']}, overflow_disconnects={totals['overflow_disconnects']}")
             else:
                 print(f"[DEBUG] Node {node_id} => No status yet.")
 
     t = threading.Thread(target=debug_print_cluster, daemon=True)
     t.start()
     
+    servicer.adopt_owned_sessions()
+    servicer.presence.start()
+
+    asyncio.run(serve(servicer, raft_db, host, port, node_id, self_addr))
+
+
+def profile_on_signal(profiler, mode):
+    """
+    Start a profile of DEFAULT_PROFILE_SECONDS when the node receives a profiling signal.
+
+    :param profiler: The node's NodeProfiler.
+    :param mode: "sample" or "memory".
+    """
+    try:
+        path = profiler.start(mode, DEFAULT_PROFILE_SECONDS)
+        print(f"[DEBUG] Profiling ({mode}) {DEFAULT_PROFILE_SECONDS:g}s into {path}")
+    except (ValueError, RuntimeError) as e:
+        print(f"[DEBUG] Could not start {mode} profile: {e}")
+
+
+def add_chat_services(servicer, server):
+    """
+    Register the chat service on a gRPC server in both wire schemas: chat.ChatService
+    (v1) and chat.v2.ChatService, which wraps the same servicer.
+
+    :param servicer: The FaultTolerantChatServicer to expose.
+    :param server: The grpc.aio server.
+    """
+    chat_pb2_grpc.add_ChatServiceServicer_to_server(servicer, server)
+    chat_v2_pb2_grpc.add_ChatServiceServicer_to_server(ChatServiceV2Servicer(servicer), server)
+
+
+async def serve(servicer, raft_db, host, port, node_id, self_addr, max_workers=10):
+    """
+    Start the gRPC server on the running event loop and block until a
+    termination signal arrives. Subscribe and Session streams are served as
+    coroutines on this loop; the unary RPCs (and the operations carried by
+    Session streams) keep running synchronously on a thread pool of
+    max_workers threads, so open streams no longer take worker threads away
+    from them.
+
+    :param servicer: The FaultTolerantChatServicer to expose.
+    :param raft_db: The node's RaftDB instance (closed on shutdown).
+    :param host: The host/IP address to bind the gRPC server to.
+    :param port: The port to bind the gRPC server to.
+    :param node_id: Unique integer ID for this node in the cluster.
+    :param self_addr: This node's Raft address (for log output).
+    :param max_workers: Number of threads running the synchronous unary handlers.
+    """
+    loop = asyncio.get_running_loop()
+    servicer.hub.bind(loop)
+
     # Create gRPC server
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    servicer.executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+    # Per-call request/response bytes, written to SERVER_LOG_FILE in batches
+    usage_log = UsageLog(SERVER_LOG_FILE).start()
+    # Responses default to the policy's algorithm; the interceptor exempts small ones.
+    # MetricsInterceptor records per-method latency, calls in flight and errors.
+    # TracingInterceptor, first so its spans cover the others, starts each call's trace.
+    # ProfilingInterceptor, last so it sees only the handler, serves StartProfile's cprofile mode.
+    interceptors = [MetricsInterceptor(REGISTRY), AccountingInterceptor(usage_log),
+                    CompressionInterceptor(servicer.compression)]
+    if servicer.tracer is not None:
+        interceptors.insert(0, TracingInterceptor(servicer.tracer))
+    if servicer.profiler is not None:
+        interceptors.append(ProfilingInterceptor(servicer.profiler))
+    server = grpc.aio.server(
+        migration_thread_pool=servicer.executor,
+        compression=servicer.compression.grpc_algorithm,
+        interceptors=interceptors,
+    )
     
-    # Add our servicer to the server
-    servicer = FaultTolerantChatServicer(raft_db)
-    chat_pb2_grpc.add_ChatServiceServicer_to_server(servicer, server)
+    # Add our servicer to the server, in the v1 and v2 schemas
+    add_chat_services(servicer, server)
     
     # Start listening
     server_addr = f"{host}:{port}"
     server.add_insecure_port(server_addr)
-    server.start()
+    await server.start()
 
     print(f"[DEBUG] Node {node_id} started. Checking status...")
     print(f"[DEBUG] getStatus() => {raft_db.getStatus()}")
@@ -681,24 +1536,26 @@ def run_server(host, port, node_id, raft_port, other_nodes=None):
     print(f"Node {node_id} started at {server_addr} (Raft: {self_addr})")
     
     # Set up signal handlers for graceful shutdown
-    def handle_shutdown(signum, frame):
-        """
-        Handle termination signals to gracefully stop the gRPC server and close the DB.
-        """
-        print(f"Node {node_id} shutting down...")
-        raft_db.close()
-        server.stop(5)  # 5 second grace period
-        sys.exit(0)
+    shutdown_event = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, shutdown_event.set)
+
+    # SIGUSR1 samples every thread and SIGUSR2 diffs memory, each for DEFAULT_PROFILE_SECONDS
+    if servicer.profiler is not None:
+        for signum, mode in ((signal.SIGUSR1, "sample"), (signal.SIGUSR2, "memory")):
+            loop.add_signal_handler(signum, profile_on_signal, servicer.profiler, mode)
     
-    signal.signal(signal.SIGINT, handle_shutdown)
-    signal.signal(signal.SIGTERM, handle_shutdown)
-    
-    # Keep the server running
-    try:
-        while True:
-            time.sleep(3600)  # Sleep for an hour
-    except KeyboardInterrupt:
-        handle_shutdown(None, None)
+    # Keep the server running until a termination signal arrives
+    await shutdown_event.wait()
+
+    # Gracefully stop the gRPC server and close the DB
+    print(f"Node {node_id} shutting down...")
+    servicer.presence.stop()
+    raft_db.close()
+    await server.stop(5)  # 5 second grace period
+    usage_log.close()
+    if servicer.tracer is not None:
+        servicer.tracer.close()
 
 
 def main():
@@ -712,7 +1569,43 @@ def main():
     parser.add_argument("--node-id", type=int, required=True, help="Unique node ID")
     parser.add_argument("--raft-port", type=int, default=50100, help="Base port for Raft consensus")
     parser.add_argument("--cluster", help="Comma-separated list of other nodes (host:raft_port)")
+    parser.add_argument("--session-ttl", type=float, default=DEFAULT_SESSION_TTL,
+                        help="Seconds a session survives without a heartbeat")
+    parser.add_argument("--stream-buffer", type=int, default=DEFAULT_MAX_DEPTH,
+                        help="Pushes buffered per Subscribe stream before the overflow policy applies")
+    parser.add_argument("--overflow-policy", choices=OVERFLOW_POLICIES, default=OVERFLOW_DROP_OLDEST,
+                        help="What to do when a subscriber falls behind by more than the stream buffer")
+    parser.add_argument("--compression", choices=sorted(COMPRESSION_ALGORITHMS), default=DEFAULT_COMPRESSION,
+                        help="Algorithm for responses at or above the compression threshold")
+    parser.add_argument("--compression-threshold", type=int, default=DEFAULT_COMPRESSION_THRESHOLD,
+                        help="Smallest response size in bytes that is compressed")
+    parser.add_argument("--compression-method", action="append", default=[], metavar="METHOD=BYTES|always|never",
+                        help="Per-method threshold override, e.g. ReadMessages=256 or Login=never (repeatable)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help=f"Port of the Prometheus /metrics endpoint (default: --port + {METRICS_PORT_OFFSET}, "
+                             "0 disables it)")
+    parser.add_argument("--metrics-host", default=DEFAULT_METRICS_HOST,
+                        help="Interface the /metrics endpoint binds to; it is not authenticated, so it "
+                             "stays on loopback whatever --host is unless this is set")
+    parser.add_argument("--status-interval", type=float, default=DEFAULT_STATUS_INTERVAL,
+                        help="Seconds between the printed cluster and Raft status dumps")
+    parser.add_argument("--trace-file", default=None,
+                        help="Chrome trace-event file request traces are appended to (tracing is off "
+                             "unless this is set; the file is not rotated)")
+    parser.add_argument("--trace-sample", type=float, default=DEFAULT_SAMPLE_RATE,
+                        help="Fraction of calls traced whatever their latency")
+    parser.add_argument("--trace-slow-ms", type=float, default=DEFAULT_SLOW_THRESHOLD * 1000,
+                        help="Keep the trace of any call at least this slow (0 keeps sampled calls only)")
+    parser.add_argument("--profile-dir", default=None,
+                        help="Directory for StartProfile and SIGUSR1/SIGUSR2 profiles (profiling is off "
+                             "unless this is set)")
     args = parser.parse_args()
+
+    try:
+        method_thresholds = parse_method_thresholds(args.compression_method)
+    except ValueError as e:
+        parser.error(str(e))
+    compression_policy = CompressionPolicy(args.compression, args.compression_threshold, method_thresholds)
     
     # Parse cluster nodes
     other_nodes = []
@@ -728,7 +1621,18 @@ def main():
         args.port,
         args.node_id,
         args.raft_port,
-        other_nodes
+        other_nodes,
+        args.session_ttl,
+        args.stream_buffer,
+        args.overflow_policy,
+        compression_policy,
+        args.metrics_port,
+        args.status_interval,
+        args.trace_file,
+        args.trace_sample,
+        args.trace_slow_ms / 1000 if args.trace_slow_ms > 0 else None,
+        args.profile_dir,
+        args.metrics_host
     )
 
 
@@ -0,0 +1,191 @@
+"""
+interceptors.py
+
+Helpers shared by the gRPC interceptors (metrics, tracing, byte accounting,
+compression, profiling). gRPC dispatches a handler on whether it is a sync or
+async function or generator, so a wrapper has to keep the original's kind,
+and an interceptor that replaces a handler's behavior has to rebuild a
+handler of the same cardinality around it. Client interceptors share the
+copied call details and the observed response stream.
+"""
+
+import contextlib
+import inspect
+
+import grpc
+
+_HANDLER_FACTORIES = (
+    ("unary_unary", grpc.unary_unary_rpc_method_handler),
+    ("unary_stream", grpc.unary_stream_rpc_method_handler),
+    ("stream_unary", grpc.stream_unary_rpc_method_handler),
+    ("stream_stream", grpc.stream_stream_rpc_method_handler),
+)
+
+
+def split_method(full_method):
+    """
+    :param full_method: A full gRPC method path, e.g. "/chat.v2.ChatService/Login".
+    :return: A tuple (service, method), e.g. ("chat.v2.ChatService", "Login").
+    """
+    if isinstance(full_method, bytes):
+        full_method = full_method.decode()
+    service, _, method = full_method.lstrip("/").rpartition("/")
+    return service, method
+
+
+def rewrap_handler(handler, wrap, request_deserializer=None, response_serializer=None):
+    """
+    Rebuild a method handler around a wrapped behavior.
+
+    :param handler: The grpc.RpcMethodHandler to wrap.
+    :param wrap: Called with the handler's behavior; returns the behavior to serve instead.
+    :param request_deserializer: Replaces the handler's request deserializer if given.
+    :param response_serializer: Replaces the handler's response serializer if given.
+    :return: A handler of the same cardinality as the original.
+    """
+    for kind, factory in _HANDLER_FACTORIES:
+        behavior = getattr(handler, kind)
+        if behavior is not None:
+            return factory(
+                wrap(behavior),
+                request_deserializer=request_deserializer or handler.request_deserializer,
+                response_serializer=response_serializer or handler.response_serializer)
+    return handler
+
+
+def observe_behavior(behavior, on_start, on_end, scope=None):
+    """
+    Wrap a handler so on_start() runs before it and on_end(started, context,
+    response, error) once it returns, raises or stops streaming, where started
+    is what on_start returned. response is the response a unary handler
+    returned (gRPC has yet to serialize it) or None, and error the exception
+    it ended with or None. The wrapper stays a sync or async function or
+    generator like the original.
+
+    If given, scope(started) returns a context manager the handler's code runs
+    in. A sync generator may be resumed on different threads, so it enters a
+    new one for every step.
+    """
+    if scope is None:
+        scope = _unscoped
+    if inspect.isasyncgenfunction(behavior):
+        async def wrapped(request, context):
+            started, error = on_start(), None
+            try:
+                with scope(started):
+                    async for response in behavior(request, context):
+                        yield response
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                on_end(started, context, None, error)
+    elif inspect.iscoroutinefunction(behavior):
+        async def wrapped(request, context):
+            started, response, error = on_start(), None, None
+            try:
+                with scope(started):
+                    response = await behavior(request, context)
+                return response
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                on_end(started, context, response, error)
+    elif inspect.isgeneratorfunction(behavior):
+        def wrapped(request, context):
+            started, error = on_start(), None
+            try:
+                if scope is _unscoped:
+                    yield from behavior(request, context)
+                else:
+                    yield from _scoped_steps(behavior(request, context), scope, started)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                on_end(started, context, None, error)
+    else:
+        def wrapped(request, context):
+            started, response, error = on_start(), None, None
+            try:
+                with scope(started):
+                    response = behavior(request, context)
+                return response
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                on_end(started, context, response, error)
+    return wrapped
+
+
+def _unscoped(started):
+    return _NO_SCOPE
+
+
+_NO_SCOPE = contextlib.nullcontext()
+
+
+def _scoped_steps(responses, scope, started):
+    """
+    Internal method to run each step of a response generator in its own scope.
+    """
+    try:
+        while True:
+            with scope(started):
+                try:
+                    response = next(responses)
+                except StopIteration:
+                    return
+            yield response
+    finally:
+        responses.close()
+
+
+class ClientCallDetails(grpc.ClientCallDetails):
+    """
+    A copy of a client call's details with some fields replaced, e.g.
+    `ClientCallDetails(details, metadata=metadata)`.
+    """
+
+    def __init__(self, details, **replaced):
+        self.method = details.method
+        self.timeout = details.timeout
+        self.metadata = details.metadata
+        self.credentials = details.credentials
+        self.wait_for_ready = getattr(details, "wait_for_ready", None)
+        self.compression = getattr(details, "compression", None)
+        for name, value in replaced.items():
+            setattr(self, name, value)
+
+
+class ObservedResponses:
+    """
+    A client response stream that passes each message the caller consumes to
+    on_message, if given, and calls on_end() once iteration ends. Everything
+    else is delegated to the underlying call.
+    """
+
+    def __init__(self, call, on_end, on_message=None):
+        self._call = call
+        self._on_end = on_end
+        self._on_message = on_message
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            message = next(self._call)
+        except (StopIteration, grpc.RpcError):
+            if self._on_end is not None:
+                self._on_end()
+                self._on_end = None
+            raise
+        if self._on_message is not None:
+            self._on_message(message)
+        return message
+
+    def __getattr__(self, name):
+        return getattr(self._call, name)
@@ -0,0 +1,436 @@
+"""
+metrics.py
+
+In-process metrics for a chat node: counters, gauges and latency histograms,
+served in the Prometheus text format from a small HTTP endpoint on a local
+port (GET /metrics).
+
+Recording is lock-free. Each thread that records into a metric gets its own
+shard of counts, so an increment never waits on, or races with, another
+thread. A scrape adds the shards up. Coroutines on the event loop share
+their thread's shard, which is safe because they never interleave within
+one update.
+
+MetricsInterceptor records, per method, the call latency, the calls in
+flight and the failed calls by status, for unary and streaming RPCs alike.
+RaftDB records the commit and apply latency of replicated commands into the
+same registry.
+"""
+
+import asyncio
+import http.server
+import threading
+import time
+from bisect import bisect_left
+
+import grpc
+
+from interceptors import observe_behavior, rewrap_handler, split_method
+
+# Bucket upper bounds in seconds, from a cached read up to a stalled Raft commit
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SUCCESS_STATUSES = (None, "", "success", 0)  # response `status` values that are not errors (v1 and v2)
+
+
+def _format_value(value):
+    """
+    :return: A sample value as Prometheus writes it.
+    """
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=""):
+    """
+    :return: A label set such as {service="chat.ChatService",method="Login"}, or "" without labels.
+    """
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Shards:
+    """
+    Per-thread lists of numbers, created on a thread's first update and summed
+    when read. Children look their thread's list up in `local` themselves, as
+    that lookup is on every update's path.
+    """
+    __slots__ = ("size", "all", "local", "lock")
+
+    def __init__(self, size):
+        self.size = size
+        self.all = []
+        self.local = threading.local()
+        self.lock = threading.Lock()  # only taken when a thread records for the first time
+
+    def new(self):
+        """
+        :return: A new shard for the calling thread.
+        """
+        shard = [0] * self.size
+        with self.lock:
+            self.all.append(shard)
+        self.local.shard = shard
+        return shard
+
+    def total(self):
+        """
+        :return: The element-wise sum of every thread's shard.
+        """
+        totals = [0] * self.size
+        with self.lock:
+            shards = list(self.all)
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class _CounterChild:
+    __slots__ = ("_shards", "_local")
+
+    def __init__(self):
+        self._shards = _Shards(1)
+        self._local = self._shards.local
+
+    def inc(self, amount=1):
+        """
+        :param amount: How much to add (non-negative).
+        """
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shards.new()
+        shard[0] += amount
+
+    def value(self):
+        return self._shards.total()[0]
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ("_function",)
+
+    def __init__(self):
+        super().__init__()
+        self._function = None
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set_function(self, function):
+        """
+        Report function() at every scrape instead of the inc/dec total.
+        """
+        self._function = function
+
+    def value(self):
+        if self._function is not None:
+            return self._function()
+        return self._shards.total()[0]
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_shards", "_local")
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        # One count per bucket (the last is +Inf), then the sum of observations
+        self._shards = _Shards(len(bounds) + 2)
+        self._local = self._shards.local
+
+    def observe(self, value):
+        """
+        :param value: One observation, in seconds for latency histograms.
+        """
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shards.new()
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self):
+        """
+        :return: A tuple (cumulative bucket counts ending with +Inf, count, sum).
+        """
+        totals = self._shards.total()
+        cumulative, running = [], 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+    def quantile(self, q):
+        """
+        Estimate a quantile from the buckets the way Prometheus' histogram_quantile
+        does: interpolate linearly inside the bucket holding the q-th observation.
+
+        :param q: The quantile, e.g. 0.99.
+        :return: The estimate, or None without observations.
+        """
+        cumulative, count, _ = self.snapshot()
+        if count == 0:
+            return None
+        rank = q * count
+        index = bisect_left(cumulative, rank)
+        if index >= len(self._bounds):
+            return self._bounds[-1]
+        lower = self._bounds[index - 1] if index > 0 else 0.0
+        below = cumulative[index - 1] if index > 0 else 0
+        in_bucket = cumulative[index] - below
+        if in_bucket == 0:
+            return self._bounds[index]
+        return lower + (self._bounds[index] - lower) * (rank - below) / in_bucket
+
+
+class _Metric:
+    """
+    A named metric with a fixed list of label names and one child per label-value tuple.
+    """
+    kind = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """
+        :param values: One value per label name, in order (none for an unlabelled metric).
+        :return: The child recording for those label values.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _series(self):
+        """
+        :return: (label values, child) pairs sorted by label values.
+        """
+        with self._lock:
+            items = list(self._children.items())
+        return sorted(items, key=lambda item: tuple(str(v) for v in item[0]))
+
+    def render(self):
+        """
+        :return: The metric in the Prometheus text format.
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._series():
+            lines.extend(self._render_child(values, child))
+        return "\n".join(lines) + "\n"
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value())}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, values, child):
+        cumulative, count, total = child.snapshot()
+        lines = []
+        for bound, running in zip(self.buckets + (float("inf"),), cumulative):
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {running}")
+        labels = _format_labels(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(float(total))}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics of one process, in registration order. Asking for a metric
+    that already exists returns it, so components can register independently.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def gauge(self, name, help_text, label_names=()):
+        return self._get_or_create(Gauge, name, help_text, label_names)
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets)
+
+    def get(self, name):
+        """
+        :return: The metric registered under name, or None.
+        """
+        return self._metrics.get(name)
+
+    def render(self):
+        """
+        :return: Every metric in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+
+# The registry a node's components record into unless given another one
+REGISTRY = MetricsRegistry()
+
+
+def start_http_server(registry, host="127.0.0.1", port=0):
+    """
+    Serve registry.render() at GET /metrics on a daemon thread.
+
+    :param registry: The MetricsRegistry to expose.
+    :param host: Interface to bind; the default keeps the endpoint local to the machine.
+    :param port: Port to bind (0 picks a free one, see server.server_address).
+    :return: The running http.server.ThreadingHTTPServer; call shutdown() to stop it.
+    """
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes every few seconds would flood the node's output
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def response_status(response):
+    """
+    The application-level outcome a response reports in its `status` field:
+    "success" in v1, Status.OK in v2.
+
+    :return: None for a successful (or status-less) response, otherwise the
+             status in lower case, e.g. "error" or "already_exists".
+    """
+    status = getattr(response, "status", None)
+    if status in SUCCESS_STATUSES:
+        return None
+    if isinstance(status, str):
+        return status.lower()
+    field = response.DESCRIPTOR.fields_by_name["status"]
+    if field.enum_type is None:
+        return None
+    value = field.enum_type.values_by_number.get(status)
+    return value.name.lower() if value is not None else str(status)
+
+
+class MetricsInterceptor(grpc.aio.ServerInterceptor):
+    """
+    Records per-method latency, calls in flight and failed calls. A call fails
+    when its handler raises (or aborts), or, for unary calls, when its
+    response reports an error status.
+    """
+
+    def __init__(self, registry=REGISTRY):
+        self.duration = registry.histogram(
+            "chat_rpc_duration_seconds", "Time from the start of a call's handler to its end.",
+            ("service", "method"))
+        self.in_flight = registry.gauge(
+            "chat_rpc_in_flight", "Calls whose handler is running.", ("service", "method"))
+        self.errors = registry.counter(
+            "chat_rpc_errors_total", "Failed calls by gRPC code or response status.",
+            ("service", "method", "status"))
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return handler
+        service, method = split_method(handler_call_details.method)
+        duration = self.duration.labels(service, method)
+        in_flight = self.in_flight.labels(service, method)
+
+        def on_start():
+            in_flight.inc()
+            return time.perf_counter()
+
+        def on_end(started, context, response, error):
+            duration.observe(time.perf_counter() - started)
+            in_flight.inc(-1)
+            if error is not None:
+                self.errors.labels(service, method, _call_status(context, error)).inc()
+            elif getattr(response, "status", None) not in SUCCESS_STATUSES:
+                self.errors.labels(service, method, response_status(response)).inc()
+
+        return rewrap_handler(handler, lambda behavior: observe_behavior(behavior, on_start, on_end))
+
+
+def _call_status(context, error):
+    """
+    :return: The name of the gRPC code a handler that raised error ends its call
+             with: the code it set or aborted with, CANCELLED for a stream closed
+             early, UNKNOWN otherwise.
+    """
+    code = None
+    if context is not None and hasattr(context, "code"):
+        try:
+            code = context.code()
+        except Exception:
+            code = None
+    if isinstance(code, grpc.StatusCode) and code is not grpc.StatusCode.OK:
+        return code.name
+    if isinstance(error, (GeneratorExit, asyncio.CancelledError)):
+        return grpc.StatusCode.CANCELLED.name
+    return grpc.StatusCode.UNKNOWN.name
+
@@ -0,0 +1,174 @@
+"""
+presence.py
+
+This module tracks live user sessions on a single server node. Every session
+carries a deadline that is pushed forward by heartbeats; sessions whose
+deadline passes are expired and handed to a callback. Deadlines are kept in a
+hashed timer wheel, so each sweep only visits the slots that have come due
+instead of scanning every session.
+"""
+
+import threading
+import time
+
+
+class PresenceTracker:
+    """
+    Per-node registry of live sessions with TTL-based expiry.
+
+    Each session is stored exactly once: in the `_sessions` dict (username ->
+    [deadline, slot]) and in the wheel slot holding that deadline. Heartbeats
+    only move the deadline forward; the entry is re-slotted lazily when the
+    sweep reaches its old slot, so a heartbeat is O(1) and a sweep costs
+    O(sessions due in the elapsed slots). Removing a session drops both
+    references, so memory is bounded by the number of live sessions no matter
+    how many users come and go.
+    """
+
+    def __init__(self, ttl=30.0, tick=1.0, num_slots=64, on_expire=None, clock=time.monotonic):
+        """
+        Initialize an empty presence tracker.
+
+        :param ttl: Seconds a session stays alive without a heartbeat.
+        :param tick: Granularity of the timer wheel in seconds. Sessions expire
+                     at most one tick after their deadline.
+        :param num_slots: Number of slots in the timer wheel.
+        :param on_expire: Optional callback(username) invoked for every expired session.
+        :param clock: Monotonic clock function, injectable for testing.
+        """
+        self.ttl = ttl
+        self.tick = tick
+        self.num_slots = num_slots
+        self.on_expire = on_expire
+        self._clock = clock
+
+        self._sessions = {}  # username -> [deadline, slot index]
+        self._slots = [set() for _ in range(num_slots)]
+        self._swept_tick = int(clock() // tick) - 1
+        self._lock = threading.Lock()
+
+        self._sweeper = None
+        self._stop_event = threading.Event()
+
+    def _slot_for(self, deadline):
+        """
+        Internal method mapping a deadline to its slot in the wheel.
+
+        :param deadline: Absolute deadline on the tracker's clock.
+        :return: The slot index.
+        """
+        return int(deadline // self.tick) % self.num_slots
+
+    def touch(self, username):
+        """
+        Record a heartbeat for a user, creating a session if none exists.
+
+        :param username: The user whose session should be kept alive.
+        :return: True if a new session was created, False if an existing one was extended.
+        """
+        deadline = self._clock() + self.ttl
+        with self._lock:
+            entry = self._sessions.get(username)
+            if entry is not None:
+                entry[0] = deadline
+                return False
+            slot = self._slot_for(deadline)
+            self._sessions[username] = [deadline, slot]
+            self._slots[slot].add(username)
+            return True
+
+    def remove(self, username):
+        """
+        Drop a user's session without invoking the expiry callback
+        (e.g. on an explicit logout).
+
+        :param username: The user whose session should be removed.
+        :return: True if a session was removed, False if none existed.
+        """
+        with self._lock:
+            entry = self._sessions.pop(username, None)
+            if entry is None:
+                return False
+            self._slots[entry[1]].discard(username)
+            return True
+
+    def is_online(self, username):
+        """
+        Check whether a user currently has a live session on this node.
+
+        :param username: The username to check.
+        :return: True if the user has an unexpired session.
+        """
+        with self._lock:
+            return username in self._sessions
+
+    def online_count(self):
+        """
+        :return: The number of live sessions on this node.
+        """
+        with self._lock:
+            return len(self._sessions)
+
+    def sweep(self, now=None):
+        """
+        Expire every session whose deadline lies in a wheel slot that has fully
+        elapsed since the previous sweep. Entries found in those slots with a
+        later deadline (extended by a heartbeat) are moved to their new slot.
+
+        :param now: Optional current time on the tracker's clock.
+        :return: A list of usernames that were expired by this sweep.
+        """
+        if now is None:
+            now = self._clock()
+        # Only slots strictly before the current tick are guaranteed to hold
+        # deadlines that have passed.
+        last_tick = int(now // self.tick) - 1
+        expired = []
+        with self._lock:
+            elapsed = min(last_tick - self._swept_tick, self.num_slots)
+            for t in range(last_tick - elapsed + 1, last_tick + 1):
+                idx = t % self.num_slots
+                bucket = self._slots[idx]
+                self._slots[idx] = set()
+                for username in bucket:
+                    entry = self._sessions[username]
+                    if entry[0] <= now:
+                        del self._sessions[username]
+                        expired.append(username)
+                    else:
+                        entry[1] = self._slot_for(entry[0])
+                        self._slots[entry[1]].add(username)
+            self._swept_tick = max(self._swept_tick, last_tick)
+
+        if self.on_expire is not None:
+            for username in expired:
+                self.on_expire(username)
+        return expired
+
+    def start(self):
+        """
+        Start a daemon thread that sweeps the wheel once per tick.
+        """
+        if self._sweeper is not None:
+            return
+        self._stop_event.clear()
+
+        def run_sweeper():
+            """Sweep the wheel until stop() is called."""
+            while not self._stop_event.wait(self.tick):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"[DEBUG] Presence sweep failed: {e}")
+
+        self._sweeper = threading.Thread(target=run_sweeper, daemon=True)
+        self._sweeper.start()
+
+    def stop(self):
+        """
+        Stop the sweeper thread if it is running.
+        """
+        self._stop_event.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=2)
+            self._sweeper = None
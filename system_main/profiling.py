@@ -0,0 +1,327 @@
+"""
+profiling.py
+
+On-demand profiling of a running node, so hot spots and memory growth can
+be diagnosed in place instead of restarting the node under cProfile. A
+profile is started by the StartProfile RPC (or a signal, see serve()), runs
+in the background and writes one file to the node's profile directory:
+
+- sample: every thread's stack is sampled every few milliseconds for N
+  seconds, including the Raft and event-loop threads. Written in the folded
+  stacks format ("thread;outer;...;inner count" per line), which
+  flamegraph.pl, inferno and speedscope read as it is.
+- cprofile: the handlers of unary calls run under cProfile for N seconds,
+  or for the next N calls of one method. Each call is profiled on its own
+  thread and the results are merged into one pstats file, for pstats,
+  snakeviz or flameprof.
+- memory: tracemalloc snapshots are taken N seconds apart and the source
+  lines whose allocations grew the most are written as text.
+
+Only one profile runs at a time. Turning a profiler on costs nothing until
+it runs: ProfilingInterceptor only wraps calls while a cprofile capture is
+waiting for them.
+"""
+
+import cProfile
+import collections
+import inspect
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+import grpc
+
+from interceptors import rewrap_handler, split_method
+
+PROFILE_MODES = ("sample", "cprofile", "memory")
+DEFAULT_PROFILE_SECONDS = 30.0  # how long a profile runs unless asked otherwise
+MAX_PROFILE_SECONDS = 3600.0  # longest profile a caller can ask for
+DEFAULT_SAMPLE_INTERVAL = 0.01  # seconds between stack samples
+MEMORY_TOP = 50  # source lines listed in a memory diff
+MEMORY_FRAMES = 10  # frames tracemalloc keeps per allocation when it is started for a diff
+PROFILE_EXTENSIONS = {"sample": "folded", "cprofile": "prof", "memory": "txt"}
+
+
+def frame_label(code):
+    """
+    :param code: A code object.
+    :return: How the function is named in folded stacks, e.g. "SendMessage (ft_server_grpc.py:412)".
+    """
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def folded_stack(thread_name, frame):
+    """
+    :param thread_name: Name of the thread the stack belongs to; the root of the stack.
+    :param frame: The innermost frame of the stack.
+    :return: The stack in the folded format, outermost frame first, without its count.
+    """
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(label.replace(";", ":") for label in reversed(labels))
+
+
+class _Capture:
+    """
+    A cprofile profile waiting for calls: which method it wants, how many
+    calls it takes and the stats merged so far.
+    """
+
+    def __init__(self, method, calls):
+        self.method = method  # method name, or None for every method
+        self.limit = calls or None  # calls to profile, None for no limit
+        self.claimed = 0  # calls started under the profiler
+        self.calls = 0  # calls finished and merged into stats
+        self.stats = None  # pstats.Stats of the calls profiled so far
+        self.lock = threading.Lock()
+
+    def claim(self, method):
+        """
+        :return: True if a call of method should be profiled; it then counts against the limit.
+        """
+        if self.method is not None and self.method != method:
+            return False
+        with self.lock:
+            if self.limit is not None and self.claimed >= self.limit:
+                return False
+            self.claimed += 1
+            return True
+
+
+class NodeProfiler:
+    """
+    Starts profiles of this process and writes each to a file in a directory.
+    """
+
+    def __init__(self, directory, name="node"):
+        """
+        :param directory: Where profile files are written (created when needed).
+        :param name: Prefix of the file names, e.g. "node1".
+        """
+        self.directory = directory
+        self.name = name
+        self.capture = None  # the running cprofile capture, read by ProfilingInterceptor
+        self.last = None  # (mode, path, summary) of the last profile written
+        self.started = 0  # profiles started, numbering the files
+        self._running = None  # (mode, path) of the running profile
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._timer = None
+
+    def running(self):
+        """
+        :return: (mode, path) of the running profile, or None.
+        """
+        return self._running
+
+    def start(self, mode, seconds=DEFAULT_PROFILE_SECONDS, method=None, calls=0,
+              interval=DEFAULT_SAMPLE_INTERVAL):
+        """
+        Start a profile in the background.
+
+        :param mode: "sample", "cprofile" or "memory".
+        :param seconds: How long to profile; for a cprofile of N calls, the longest to wait for them.
+        :param method: cprofile only: profile only calls of this method (e.g. "SendMessage").
+        :param calls: cprofile only: stop after this many calls (0 for no limit).
+        :param interval: sample only: seconds between stack samples.
+        :return: The path the profile will be written to.
+        :raises ValueError: If the mode or a limit is invalid.
+        :raises RuntimeError: If a profile is already running.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'; expected one of {', '.join(PROFILE_MODES)}.")
+        if not 0 < seconds <= MAX_PROFILE_SECONDS:
+            raise ValueError(f"Profile length must be between 0 and {MAX_PROFILE_SECONDS:.0f} seconds.")
+        if calls < 0 or interval <= 0:
+            raise ValueError("Call limit and sample interval must be positive.")
+        if mode != "cprofile" and (method or calls):
+            raise ValueError("A method or call limit only applies to cprofile profiles.")
+        with self._lock:
+            if self._running is not None:
+                raise RuntimeError(f"A {self._running[0]} profile is already running ({self._running[1]}).")
+            os.makedirs(self.directory, exist_ok=True)
+            self.started += 1
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(self.directory,
+                                f"{self.name}_{mode}_{stamp}_{self.started}.{PROFILE_EXTENSIONS[mode]}")
+            self._running = (mode, path)
+            if mode == "cprofile":
+                self.capture = _Capture(method or None, calls)
+                self._timer = threading.Timer(seconds, self._finish_capture)
+                self._timer.daemon = True
+                self._timer.start()
+            else:
+                target = self._sample if mode == "sample" else self._memory_diff
+                args = (path, seconds, interval) if mode == "sample" else (path, seconds)
+                threading.Thread(target=target, args=args, name=f"profile-{mode}", daemon=True).start()
+        return path
+
+    def wait(self, timeout=None):
+        """
+        Wait for the running profile, if any, to be written.
+
+        :return: True if no profile is running any more.
+        """
+        with self._done:
+            return self._done.wait_for(lambda: self._running is None, timeout)
+
+    def _written(self, summary):
+        """
+        Internal method to record that the running profile has been written.
+        """
+        with self._done:
+            mode, path = self._running
+            self.last = (mode, path, summary)
+            self._running = None
+            self._done.notify_all()
+        print(f"[DEBUG] {mode} profile written to {path} ({summary})")
+
+    # ------------------ Modes ------------------
+
+    def _sample(self, path, seconds, interval):
+        """
+        Internal method run on the sampling thread: count every other thread's
+        stack each interval, then write the counts as folded stacks.
+        """
+        own = threading.get_ident()
+        counts = collections.Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        try:
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident != own:
+                        counts[folded_stack(names.get(ident, f"thread-{ident}"), frame)] += 1
+                samples += 1
+                time.sleep(interval)
+            with open(path, "w") as f:
+                for stack, count in counts.most_common():
+                    f.write(f"{stack} {count}\n")
+            summary = f"{samples} samples, {len(counts)} distinct stacks"
+        except Exception as e:
+            summary = f"failed: {e}"
+        self._written(summary)
+
+    def _memory_diff(self, path, seconds):
+        """
+        Internal method run on the memory thread: diff two tracemalloc
+        snapshots taken seconds apart and write the lines that grew most.
+        """
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(MEMORY_FRAMES)
+        try:
+            ignore = (tracemalloc.Filter(False, tracemalloc.__file__),
+                      tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+            before = tracemalloc.take_snapshot().filter_traces(ignore)
+            time.sleep(seconds)
+            after = tracemalloc.take_snapshot().filter_traces(ignore)
+            stats = after.compare_to(before, "lineno")
+            growth = sum(stat.size_diff for stat in stats)
+            with open(path, "w") as f:
+                f.write(f"# tracemalloc diff over {seconds:g}s: {growth / 1024:+.1f} KiB in total, "
+                        f"{sum(stat.size for stat in stats) / 1024:.1f} KiB traced\n")
+                if started:
+                    f.write("# tracing started with this diff, so older allocations are not shown\n")
+                for stat in stats[:MEMORY_TOP]:
+                    f.write(f"{stat}\n")
+            summary = f"{growth / 1024:+.1f} KiB over {seconds:g}s"
+        except Exception as e:
+            summary = f"failed: {e}"
+        finally:
+            if started:
+                tracemalloc.stop()
+        self._written(summary)
+
+    def profile_call(self, capture, function, *args):
+        """
+        Run one call under its own cProfile.Profile and merge the result into
+        the capture. The capture finishes once it has taken its calls.
+
+        :return: What function returned.
+        """
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(function, *args)
+        finally:
+            with capture.lock:
+                if capture.stats is None:
+                    capture.stats = pstats.Stats(profile)
+                else:
+                    capture.stats.add(profile)
+                capture.calls += 1
+                done = capture.limit is not None and capture.calls >= capture.limit
+            if done:
+                self._finish_capture(capture)
+
+    def claim_call(self, method):
+        """
+        :param method: The method of a call about to start.
+        :return: The capture that should profile the call, or None.
+        """
+        capture = self.capture
+        if capture is None or not capture.claim(method):
+            return None
+        return capture
+
+    def _finish_capture(self, capture=None):
+        """
+        Internal method to end the cprofile capture, once its time is up or
+        it has taken its calls, and write its stats.
+        """
+        with self._lock:
+            if self.capture is None or (capture is not None and capture is not self.capture):
+                return
+            capture, self.capture = self.capture, None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            path = self._running[1]
+        with capture.lock:
+            stats = capture.stats
+            try:
+                if stats is None:
+                    summary = "calls profiled: 0"
+                    pstats.Stats(cProfile.Profile()).dump_stats(path)
+                else:
+                    stats.dump_stats(path)
+                    summary = f"calls profiled: {capture.calls}"
+            except Exception as e:
+                summary = f"failed: {e}"
+        self._written(summary)
+
+
+class ProfilingInterceptor(grpc.aio.ServerInterceptor):
+    """
+    Profiles unary handlers while a cprofile profile of NodeProfiler waits
+    for their calls. Other calls, and every call while no such profile runs,
+    are served without a wrapper.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if self.profiler.capture is None or handler is None or handler.unary_unary is None \
+                or inspect.iscoroutinefunction(handler.unary_unary):
+            return handler  # cProfile cannot follow an awaited handler across the event loop
+        method = split_method(handler_call_details.method)[1]
+        profiler = self.profiler
+
+        def profile(behavior):
+            def profiled(request, context):
+                capture = profiler.claim_call(method)
+                if capture is None:
+                    return behavior(request, context)
+                return profiler.profile_call(capture, behavior, request, context)
+            return profiled
+
+        return rewrap_handler(handler, profile)
@@ -5,12 +5,97 @@ This module provides a SQLite database helper (`DBHelper`) and a Raft-based
 wrapper (`RaftDB`) for replicated state management using `pysyncobj`.
 """
 
+import functools
 import os
 import sqlite3
 import threading
+import time
 import datetime
 import zoneinfo
-from pysyncobj import SyncObj, replicated, SyncObjConf
+from pysyncobj import SyncObj, replicated, SyncObjConf, FAIL_REASON
+
+# FAIL_REASON values by name, for metric labels
+FAIL_REASON_NAMES = {value: name.lower() for name, value in vars(FAIL_REASON).items() if name.isupper()}
+RAFT_ROLES = {0: "follower", 1: "candidate", 2: "leader"}  # getStatus()['state'] -> role name
+
+PUSH_OUTBOX_RETENTION = 1000  # most recent push notifications kept per receiver for replay
+SQL_VARIABLE_CHUNK = 500  # usernames per IN (...) lookup, below SQLite's bound-variable limit
+READ_STREAM_CHUNK = 100  # messages per ReadMessagesStream chunk unless the client asks otherwise
+SYNC_CHANGES_LIMIT = 1000  # change_log entries per SyncSince response unless the client asks otherwise
+CHANGE_LOG_RETENTION = 100000  # most recent change_log entries kept for SyncSince; older cursors get reset
+CONVERSATION_PAGE = 50  # conversations per ListConversations page unless the client asks otherwise
+HISTORY_PAGE = 50  # messages per GetConversation page unless the client asks otherwise
+SENT_PAGE = 50  # messages per ListSentMessages page unless the client asks otherwise
+
+# The unordered pair of users a message is between, as indexed by idx_messages_pair
+MESSAGE_PAIR_LOW = "MIN(m.sender_id, m.receiver_id)"
+MESSAGE_PAIR_HIGH = "MAX(m.sender_id, m.receiver_id)"
+
+# change_log kinds; user changes are logged with user_id 0 because every user sees them
+CHANGE_MESSAGE = "message"
+CHANGE_READ = "read"
+CHANGE_READ_UP_TO = "read_up_to"
+CHANGE_MESSAGE_DELETED = "message_deleted"
+CHANGE_USER = "user"
+CHANGE_USER_DELETED = "user_deleted"
+
+# A message's content is stored inline, or once in message_bodies for a
+# multi-recipient send; queries selecting from `messages m` resolve it with these
+MESSAGE_CONTENT_COLUMN = "COALESCE(body.content, m.content) AS content"
+MESSAGE_BODY_JOIN = "LEFT JOIN message_bodies AS body ON body.id = m.body_id"
+
+# A message is read if its ID is at or below the receiver's read watermark, or
+# if its read_status flag was set because it was read out of order
+MESSAGE_READ_COLUMN = "(m.read_status OR m.id <= COALESCE(w.read_up_to, 0)) AS read_status"
+MESSAGE_WATERMARK_JOIN = "LEFT JOIN read_watermarks AS w ON w.receiver_id = m.receiver_id"
+MESSAGE_UNREAD_FILTER = "m.read_status = 0 AND m.id > COALESCE(w.read_up_to, 0)"
+
+# created_ms is the epoch-millisecond time a message was sent, clamped so it never
+# decreases as IDs grow. A time window is therefore one ID range, whose ends are
+# found through idx_messages_created and then bound the receiver's index range.
+MESSAGE_SINCE_FILTER = ("m.id >= (SELECT t.id FROM messages t WHERE t.created_ms >= ? "
+                        "ORDER BY t.created_ms, t.id LIMIT 1)")
+MESSAGE_UNTIL_FILTER = ("m.id <= (SELECT t.id FROM messages t WHERE t.created_ms < ? "
+                        "ORDER BY t.created_ms DESC, t.id DESC LIMIT 1)")
+
+def raft_conf(**overrides):
+    """
+    Build the pysyncobj configuration a RaftDB node runs with.
+
+    :param overrides: SyncObjConf options replacing the defaults, e.g. appendEntriesPeriod=0.01.
+    :return: A new SyncObjConf (each node needs its own).
+    :raises ValueError: If an option is not a SyncObjConf option.
+    """
+    options = dict(
+        autoTick=True,
+        appendEntriesUseBatch=True,
+        dynamicMembershipChange=True,
+        commandsQueueSize=100000,
+        appendEntriesPeriod=0.05,        # Faster heartbeats
+        raftMinTimeout=1.0,             # Must be > 3 * appendEntriesPeriod
+        raftMaxTimeout=2.0,
+        electionTimeout=5.0,            # Increased election timeout
+        connectionRetryDelay=0.5,
+        connectionTimeout=10.0,
+        leaderFallbackTimeout=10.0,      # Increased leader fallback timeout
+    )
+    unknown = [name for name in overrides if not hasattr(SyncObjConf(), name)]
+    if unknown:
+        raise ValueError(f"Unknown SyncObjConf option(s): {', '.join(sorted(unknown))}")
+    options.update(overrides)
+    return SyncObjConf(**options)
+
+class _TracedConnection(sqlite3.Connection):
+    """
+    A SQLite connection whose commits are recorded as "sqlite.commit" spans
+    of the trace current on the committing thread (see tracing.py).
+    """
+    tracer = None
+
+    def commit(self):
+        with self.tracer.span("sqlite.commit"):
+            super().commit()
+
 
 class DBHelper:
     """
@@ -21,15 +106,17 @@ class DBHelper:
     This class ensures PySyncObj does NOT try to pickle the sqlite3.Connection
     by keeping the connection object non-serializable.
     """
-    def __init__(self, db_path):
+    def __init__(self, db_path, tracer=None):
         """
         Initialize the DBHelper with a given path to the SQLite database file.
 
         :param db_path: The filesystem path to the SQLite database file.
+        :param tracer: Optional Tracer (see tracing.py) recording each commit as a span.
         """
         self.__db_path = db_path
         self.__conn = None
         self.__conn_lock = threading.Lock()
+        self.__tracer = tracer
         self._init_db()
 
     def _get_connection(self):
@@ -39,7 +126,11 @@ class DBHelper:
         :return: A SQLite connection object.
         """
         if self.__conn is None:
-            self.__conn = sqlite3.connect(self.__db_path, check_same_thread=False)
+            if self.__tracer is not None:
+                self.__conn = sqlite3.connect(self.__db_path, check_same_thread=False, factory=_TracedConnection)
+                self.__conn.tracer = self.__tracer
+            else:
+                self.__conn = sqlite3.connect(self.__db_path, check_same_thread=False)
             self.__conn.row_factory = sqlite3.Row
             self.__conn.execute("PRAGMA foreign_keys = ON")
         return self.__conn
@@ -47,10 +138,14 @@ class DBHelper:
     def _init_db(self):
         """
         Internal method to initialize the database schema if it doesn't exist.
-        Creates 'users' and 'messages' tables with the appropriate schema.
+        Creates 'users', 'messages', 'message_bodies', 'push_outbox', 'read_watermarks',
+        'change_log' and 'conversations' tables with the appropriate schema, adds the
+        body_id and created_ms columns to older 'messages' tables, moves their read
+        flags to watermarks and builds their conversations.
         """
         c = self._get_connection()
         with self.__conn_lock:
+            tables = {row["name"] for row in c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
             c.execute("""
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -71,8 +166,274 @@ class DBHelper:
                 FOREIGN KEY (receiver_id) REFERENCES users(id) ON DELETE CASCADE
             )
             """)
+            # Bodies shared by the recipient rows of a multi-recipient send
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS message_bodies (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content TEXT NOT NULL
+            )
+            """)
+            columns = [row["name"] for row in c.execute("PRAGMA table_info(messages)")]
+            if "body_id" not in columns:
+                c.execute("ALTER TABLE messages ADD COLUMN body_id INTEGER REFERENCES message_bodies(id)")
+            if "created_ms" not in columns:
+                c.execute("ALTER TABLE messages ADD COLUMN created_ms INTEGER NOT NULL DEFAULT 0")
+                # Existing messages: their stored timestamps, as a running maximum in ID order
+                c.execute("""
+                UPDATE messages SET created_ms = clamped.ms
+                FROM (
+                    SELECT id, MAX(COALESCE(CAST(ROUND((julianday(timestamp) - 2440587.5) * 86400000) AS INTEGER), 0))
+                        OVER (ORDER BY id) AS ms
+                    FROM messages
+                ) AS clamped
+                WHERE messages.id = clamped.id
+                """)
+            # Find the ID range of a time window
+            c.execute("CREATE INDEX IF NOT EXISTS idx_messages_created ON messages(created_ms)")
+            # Walk the messages one receiver got from one sender newest-first
+            c.execute("CREATE INDEX IF NOT EXISTS idx_messages_receiver_sender ON messages(receiver_id, sender_id, id)")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_messages_body ON messages(body_id) WHERE body_id IS NOT NULL")
+            # Walk one receiver's inbox newest-first without sorting it
+            c.execute("CREATE INDEX IF NOT EXISTS idx_messages_receiver ON messages(receiver_id, id)")
+            # Walk one sender's outbox newest-first without sorting it
+            c.execute("CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages(sender_id, id)")
+            # Walk the messages between two users, both directions interleaved by ID
+            c.execute("""
+            CREATE INDEX IF NOT EXISTS idx_messages_pair
+            ON messages(MIN(sender_id, receiver_id), MAX(sender_id, receiver_id), id)
+            """)
+            # Drop a shared body once the last recipient row referencing it is gone
+            c.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_messages_release_body
+            AFTER DELETE ON messages
+            WHEN OLD.body_id IS NOT NULL
+                AND NOT EXISTS (SELECT 1 FROM messages WHERE body_id = OLD.body_id)
+            BEGIN
+                DELETE FROM message_bodies WHERE id = OLD.body_id;
+            END
+            """)
+            # Push notifications per receiver, numbered by a per-receiver sequence so
+            # a Subscribe stream can resume after the last one the client saw
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS push_outbox (
+                receiver_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                sent_at_ms INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (receiver_id, seq),
+                FOREIGN KEY (receiver_id) REFERENCES users(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+            """)
+            # Per receiver, the ID up to which every message has been read. read_status
+            # only records messages above the watermark that were read out of order.
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS read_watermarks (
+                receiver_id INTEGER PRIMARY KEY,
+                read_up_to INTEGER NOT NULL,
+                FOREIGN KEY (receiver_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+            """)
+            if "read_watermarks" not in tables:
+                # Existing read flags: each receiver has read everything below its oldest unread message
+                c.execute("""
+                INSERT INTO read_watermarks (receiver_id, read_up_to)
+                SELECT m.receiver_id, COALESCE(
+                    (SELECT MIN(u.id) - 1 FROM messages u WHERE u.receiver_id = m.receiver_id AND u.read_status = 0),
+                    MAX(m.id))
+                FROM messages m
+                GROUP BY m.receiver_id
+                """)
+            # Unread messages above a watermark, for unread counts and only_unread reads
+            c.execute("CREATE INDEX IF NOT EXISTS idx_messages_unread ON messages(receiver_id, id) WHERE read_status = 0")
+            # Append-only log of what changed for whom, filled by the triggers below so
+            # every write path (and every replica) records the same entries in the same
+            # order. seq is the cursor a reconnecting client passes to SyncSince.
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                item_id INTEGER NOT NULL,
+                username TEXT
+            )
+            """)
+            c.execute("CREATE INDEX IF NOT EXISTS idx_change_log_user ON change_log(user_id, seq)")
+            # Entries older than the newest CHANGE_LOG_RETENTION are trimmed in the same
+            # transaction that logs a new one, so the log stays bounded on every replica.
+            # Recreated on open so a changed retention applies to existing databases.
+            c.execute("DROP TRIGGER IF EXISTS trg_change_log_trim")
+            c.execute(f"""
+            CREATE TRIGGER trg_change_log_trim
+            AFTER INSERT ON change_log
+            WHEN NEW.seq > {CHANGE_LOG_RETENTION}
+            BEGIN
+                DELETE FROM change_log WHERE seq <= NEW.seq - {CHANGE_LOG_RETENTION};
+            END
+            """)
+            c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_change_message_insert
+            AFTER INSERT ON messages
+            BEGIN
+                INSERT INTO change_log (user_id, kind, item_id) VALUES (NEW.receiver_id, '{CHANGE_MESSAGE}', NEW.id);
+            END
+            """)
+            c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_change_message_read
+            AFTER UPDATE OF read_status ON messages
+            WHEN NEW.read_status != OLD.read_status
+            BEGIN
+                INSERT INTO change_log (user_id, kind, item_id) VALUES (NEW.receiver_id, '{CHANGE_READ}', NEW.id);
+            END
+            """)
+            for event in ("INSERT", "UPDATE OF read_up_to"):
+                c.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_change_read_watermark_{event.split()[0].lower()}
+                AFTER {event} ON read_watermarks
+                BEGIN
+                    INSERT INTO change_log (user_id, kind, item_id)
+                    VALUES (NEW.receiver_id, '{CHANGE_READ_UP_TO}', NEW.read_up_to);
+                END
+                """)
+            c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_change_message_delete
+            AFTER DELETE ON messages
+            BEGIN
+                INSERT INTO change_log (user_id, kind, item_id)
+                VALUES (OLD.receiver_id, '{CHANGE_MESSAGE_DELETED}', OLD.id);
+            END
+            """)
+            c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_change_user_insert
+            AFTER INSERT ON users
+            BEGIN
+                INSERT INTO change_log (user_id, kind, item_id, username) VALUES (0, '{CHANGE_USER}', NEW.id, NEW.username);
+            END
+            """)
+            # Runs after the cascade has deleted the user's messages, so it also drops
+            # the entries those deletions logged for the user
+            c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_change_user_delete
+            AFTER DELETE ON users
+            BEGIN
+                DELETE FROM change_log WHERE user_id = OLD.id;
+                INSERT INTO change_log (user_id, kind, item_id, username)
+                VALUES (0, '{CHANGE_USER_DELETED}', OLD.id, OLD.username);
+            END
+            """)
+            self._init_conversations(c, "conversations" not in tables)
             c.commit()
 
+    def _init_conversations(self, c, build):
+        """
+        Internal method to create the 'conversations' table and the triggers that
+        keep it up to date. There is one row per user and peer they have exchanged
+        messages with, holding the newest message either way and how many messages
+        from the peer the user has not read. The triggers run in the same
+        transaction as the write that fires them, so every replicated apply updates
+        the table, and listing conversations never touches 'messages'.
+
+        :param c: The SQLite connection (the caller holds the connection lock).
+        :param build: True if the table is new and should be built from existing messages.
+        """
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS conversations (
+            user_id INTEGER NOT NULL,
+            peer_id INTEGER NOT NULL,
+            last_message_id INTEGER NOT NULL,
+            last_timestamp DATETIME NOT NULL,
+            unread_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, peer_id),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (peer_id) REFERENCES users(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """)
+        # A user's conversations, most recent first
+        c.execute("CREATE INDEX IF NOT EXISTS idx_conversations_recent ON conversations(user_id, last_message_id)")
+        if build:
+            c.execute(f"""
+            INSERT INTO conversations (user_id, peer_id, last_message_id, last_timestamp, unread_count)
+            SELECT user_id, peer_id, MAX(id), timestamp, SUM(unread)
+            FROM (
+                SELECT m.receiver_id AS user_id, m.sender_id AS peer_id, m.id, m.timestamp,
+                       ({MESSAGE_UNREAD_FILTER}) AS unread
+                FROM messages m {MESSAGE_WATERMARK_JOIN}
+                UNION ALL
+                SELECT sender_id, receiver_id, id, timestamp, 0 FROM messages WHERE sender_id != receiver_id
+            )
+            GROUP BY user_id, peer_id
+            """)
+
+        c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_conversations_message_insert
+        AFTER INSERT ON messages
+        BEGIN
+            INSERT INTO conversations (user_id, peer_id, last_message_id, last_timestamp, unread_count)
+            VALUES (NEW.receiver_id, NEW.sender_id, NEW.id, NEW.timestamp, 1)
+            ON CONFLICT (user_id, peer_id) DO UPDATE SET
+                last_message_id = excluded.last_message_id,
+                last_timestamp = excluded.last_timestamp,
+                unread_count = unread_count + 1;
+            INSERT INTO conversations (user_id, peer_id, last_message_id, last_timestamp, unread_count)
+            VALUES (NEW.sender_id, NEW.receiver_id, NEW.id, NEW.timestamp, 0)
+            ON CONFLICT (user_id, peer_id) DO UPDATE SET
+                last_message_id = excluded.last_message_id,
+                last_timestamp = excluded.last_timestamp;
+        END
+        """)
+        # A message above the watermark read out of order
+        c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_conversations_message_read
+        AFTER UPDATE OF read_status ON messages
+        WHEN NEW.read_status = 1 AND OLD.read_status = 0
+            AND NEW.id > (SELECT COALESCE(MAX(read_up_to), 0) FROM read_watermarks WHERE receiver_id = NEW.receiver_id)
+        BEGIN
+            UPDATE conversations SET unread_count = unread_count - 1
+            WHERE user_id = NEW.receiver_id AND peer_id = NEW.sender_id;
+        END
+        """)
+        # A watermark move: recount the conversations that still had unread messages
+        for event in ("INSERT", "UPDATE OF read_up_to"):
+            c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_conversations_watermark_{event.split()[0].lower()}
+            AFTER {event} ON read_watermarks
+            BEGIN
+                UPDATE conversations SET unread_count = (
+                    SELECT COUNT(*) FROM messages m
+                    WHERE m.receiver_id = NEW.receiver_id AND m.read_status = 0 AND m.id > NEW.read_up_to
+                    AND m.sender_id = conversations.peer_id
+                )
+                WHERE user_id = NEW.receiver_id AND unread_count > 0;
+            END
+            """)
+        c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_conversations_message_delete
+        AFTER DELETE ON messages
+        BEGIN
+            UPDATE conversations SET unread_count = unread_count - 1
+            WHERE user_id = OLD.receiver_id AND peer_id = OLD.sender_id AND OLD.read_status = 0
+            AND OLD.id > (SELECT COALESCE(MAX(read_up_to), 0) FROM read_watermarks WHERE receiver_id = OLD.receiver_id);
+            -- Only the deletion of a conversation's newest message changes its last message
+            DELETE FROM conversations
+            WHERE ((user_id = OLD.receiver_id AND peer_id = OLD.sender_id)
+                OR (user_id = OLD.sender_id AND peer_id = OLD.receiver_id))
+            AND last_message_id = OLD.id
+            AND NOT EXISTS (
+                SELECT 1 FROM messages m
+                WHERE MIN(m.sender_id, m.receiver_id) = MIN(OLD.sender_id, OLD.receiver_id)
+                AND MAX(m.sender_id, m.receiver_id) = MAX(OLD.sender_id, OLD.receiver_id)
+            );
+            UPDATE conversations SET (last_message_id, last_timestamp) = (
+                SELECT m.id, m.timestamp FROM messages m
+                WHERE MIN(m.sender_id, m.receiver_id) = MIN(OLD.sender_id, OLD.receiver_id)
+                AND MAX(m.sender_id, m.receiver_id) = MAX(OLD.sender_id, OLD.receiver_id)
+                ORDER BY m.id DESC LIMIT 1
+            )
+            WHERE ((user_id = OLD.receiver_id AND peer_id = OLD.sender_id)
+                OR (user_id = OLD.sender_id AND peer_id = OLD.receiver_id))
+            AND last_message_id = OLD.id;
+        END
+        """)
+
     def close(self):
         """
         Close the database connection if it is active.
@@ -127,19 +488,195 @@ class DBHelper:
         :param sender_id: The user ID of the sender.
         :param receiver_id: The user ID of the receiver.
         :param content: The text content of the message.
-        :return: True if the message was inserted successfully.
+        :return: The ID of the inserted message (always truthy).
         """
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            timestamp, created_ms = self._message_time(cur, int(time.time() * 1000))
+            cur.execute("""
+                INSERT INTO messages (sender_id, receiver_id, content, timestamp, read_status, created_ms)
+                VALUES (?, ?, ?, ?, 0, ?)
+            """, (sender_id, receiver_id, content, timestamp, created_ms))
+            c.commit()
+            return cur.lastrowid
+
+    def _message_time(self, cur, sent_at_ms):
+        """
+        Internal method to stamp a new message. Its created_ms is sent_at_ms, raised to
+        the newest message's created_ms so it never decreases as IDs grow, and its
+        timestamp is the same instant as an Eastern-time ISO-8601 string.
+
+        :param cur: A cursor of the transaction inserting the message.
+        :param sent_at_ms: Epoch milliseconds at which the message was submitted.
+        :return: A tuple (timestamp, created_ms).
+        """
+        cur.execute("SELECT created_ms FROM messages ORDER BY id DESC LIMIT 1")
+        row = cur.fetchone()
+        created_ms = max(sent_at_ms, row[0] if row else 0)
         eastern = zoneinfo.ZoneInfo("America/New_York")
-        timestamp = datetime.datetime.now(eastern).isoformat()
+        return datetime.datetime.fromtimestamp(created_ms / 1000, eastern).isoformat(), created_ms
+
+    def insert_message_with_push(self, sender_id, receiver_id, content, sent_at_ms, retention):
+        """
+        Insert a new message and append it to the receiver's push outbox in one
+        transaction. Outbox entries older than the newest `retention` ones are trimmed.
+
+        :param sender_id: The user ID of the sender.
+        :param receiver_id: The user ID of the receiver.
+        :param content: The text content of the message.
+        :param sent_at_ms: Epoch milliseconds at which the message was submitted.
+        :param retention: Number of outbox entries to keep for the receiver.
+        :return: A tuple (message_id, seq) with the new message ID and its push sequence number.
+        """
         with self.__conn_lock:
             c = self._get_connection()
             cur = c.cursor()
+            timestamp, created_ms = self._message_time(cur, sent_at_ms)
             cur.execute("""
-                INSERT INTO messages (sender_id, receiver_id, content, timestamp, read_status)
-                VALUES (?, ?, ?, ?, 0)
-            """, (sender_id, receiver_id, content, timestamp))
+                INSERT INTO messages (sender_id, receiver_id, content, timestamp, read_status, created_ms)
+                VALUES (?, ?, ?, ?, 0, ?)
+            """, (sender_id, receiver_id, content, timestamp, created_ms))
+            message_id = cur.lastrowid
+            cur.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM push_outbox WHERE receiver_id = ?", (receiver_id,))
+            seq = cur.fetchone()[0]
+            cur.execute("""
+                INSERT INTO push_outbox (receiver_id, seq, message_id, sent_at_ms)
+                VALUES (?, ?, ?, ?)
+            """, (receiver_id, seq, message_id, sent_at_ms))
+            cur.execute("DELETE FROM push_outbox WHERE receiver_id = ? AND seq <= ?", (receiver_id, seq - retention))
             c.commit()
-        return True
+            return message_id, seq
+
+    def insert_fanout_messages(self, sender_id, receivers, content, sent_at_ms, retention):
+        """
+        Insert one message for each of several receivers in a single transaction.
+        The content is stored once in 'message_bodies' and referenced by every
+        recipient row, and each receiver's push outbox gets the next sequence number.
+
+        :param sender_id: The user ID of the sender.
+        :param receivers: A list of (receiver_id, receiver_username) tuples, without duplicates.
+        :param content: The text content of the message.
+        :param sent_at_ms: Epoch milliseconds at which the message was submitted.
+        :param retention: Number of outbox entries to keep per receiver.
+        :return: A list of (receiver_username, message_id, seq) tuples in receiver order.
+        """
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            timestamp, created_ms = self._message_time(cur, sent_at_ms)
+            cur.execute("INSERT INTO message_bodies (content) VALUES (?)", (content,))
+            body_id = cur.lastrowid
+
+            last_seqs = {}
+            receiver_ids = [receiver_id for receiver_id, _ in receivers]
+            for start in range(0, len(receiver_ids), SQL_VARIABLE_CHUNK):
+                chunk = receiver_ids[start:start + SQL_VARIABLE_CHUNK]
+                cur.execute(f"""
+                    SELECT receiver_id, MAX(seq) AS seq FROM push_outbox
+                    WHERE receiver_id IN ({",".join("?" * len(chunk))})
+                    GROUP BY receiver_id
+                """, chunk)
+                last_seqs.update((row["receiver_id"], row["seq"]) for row in cur.fetchall())
+
+            delivered = []
+            outbox_rows = []
+            for receiver_id, receiver_username in receivers:
+                cur.execute("""
+                    INSERT INTO messages (sender_id, receiver_id, content, timestamp, read_status, body_id, created_ms)
+                    VALUES (?, ?, '', ?, 0, ?, ?)
+                """, (sender_id, receiver_id, timestamp, body_id, created_ms))
+                seq = last_seqs.get(receiver_id, 0) + 1
+                outbox_rows.append((receiver_id, seq, cur.lastrowid, sent_at_ms))
+                delivered.append((receiver_username, cur.lastrowid, seq))
+            cur.executemany("""
+                INSERT INTO push_outbox (receiver_id, seq, message_id, sent_at_ms)
+                VALUES (?, ?, ?, ?)
+            """, outbox_rows)
+            cur.executemany("DELETE FROM push_outbox WHERE receiver_id = ? AND seq <= ?",
+                            [(row[0], row[1] - retention) for row in outbox_rows if row[1] > retention])
+            c.commit()
+            return delivered
+
+    def get_users_by_usernames(self, usernames):
+        """
+        Look up the IDs of several users at once.
+
+        :param usernames: An iterable of usernames.
+        :return: A dict mapping each existing username to its user ID.
+        """
+        usernames = list(usernames)
+        found = {}
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            for start in range(0, len(usernames), SQL_VARIABLE_CHUNK):
+                chunk = usernames[start:start + SQL_VARIABLE_CHUNK]
+                cur.execute(f"SELECT id, username FROM users WHERE username IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((row["username"], row["id"]) for row in cur.fetchall())
+        return found
+
+    def get_users_matching(self, pattern):
+        """
+        List the IDs of users whose usernames match a pattern, using the same
+        wildcards as list_users.
+
+        :param pattern: A pattern string, e.g., "team_*".
+        :return: A list of (user_id, username) tuples ordered by user ID.
+        """
+        sql_pattern = pattern.replace("*", "%").replace("?", "_")
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute("SELECT id, username FROM users WHERE username LIKE ? ORDER BY id", (sql_pattern,))
+            return [(row["id"], row["username"]) for row in cur.fetchall()]
+
+    def get_push_seq(self, receiver_id):
+        """
+        Get the sequence number of the newest push notification for a user.
+
+        :param receiver_id: The user ID of the receiver.
+        :return: The newest sequence number, or 0 if the user has had no pushes.
+        """
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM push_outbox WHERE receiver_id = ?", (receiver_id,))
+            return cur.fetchone()["seq"]
+
+    def get_pushes_since(self, receiver_id, after_seq, limit):
+        """
+        Retrieve the push notifications of a user that follow a sequence number.
+        Pushes whose message has since been deleted are skipped.
+
+        :param receiver_id: The user ID of the receiver.
+        :param after_seq: Only pushes with a greater sequence number are returned.
+        :param limit: Maximum number of pushes returned.
+        :return: A tuple (rows, oldest_seq): sqlite3.Row objects ordered by seq with
+                 seq, message_id, sent_at_ms, content and sender_username, and the
+                 oldest sequence number still retained (0 if none).
+        """
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute("SELECT COALESCE(MIN(seq), 0) AS seq FROM push_outbox WHERE receiver_id = ?", (receiver_id,))
+            oldest_seq = cur.fetchone()["seq"]
+            cur.execute(f"""
+                SELECT
+                    o.seq,
+                    o.message_id,
+                    o.sent_at_ms,
+                    {MESSAGE_CONTENT_COLUMN},
+                    sender.username AS sender_username
+                FROM push_outbox o
+                JOIN messages m ON m.id = o.message_id
+                JOIN users AS sender ON sender.id = m.sender_id
+                {MESSAGE_BODY_JOIN}
+                WHERE o.receiver_id = ? AND o.seq > ?
+                ORDER BY o.seq
+                LIMIT ?
+            """, (receiver_id, after_seq, limit))
+            return cur.fetchall(), oldest_seq
 
     def mark_message_read(self, message_id, receiver_id):
         """
@@ -160,6 +697,101 @@ class DBHelper:
             c.commit()
             return (cur.rowcount > 0)
 
+    def mark_messages_read(self, message_ids, receiver_id):
+        """
+        Mark several messages as read in one transaction. Only messages that are
+        still unread above the receiver's watermark are updated, so marking read
+        messages again logs no read change.
+
+        :param message_ids: The IDs of the messages to update.
+        :param receiver_id: The user ID of the receiver who is marking the messages as read.
+        :return: The number of the messages that belong to the receiver, all of which are read afterwards.
+        """
+        found = 0
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            for start in range(0, len(message_ids), SQL_VARIABLE_CHUNK):
+                chunk = message_ids[start:start + SQL_VARIABLE_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cur.execute(f"""
+                    UPDATE messages
+                    SET read_status = 1
+                    WHERE receiver_id = ? AND id IN ({placeholders}) AND read_status = 0
+                      AND id > (SELECT COALESCE(MAX(read_up_to), 0) FROM read_watermarks WHERE receiver_id = ?)
+                """, (receiver_id, *chunk, receiver_id))
+                cur.execute(f"SELECT COUNT(*) FROM messages WHERE receiver_id = ? AND id IN ({placeholders})",
+                            (receiver_id, *chunk))
+                found += cur.fetchone()[0]
+            c.commit()
+            return found
+
+    def mark_read_range(self, receiver_id, low_id, high_id):
+        """
+        Mark all of a receiver's messages with IDs from low_id to high_id as read.
+        If no unread message lies between the receiver's watermark and low_id, this
+        only moves the watermark, a single-row write however many messages are
+        covered. Otherwise the range was read out of order, and the read_status
+        flags of its unread messages are set instead.
+
+        :param receiver_id: The user ID of the receiver.
+        :param low_id: The smallest message ID of the range.
+        :param high_id: The largest message ID of the range.
+        :return: True once every message in the range is read.
+        """
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute("SELECT COALESCE(MAX(read_up_to), 0) FROM read_watermarks WHERE receiver_id = ?",
+                        (receiver_id,))
+            watermark = cur.fetchone()[0]
+            if high_id <= watermark:
+                return True
+            cur.execute("""
+                SELECT 1 FROM messages
+                WHERE receiver_id = ? AND read_status = 0 AND id > ? AND id < ?
+                LIMIT 1
+            """, (receiver_id, watermark, low_id))
+            if cur.fetchone() is None:
+                # Everything up to high_id is read: move the watermark there, and on past
+                # messages above it that were already read out of order
+                cur.execute("""
+                    SELECT MIN(id) FROM messages
+                    WHERE receiver_id = ? AND read_status = 0 AND id > ?
+                """, (receiver_id, high_id))
+                next_unread = cur.fetchone()[0]
+                if next_unread is None:
+                    cur.execute("SELECT COALESCE(MAX(id), 0) FROM messages WHERE receiver_id = ?", (receiver_id,))
+                    read_up_to = max(high_id, cur.fetchone()[0])
+                else:
+                    read_up_to = next_unread - 1
+                cur.execute("""
+                    INSERT INTO read_watermarks (receiver_id, read_up_to) VALUES (?, ?)
+                    ON CONFLICT (receiver_id) DO UPDATE SET read_up_to = excluded.read_up_to
+                """, (receiver_id, read_up_to))
+            else:
+                cur.execute("""
+                    UPDATE messages
+                    SET read_status = 1
+                    WHERE receiver_id = ? AND id BETWEEN ? AND ? AND read_status = 0
+                """, (receiver_id, low_id, high_id))
+            c.commit()
+            return True
+
+    def get_read_watermark(self, receiver_id):
+        """
+        Get the ID up to which all of a receiver's messages have been read.
+
+        :param receiver_id: The user ID of the receiver.
+        :return: The watermark, or 0 if the receiver has not read anything in order.
+        """
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute("SELECT COALESCE(MAX(read_up_to), 0) AS read_up_to FROM read_watermarks WHERE receiver_id = ?",
+                        (receiver_id,))
+            return cur.fetchone()["read_up_to"]
+
     def delete_message(self, message_id, user_id):
         """
         Delete a message if the user is either the sender or the receiver of the message.
@@ -208,41 +840,311 @@ class DBHelper:
             rows = cur.fetchall()
             return [(row["username"], row["display_name"]) for row in rows]
 
-    def get_messages_for_user(self, receiver_id, only_unread=False, limit=None):
+    def _inbox_query(self, receiver_id, only_unread, before_id, limit, sender_id, since_ms, until_ms):
+        """
+        Internal method to build the query for a user's messages, newest first. Every
+        combination of filters is an index range: on idx_messages_receiver (or
+        idx_messages_unread), or on idx_messages_receiver_sender when a sender is
+        given, with a time window narrowing the ID range through idx_messages_created.
+
+        :param receiver_id: The user ID of the message receiver.
+        :param only_unread: If True, only unread messages are selected.
+        :param before_id: Only select messages with a smaller ID (None for no bound).
+        :param limit: The maximum number of messages (None or 0 for no limit).
+        :param sender_id: Only select messages from this user ID (None for any sender).
+        :param since_ms: Only select messages sent at or after this epoch millisecond (None for no bound).
+        :param until_ms: Only select messages sent before this epoch millisecond (None for no bound).
+        :return: A tuple (query, params).
+        """
+        query = f"""
+        SELECT
+            m.id,
+            m.sender_id,
+            m.receiver_id,
+            {MESSAGE_CONTENT_COLUMN},
+            m.timestamp,
+            {MESSAGE_READ_COLUMN},
+            sender.username AS sender_username
+        FROM messages m
+        JOIN users AS sender ON sender.id = m.sender_id
+        {MESSAGE_BODY_JOIN}
+        {MESSAGE_WATERMARK_JOIN}
+        WHERE m.receiver_id = ?
+        """
+        params = [receiver_id]
+        if sender_id is not None:
+            query += " AND m.sender_id = ?"
+            params.append(sender_id)
+        if since_ms is not None:
+            query += f" AND {MESSAGE_SINCE_FILTER}"
+            params.append(since_ms)
+        if until_ms is not None:
+            query += f" AND {MESSAGE_UNTIL_FILTER}"
+            params.append(until_ms)
+        if before_id is not None:
+            query += " AND m.id < ?"
+            params.append(before_id)
+        if only_unread:
+            query += f" AND {MESSAGE_UNREAD_FILTER}"
+        # IDs follow the order messages were applied in, and read ranges are ID ranges
+        query += " ORDER BY m.id DESC"
+        if limit is not None and limit > 0:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, params
+
+    def get_messages_for_user(self, receiver_id, only_unread=False, limit=None, sender_id=None,
+                              since_ms=None, until_ms=None):
         """
-        Retrieve messages for a user, optionally filtering by unread status, and limiting the result set.
+        Retrieve messages for a user, optionally filtering by unread status, sender and
+        time window, and limiting the result set.
 
         :param receiver_id: The user ID of the message receiver.
         :param only_unread: If True, only retrieve unread messages. Default is False.
         :param limit: Optional numeric limit to cap the number of messages returned.
+        :param sender_id: Optional user ID; only retrieve messages from this sender.
+        :param since_ms: Optional epoch milliseconds; only retrieve messages sent at or after it.
+        :param until_ms: Optional epoch milliseconds; only retrieve messages sent before it.
         :return: A list of sqlite3.Row objects containing message data.
         """
-        base_query = """
-        SELECT 
+        query, params = self._inbox_query(receiver_id, only_unread, None, limit, sender_id, since_ms, until_ms)
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute(query, params)
+            return cur.fetchall()
+
+    def get_message_page(self, receiver_id, only_unread=False, before_id=None, limit=READ_STREAM_CHUNK,
+                         sender_id=None, since_ms=None, until_ms=None):
+        """
+        Retrieve one page of a user's messages, newest first, starting below a message ID.
+        Pages are read through idx_messages_receiver, so the cost of a page does not
+        depend on how many messages the user has, and the connection lock is only
+        held while the page is fetched.
+
+        :param receiver_id: The user ID of the message receiver.
+        :param only_unread: If True, only retrieve unread messages. Default is False.
+        :param before_id: Only return messages with a smaller ID (None starts from the newest).
+        :param limit: The maximum number of messages in the page.
+        :param sender_id: Optional user ID; only return messages from this sender.
+        :param since_ms: Optional epoch milliseconds; only return messages sent at or after it.
+        :param until_ms: Optional epoch milliseconds; only return messages sent before it.
+        :return: A list of sqlite3.Row objects containing message data.
+        """
+        query, params = self._inbox_query(receiver_id, only_unread, before_id, limit, sender_id, since_ms, until_ms)
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute(query, params)
+            return cur.fetchall()
+
+    def get_change_cursor(self):
+        """
+        Get the seq of the newest change_log entry.
+
+        :return: The newest seq, or 0 if the log is empty.
+        """
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM change_log")
+            return cur.fetchone()["seq"]
+
+    def get_changes_since(self, user_id, after_seq, limit=SYNC_CHANGES_LIMIT):
+        """
+        Retrieve the change_log entries that concern a user and follow a cursor.
+
+        :param user_id: The user whose changes are wanted (user changes are included too).
+        :param after_seq: Only entries with a greater seq are returned.
+        :param limit: Maximum number of entries returned.
+        :return: A tuple (rows, oldest_seq, newest_seq): sqlite3.Row objects ordered by seq
+                 with seq, kind, item_id and username, and the oldest and newest seq still
+                 in the whole log (0 if empty).
+        """
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute("SELECT COALESCE(MIN(seq), 0) AS oldest, COALESCE(MAX(seq), 0) AS newest FROM change_log")
+            bounds = cur.fetchone()
+            cur.execute("""
+                SELECT seq, kind, item_id, username FROM change_log
+                WHERE user_id IN (0, ?) AND seq > ?
+                ORDER BY seq
+                LIMIT ?
+            """, (user_id, after_seq, limit))
+            return cur.fetchall(), bounds["oldest"], bounds["newest"]
+
+    def get_messages_by_ids(self, receiver_id, message_ids):
+        """
+        Retrieve those of the given messages that still exist and were sent to a user.
+
+        :param receiver_id: The user ID of the message receiver.
+        :param message_ids: The IDs of the messages.
+        :return: A list of sqlite3.Row objects with the columns of get_messages_for_user, ordered by ID.
+        """
+        rows = []
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            for start in range(0, len(message_ids), SQL_VARIABLE_CHUNK):
+                chunk = message_ids[start:start + SQL_VARIABLE_CHUNK]
+                cur.execute(f"""
+                    SELECT
+                        m.id,
+                        m.sender_id,
+                        m.receiver_id,
+                        {MESSAGE_CONTENT_COLUMN},
+                        m.timestamp,
+                        {MESSAGE_READ_COLUMN},
+                        sender.username AS sender_username
+                    FROM messages m
+                    JOIN users AS sender ON sender.id = m.sender_id
+                    {MESSAGE_BODY_JOIN}
+                    {MESSAGE_WATERMARK_JOIN}
+                    WHERE m.receiver_id = ? AND m.id IN ({",".join("?" * len(chunk))})
+                """, (receiver_id, *chunk))
+                rows.extend(cur.fetchall())
+        rows.sort(key=lambda row: row["id"])
+        return rows
+
+    def get_users_by_ids(self, user_ids):
+        """
+        Retrieve those of the given users that still exist.
+
+        :param user_ids: The IDs of the users.
+        :return: A list of (username, display_name) tuples ordered by user ID.
+        """
+        rows = []
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            for start in range(0, len(user_ids), SQL_VARIABLE_CHUNK):
+                chunk = user_ids[start:start + SQL_VARIABLE_CHUNK]
+                cur.execute(f"SELECT id, username, display_name FROM users WHERE id IN ({','.join('?' * len(chunk))})",
+                            chunk)
+                rows.extend(cur.fetchall())
+        rows.sort(key=lambda row: row["id"])
+        return [(row["username"], row["display_name"]) for row in rows]
+
+    def get_conversations(self, user_id, before_message_id=None, limit=CONVERSATION_PAGE):
+        """
+        Retrieve one page of a user's conversations, most recent first, through
+        idx_conversations_recent.
+
+        :param user_id: The user whose conversations are listed.
+        :param before_message_id: Only return conversations whose last message has a
+                                  smaller ID (None starts from the most recent).
+        :param limit: The maximum number of conversations in the page.
+        :return: A list of sqlite3.Row objects with peer_username, last_message_id,
+                 last_timestamp, last_content and unread_count.
+        """
+        query = f"""
+        SELECT
+            peer.username AS peer_username,
+            conv.last_message_id,
+            conv.last_timestamp,
+            COALESCE(body.content, m.content) AS last_content,
+            conv.unread_count
+        FROM conversations conv
+        JOIN users AS peer ON peer.id = conv.peer_id
+        JOIN messages m ON m.id = conv.last_message_id
+        {MESSAGE_BODY_JOIN}
+        WHERE conv.user_id = ?
+        """
+        params = [user_id]
+        if before_message_id is not None:
+            query += " AND conv.last_message_id < ?"
+            params.append(before_message_id)
+        query += " ORDER BY conv.last_message_id DESC LIMIT ?"
+        params.append(limit)
+
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute(query, params)
+            return cur.fetchall()
+
+    def get_sent_page(self, sender_id, before_id=None, limit=SENT_PAGE):
+        """
+        Retrieve one page of the messages a user has sent, newest first, starting
+        below a message ID. Pages are read through idx_messages_sender, so the cost
+        of a page does not depend on how many messages the user has sent.
+
+        :param sender_id: The user ID of the message sender.
+        :param before_id: Only return messages with a smaller ID (None starts from the newest).
+        :param limit: The maximum number of messages in the page.
+        :return: A list of sqlite3.Row objects with the columns of get_messages_for_user,
+                 plus receiver_username. read_status tells whether the receiver has read
+                 the message.
+        """
+        query = f"""
+        SELECT
             m.id,
             m.sender_id,
             m.receiver_id,
-            m.content,
+            {MESSAGE_CONTENT_COLUMN},
             m.timestamp,
-            m.read_status,
-            sender.username AS sender_username
+            {MESSAGE_READ_COLUMN},
+            sender.username AS sender_username,
+            receiver.username AS receiver_username
         FROM messages m
         JOIN users AS sender ON sender.id = m.sender_id
-        WHERE m.receiver_id = ?
+        JOIN users AS receiver ON receiver.id = m.receiver_id
+        {MESSAGE_BODY_JOIN}
+        {MESSAGE_WATERMARK_JOIN}
+        WHERE m.sender_id = ?
         """
+        params = [sender_id]
+        if before_id is not None:
+            query += " AND m.id < ?"
+            params.append(before_id)
+        query += " ORDER BY m.id DESC LIMIT ?"
+        params.append(limit)
 
-        if only_unread:
-            base_query += " AND m.read_status = 0"
-        base_query += " ORDER BY m.timestamp DESC"
+        with self.__conn_lock:
+            c = self._get_connection()
+            cur = c.cursor()
+            cur.execute(query, params)
+            return cur.fetchall()
+
+    def get_conversation_page(self, user_id, peer_id, before_id=None, limit=HISTORY_PAGE):
+        """
+        Retrieve one page of the messages between two users in both directions,
+        newest first, starting below a message ID. Pages are read through
+        idx_messages_pair, so a page costs the same however long the thread is.
+
+        :param user_id: The user ID of one side.
+        :param peer_id: The user ID of the other side.
+        :param before_id: Only return messages with a smaller ID (None starts from the newest).
+        :param limit: The maximum number of messages in the page.
+        :return: A list of sqlite3.Row objects with the columns of get_messages_for_user.
+        """
+        query = f"""
+        SELECT
+            m.id,
+            m.sender_id,
+            m.receiver_id,
+            {MESSAGE_CONTENT_COLUMN},
+            m.timestamp,
+            {MESSAGE_READ_COLUMN},
+            sender.username AS sender_username
+        FROM messages m
+        JOIN users AS sender ON sender.id = m.sender_id
+        {MESSAGE_BODY_JOIN}
+        {MESSAGE_WATERMARK_JOIN}
+        WHERE {MESSAGE_PAIR_LOW} = ? AND {MESSAGE_PAIR_HIGH} = ?
+        """
+        params = [min(user_id, peer_id), max(user_id, peer_id)]
+        if before_id is not None:
+            query += " AND m.id < ?"
+            params.append(before_id)
+        query += " ORDER BY m.id DESC LIMIT ?"
+        params.append(limit)
 
         with self.__conn_lock:
             c = self._get_connection()
             cur = c.cursor()
-            if limit is not None and limit > 0:
-                base_query += " LIMIT ?"
-                cur.execute(base_query, (receiver_id, limit))
-            else:
-                cur.execute(base_query, (receiver_id,))
+            cur.execute(query, params)
             return cur.fetchall()
 
     def get_unread_count(self, receiver_id):
@@ -255,14 +1157,29 @@ class DBHelper:
         with self.__conn_lock:
             c = self._get_connection()
             cur = c.cursor()
+            # A range count over idx_messages_unread above the watermark
             cur.execute("""
                 SELECT COUNT(*) AS cnt
                 FROM messages
                 WHERE receiver_id = ? AND read_status = 0
-            """, (receiver_id,))
+                AND id > (SELECT COALESCE(MAX(read_up_to), 0) FROM read_watermarks WHERE receiver_id = ?)
+            """, (receiver_id, receiver_id))
             row = cur.fetchone()
             return row["cnt"] if row else 0
 
+def _applied(method):
+    """
+    Decorate a replicated method, below @replicated, so that every apply of it
+    runs through RaftDB._apply, which times it and ties it to the trace of the
+    call that submitted it. pysyncobj only calls the decorated function when a
+    committed command is applied.
+    """
+    @functools.wraps(method)
+    def apply(self, *args, **kwargs):
+        return self._apply(method, self, *args, **kwargs)
+    return apply
+
+
 class RaftDB(SyncObj):
     """
     Database wrapper that integrates with the Raft consensus algorithm using PySyncObj. 
@@ -270,43 +1187,298 @@ class RaftDB(SyncObj):
     to ensure consistency. Read operations are local (non-replicated).
     """
     
-    def __init__(self, self_address, other_addresses, db_path):
+    def __init__(self, self_address, other_addresses, db_path, metrics=None, tracer=None, conf=None):
         """
         Initialize the Raft consensus database wrapper.
 
         :param self_address: The local node's address, e.g., "localhost:5000".
         :param other_addresses: A list of addresses for other nodes in the cluster.
         :param db_path: Filesystem path to the SQLite database file.
+        :param metrics: Optional MetricsRegistry (see metrics.py) that records the
+                        commit and apply latency of replicated commands and the
+                        state of the Raft log (see raft_status()).
+        :param tracer: Optional Tracer (see tracing.py). Commands submitted during a
+                       traced call add the time until this node applied them
+                       and the apply itself to the call's trace, down to the
+                       SQLite commit.
+        :param conf: Optional SyncObjConf, e.g. from raft_conf() with some options
+                     changed; defaults to raft_conf().
         """
         # Configure Raft with auto recovery
-        conf = SyncObjConf(
-            autoTick=True,
-            appendEntriesUseBatch=True,
-            dynamicMembershipChange=True,
-            commandsQueueSize=100000,
-            appendEntriesPeriod=0.05,        # Faster heartbeats
-            raftMinTimeout=1.0,             # Must be > 3 * appendEntriesPeriod
-            raftMaxTimeout=2.0,
-            electionTimeout=5.0,            # Increased election timeout
-            connectionRetryDelay=0.5,
-            connectionTimeout=10.0,
-            leaderFallbackTimeout=10.0,      # Increased leader fallback timeout
-        )
+        if conf is None:
+            conf = raft_conf()
+        # Set before SyncObj.__init__ so they are excluded from replicated state;
+        # otherwise log compaction would try to pickle the SQLite connection
+        self.node_address = self_address
+        self.message_listeners = []  # callbacks fired when create_message(s) is applied
+        self.__db = DBHelper(db_path, tracer)
+        self._tracer = tracer
+        self._traced_pending = 0  # traced commands submitted on this node and not yet answered
+        self._traced_lock = threading.Lock()
+        self._applying = None  # (log index, start, detached raft.apply span) of the last apply
+        self._apply_latencies = {}  # replicated method name -> its chat_raft_apply_seconds child
+        self._commit_seconds = self._commit_failures = self._apply_seconds = self._submit_apply_seconds = None
+        self._follower_lag = None
+        self._lag_peers = set()  # peers with a chat_raft_follower_lag_entries series
+        if metrics is not None:
+            self._commit_seconds = metrics.histogram(
+                "chat_raft_commit_seconds",
+                "Time from submitting a replicated command on this node until its result is known.").labels()
+            self._commit_failures = metrics.counter(
+                "chat_raft_commit_failures_total", "Replicated commands that failed, by pysyncobj FAIL_REASON.",
+                ("reason",))
+            self._apply_seconds = metrics.histogram(
+                "chat_raft_apply_seconds", "Time spent applying a committed command to the database.",
+                ("command",))
+            for name in dir(type(self)):
+                if getattr(getattr(type(self), name), "replicated", False):
+                    self._apply_latencies[name] = self._apply_seconds.labels(name)
+            self._submit_apply_seconds = metrics.histogram(
+                "chat_raft_submit_to_apply_seconds",
+                "Time from submitting a replicated command on this node until this node started applying it "
+                "(queueing or forwarding, replication and the commit).").labels()
+            self._follower_lag = metrics.gauge(
+                "chat_raft_follower_lag_entries",
+                "Committed log entries a follower has not matched yet (0 when not the leader).",
+                ("peer",))
+
         super().__init__(self_address, other_addresses, conf)
-        self.__db = DBHelper(db_path)
+        if metrics is not None:
+            self._register_gauges(metrics)
 
         # Replicated state
-        self._active_users = {}  # Track active/logged in users
+        self._active_users = {}  # username -> address of the node owning the session
     
     def close(self):
         """
         Close the underlying database connection.
         """
         self.__db.close()
+
+    def _applyCommand(self, command, callback, commandType=None):
+        """
+        Internal method (pysyncobj's submission hook) that times commands whose
+        caller waits for the result, i.e. those passed sync=True or a callback,
+        and remembers which trace submitted them. Commands a follower forwarded
+        reach the leader's hook with a (node, request_id) tuple instead of a
+        callback and pass through untouched.
+
+        pysyncobj reports a command's success right after this node applied
+        it, before raftLastApplied moves past its log index, so the callback
+        finds that apply in self._applying by its index.
+        """
+        if not callable(callback):
+            return super()._applyCommand(command, callback, commandType)
+        parent = self._tracer.current_span() if self._tracer is not None else None
+        if self._commit_seconds is None and parent is None:
+            return super()._applyCommand(command, callback, commandType)
+        submitted = time.perf_counter()
+        on_result = callback
+        if parent is not None:
+            forwarded = not self._isLeader()
+            tid = threading.get_ident()
+            with self._traced_lock:
+                self._traced_pending += 1
+
+        def callback(result, error):
+            applying = self._applying
+            if error != FAIL_REASON.SUCCESS or applying is None or applying[0] != self.raftLastApplied + 1:
+                applying = None
+            if self._commit_seconds is not None:
+                if error == FAIL_REASON.SUCCESS:
+                    self._commit_seconds.observe(time.perf_counter() - submitted)
+                    if applying is not None:
+                        self._submit_apply_seconds.observe(applying[1] - submitted)
+                else:
+                    self._commit_failures.labels(FAIL_REASON_NAMES.get(error, str(error))).inc()
+            if parent is not None:
+                with self._traced_lock:
+                    self._traced_pending -= 1
+                if applying is not None:
+                    self._tracer.add_span("raft.replicate", submitted, applying[1], parent, tid, forwarded=forwarded)
+                    if applying[2] is not None:
+                        self._tracer.adopt(applying[2], parent)
+            on_result(result, error)
+        super()._applyCommand(command, callback, commandType)
+
+    def _apply(self, method, *args, **kwargs):
+        """
+        Internal method (see _applied) to apply a committed command, recording
+        its duration in chat_raft_apply_seconds under the method's name. While
+        traced commands submitted on this node wait for their result, the apply
+        is also a detached raft.apply span, which the result callback of the
+        command it belongs to adopts into the submitting call's trace.
+        """
+        if self._apply_seconds is None and self._tracer is None:
+            return method(*args, **kwargs)
+        name = method.__name__
+        started = time.perf_counter()
+        detached = None
+        if self._tracer is not None and self._traced_pending:
+            detached = self._tracer.detached_span("raft.apply", command=name)
+        self._applying = (self.raftLastApplied + 1, started, detached)
+        try:
+            if detached is None:
+                return method(*args, **kwargs)
+            with detached:
+                return method(*args, **kwargs)
+        finally:
+            if self._apply_seconds is not None:
+                self._apply_latencies[name].observe(time.perf_counter() - started)
+
+    def _register_gauges(self, metrics):
+        """
+        Internal method to register the gauges read from the Raft state at each
+        scrape: commit and apply progress and the log's length.
+        """
+        gauges = (
+            ("chat_raft_commit_index", "Index of the newest committed log entry.", lambda: self.raftCommitIndex),
+            ("chat_raft_last_applied", "Index of the newest log entry applied to the database.",
+             lambda: self.raftLastApplied),
+            ("chat_raft_log_entries", "Entries in the Raft log since the last snapshot.",
+             lambda: self.getStatus()["log_len"]),
+        )
+        for name, help_text, function in gauges:
+            metrics.gauge(name, help_text).labels().set_function(function)
+        self._track_peers(node.id for node in self.otherNodes)
+
+    def _track_peers(self, peer_ids):
+        """
+        Internal method to add a chat_raft_follower_lag_entries series for peers
+        that do not have one yet (members can join while the node runs).
+        """
+        for peer_id in peer_ids:
+            if peer_id not in self._lag_peers:
+                self._lag_peers.add(peer_id)
+                self._follower_lag.labels(peer_id).set_function(
+                    lambda peer_id=peer_id: self.peer_replication().get(peer_id, {}).get("lag", 0))
+
+    def peer_replication(self, status=None):
+        """
+        How far each partner node has replicated this node's log. Match and next
+        indexes are only tracked by the leader; on other nodes they are 0.
+
+        :param status: A getStatus() dict to read, or None to take a new one.
+        :return: A dict mapping each peer's address to a dict with connected,
+                 match_index, next_index and lag (committed entries beyond match_index).
+        """
+        status = status if status is not None else self.getStatus()
+        is_leader = RAFT_ROLES.get(status.get("state")) == "leader"
+        commit_index = status.get("commit_idx", 0)
+        peers = {}
+        for key, value in status.items():
+            if not key.startswith("partner_node_status_server_"):
+                continue
+            peer_id = key[len("partner_node_status_server_"):]
+            match_index = status.get("match_idx_server_" + peer_id, 0) if is_leader else 0
+            peers[peer_id] = {
+                "connected": value == 2,
+                "match_index": match_index,
+                "next_index": status.get("next_node_idx_server_" + peer_id, 0) if is_leader else 0,
+                "lag": max(commit_index - match_index, 0) if is_leader else 0,
+            }
+        return peers
+
+    def latency_summaries(self):
+        """
+        Summaries of the Raft latency histograms, for status output. Empty
+        unless the node was created with a metrics registry.
+
+        :return: A list of (name, count, p50, p99, mean) tuples in seconds, one per
+                 histogram with observations: submit_to_result, submit_to_apply
+                 and apply:<command>.
+        """
+        if self._commit_seconds is None:
+            return []
+        histograms = [("submit_to_result", self._commit_seconds),
+                      ("submit_to_apply", self._submit_apply_seconds)]
+        histograms += [(f"apply:{name}", child) for name, child in sorted(self._apply_latencies.items())]
+        summaries = []
+        for name, histogram in histograms:
+            _, count, total = histogram.snapshot()
+            if count:
+                summaries.append((name, count, histogram.quantile(0.5), histogram.quantile(0.99), total / count))
+        return summaries
+
+    def raft_status(self):
+        """
+        A snapshot of this node's Raft state for the GetRaftStatus RPC and the
+        periodic status output, taken from pysyncobj's getStatus(): role,
+        commit and apply progress, log length, follower replication and
+        latency summaries.
+
+        :return: A dict with node, role, leader, term, commit_index, last_applied,
+                 log_entries, peers (see peer_replication()) and latencies (see
+                 latency_summaries()).
+        """
+        status = self.getStatus()
+        peers = self.peer_replication(status)
+        if self._follower_lag is not None:
+            self._track_peers(peers)
+        leader = status.get("leader")
+        return {
+            "node": self.node_address,
+            "role": RAFT_ROLES.get(status.get("state"), "unknown"),
+            "leader": leader.id if leader is not None else "",
+            "term": status.get("raft_term", 0),
+            "commit_index": status.get("commit_idx", 0),
+            "last_applied": status.get("last_applied", 0),
+            "log_entries": status.get("log_len", 0),
+            "peers": peers,
+            "latencies": self.latency_summaries(),
+        }
+
+    def add_message_listener(self, callback):
+        """
+        Register a callback that fires on this node whenever a replicated
+        create_message or create_messages is applied. Because every node applies
+        the same log, each node learns about every new message, no matter which
+        node accepted the SendMessage call.
+
+        The callback runs on the Raft apply thread and must not block. It is
+        called once per applied command with all the messages it created.
+
+        :param callback: callback(messages), where messages is a list of
+                         (receiver_username, sender_username, content, message_id, sent_at_ms, seq)
+                         tuples and seq is the receiver's push sequence number.
+        """
+        self.message_listeners.append(callback)
+
+    def _notify_message_listeners(self, messages):
+        """
+        Internal method to notify the message listeners, as a push.notify span
+        of the current trace when tracing.
+        """
+        if self._tracer is not None:
+            with self._tracer.span("push.notify", messages=len(messages)):
+                self._call_message_listeners(messages)
+        else:
+            self._call_message_listeners(messages)
+
+    def _call_message_listeners(self, messages):
+        """
+        Internal method to invoke every message listener, isolating the apply
+        path from listener failures.
+        """
+        for callback in self.message_listeners:
+            try:
+                callback(messages)
+            except Exception as e:
+                print(f"[DEBUG] Message listener failed: {e}")
+
+    def waitReady(self):
+        """
+        Wait until the Raft transport is ready, as a raft.wait_ready span of the current trace.
+        """
+        if self._tracer is None:
+            return super().waitReady()
+        with self._tracer.span("raft.wait_ready"):
+            return super().waitReady()
     
     # Replicated write operations (will be synchronized through Raft)
     
     @replicated
+    @_applied
     def create_user(self, username, password_hash, display_name):
         """
         Create a new user (replicated operation).
@@ -320,6 +1492,7 @@ class RaftDB(SyncObj):
         return self.__db.insert_user(username, password_hash, display_name)
     
     @replicated
+    @_applied
     def delete_user(self, username):
         """
         Delete a user by their username (replicated operation). 
@@ -341,15 +1514,22 @@ class RaftDB(SyncObj):
         return (deleted_count > 0)
     
     @replicated
-    def create_message(self, sender_username, receiver_username, content):
+    @_applied
+    def create_message(self, sender_username, receiver_username, content, sent_at_ms):
         """
-        Create a new message (replicated operation).
+        Create a new message (replicated operation). The message is appended to
+        the receiver's push outbox under the next per-receiver sequence number,
+        which every node assigns identically because they apply the same log.
+        Message listeners are notified on every node once the message is stored.
 
         :param sender_username: Username of the sender.
         :param receiver_username: Username of the receiver.
         :param content: Text content of the message.
-        :return: True if the sender and receiver exist and the message was created,
-                 False otherwise.
+        :param sent_at_ms: Wall-clock time (epoch milliseconds) at which the
+                           accepting node submitted the message. It is part of
+                           the command so every replica stamps the message alike.
+        :return: The new message ID if the sender and receiver exist and the message
+                 was created, False otherwise.
         """
         sender_row = self.__db.get_user_by_username(sender_username)
         if not sender_row:
@@ -358,9 +1538,63 @@ class RaftDB(SyncObj):
         if not receiver_row:
             return False
 
-        return self.__db.insert_message(sender_row["id"], receiver_row["id"], content)
+        message_id, seq = self.__db.insert_message_with_push(
+            sender_row["id"], receiver_row["id"], content, sent_at_ms, PUSH_OUTBOX_RETENTION)
+        self._notify_message_listeners([(receiver_username, sender_username, content, message_id, sent_at_ms, seq)])
+        return message_id
+
+    @replicated
+    @_applied
+    def create_messages(self, sender_username, receiver_usernames, receiver_pattern, content, sent_at_ms):
+        """
+        Create one message for many receivers (replicated operation). The whole
+        fan-out is a single log entry: receivers are resolved when the entry is
+        applied, and all recipient rows are inserted in one transaction with the
+        content stored once. Message listeners get the whole batch in one call.
+
+        :param sender_username: Username of the sender.
+        :param receiver_usernames: Explicit receiver usernames (may be empty).
+        :param receiver_pattern: A list_users pattern selecting further receivers,
+                                 excluding the sender ("" for none).
+        :param content: Text content of the message.
+        :param sent_at_ms: Wall-clock time (epoch milliseconds) at which the
+                           accepting node submitted the message, as for create_message.
+        :return: A dict with the "delivered" receiver usernames and the "unknown"
+                 explicit usernames, or False if the sender does not exist.
+        """
+        sender_row = self.__db.get_user_by_username(sender_username)
+        if not sender_row:
+            return False
+
+        # Resolve receivers in a deterministic order, without duplicates
+        receivers = {}
+        unknown = []
+        if receiver_usernames:
+            found = self.__db.get_users_by_usernames(receiver_usernames)
+            for username in receiver_usernames:
+                if username in found:
+                    receivers.setdefault(username, found[username])
+                elif username not in unknown:
+                    unknown.append(username)
+        if receiver_pattern:
+            for user_id, username in self.__db.get_users_matching(receiver_pattern):
+                if username != sender_username:
+                    receivers.setdefault(username, user_id)
+
+        if not receivers:
+            return {"delivered": [], "unknown": unknown}
+
+        delivered = self.__db.insert_fanout_messages(
+            sender_row["id"], [(user_id, username) for username, user_id in receivers.items()],
+            content, sent_at_ms, PUSH_OUTBOX_RETENTION)
+        self._notify_message_listeners([
+            (receiver_username, sender_username, content, message_id, sent_at_ms, seq)
+            for receiver_username, message_id, seq in delivered
+        ])
+        return {"delivered": [receiver_username for receiver_username, _, _ in delivered], "unknown": unknown}
     
     @replicated
+    @_applied
     def mark_message_read(self, message_id, username):
         """
         Mark a specific message as read (replicated operation).
@@ -376,6 +1610,40 @@ class RaftDB(SyncObj):
         return self.__db.mark_message_read(message_id, user_row["id"])
     
     @replicated
+    @_applied
+    def mark_messages_read(self, message_ids, username):
+        """
+        Mark several messages as read with one log entry (replicated operation).
+
+        :param message_ids: The IDs of the messages to mark as read.
+        :param username: Username of the recipient marking the messages as read.
+        :return: The number of the messages that are the user's, all now read (0 if the user doesn't exist).
+        """
+        user_row = self.__db.get_user_by_username(username)
+        if not user_row:
+            return 0
+        return self.__db.mark_messages_read(list(message_ids), user_row["id"])
+
+    @replicated
+    @_applied
+    def mark_read_range(self, low_id, high_id, username):
+        """
+        Mark the recipient's messages with IDs from low_id to high_id as read with
+        one small log entry (replicated operation). Reading the newest messages in
+        order usually only moves the recipient's read watermark.
+
+        :param low_id: The smallest message ID of the range.
+        :param high_id: The largest message ID of the range.
+        :param username: Username of the recipient marking the messages as read.
+        :return: True if the range was marked as read, False if the user doesn't exist.
+        """
+        user_row = self.__db.get_user_by_username(username)
+        if not user_row:
+            return False
+        return self.__db.mark_read_range(user_row["id"], low_id, high_id)
+
+    @replicated
+    @_applied
     def delete_message(self, message_id, username):
         """
         Delete a message (replicated operation).
@@ -393,18 +1661,22 @@ class RaftDB(SyncObj):
     # User session management (replicated)
     
     @replicated
-    def user_login(self, username):
+    @_applied
+    def user_login(self, username, node_address=""):
         """
         Mark a user as logged in (replicated operation). 
         This is a simple in-memory flag, not persisted in the database.
 
         :param username: The username of the user who is logging in.
+        :param node_address: Raft address of the node that owns the session
+                             (the node receiving the user's heartbeats).
         :return: True once the user is marked as active in the cluster state.
         """
-        self._active_users[username] = True
+        self._active_users[username] = node_address
         return True
     
     @replicated
+    @_applied
     def user_logout(self, username):
         """
         Mark a user as logged out (replicated operation).
@@ -418,6 +1690,39 @@ class RaftDB(SyncObj):
             return True
         return False
     
+    @replicated
+    @_applied
+    def claim_session(self, username, node_address):
+        """
+        Transfer ownership of an active session to another node (replicated operation).
+        Used when a client fails over and starts heartbeating a different node.
+
+        :param username: The username whose session is being claimed.
+        :param node_address: Raft address of the node taking over the session.
+        :return: True if the user was active and is now owned by node_address, False otherwise.
+        """
+        if username not in self._active_users:
+            return False
+        self._active_users[username] = node_address
+        return True
+
+    @replicated
+    @_applied
+    def expire_session(self, username, node_address):
+        """
+        Log out a user whose session expired on its owning node (replicated operation).
+        The expiry is ignored if another node has claimed the session in the meantime,
+        so a stale node cannot log out a client that failed over elsewhere.
+
+        :param username: The username whose session expired.
+        :param node_address: Raft address of the node reporting the expiry.
+        :return: True if the user was logged out, False otherwise.
+        """
+        if username not in self._active_users or self._active_users[username] != node_address:
+            return False
+        del self._active_users[username]
+        return True
+    
     # Non-replicated read-only operations
     
     def get_user_by_username(self, username):
@@ -438,20 +1743,227 @@ class RaftDB(SyncObj):
         """
         return self.__db.list_users(pattern)
     
-    def get_messages_for_user(self, username, only_unread=False, limit=None):
+    def _message_filters(self, from_sender, since_ms, until_ms):
+        """
+        Internal method to turn the sender and time filters of a read into the
+        keyword arguments of DBHelper.get_messages_for_user and get_message_page.
+
+        :param from_sender: Optional sender username.
+        :param since_ms: Optional inclusive lower bound in epoch milliseconds.
+        :param until_ms: Optional exclusive upper bound in epoch milliseconds.
+        :return: A dict of keyword arguments, or None if the sender does not exist.
+        """
+        filters = {"since_ms": since_ms, "until_ms": until_ms}
+        if from_sender:
+            sender_row = self.__db.get_user_by_username(from_sender)
+            if not sender_row:
+                return None
+            filters["sender_id"] = sender_row["id"]
+        return filters
+
+    def get_messages_for_user(self, username, only_unread=False, limit=None, from_sender=None,
+                              since_ms=None, until_ms=None):
         """
         Retrieve messages for a user (local read-only operation).
 
         :param username: The username of the receiver.
         :param only_unread: If True, only unread messages are returned. Default is False.
         :param limit: Optional integer limit on the number of messages returned.
+        :param from_sender: Optional username; only messages from this sender are returned.
+        :param since_ms: Optional epoch milliseconds; only messages sent at or after it are returned.
+        :param until_ms: Optional epoch milliseconds; only messages sent before it are returned.
         :return: A list of sqlite3.Row objects representing messages.
         """
         row = self.__db.get_user_by_username(username)
         if not row:
             return []
-        return self.__db.get_messages_for_user(row["id"], only_unread, limit)
+        filters = self._message_filters(from_sender, since_ms, until_ms)
+        if filters is None:
+            return []
+        return self.__db.get_messages_for_user(row["id"], only_unread, limit, **filters)
     
+    def iter_messages_for_user(self, username, only_unread=False, limit=None, chunk_size=READ_STREAM_CHUNK,
+                               from_sender=None, since_ms=None, until_ms=None):
+        """
+        Iterate over a user's messages newest first, one chunk at a time
+        (local read-only operation). Only one chunk is held in memory, and each
+        chunk is fetched when the previous one has been consumed.
+
+        :param username: The username of the receiver.
+        :param only_unread: If True, only unread messages are returned. Default is False.
+        :param limit: Optional integer limit on the total number of messages returned.
+        :param chunk_size: The maximum number of messages per chunk.
+        :param from_sender: Optional username; only messages from this sender are returned.
+        :param since_ms: Optional epoch milliseconds; only messages sent at or after it are returned.
+        :param until_ms: Optional epoch milliseconds; only messages sent before it are returned.
+        :return: A generator of lists of sqlite3.Row objects.
+        """
+        row = self.__db.get_user_by_username(username)
+        if not row:
+            return
+        filters = self._message_filters(from_sender, since_ms, until_ms)
+        if filters is None:
+            return
+        remaining = limit if limit is not None and limit > 0 else None
+        before_id = None
+        while remaining is None or remaining > 0:
+            page_size = chunk_size if remaining is None else min(chunk_size, remaining)
+            page = self.__db.get_message_page(row["id"], only_unread, before_id, page_size, **filters)
+            if not page:
+                return
+            yield page
+            if remaining is not None:
+                remaining -= len(page)
+            if len(page) < page_size:
+                return
+            before_id = page[-1]["id"]
+
+    def get_push_seq(self, username):
+        """
+        Get the sequence number of the newest push notification for a user
+        (local read-only operation).
+
+        :param username: The username of the receiver.
+        :return: The newest sequence number, or 0 if none.
+        """
+        row = self.__db.get_user_by_username(username)
+        if not row:
+            return 0
+        return self.__db.get_push_seq(row["id"])
+
+    def get_pushes_since(self, username, after_seq, limit=PUSH_OUTBOX_RETENTION):
+        """
+        Retrieve the push notifications a user has not seen yet (local read-only operation).
+
+        :param username: The username of the receiver.
+        :param after_seq: The last sequence number the user has seen.
+        :param limit: Maximum number of pushes returned.
+        :return: A tuple (rows, oldest_seq) as returned by DBHelper.get_pushes_since.
+        """
+        row = self.__db.get_user_by_username(username)
+        if not row:
+            return [], 0
+        return self.__db.get_pushes_since(row["id"], after_seq, limit)
+
+    def get_change_cursor(self):
+        """
+        Get the current change cursor, to be passed to a later get_changes_since
+        (local read-only operation).
+
+        :return: The seq of the newest change_log entry, or 0 if none.
+        """
+        return self.__db.get_change_cursor()
+
+    def get_changes_since(self, username, cursor, limit=SYNC_CHANGES_LIMIT):
+        """
+        Summarize what changed for a user after a change cursor (local read-only
+        operation). Entries are folded into their net effect: a message created
+        and then read within the window is returned once with its current read
+        status, and a message created and then deleted is only reported as deleted.
+
+        A cursor of 0, one newer than this node's log, or one whose following
+        entries were trimmed (see CHANGE_LOG_RETENTION) cannot be resumed from:
+        the result then has reset=True and the current cursor, and the client
+        should reload with ReadMessages and ListUsers.
+
+        :param username: The user asking.
+        :param cursor: The seq of the last change the client has applied.
+        :param limit: Maximum number of change_log entries folded into one result.
+        :return: None if the user does not exist, otherwise a dict with "cursor",
+                 "reset", "has_more", "messages" (sqlite3.Rows of new messages),
+                 "read_up_to" (the new read watermark, 0 if unchanged), "read_ids"
+                 (messages above it read out of order), "deleted_ids", "users"
+                 ((username, display_name) tuples) and "deleted_users".
+        """
+        row = self.__db.get_user_by_username(username)
+        if not row:
+            return None
+        entries, oldest_seq, newest_seq = self.__db.get_changes_since(row["id"], cursor, limit)
+        result = {"cursor": newest_seq, "reset": False, "has_more": False, "messages": [], "read_up_to": 0,
+                  "read_ids": [], "deleted_ids": [], "users": [], "deleted_users": []}
+        if cursor <= 0 or cursor > newest_seq or cursor + 1 < oldest_seq:
+            result["reset"] = True
+            return result
+
+        created, read, deleted = {}, {}, {}  # dicts keep the order ids were first seen
+        new_users, deleted_users = {}, {}
+        for entry in entries:
+            kind, item_id = entry["kind"], entry["item_id"]
+            if kind == CHANGE_MESSAGE:
+                created[item_id] = True
+            elif kind == CHANGE_READ and item_id not in created:
+                read[item_id] = True
+            elif kind == CHANGE_READ_UP_TO:
+                result["read_up_to"] = max(result["read_up_to"], item_id)
+            elif kind == CHANGE_MESSAGE_DELETED:
+                created.pop(item_id, None)
+                read.pop(item_id, None)
+                deleted[item_id] = True
+            elif kind == CHANGE_USER:
+                new_users[item_id] = True
+            elif kind == CHANGE_USER_DELETED:
+                new_users.pop(item_id, None)
+                deleted_users[entry["username"]] = True
+
+        if len(entries) == limit:
+            result["cursor"] = entries[-1]["seq"]
+            result["has_more"] = True
+        elif entries:
+            result["cursor"] = max(newest_seq, entries[-1]["seq"])
+        result["messages"] = self.__db.get_messages_by_ids(row["id"], list(created))
+        result["read_ids"] = [message_id for message_id in read if message_id > result["read_up_to"]]
+        result["deleted_ids"] = list(deleted)
+        result["users"] = self.__db.get_users_by_ids(list(new_users))
+        result["deleted_users"] = list(deleted_users)
+        return result
+
+    def get_conversations(self, username, before_message_id=None, limit=CONVERSATION_PAGE):
+        """
+        Retrieve one page of a user's conversations, most recent first (local
+        read-only operation).
+
+        :param username: The user whose conversations are listed.
+        :param before_message_id: Continue below this last-message ID (None starts from the most recent).
+        :param limit: The maximum number of conversations in the page.
+        :return: A list of sqlite3.Row objects as returned by DBHelper.get_conversations.
+        """
+        row = self.__db.get_user_by_username(username)
+        if not row:
+            return []
+        return self.__db.get_conversations(row["id"], before_message_id, limit)
+
+    def get_sent_messages(self, username, before_id=None, limit=SENT_PAGE):
+        """
+        Retrieve one page of the messages a user has sent, newest first (local
+        read-only operation).
+
+        :param username: The sender.
+        :param before_id: Continue below this message ID (None starts from the newest).
+        :param limit: The maximum number of messages in the page.
+        :return: A list of sqlite3.Row objects as returned by DBHelper.get_sent_page,
+                 or None if the user does not exist.
+        """
+        row = self.__db.get_user_by_username(username)
+        if not row:
+            return None
+        return self.__db.get_sent_page(row["id"], before_id, limit)
+
+    def get_conversation(self, username, peer_username, before_id=None, limit=HISTORY_PAGE):
+        """
+        Retrieve one page of the messages between two users, both directions
+        interleaved newest first (local read-only operation).
+
+        :param username: The user asking.
+        :param peer_username: The other side of the conversation.
+        :param before_id: Continue below this message ID (None starts from the newest).
+        :param limit: The maximum number of messages in the page.
+        :return: A list of sqlite3.Row objects, or None if either user does not exist.
+        """
+        users = self.__db.get_users_by_usernames([username, peer_username])
+        if username not in users or peer_username not in users:
+            return None
+        return self.__db.get_conversation_page(users[username], users[peer_username], before_id, limit)
+
     def get_num_unread_messages(self, username):
         """
         Get the count of unread messages for a user (local read-only operation).
@@ -472,3 +1984,28 @@ class RaftDB(SyncObj):
         :return: True if the user is in the active users list, False otherwise.
         """
         return (username in self._active_users)
+
+    def get_session_owner(self, username):
+        """
+        Get the Raft address of the node that owns a user's session.
+
+        :param username: The username to check.
+        :return: The owning node's address, or None if the user is not active.
+        """
+        return self._active_users.get(username)
+
+    def get_online_count(self):
+        """
+        Get the number of users currently logged in across the cluster.
+
+        :return: Integer count of active users.
+        """
+        return len(self._active_users)
+
+    def get_active_usernames(self):
+        """
+        Get a snapshot of the usernames currently marked as active.
+
+        :return: A list of usernames.
+        """
+        return list(self._active_users)
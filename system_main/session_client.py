@@ -0,0 +1,141 @@
+"""
+session_client.py
+
+Client side of the bidirectional `Session` RPC. A ChatSession keeps one
+long-lived stream open and sends every ChatService operation over it as a
+tagged SessionRequest. Each request gets a future that is resolved when the
+SessionResponse with the same request_id arrives, so callers can pipeline
+many operations and collect the results in whatever order the server
+finishes them. Pushes from a subscribe operation are handed to a callback.
+"""
+
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+
+# #uncomment if running a testing file in unittests
+# from system_main import chat_pb2
+# from system_main import chat_pb2_grpc
+import chat_pb2
+import chat_pb2_grpc
+
+
+class SessionError(Exception):
+    """
+    Raised for an operation that the server answered with an error.
+    """
+
+
+class ChatSession:
+    """
+    A pipelined Session stream over an existing gRPC channel.
+    """
+
+    def __init__(self, channel, on_push=None):
+        """
+        Open the Session stream.
+
+        :param channel: A grpc.Channel connected to a chat server.
+        :param on_push: Optional callback(IncomingMessage) for pushes. It runs on
+                        the session's receive thread and must not block.
+        """
+        self.on_push = on_push
+        self._stub = chat_pb2_grpc.ChatServiceStub(channel)
+        self._ids = itertools.count(1)
+        self._pending = {}  # request_id -> Future
+        self._pending_lock = threading.Lock()
+        self._outgoing = queue.Queue()
+        self._subscribe_id = None
+        self._closed = False
+
+        self._call = self._stub.Session(iter(self._outgoing.get, None))
+        self._receiver = threading.Thread(target=self._receive, daemon=True)
+        self._receiver.start()
+
+    def _receive(self):
+        """
+        Internal method run by the receive thread: resolve the future of every
+        response, hand pushes to on_push, and fail what is still pending once
+        the stream ends.
+        """
+        error = None
+        try:
+            for response in self._call:
+                kind = response.WhichOneof("result")
+                if kind == "push":
+                    if self.on_push is not None:
+                        self.on_push(response.push)
+                    continue
+                with self._pending_lock:
+                    future = self._pending.pop(response.request_id, None)
+                if future is None:
+                    # An error for the subscription (e.g. push overflow) has no pending future
+                    if kind == "error":
+                        print(f"[DEBUG] Session error for request {response.request_id}: {response.error}")
+                    continue
+                if kind == "error":
+                    future.set_exception(SessionError(response.error))
+                else:
+                    future.set_result(getattr(response, kind))
+        except Exception as e:
+            error = e
+        finally:
+            with self._pending_lock:
+                self._closed = True
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                future.set_exception(error or SessionError("Session stream closed"))
+
+    def submit(self, op, request):
+        """
+        Send one operation without waiting for its response.
+
+        :param op: The SessionRequest field naming the operation, e.g. "send_message".
+        :param request: The operation's request message, e.g. a SendMessageRequest.
+        :return: A concurrent.futures.Future resolved with the operation's response message.
+        """
+        request_id = next(self._ids)
+        future = Future()
+        with self._pending_lock:
+            if self._closed:
+                raise SessionError("Session stream closed")
+            self._pending[request_id] = future
+        self._outgoing.put(chat_pb2.SessionRequest(request_id=request_id, **{op: request}))
+        return future
+
+    def call(self, op, request, timeout=None):
+        """
+        Send one operation and wait for its response.
+
+        :param op: The SessionRequest field naming the operation.
+        :param request: The operation's request message.
+        :param timeout: Seconds to wait for the response (None waits forever).
+        :return: The operation's response message.
+        """
+        return self.submit(op, request).result(timeout)
+
+    def subscribe(self, username, resume_from=None):
+        """
+        Start receiving pushes for a logged-in user on this session.
+
+        :param username: The user whose pushes should be delivered.
+        :param resume_from: The last push seq already seen, to replay newer ones.
+        """
+        request = chat_pb2.SubscribeRequest(username=username)
+        if resume_from is not None:
+            request.resume_from = resume_from
+        self._subscribe_id = next(self._ids)
+        self._outgoing.put(chat_pb2.SessionRequest(request_id=self._subscribe_id, subscribe=request))
+
+    def close(self, timeout=5):
+        """
+        Half-close the stream; the server answers the operations already sent,
+        then ends the session.
+
+        :param timeout: Seconds to wait for the receive thread to finish.
+        """
+        self._outgoing.put(None)
+        self._receiver.join(timeout)
+        if self._receiver.is_alive():
+            self._call.cancel()
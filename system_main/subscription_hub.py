@@ -0,0 +1,393 @@
+"""
+subscription_hub.py
+
+This module multiplexes every open Subscribe stream of a server node on a
+single asyncio event loop. A stream is a small buffer plus a future that is
+resolved when something arrives, so an idle subscriber costs no thread and no
+polling. Producers on other threads (the Raft apply thread, gRPC worker
+threads, the presence sweeper) hand work to the loop with
+call_soon_threadsafe.
+
+Each buffer is bounded. When a client stops reading, its buffer fills up and
+the stream's overflow policy decides what happens to the next item:
+
+- drop_oldest: the oldest buffered item is discarded.
+- coalesce:    the whole backlog collapses into one CoalescedNotice ("N new
+               messages"), delivered ahead of the items that follow it.
+- disconnect:  the stream is closed and marked as overflowed, so the
+               Subscribe call can end with RESOURCE_EXHAUSTED.
+"""
+
+import asyncio
+import collections
+import threading
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_COALESCE = "coalesce"
+OVERFLOW_DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE, OVERFLOW_DISCONNECT)
+
+DEFAULT_MAX_DEPTH = 256  # buffered items per stream before the overflow policy applies
+
+
+class CoalescedNotice:
+    """
+    Delivered in place of pushes that were collapsed by the coalesce policy.
+    """
+
+    __slots__ = ("count",)
+
+    def __init__(self, count):
+        """
+        :param count: Number of pushes the notice stands for.
+        """
+        self.count = count
+
+    def __eq__(self, other):
+        return isinstance(other, CoalescedNotice) and other.count == self.count
+
+    def __repr__(self):
+        return f"CoalescedNotice({self.count})"
+
+
+class SubscriberStream:
+    """
+    The bounded delivery buffer of one Subscribe call. Only touched from the
+    hub's event loop.
+    """
+
+    __slots__ = ("username", "max_depth", "policy", "_items", "_waiter", "_pending_coalesced",
+                 "closed", "overflowed", "delivered", "dropped", "coalesced", "high_water")
+
+    def __init__(self, username, max_depth=DEFAULT_MAX_DEPTH, policy=OVERFLOW_DROP_OLDEST):
+        """
+        :param username: The user this stream delivers to.
+        :param max_depth: Maximum number of buffered items.
+        :param policy: One of OVERFLOW_POLICIES, applied when the buffer is full.
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.username = username
+        self.max_depth = max(1, max_depth)
+        self.policy = policy
+        self._items = collections.deque()
+        self._waiter = None
+        self._pending_coalesced = 0
+        self.closed = False
+        self.overflowed = False
+
+        # Per-stream metrics
+        self.delivered = 0   # items handed to the Subscribe call
+        self.dropped = 0     # items discarded (drop_oldest, or lost on disconnect)
+        self.coalesced = 0   # items folded into CoalescedNotices
+        self.high_water = 0  # deepest the buffer has been
+
+    def _wake(self):
+        """
+        Internal method to resolve the pending get(), if any.
+        """
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def put(self, item):
+        """
+        Buffer an item for delivery.
+
+        :param item: The payload to deliver.
+        """
+        if self.closed:
+            return
+        if len(self._items) >= self.max_depth:
+            self._overflow()
+            if self.closed:
+                return
+        self._items.append(item)
+        if len(self._items) > self.high_water:
+            self.high_water = len(self._items)
+        self._wake()
+
+    def _overflow(self):
+        """
+        Internal method to make room in a full buffer according to the policy.
+        """
+        if self.policy == OVERFLOW_DROP_OLDEST:
+            self._items.popleft()
+            self.dropped += 1
+        elif self.policy == OVERFLOW_COALESCE:
+            self._pending_coalesced += len(self._items)
+            self.coalesced += len(self._items)
+            self._items.clear()
+        else:
+            self.dropped += len(self._items) + 1
+            self.overflowed = True
+            self.close()
+
+    def close(self):
+        """
+        Mark the stream closed. Buffered items are dropped and get() returns None.
+        """
+        self.closed = True
+        self._items.clear()
+        self._pending_coalesced = 0
+        self._wake()
+
+    def depth(self):
+        """
+        :return: Number of buffered items awaiting delivery.
+        """
+        return len(self._items)
+
+    def stats(self):
+        """
+        :return: A dict with this stream's depth and delivery counters.
+        """
+        return {
+            "username": self.username,
+            "depth": len(self._items),
+            "high_water": self.high_water,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+    async def get(self):
+        """
+        Wait for the next item.
+
+        :return: The next buffered item, a CoalescedNotice, or None once the
+                 stream is closed.
+        """
+        while not self._items and not self._pending_coalesced:
+            if self.closed:
+                return None
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        if self._pending_coalesced:
+            # The notice stands for pushes older than anything still buffered
+            notice = CoalescedNotice(self._pending_coalesced)
+            self._pending_coalesced = 0
+            return notice
+        self.delivered += 1
+        return self._items.popleft()
+
+    async def send(self, write):
+        """
+        Wait for a write on the Subscribe call to complete. A client that stops
+        reading stalls the write on flow control; if the buffer overflows with
+        the disconnect policy in the meantime, stop waiting so the call can be
+        aborted instead of staying parked on the stalled write.
+
+        :param write: Awaitable performing the write (e.g. context.write(msg)).
+        :return: True if the write completed, False if the stream overflowed first.
+        """
+        task = asyncio.ensure_future(write)
+        while not task.done():
+            if self.overflowed:
+                # The abort fails the abandoned write; consume its outcome
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                return False
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait((task, self._waiter), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                self._waiter = None
+        task.result()
+        return True
+
+
+class SubscriptionHub:
+    """
+    Registry of open Subscribe streams, one per user on this node.
+
+    Streams are created and awaited on the hub's event loop. publish(),
+    close_user() and the stats methods may be called from any thread.
+    """
+
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH, policy=OVERFLOW_DROP_OLDEST):
+        """
+        :param max_depth: Buffer bound of every stream opened by this hub.
+        :param policy: Overflow policy of every stream opened by this hub.
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.max_depth = max_depth
+        self.policy = policy
+        self._loop = None
+        self._streams = {}  # username -> SubscriberStream
+        self._count_lock = threading.Lock()
+        self._count = 0
+
+        # Counters of streams that have already ended, so totals survive them
+        self._closed_totals = {"delivered": 0, "dropped": 0, "coalesced": 0}
+        self.overflow_disconnects = 0
+
+    def bind(self, loop):
+        """
+        Attach the hub to the event loop that runs the gRPC server.
+
+        :param loop: The asyncio event loop serving Subscribe calls.
+        """
+        self._loop = loop
+
+    def _call(self, func, *args):
+        """
+        Internal method to run func on the hub's loop, directly if we are
+        already on it, otherwise via call_soon_threadsafe.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            func(*args)
+        else:
+            try:
+                loop.call_soon_threadsafe(func, *args)
+            except RuntimeError:
+                # The loop shut down between the check and the call
+                pass
+
+    # ---------- Loop-side operations ---------- #
+
+    def open(self, username):
+        """
+        Register a new stream for a user, closing any previous stream the user
+        had on this node (e.g. a half-dead connection from before a reconnect).
+        Must be called on the hub's event loop.
+
+        :param username: The subscribing user.
+        :return: The new SubscriberStream.
+        """
+        stream = SubscriberStream(username, self.max_depth, self.policy)
+        old = self._streams.get(username)
+        if old is not None:
+            old.close()
+            self._retire(old)
+        else:
+            with self._count_lock:
+                self._count += 1
+        self._streams[username] = stream
+        return stream
+
+    def unregister(self, stream):
+        """
+        Remove a stream when its Subscribe call ends. A stream that was already
+        replaced by a newer one is left alone. Must be called on the hub's loop.
+
+        :param stream: The SubscriberStream being torn down.
+        """
+        stream.close()
+        if self._streams.get(stream.username) is stream:
+            del self._streams[stream.username]
+            self._retire(stream)
+            with self._count_lock:
+                self._count -= 1
+
+    def _retire(self, stream):
+        """
+        Internal method to fold the counters of an ended stream into the hub totals.
+        """
+        with self._count_lock:
+            for key in self._closed_totals:
+                self._closed_totals[key] += getattr(stream, key)
+
+    def _deliver(self, username, item):
+        """
+        Internal method to buffer an item on a user's stream, if one is open.
+        """
+        stream = self._streams.get(username)
+        if stream is not None:
+            stream.put(item)
+            if stream.overflowed:
+                # Forget the stream now so later pushes are not buffered for it;
+                # its Subscribe call sees the overflow and ends
+                del self._streams[username]
+                self._retire(stream)
+                with self._count_lock:
+                    self._count -= 1
+                    self.overflow_disconnects += 1
+
+    def _deliver_many(self, deliveries):
+        """
+        Internal method to buffer a batch of (username, item) pairs.
+        """
+        for username, item in deliveries:
+            self._deliver(username, item)
+
+    def _close_user(self, username):
+        """
+        Internal method to close and forget a user's stream.
+        """
+        stream = self._streams.pop(username, None)
+        if stream is not None:
+            stream.close()
+            self._retire(stream)
+            with self._count_lock:
+                self._count -= 1
+
+    # ---------- Thread-safe entry points ---------- #
+
+    def publish(self, username, item):
+        """
+        Deliver an item to a user's stream if the user is subscribed on this node.
+
+        :param username: The receiving user.
+        :param item: The payload to deliver.
+        """
+        self._call(self._deliver, username, item)
+
+    def publish_many(self, deliveries):
+        """
+        Deliver several items with a single hop onto the event loop.
+
+        :param deliveries: An iterable of (username, item) pairs.
+        """
+        self._call(self._deliver_many, list(deliveries))
+
+    def close_user(self, username):
+        """
+        Close a user's stream (logout, account deletion or session expiry).
+        The corresponding Subscribe call ends.
+
+        :param username: The user whose stream should be closed.
+        """
+        self._call(self._close_user, username)
+
+    def stream_count(self):
+        """
+        :return: The number of open streams on this node.
+        """
+        with self._count_lock:
+            return self._count
+
+    def stream_stats(self):
+        """
+        :return: A list with the stats() dict of every open stream on this node.
+        """
+        return [stream.stats() for stream in list(self._streams.values())]
+
+    def totals(self):
+        """
+        Aggregate delivery counters across open and already-ended streams.
+
+        :return: A dict with the number of open streams, items currently
+                 buffered, the deepest open buffer, and cumulative delivered,
+                 dropped and coalesced counts plus overflow disconnects.
+        """
+        open_stats = self.stream_stats()
+        with self._count_lock:
+            totals = dict(self._closed_totals)
+            totals["streams"] = self._count
+            totals["overflow_disconnects"] = self.overflow_disconnects
+        for stats in open_stats:
+            for key in ("delivered", "dropped", "coalesced"):
+                totals[key] += stats[key]
+        totals["queued"] = sum(stats["depth"] for stats in open_stats)
+        totals["max_depth"] = max((stats["depth"] for stats in open_stats), default=0)
+        return totals
@@ -0,0 +1,545 @@
+"""
+tracing.py
+
+Lightweight request tracing for a chat node. A trace follows one call from
+its gRPC handler through Raft (replication until the node applies the
+command, then the apply itself) down to the SQLite commit and the push to
+subscribers, as a tree of timed spans. When a SendMessage takes seconds,
+its trace shows which phase took them.
+
+Trace context crosses processes in the W3C `traceparent` gRPC metadata
+entry ("00-<trace id>-<parent span id>-<flags>"). TracingInterceptor
+continues a trace the caller started, or starts one, and
+TracingClientInterceptor adds the entry to a client's calls.
+
+Which traces are kept:
+
+- Head sampling: a trace is sampled when it starts, with probability
+  sample_rate, unless the caller's traceparent already decided.
+- Slow calls: with a slow threshold, every call records its spans in memory
+  and a trace whose root took at least that long is kept even if it was not
+  sampled. Without one, unsampled calls record nothing.
+
+Kept traces go to an in-memory ring buffer that a background thread appends
+to a file every flush interval, in the Chrome trace-event format: a JSON
+array of complete ("X") events with microsecond timestamps, which
+chrome://tracing, Perfetto (ui.perfetto.dev) and speedscope open as they
+are. The closing bracket is optional in that format and is never written,
+so the file can be appended to across restarts.
+
+Spans are attached to the span that is current in the calling context
+(a contextvars.ContextVar). Work done for a call on another thread records
+its spans after activate()-ing the call's span, or under a detached_span()
+that is adopted into the call's trace once the call is known, as the Raft
+apply is.
+"""
+
+import atexit
+import collections
+import contextlib
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+
+import grpc
+
+from interceptors import ClientCallDetails, ObservedResponses, observe_behavior, rewrap_handler, split_method
+
+DEFAULT_SAMPLE_RATE = 0.01  # fraction of calls traced regardless of their latency
+DEFAULT_SLOW_THRESHOLD = 0.5  # seconds; slower calls are kept even when not sampled
+DEFAULT_CAPACITY = 65536  # spans buffered before the oldest are dropped
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds between writes of the buffered spans
+TRACEPARENT = "traceparent"  # gRPC metadata key carrying the trace context
+UNTRACED_METHODS = ("Subscribe", "Session")  # long-lived streams; Session traces its operations instead
+
+_current_span = contextvars.ContextVar("chat_current_span", default=None)
+
+
+def parse_traceparent(value):
+    """
+    :param value: A W3C traceparent value, e.g. "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01".
+    :return: A tuple (trace_id, parent_span_id, sampled), or None if the value is malformed.
+    """
+    parts = value.split("-") if isinstance(value, str) else ()
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        trace, parent, flags = int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    if trace == 0 or parent == 0:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def format_traceparent(span):
+    """
+    :param span: The Span that is the parent of the callee's work.
+    :return: The traceparent value that continues span's trace in another process.
+    """
+    return f"00-{span.trace.trace_id}-{span.span_id}-{'01' if span.trace.sampled else '00'}"
+
+
+def _new_id(bits):
+    return f"{random.getrandbits(bits) or 1:0{bits // 4}x}"
+
+
+class _Trace:
+    """
+    The spans of one trace recorded in this process. Spans that end before the
+    root wait in `spans` until the root decides whether the trace is kept.
+    """
+    __slots__ = ("trace_id", "sampled", "root", "spans", "kept")
+
+    def __init__(self, trace_id, sampled):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.root = None  # the span start_trace returned
+        self.spans = []
+        self.kept = None  # True or False once the root span has ended
+
+
+class Span:
+    """
+    One timed operation in a trace. Used as a context manager, a span is the
+    current span of its context while the block runs and ends with it.
+    """
+    __slots__ = ("tracer", "trace", "span_id", "parent_id", "name", "start", "end", "tid", "args", "_token")
+
+    def __init__(self, tracer, trace, parent_id, name, args, start=None, tid=None):
+        self.tracer = tracer
+        self.trace = trace
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter() if start is None else start
+        self.end = None
+        self.tid = threading.get_ident() if tid is None else tid
+        self.args = args
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.finish(self)
+        return False
+
+
+class _NoSpan:
+    """
+    Stands in for a span when no trace is being recorded.
+    """
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """
+    Records spans and writes the kept traces to a Chrome trace-event file in
+    batches from a background thread.
+    """
+
+    def __init__(self, path, sample_rate=DEFAULT_SAMPLE_RATE, slow_threshold=DEFAULT_SLOW_THRESHOLD,
+                 process_name="", capacity=DEFAULT_CAPACITY, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        :param path: The trace file the events are appended to.
+        :param sample_rate: Fraction of calls traced whatever their latency (0 to 1).
+        :param slow_threshold: Seconds from which a call is kept even if not sampled (None to disable).
+        :param process_name: Name the trace viewer shows for this process, e.g. "node 1".
+        :param capacity: Spans buffered before the oldest are dropped.
+        :param flush_interval: Seconds between writes.
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.process_name = process_name or f"pid {os.getpid()}"
+        self.flush_interval = flush_interval
+        self.spans = collections.deque(maxlen=capacity)
+        self.kept = 0
+        self.written = 0
+        self.dropped = 0
+        self._pid = os.getpid()
+        self._epoch = time.time() - time.perf_counter()  # converts perf_counter times to epoch seconds
+        self._thread_names = {}  # thread ident -> name, for the viewer
+        self._named = set()  # threads (and the process, as None) whose name has been written
+        self._lock = threading.Lock()  # orders a trace's last spans against its keep decision
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start the flusher thread. Buffered spans are also written at interpreter exit.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    # ------------------ Recording ------------------
+
+    def start_trace(self, name, traceparent=None, **args):
+        """
+        Start the root span of a call in this process, continuing the caller's
+        trace if traceparent names one.
+
+        :param name: The span name, e.g. "SendMessage".
+        :param traceparent: The caller's traceparent value, or None.
+        :param args: Attributes shown with the span.
+        :return: The root Span (use it with `with`, or pass it to end_trace), or
+                 None if the call is neither sampled nor checked for slowness.
+        """
+        parent = parse_traceparent(traceparent) if traceparent else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = _new_id(128), None, random.random() < self.sample_rate
+        if not sampled and self.slow_threshold is None:
+            return None
+        self._name_thread()
+        trace = _Trace(trace_id, sampled)
+        trace.root = Span(self, trace, parent_id, name, args)
+        return trace.root
+
+    def span(self, name, **args):
+        """
+        :param name: The span name, e.g. "sqlite.commit".
+        :param args: Attributes shown with the span.
+        :return: A child of the current span to use with `with`, or NO_SPAN
+                 (which records nothing) if no trace is current.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return NO_SPAN
+        self._name_thread()
+        return Span(self, parent.trace, parent.span_id, name, args)
+
+    def add_span(self, name, start, end, parent, tid=None, **args):
+        """
+        Record a span that has already ended, such as a phase measured from
+        timestamps taken on other threads.
+
+        :param name: The span name.
+        :param start: perf_counter time the phase started.
+        :param end: perf_counter time it ended.
+        :param parent: The parent Span.
+        :param tid: Thread ident to show the span on (defaults to the calling thread).
+        :param args: Attributes shown with the span.
+        """
+        span = Span(self, parent.trace, parent.span_id, name, args, start, tid)
+        span.end = end
+        self._finish(span)
+
+    def detached_span(self, name, **args):
+        """
+        Start a span that belongs to no trace yet, for work whose trace is only
+        known once it is done, such as a Raft apply that the command's result
+        callback later ties to the call that submitted it. The span and its
+        children are held until adopt() attaches them to a trace, and dropped
+        with it otherwise.
+
+        :param name: The span name, e.g. "raft.apply".
+        :param args: Attributes shown with the span.
+        :return: A Span to use with `with`.
+        """
+        self._name_thread()
+        return Span(self, _Trace(None, False), None, name, args)
+
+    def adopt(self, span, parent):
+        """
+        Attach an ended detached span, and the spans recorded under it, to
+        parent's trace as a child of parent.
+
+        :param span: A Span returned by detached_span, after its block has ended.
+        :param parent: The Span it becomes a child of.
+        """
+        detached = span.trace
+        with self._lock:
+            spans, detached.spans = detached.spans, []
+        for child in spans:
+            child.trace = parent.trace
+            if child.parent_id is None:
+                child.parent_id = parent.span_id
+            self._finish(child)
+
+    @staticmethod
+    def current_span():
+        """
+        :return: The span current in the calling context, or None.
+        """
+        return _current_span.get()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def activate(span):
+        """
+        Make span the current span for a block, e.g. on a thread doing work for
+        a call that started elsewhere.
+        """
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    def finish(self, span):
+        """
+        End a span now. Ending a root span decides whether its trace is kept.
+        """
+        span.end = time.perf_counter()
+        if span is span.trace.root:
+            self._end_trace(span)
+        else:
+            self._finish(span)
+
+    def end_trace(self, root, error=None):
+        """
+        End the root span of a call and keep its trace if it was sampled or slow.
+
+        :param root: The Span returned by start_trace.
+        :param error: The exception the call failed with, if any.
+        """
+        root.end = time.perf_counter()
+        if error is not None:
+            root.args["error"] = type(error).__name__
+        self._end_trace(root)
+
+    def _end_trace(self, root):
+        """
+        Internal method to decide whether a trace is kept once its root has
+        ended, and buffer its spans if it is.
+        """
+        trace = root.trace
+        keep = trace.sampled or (self.slow_threshold is not None
+                                 and root.end - root.start >= self.slow_threshold)
+        with self._lock:
+            trace.kept = keep
+            spans, trace.spans = trace.spans, None
+        if keep:
+            self.kept += 1
+            spans.append(root)
+            self._buffer(spans)
+
+    def _finish(self, span):
+        """
+        Internal method to hold an ended child span until its trace is decided,
+        or buffer it directly if the trace has been kept already.
+        """
+        trace = span.trace
+        with self._lock:
+            if trace.kept is None:
+                trace.spans.append(span)
+                return
+        if trace.kept:
+            self._buffer((span,))
+
+    def _buffer(self, spans):
+        overflow = len(self.spans) + len(spans) - self.spans.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self.spans.extend(spans)
+
+    def _name_thread(self):
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+
+    # ------------------ Writing ------------------
+
+    def _event(self, span):
+        """
+        :return: The Chrome trace event of an ended span.
+        """
+        args = {"trace_id": span.trace.trace_id, "span_id": span.span_id}
+        if span.parent_id is not None:
+            args["parent_id"] = span.parent_id
+        args.update(span.args)
+        return {
+            "name": span.name,
+            "cat": span.name.split(".", 1)[0] if "." in span.name else "rpc",
+            "ph": "X",
+            "ts": round((span.start + self._epoch) * 1e6, 1),
+            "dur": round((span.end - span.start) * 1e6, 1),
+            "pid": self._pid,
+            "tid": span.tid,
+            "args": args,
+        }
+
+    def _metadata_events(self, spans):
+        """
+        :return: process_name and thread_name events for the process and any
+                 thread not named in the file yet.
+        """
+        events = []
+        if None not in self._named:
+            self._named.add(None)
+            events.append({"name": "process_name", "ph": "M", "pid": self._pid,
+                           "args": {"name": self.process_name}})
+        for span in spans:
+            if span.tid not in self._named:
+                self._named.add(span.tid)
+                events.append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": span.tid,
+                               "args": {"name": self._thread_names.get(span.tid, str(span.tid))}})
+        return events
+
+    def flush(self):
+        """
+        Append every buffered span to the trace file with one write.
+
+        :return: The number of spans written.
+        """
+        with self._write_lock:
+            spans = []
+            while True:
+                try:
+                    spans.append(self.spans.popleft())
+                except IndexError:
+                    break
+            if not spans:
+                return 0
+            events = self._metadata_events(spans) + [self._event(span) for span in spans]
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            body = ",\n".join(json.dumps(event, separators=(",", ":")) for event in events)
+            with open(self.path, "a") as f:
+                f.write(("[\n" if new_file else ",\n") + body)
+            self.written += len(spans)
+            return len(spans)
+
+    def close(self):
+        """
+        Stop the flusher thread and write the remaining spans.
+        """
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(self.flush_interval + 1.0)
+        self.flush()
+
+    def _run(self):
+        """
+        Internal method run by the flusher thread.
+        """
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[DEBUG] Trace write failed: {e}")
+
+    # ------------------ Calls ------------------
+
+    def call(self, name, function, *args):
+        """
+        Run function(*args) as the root span of a new trace, e.g. on a thread
+        pool, which does not carry the submitting context's current span.
+
+        :return: What function returned.
+        """
+        root = self.start_trace(name)
+        if root is None:
+            return function(*args)
+        with root:
+            return function(*args)
+
+
+def read_traceparent(metadata):
+    """
+    :param metadata: Invocation metadata, as a sequence of (key, value) pairs.
+    :return: The traceparent value, or None.
+    """
+    for key, value in metadata or ():
+        if key == TRACEPARENT:
+            return value
+    return None
+
+
+class TracingInterceptor(grpc.aio.ServerInterceptor):
+    """
+    Runs each call's handler as the root span of a trace, named after the
+    method, continuing the caller's trace if its metadata carries one.
+    Long-lived streams (UNTRACED_METHODS) are not traced.
+    """
+
+    def __init__(self, tracer, untraced_methods=UNTRACED_METHODS):
+        self.tracer = tracer
+        self.untraced_methods = set(untraced_methods)
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or handler.stream_stream is not None or handler.stream_unary is not None:
+            return handler
+        service, method = split_method(handler_call_details.method)
+        if method in self.untraced_methods:
+            return handler
+        traceparent = read_traceparent(handler_call_details.invocation_metadata)
+        tracer = self.tracer
+
+        def start():
+            return tracer.start_trace(method, traceparent, service=service)
+
+        def end(root, context, response, error):
+            if root is not None:
+                tracer.end_trace(root, error)
+
+        # The root is the handler's current span, so its spans nest under the call
+        return rewrap_handler(handler, lambda behavior: observe_behavior(behavior, start, end, Tracer.activate))
+
+
+class TracingClientInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor):
+    """
+    Adds a traceparent to a client channel's calls, e.g.
+    `grpc.intercept_channel(channel, TracingClientInterceptor(tracer))`. Each
+    call is the root span of a trace (or a child of the caller's current
+    span), and the server continues the trace under it.
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def _start(self, client_call_details):
+        name = "client." + split_method(client_call_details.method)[1]
+        parent = _current_span.get()
+        if parent is not None:
+            span = self.tracer.span(name)
+        else:
+            span = self.tracer.start_trace(name)
+            if span is None:
+                # Not recorded here, but the server may still sample the call
+                return None, client_call_details
+        metadata = [(key, value) for key, value in (client_call_details.metadata or ()) if key != TRACEPARENT]
+        metadata.append((TRACEPARENT, format_traceparent(span)))
+        return span, ClientCallDetails(client_call_details, metadata=metadata)
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        span, details = self._start(client_call_details)
+        outcome = continuation(details, request)
+        if span is not None:
+            outcome.add_done_callback(lambda call: self._end(span, call))
+        return outcome
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        span, details = self._start(client_call_details)
+        responses = continuation(details, request)
+        if span is None:
+            return responses
+        return ObservedResponses(responses, lambda: self._end(span, None))
+
+    def _end(self, span, call):
+        if call is not None and call.code() is not grpc.StatusCode.OK:
+            span.args["error"] = call.code().name
+        self.tracer.finish(span)
+
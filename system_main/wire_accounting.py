@@ -0,0 +1,238 @@
+"""
+wire_accounting.py
+
+Per-RPC byte accounting kept off the hot path. Measuring a call used to mean
+serializing its request and response a second time and appending a line to a
+CSV file, synchronously, inside every handler.
+
+On the server an AccountingInterceptor wraps the request deserializer and the
+response serializer of each call, so bytes are counted from the serialization
+gRPC does anyway. This covers unary and streaming RPCs alike, including
+handlers that write to the stream themselves (Subscribe, Session). When the
+handler ends, one record is handed to a UsageLog. A unary response is only
+serialized after that, so the record is not written until it has been.
+
+On the client an AccountingClientInterceptor records the request and response
+messages of each unary call. Their sizes are computed later by the UsageLog's
+flusher thread, off the caller's path. Streamed responses are counted as the
+caller consumes them.
+
+A UsageLog is an in-memory ring buffer that a background thread drains every
+flush interval, appending the whole batch to the CSV file with one write. If
+the writer falls more than the buffer's capacity behind, the oldest records
+are dropped and counted.
+"""
+
+import atexit
+import collections
+import os
+import threading
+
+import grpc
+
+from interceptors import ObservedResponses, observe_behavior, rewrap_handler, split_method
+
+DEFAULT_CAPACITY = 65536  # records buffered before the oldest are dropped
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds between writes of the buffered records
+MAX_HELD_FLUSHES = 3  # flushes a record waits for its response to be serialized (e.g. a cancelled call)
+LOG_HEADER = "method_name,request_size,response_size,service\n"
+
+
+def message_size(value):
+    """
+    Resolve a recorded request or response to its size in bytes.
+
+    :param value: A byte count (int or ByteCount), a protobuf message, a finished
+                  grpc.Future whose result is a message, or None.
+    :return: The size in bytes (0 for None or a failed call).
+    """
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    if isinstance(value, ByteCount):
+        return value.bytes
+    if isinstance(value, grpc.Future):
+        if value.cancelled() or value.exception() is not None:
+            return 0
+        value = value.result()
+    return value.ByteSize()
+
+
+class UsageLog:
+    """
+    A ring buffer of per-call records, appended to a CSV file in batches by a
+    background thread. record() only appends to a deque, so it is safe to
+    call from any thread or coroutine.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        :param path: The CSV file the records are appended to.
+        :param capacity: Records buffered before the oldest are dropped.
+        :param flush_interval: Seconds between writes.
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.records = collections.deque(maxlen=capacity)
+        self._held = []  # (record, flushes held) of calls whose response was not serialized yet
+        self.written = 0
+        self.dropped = 0
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start the flusher thread. Buffered records are also written at interpreter exit.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="usage-log", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def record(self, method, request, response, service=""):
+        """
+        Buffer the record of one call.
+
+        :param method: The bare method name, e.g. "Login".
+        :param request: The request size, or anything message_size resolves when the record is flushed.
+        :param response: The response size, or anything message_size resolves.
+        :param service: The full service name, e.g. "chat.ChatService".
+        """
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append((method, request, response, service))
+
+    def flush(self, final=False):
+        """
+        Write the buffered records to the file with one write. Records whose
+        response is still to be serialized are held back for a later flush,
+        at most MAX_HELD_FLUSHES times.
+
+        :param final: Write every record, finished or not (used by close()).
+        :return: The number of records written.
+        """
+        with self._write_lock:
+            pending, self._held = self._held, []
+            while True:
+                try:
+                    pending.append((self.records.popleft(), 0))
+                except IndexError:
+                    break
+            lines = []
+            for record, held in pending:
+                method, request, response, service = record
+                if not final and held < MAX_HELD_FLUSHES and isinstance(response, ByteCount) and response.pending:
+                    self._held.append((record, held + 1))
+                    continue
+                lines.append(f"{method},{message_size(request)},{message_size(response)},{service}\n")
+            if not lines:
+                return 0
+            new_file = not os.path.exists(self.path)
+            with open(self.path, "a") as f:
+                f.write((LOG_HEADER if new_file else "") + "".join(lines))
+            self.written += len(lines)
+            return len(lines)
+
+    def close(self):
+        """
+        Stop the flusher thread and write the remaining records.
+        """
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(self.flush_interval + 1.0)
+        self.flush(final=True)
+
+    def _run(self):
+        """
+        Internal method run by the flusher thread.
+        """
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[DEBUG] Usage log write failed: {e}")
+
+
+class ByteCount:
+    """
+    A byte counter that a call keeps adding to after it has been recorded; its
+    total is read when the record is flushed. While pending is set, more bytes
+    are still to come and flushes hold the record back.
+    """
+
+    __slots__ = ("bytes", "pending")
+
+    def __init__(self):
+        self.bytes = 0
+        self.pending = False
+
+
+class AccountingInterceptor(grpc.aio.ServerInterceptor):
+    """
+    Records the request and response bytes of every call in a UsageLog, counted
+    from the serialization gRPC performs anyway.
+    """
+
+    def __init__(self, usage_log):
+        self.usage_log = usage_log
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return handler
+        service, method = split_method(handler_call_details.method)
+        request_bytes, response_bytes = ByteCount(), ByteCount()
+
+        deserialize = handler.request_deserializer or (lambda data: data)
+        serialize = handler.response_serializer or (lambda message: message)
+
+        def request_deserializer(data):
+            request_bytes.bytes += len(data)
+            return deserialize(data)
+
+        def response_serializer(message):
+            data = serialize(message)
+            response_bytes.bytes += len(data)
+            response_bytes.pending = False
+            return data
+
+        def on_end(started, context, returned, error):
+            # A returned (unary) response is serialized after its handler returns, so the
+            # counters are recorded by reference and the record is held until then
+            response_bytes.pending = returned is not None
+            self.usage_log.record(method, request_bytes, response_bytes, service)
+
+        return rewrap_handler(
+            handler, lambda behavior: observe_behavior(behavior, lambda: None, on_end),
+            request_deserializer=request_deserializer, response_serializer=response_serializer)
+
+
+class AccountingClientInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor):
+    """
+    Records the calls of a client channel in a UsageLog, e.g.
+    `grpc.intercept_channel(channel, AccountingClientInterceptor(usage_log))`.
+    """
+
+    def __init__(self, usage_log):
+        self.usage_log = usage_log
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        service, method = split_method(client_call_details.method)
+        outcome = continuation(client_call_details, request)
+        # Sizes are resolved by the flusher thread
+        outcome.add_done_callback(lambda call: self.usage_log.record(method, request, call, service))
+        return outcome
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        service, method = split_method(client_call_details.method)
+        size = ByteCount()
+
+        def count(message):
+            size.bytes += message.ByteSize()
+
+        return ObservedResponses(continuation(client_call_details, request),
+                                 lambda: self.usage_log.record(method, request, size.bytes, service), count)
+
@@ -0,0 +1,95 @@
+"""
+A single-node fault-tolerant chat server for the RPC test suites, served on an
+asyncio server thread and set up like ft_server_grpc.serve(). Every test class
+built on it gets its own node, database and port.
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+import socket
+import tempfile
+import shutil
+import threading
+import time
+from concurrent import futures
+
+import grpc
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+# The server and generated modules import each other by bare name
+SYSTEM_MAIN = os.path.join(PROJECT_ROOT, "system_main")
+if SYSTEM_MAIN not in sys.path:
+    sys.path.insert(0, SYSTEM_MAIN)
+
+from raft_db import RaftDB
+from ft_server_grpc import FaultTolerantChatServicer, add_chat_services
+from compression_policy import CompressionPolicy, CompressionInterceptor
+from profiling import NodeProfiler, ProfilingInterceptor
+
+def get_free_port():
+    """
+    Ask the OS for a free TCP port on localhost.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+class SingleNodeServerTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Start a one-node Raft cluster and serve the fault-tolerant servicer on an asyncio server thread
+        """
+        cls.temp_dir = tempfile.mkdtemp(prefix=f"test_{cls.__name__}_")
+        cls.cwd = os.getcwd()
+        os.chdir(cls.temp_dir)  # keep the data-usage log out of the repository
+        cls.raft_db = RaftDB(f"127.0.0.1:{get_free_port()}", [], os.path.join(cls.temp_dir, "node.db"))
+        deadline = time.time() + 20
+        while cls.raft_db.getStatus()["state"] != 2:
+            if time.time() > deadline:
+                raise Exception("Single-node cluster did not elect itself leader")
+            time.sleep(0.1)
+
+        # Compress even small messages so the streams exercise the compression path
+        cls.servicer = FaultTolerantChatServicer(cls.raft_db, compression_policy=CompressionPolicy("gzip", 64),
+                                                 profiler=NodeProfiler(os.path.join(cls.temp_dir, "profiles")))
+        cls.port = get_free_port()
+        ready = threading.Event()
+
+        async def serve():
+            cls.loop = asyncio.get_running_loop()
+            cls.servicer.hub.bind(cls.loop)
+            cls.servicer.executor = futures.ThreadPoolExecutor(max_workers=4)
+            cls.server = grpc.aio.server(
+                migration_thread_pool=cls.servicer.executor,
+                compression=cls.servicer.compression.grpc_algorithm,
+                interceptors=[CompressionInterceptor(cls.servicer.compression),
+                              ProfilingInterceptor(cls.servicer.profiler)],
+            )
+            add_chat_services(cls.servicer, cls.server)
+            cls.server.add_insecure_port(f"127.0.0.1:{cls.port}")
+            await cls.server.start()
+            ready.set()
+            await cls.server.wait_for_termination()
+
+        cls.server_thread = threading.Thread(target=lambda: asyncio.run(serve()), daemon=True)
+        cls.server_thread.start()
+        ready.wait(10)
+        cls.channel = grpc.insecure_channel(f"127.0.0.1:{cls.port}")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.channel.close()
+        asyncio.run_coroutine_threadsafe(cls.server.stop(0), cls.loop).result(5)
+        cls.server_thread.join(5)
+        cls.raft_db.destroy()
+        cls.raft_db.close()
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.temp_dir)
@@ -0,0 +1,102 @@
+import unittest
+import os
+import sys
+import time
+
+from google.protobuf import field_mask_pb2
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from unit_tests.server_fixture import SingleNodeServerTestCase
+import chat_pb2
+import chat_pb2_grpc
+import chat_v2_pb2
+import chat_v2_pb2_grpc
+
+# The following tests are for the v2 schema served by system_main.chat_v2_servicer,
+# each feature against its own single-node server
+class TestV2Schema(SingleNodeServerTestCase):
+    def test_v2_schema_side_by_side(self):
+        """
+        Verify the v2 service works alongside v1 on the same server and sends smaller responses
+        """
+        v1 = chat_pb2_grpc.ChatServiceStub(self.channel)
+        v2 = chat_v2_pb2_grpc.ChatServiceStub(self.channel)
+        for name in ("ana", "ben"):
+            created = v2.CreateUser(chat_v2_pb2.CreateUserRequest(
+                username=name, hashed_password="pw", display_name=name), timeout=10)
+            self.assertEqual(created.status, chat_v2_pb2.OK)
+            self.assertFalse(created.HasField("message"))
+        duplicate = v2.CreateUser(chat_v2_pb2.CreateUserRequest(
+            username="ana", hashed_password="pw", display_name="ana"), timeout=10)
+        self.assertEqual(duplicate.status, chat_v2_pb2.ALREADY_EXISTS)
+        self.assertTrue(duplicate.message)
+
+        login_v1 = v1.Login(chat_pb2.LoginRequest(username="ana", hashed_password="pw"), timeout=10)
+        login_v2 = v2.Login(chat_v2_pb2.LoginRequest(username="ben", hashed_password="pw"), timeout=10)
+        self.assertEqual(login_v2.status, chat_v2_pb2.OK)
+        self.assertLess(login_v2.ByteSize(), login_v1.ByteSize())
+
+        pushes = v2.Subscribe(chat_v2_pb2.SubscribeRequest(username="ben", resume_from=login_v2.push_seq))
+        sent = v2.SendMessage(chat_v2_pb2.SendMessageRequest(sender="ana", receiver="ben", content="hey"), timeout=10)
+        self.assertEqual((sent.status, sent.delivered_count), (chat_v2_pb2.OK, 1))
+        push = next(pushes)
+        self.assertEqual((push.sender, push.content, push.seq), ("ana", "hey", login_v2.push_seq + 1))
+        pushes.cancel()
+
+        read = v2.ReadMessages(chat_v2_pb2.ReadMessagesRequest(username="ben"), timeout=10)
+        self.assertEqual([(m.sender_username, m.content, m.read) for m in read.messages], [("ana", "hey", False)])
+        self.assertAlmostEqual(read.messages[0].sent_at_ms / 1000.0, time.time(), delta=60)
+        chunks = list(v2.ReadMessagesStream(chat_v2_pb2.ReadMessagesRequest(username="ben"), timeout=10))
+        self.assertEqual((chunks[-1].status, chunks[-1].total), (chat_v2_pb2.OK, 1))
+        self.assertTrue(chunks[0].messages[0].read)
+
+        deleted = v2.DeleteMessages(chat_v2_pb2.DeleteMessagesRequest(
+            username="ben", message_ids=[read.messages[0].id, 2 ** 40]), timeout=10)
+        self.assertEqual((deleted.status, deleted.deleted_count), (chat_v2_pb2.OK, 1))
+        logged_out = v2.ReadMessages(chat_v2_pb2.ReadMessagesRequest(username="nobody"), timeout=10)
+        self.assertEqual(logged_out.status, chat_v2_pb2.ERROR)
+
+class TestV2ReadShaping(SingleNodeServerTestCase):
+    def test_v2_read_sender_table_and_mask(self):
+        """
+        Verify sender_table sends each sender once and read_mask drops the unrequested fields
+        """
+        v2 = chat_v2_pb2_grpc.ChatServiceStub(self.channel)
+        for name in ("cara", "dev", "eli"):
+            v2.CreateUser(chat_v2_pb2.CreateUserRequest(username=name, hashed_password="pw", display_name=name),
+                          timeout=10)
+            v2.Login(chat_v2_pb2.LoginRequest(username=name, hashed_password="pw"), timeout=10)
+        for sender in ("cara", "dev", "cara", "cara", "dev"):
+            v2.SendMessage(chat_v2_pb2.SendMessageRequest(
+                sender=sender, receiver="eli", content="see you at the standup, bring the deploy notes"), timeout=10)
+
+        headers = field_mask_pb2.FieldMask(paths=["id", "sender_username", "sent_at_ms"])
+        read = v2.ReadMessages(chat_v2_pb2.ReadMessagesRequest(
+            username="eli", sender_table=True, read_mask=headers), timeout=10)
+        self.assertEqual(read.status, chat_v2_pb2.OK)
+        # Newest first: dev, cara, cara, dev, cara
+        self.assertEqual(list(read.senders), ["dev", "cara"])
+        self.assertEqual([read.senders[m.sender_index] for m in read.messages], ["dev", "cara", "cara", "dev", "cara"])
+        self.assertTrue(all(m.id and m.sent_at_ms and not m.content and not m.sender_username
+                            for m in read.messages))
+        full = v2.ReadMessages(chat_v2_pb2.ReadMessagesRequest(username="eli"), timeout=10)
+        self.assertLess(read.ByteSize() * 3, full.ByteSize())
+
+        # In a stream each chunk only carries the senders it adds to the table
+        chunks = list(v2.ReadMessagesStream(chat_v2_pb2.ReadMessagesRequest(
+            username="eli", chunk_size=1, sender_table=True, read_mask=headers), timeout=10))
+        self.assertEqual([list(c.senders) for c in chunks[:-1]], [["dev"], ["cara"], [], [], []])
+        self.assertEqual([c.messages[0].sender_index for c in chunks[:-1]], [0, 1, 1, 0, 1])
+
+        bad_mask = v2.ReadMessages(chat_v2_pb2.ReadMessagesRequest(
+            username="eli", read_mask=field_mask_pb2.FieldMask(paths=["id", "body"])), timeout=10)
+        self.assertEqual(bad_mask.status, chat_v2_pb2.ERROR)
+        self.assertIn("body", bad_mask.message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import os
+import sys
+
+import grpc
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from system_main.compression_policy import (
+    CompressionPolicy, CompressionInterceptor, CompressionClientInterceptor,
+    ALWAYS, NEVER, parse_method_thresholds
+)
+
+class FakeMessage:
+    def __init__(self, size):
+        self.size = size
+
+    def ByteSize(self):
+        return self.size
+
+class FakeContext:
+    """
+    Records which messages had compression disabled
+    """
+    def __init__(self):
+        self.disabled = 0
+
+    def disable_next_message_compression(self):
+        self.disabled += 1
+
+class FakeHandlerCallDetails:
+    def __init__(self, method):
+        self.method = method
+
+# The following tests are for the system_main.compression_policy module
+class TestCompressionPolicy(unittest.TestCase):
+    def test_threshold_and_overrides(self):
+        """
+        Verify the default threshold and per-method always/never/byte overrides
+        """
+        policy = CompressionPolicy("gzip", 1024, parse_method_thresholds(
+            ["Login=never", "Heartbeat=always", "ListUsers=256"]))
+        self.assertFalse(policy.should_compress("ReadMessages", 1023))
+        self.assertTrue(policy.should_compress("ReadMessages", 1024))
+        self.assertFalse(policy.should_compress("Login", 10 ** 6))
+        self.assertTrue(policy.should_compress("Heartbeat", 1))
+        self.assertTrue(policy.should_compress("ListUsers", 300))
+        self.assertEqual(policy.threshold_for("Login"), NEVER)
+        self.assertEqual(policy.threshold_for("Heartbeat"), ALWAYS)
+        self.assertFalse(CompressionPolicy("none").should_compress("ReadMessages", 10 ** 6))
+        with self.assertRaises(ValueError):
+            parse_method_thresholds(["Login"])
+        with self.assertRaises(ValueError):
+            CompressionPolicy("brotli")
+
+    def test_client_interceptor_picks_call_compression(self):
+        """
+        Verify the client interceptor compresses only requests at or above the threshold
+        """
+        interceptor = CompressionClientInterceptor(CompressionPolicy("deflate", 100))
+        seen = []
+        details = grpc.ClientCallDetails()
+        details.method, details.timeout, details.metadata = "/chat.ChatService/SendMessage", None, None
+        details.credentials, details.wait_for_ready, details.compression = None, None, None
+        for size in (10, 500):
+            interceptor.intercept_unary_unary(lambda d, r: seen.append(d.compression), details, FakeMessage(size))
+        self.assertEqual(seen, [grpc.Compression.NoCompression, grpc.Compression.Deflate])
+
+class TestCompressionInterceptor(unittest.IsolatedAsyncioTestCase):
+    async def intercept(self, policy, method, handler):
+        async def continuation(details):
+            return handler
+        return await CompressionInterceptor(policy).intercept_service(
+            continuation, FakeHandlerCallDetails(f"/chat.ChatService/{method}"))
+
+    async def test_small_unary_response_not_compressed(self):
+        """
+        Verify a wrapped sync unary handler disables compression only for small responses
+        """
+        handler = grpc.unary_unary_rpc_method_handler(lambda request, context: FakeMessage(request))
+        wrapped = await self.intercept(CompressionPolicy("gzip", 1024), "ListUsers", handler)
+        context = FakeContext()
+        self.assertEqual(wrapped.unary_unary(10, context).size, 10)
+        self.assertEqual(context.disabled, 1)
+        wrapped.unary_unary(5000, context)
+        self.assertEqual(context.disabled, 1)
+
+    async def test_stream_messages_checked_one_by_one(self):
+        """
+        Verify each message of a sync or async response stream is checked separately
+        """
+        def sync_stream(request, context):
+            for size in request:
+                yield FakeMessage(size)
+
+        async def async_stream(request, context):
+            for size in request:
+                yield FakeMessage(size)
+
+        policy = CompressionPolicy("gzip", 1024)
+        wrapped = await self.intercept(policy, "ReadMessagesStream", grpc.unary_stream_rpc_method_handler(sync_stream))
+        context = FakeContext()
+        self.assertEqual([m.size for m in wrapped.unary_stream([10, 5000, 20], context)], [10, 5000, 20])
+        self.assertEqual(context.disabled, 2)
+
+        wrapped = await self.intercept(policy, "ReadMessagesStream", grpc.unary_stream_rpc_method_handler(async_stream))
+        context = FakeContext()
+        self.assertEqual([m.size async for m in wrapped.unary_stream([5000, 10], context)], [5000, 10])
+        self.assertEqual(context.disabled, 1)
+
+    async def test_disabled_policy_leaves_handler_alone(self):
+        """
+        Verify the interceptor does not wrap handlers when compression is off
+        """
+        handler = grpc.unary_unary_rpc_method_handler(lambda request, context: FakeMessage(request))
+        self.assertIs(await self.intercept(CompressionPolicy("none"), "Login", handler), handler)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,244 @@
+import unittest
+import os
+import sys
+import pstats
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from unit_tests.server_fixture import SingleNodeServerTestCase
+import chat_pb2
+import chat_pb2_grpc
+import chat_v2_pb2
+import chat_v2_pb2_grpc
+
+# The following tests are for the RPCs of system_main.ft_server_grpc, each
+# feature against its own single-node server
+class TestReadMessagesStream(SingleNodeServerTestCase):
+    def test_read_messages_stream_chunks(self):
+        """
+        Verify ReadMessagesStream returns the inbox newest first in chunks and marks it read
+        """
+        stub = chat_pb2_grpc.ChatServiceStub(self.channel)
+        for name in ("lee", "max"):
+            stub.CreateUser(chat_pb2.CreateUserRequest(username=name, hashed_password="pw", display_name=name),
+                            timeout=10)
+            stub.Login(chat_pb2.LoginRequest(username=name, hashed_password="pw"), timeout=10)
+        stub.SendMessage(chat_pb2.SendMessageRequest(sender="lee", receiver="max", content="first"), timeout=10)
+        for i in range(6):
+            stub.SendMessage(chat_pb2.SendMessageRequest(sender="lee", receiver="max", content=f"m{i}"), timeout=10)
+
+        chunks = list(stub.ReadMessagesStream(chat_pb2.ReadMessagesRequest(
+            username="max", only_unread=True, chunk_size=3), timeout=10))
+        self.assertEqual([len(c.messages) for c in chunks], [3, 3, 1, 0])
+        self.assertEqual([m.content for c in chunks for m in c.messages],
+                         [f"m{i}" for i in range(5, -1, -1)] + ["first"])
+        self.assertEqual((chunks[-1].status, chunks[-1].message), ("success", "Retrieved 7 messages."))
+
+        unread = list(stub.ReadMessagesStream(chat_pb2.ReadMessagesRequest(
+            username="max", only_unread=True), timeout=10))
+        self.assertEqual(sum(len(c.messages) for c in unread), 0)
+        limited = list(stub.ReadMessagesStream(chat_pb2.ReadMessagesRequest(
+            username="max", limit=4, chunk_size=3), timeout=10))
+        self.assertEqual([len(c.messages) for c in limited], [3, 1, 0])
+
+class TestSyncSince(SingleNodeServerTestCase):
+    def test_sync_since_returns_only_changes(self):
+        """
+        Verify SyncSince returns what changed after the Login cursor, and nothing once caught up
+        """
+        v1 = chat_pb2_grpc.ChatServiceStub(self.channel)
+        v2 = chat_v2_pb2_grpc.ChatServiceStub(self.channel)
+        for name in ("fay", "gus"):
+            v1.CreateUser(chat_pb2.CreateUserRequest(username=name, hashed_password="pw", display_name=name),
+                          timeout=10)
+            login = v1.Login(chat_pb2.LoginRequest(username=name, hashed_password="pw"), timeout=10)
+        cursor = login.sync_cursor
+        self.assertGreater(cursor, 0)
+
+        for text in ("one", "two"):
+            v1.SendMessage(chat_pb2.SendMessageRequest(sender="fay", receiver="gus", content=text), timeout=10)
+        synced = v1.SyncSince(chat_pb2.SyncSinceRequest(username="gus", cursor=cursor), timeout=10)
+        self.assertEqual(synced.status, "success")
+        self.assertEqual([(m.sender_username, m.content, m.read_status) for m in synced.new_messages],
+                         [("fay", "one", 0), ("fay", "two", 0)])
+        self.assertGreater(synced.cursor, cursor)
+
+        caught_up = v1.SyncSince(chat_pb2.SyncSinceRequest(username="gus", cursor=synced.cursor), timeout=10)
+        self.assertEqual((len(caught_up.new_messages), caught_up.cursor), (0, synced.cursor))
+
+        v1.ReadMessages(chat_pb2.ReadMessagesRequest(username="gus"), timeout=10)
+        synced_v2 = v2.SyncSince(chat_v2_pb2.SyncSinceRequest(username="gus", cursor=synced.cursor), timeout=10)
+        # Reading the whole inbox only moved the read watermark
+        self.assertGreaterEqual(synced_v2.read_up_to, max(m.id for m in synced.new_messages))
+        self.assertEqual(list(synced_v2.read_ids), [])
+        reset = v2.SyncSince(chat_v2_pb2.SyncSinceRequest(username="gus"), timeout=10)
+        self.assertTrue(reset.reset)
+
+class TestListConversations(SingleNodeServerTestCase):
+    def test_list_conversations_pages_by_recency(self):
+        """
+        Verify ListConversations returns one entry per peer, most recent first, in pages
+        """
+        v1 = chat_pb2_grpc.ChatServiceStub(self.channel)
+        v2 = chat_v2_pb2_grpc.ChatServiceStub(self.channel)
+        names = ("hal", "ivy", "jon", "kim")
+        for name in names:
+            v1.CreateUser(chat_pb2.CreateUserRequest(username=name, hashed_password="pw", display_name=name),
+                          timeout=10)
+            v1.Login(chat_pb2.LoginRequest(username=name, hashed_password="pw"), timeout=10)
+        for sender in ("ivy", "jon", "kim", "ivy"):
+            v1.SendMessage(chat_pb2.SendMessageRequest(sender=sender, receiver="hal", content=f"hi from {sender}"),
+                           timeout=10)
+
+        first = v1.ListConversations(chat_pb2.ListConversationsRequest(username="hal", limit=2), timeout=10)
+        self.assertEqual([(c.peer, c.last_content, c.unread_count) for c in first.conversations],
+                         [("ivy", "hi from ivy", 2), ("kim", "hi from kim", 1)])
+        rest = v2.ListConversations(chat_v2_pb2.ListConversationsRequest(
+            username="hal", before=first.next_before, limit=2), timeout=10)
+        self.assertEqual(([c.peer for c in rest.conversations], rest.next_before), (["jon"], 0))
+        self.assertGreater(rest.conversations[0].last_sent_at_ms, 0)
+
+        v1.ReadMessages(chat_pb2.ReadMessagesRequest(username="hal"), timeout=10)
+        after_read = v1.ListConversations(chat_pb2.ListConversationsRequest(username="hal"), timeout=10)
+        self.assertEqual([c.unread_count for c in after_read.conversations], [0, 0, 0])
+
+class TestGetConversation(SingleNodeServerTestCase):
+    def test_get_conversation_pages_thread(self):
+        """
+        Verify GetConversation returns both directions of one thread, newest first, without marking it read
+        """
+        v1 = chat_pb2_grpc.ChatServiceStub(self.channel)
+        v2 = chat_v2_pb2_grpc.ChatServiceStub(self.channel)
+        for name in ("lee", "max", "ned"):
+            v1.CreateUser(chat_pb2.CreateUserRequest(username=name, hashed_password="pw", display_name=name),
+                          timeout=10)
+            v1.Login(chat_pb2.LoginRequest(username=name, hashed_password="pw"), timeout=10)
+        for sender, receiver, content in (("lee", "max", "l0"), ("ned", "max", "n0"), ("max", "lee", "m0"),
+                                          ("lee", "max", "l1"), ("max", "ned", "m1")):
+            v1.SendMessage(chat_pb2.SendMessageRequest(sender=sender, receiver=receiver, content=content),
+                           timeout=10)
+
+        first = v1.GetConversation(chat_pb2.GetConversationRequest(username="max", peer="lee", limit=2), timeout=10)
+        self.assertEqual([(m.sender_username, m.content) for m in first.messages], [("lee", "l1"), ("max", "m0")])
+        self.assertGreater(first.next_cursor, 0)
+        rest = v2.GetConversation(chat_v2_pb2.GetConversationRequest(
+            username="lee", peer="max", cursor=first.next_cursor), timeout=10)
+        self.assertEqual(([m.content for m in rest.messages], rest.next_cursor), (["l0"], 0))
+
+        unread = v1.ReadMessages(chat_pb2.ReadMessagesRequest(username="max", only_unread=True), timeout=10)
+        self.assertEqual(len(unread.messages), 3)
+        missing = v1.GetConversation(chat_pb2.GetConversationRequest(username="max", peer="nobody"), timeout=10)
+        self.assertEqual(missing.status, "error")
+
+class TestListSentMessages(SingleNodeServerTestCase):
+    def test_list_sent_messages_pages_outbox(self):
+        """
+        Verify ListSentMessages pages the sender's own messages, and its ids can be deleted by the sender
+        """
+        v1 = chat_pb2_grpc.ChatServiceStub(self.channel)
+        v2 = chat_v2_pb2_grpc.ChatServiceStub(self.channel)
+        for name in ("oli", "pam", "quin"):
+            v1.CreateUser(chat_pb2.CreateUserRequest(username=name, hashed_password="pw", display_name=name),
+                          timeout=10)
+            v1.Login(chat_pb2.LoginRequest(username=name, hashed_password="pw"), timeout=10)
+        for receiver, content in (("pam", "o0"), ("quin", "o1"), ("pam", "o2")):
+            v1.SendMessage(chat_pb2.SendMessageRequest(sender="oli", receiver=receiver, content=content),
+                           timeout=10)
+        v1.SendMessage(chat_pb2.SendMessageRequest(sender="pam", receiver="oli", content="p0"), timeout=10)
+
+        first = v1.ListSentMessages(chat_pb2.ListSentMessagesRequest(username="oli", limit=2), timeout=10)
+        self.assertEqual([(m.receiver_username, m.content) for m in first.messages], [("pam", "o2"), ("quin", "o1")])
+        rest = v2.ListSentMessages(chat_v2_pb2.ListSentMessagesRequest(
+            username="oli", cursor=first.next_cursor), timeout=10)
+        self.assertEqual(([(m.receiver_username, m.content) for m in rest.messages], rest.next_cursor),
+                         ([("pam", "o0")], 0))
+
+        deleted = v1.DeleteMessages(chat_pb2.DeleteMessagesRequest(
+            username="oli", message_ids=[m.id for m in first.messages]), timeout=10)
+        self.assertEqual(deleted.status, "success")
+        after = v1.ListSentMessages(chat_pb2.ListSentMessagesRequest(username="oli"), timeout=10)
+        self.assertEqual([m.content for m in after.messages], ["o0"])
+
+class TestReadFilters(SingleNodeServerTestCase):
+    def test_read_messages_filters(self):
+        """
+        Verify ReadMessages filters by sender and time, and only marks the returned messages as read
+        """
+        v1 = chat_pb2_grpc.ChatServiceStub(self.channel)
+        v2 = chat_v2_pb2_grpc.ChatServiceStub(self.channel)
+        for name in ("ray", "sam", "tia"):
+            v1.CreateUser(chat_pb2.CreateUserRequest(username=name, hashed_password="pw", display_name=name),
+                          timeout=10)
+            v1.Login(chat_pb2.LoginRequest(username=name, hashed_password="pw"), timeout=10)
+        for sender, content in (("sam", "s0"), ("tia", "t0"), ("sam", "s1")):
+            v1.SendMessage(chat_pb2.SendMessageRequest(sender=sender, receiver="ray", content=content), timeout=10)
+
+        from_sam = v1.ReadMessages(chat_pb2.ReadMessagesRequest(username="ray", from_sender="sam"), timeout=10)
+        self.assertEqual([m.content for m in from_sam.messages], ["s1", "s0"])
+        unread = v1.ReadMessages(chat_pb2.ReadMessagesRequest(username="ray", only_unread=True), timeout=10)
+        self.assertEqual([m.content for m in unread.messages], ["t0"])
+
+        sent_at = {m.content: m.sent_at_ms for m in v2.ReadMessages(
+            chat_v2_pb2.ReadMessagesRequest(username="ray"), timeout=10).messages}
+        window = v2.ReadMessages(chat_v2_pb2.ReadMessagesRequest(
+            username="ray", since_ms=sent_at["s0"], until_ms=sent_at["s1"] + 60000, from_sender="sam"), timeout=10)
+        self.assertEqual([m.content for m in window.messages], ["s1", "s0"])
+        nobody = v1.ReadMessages(chat_pb2.ReadMessagesRequest(username="ray", from_sender="nobody"), timeout=10)
+        self.assertEqual(len(nobody.messages), 0)
+
+class TestRaftStatus(SingleNodeServerTestCase):
+    def test_get_raft_status_in_both_schemas(self):
+        """
+        Verify GetRaftStatus reports the node's Raft state in v1 and v2
+        """
+        v1 = chat_pb2_grpc.ChatServiceStub(self.channel)
+        v2 = chat_v2_pb2_grpc.ChatServiceStub(self.channel)
+        v1.CreateUser(chat_pb2.CreateUserRequest(username="uma", hashed_password="pw", display_name="uma"),
+                      timeout=10)
+        status = v1.GetRaftStatus(chat_pb2.RaftStatusRequest(), timeout=10)
+        self.assertEqual((status.status, status.role, status.leader), ("success", "leader", self.raft_db.node_address))
+        self.assertGreater(status.commit_index, 0)
+        self.assertEqual(status.last_applied, status.commit_index)
+        self.assertGreater(status.log_entries, 0)
+        self.assertEqual(len(status.peers), 0)
+        self.assertEqual(len(status.latencies), 0)  # this node records no metrics
+
+        status_v2 = v2.GetRaftStatus(chat_v2_pb2.RaftStatusRequest(), timeout=10)
+        self.assertEqual(status_v2.status, chat_v2_pb2.OK)
+        self.assertFalse(status_v2.HasField("message"))
+        self.assertEqual((status_v2.role, status_v2.node), ("leader", status.node))
+        self.assertGreaterEqual(status_v2.log_entries, status.log_entries)
+        self.assertGreaterEqual(status_v2.commit_index, status.commit_index)
+
+class TestStartProfile(SingleNodeServerTestCase):
+    def test_start_profile_captures_next_calls(self):
+        """
+        Verify StartProfile profiles the next calls of one method into a pstats file, one profile at a time
+        """
+        v1 = chat_pb2_grpc.ChatServiceStub(self.channel)
+        v2 = chat_v2_pb2_grpc.ChatServiceStub(self.channel)
+        started = v1.StartProfile(chat_pb2.ProfileRequest(mode="cprofile", method="Heartbeat", calls=2, seconds=30),
+                                  timeout=10)
+        self.assertEqual(started.status, "success")
+        self.assertTrue(started.path.endswith(".prof"))
+
+        busy = v2.StartProfile(chat_v2_pb2.ProfileRequest(mode="sample", seconds=1), timeout=10)
+        self.assertEqual(busy.status, chat_v2_pb2.ERROR)
+        self.assertIn("already running", busy.message)
+        for _ in range(3):
+            v1.Heartbeat(chat_pb2.HeartbeatRequest(username="nobody"), timeout=10)
+        self.assertTrue(self.servicer.profiler.wait(10))
+        self.assertEqual(self.servicer.profiler.last, ("cprofile", started.path, "calls profiled: 2"))
+        functions = {name for _, _, name in pstats.Stats(started.path).stats}
+        self.assertIn("Heartbeat", functions)
+
+        invalid = v1.StartProfile(chat_pb2.ProfileRequest(mode="perf"), timeout=10)
+        self.assertEqual(invalid.status, "error")
+        self.assertIn("Unknown profile mode", invalid.message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import contextlib
+import inspect
+import os
+import sys
+
+import grpc
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from system_main.interceptors import (
+    split_method, rewrap_handler, observe_behavior, ClientCallDetails, ObservedResponses
+)
+
+# The following tests are for the system_main.interceptors module
+class TestInterceptorHelpers(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.ends = []
+
+    def observe(self, behavior):
+        return observe_behavior(behavior, lambda: "started",
+                                lambda started, context, response, error: self.ends.append((started, response, error)))
+
+    def test_split_method(self):
+        """
+        Verify full method paths, as str or bytes, are split into service and method
+        """
+        self.assertEqual(split_method("/chat.v2.ChatService/Login"), ("chat.v2.ChatService", "Login"))
+        self.assertEqual(split_method(b"/chat.ChatService/Heartbeat"), ("chat.ChatService", "Heartbeat"))
+
+    def test_rewrap_keeps_cardinality_and_serializers(self):
+        """
+        Verify a rewrapped handler keeps its kind and serializers unless they are replaced
+        """
+        def behavior(request, context):
+            return request
+
+        for factory, kind in [(grpc.unary_unary_rpc_method_handler, "unary_unary"),
+                              (grpc.unary_stream_rpc_method_handler, "unary_stream"),
+                              (grpc.stream_unary_rpc_method_handler, "stream_unary"),
+                              (grpc.stream_stream_rpc_method_handler, "stream_stream")]:
+            handler = factory(behavior, request_deserializer=bytes, response_serializer=str)
+            wrapped = rewrap_handler(handler, lambda b: (lambda request, context: b(request, context) * 2),
+                                     response_serializer=repr)
+            self.assertEqual(getattr(wrapped, kind)(3, None), 6)
+            self.assertEqual(wrapped.request_streaming, handler.request_streaming)
+            self.assertEqual(wrapped.response_streaming, handler.response_streaming)
+            self.assertIs(wrapped.request_deserializer, bytes)
+            self.assertIs(wrapped.response_serializer, repr)
+
+    async def test_observe_keeps_kind(self):
+        """
+        Verify sync and async functions and generators stay what they were, and on_end sees responses and errors
+        """
+        def function(request, context):
+            return request + 1
+
+        async def coroutine(request, context):
+            return request + 1
+
+        def generator(request, context):
+            yield request
+            raise ValueError("stream failed")
+
+        async def async_generator(request, context):
+            yield request
+
+        wrapped = self.observe(function)
+        self.assertFalse(inspect.iscoroutinefunction(wrapped) or inspect.isgeneratorfunction(wrapped))
+        self.assertEqual(wrapped(1, None), 2)
+
+        wrapped = self.observe(coroutine)
+        self.assertTrue(inspect.iscoroutinefunction(wrapped))
+        self.assertEqual(await wrapped(1, None), 2)
+
+        wrapped = self.observe(generator)
+        self.assertTrue(inspect.isgeneratorfunction(wrapped))
+        with self.assertRaises(ValueError):
+            list(wrapped(1, None))
+
+        wrapped = self.observe(async_generator)
+        self.assertTrue(inspect.isasyncgenfunction(wrapped))
+        self.assertEqual([response async for response in wrapped(1, None)], [1])
+
+        self.assertEqual([end[:2] for end in self.ends],
+                         [("started", 2), ("started", 2), ("started", None), ("started", None)])
+        self.assertIsNone(self.ends[0][2])
+        self.assertIsInstance(self.ends[2][2], ValueError)
+        self.assertIsNone(self.ends[3][2])
+
+    def test_scope_entered_for_every_generator_step(self):
+        """
+        Verify a sync generator's steps each run in a fresh scope, resumable from any thread
+        """
+        entered = []
+
+        @contextlib.contextmanager
+        def scope(started):
+            entered.append(started)
+            yield
+
+        def generator(request, context):
+            yield 1
+            yield 2
+
+        wrapped = observe_behavior(generator, lambda: "root", lambda *end: None, scope)
+        self.assertEqual(list(wrapped(None, None)), [1, 2])
+        self.assertEqual(entered, ["root"] * 3)  # two responses and the step that ends the stream
+
+    def test_client_helpers(self):
+        """
+        Verify copied call details keep unreplaced fields and observed streams report messages and their end once
+        """
+        class Details:
+            method, timeout, metadata, credentials = "/chat.ChatService/Login", 5, (("a", "1"),), None
+
+        details = ClientCallDetails(Details(), metadata=[("b", "2")])
+        self.assertEqual((details.method, details.timeout, details.metadata), ("/chat.ChatService/Login", 5, [("b", "2")]))
+        self.assertIsNone(details.compression)
+
+        seen, ends = [], []
+        responses = ObservedResponses(iter([1, 2]), lambda: ends.append(True), seen.append)
+        self.assertEqual(list(responses), [1, 2])
+        self.assertRaises(StopIteration, next, responses)
+        self.assertEqual((seen, ends), ([1, 2], [True]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+import unittest
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import grpc
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from system_main.metrics import MetricsRegistry, MetricsInterceptor, start_http_server, response_status
+from system_main import chat_pb2, chat_v2_pb2
+
+class FakeHandlerCallDetails:
+    def __init__(self, method):
+        self.method = method
+
+class FakeContext:
+    def __init__(self, code=None):
+        self._code = code
+
+    def code(self):
+        return self._code
+
+# The following tests are for the system_main.metrics module
+class TestMetricsRegistry(unittest.TestCase):
+    def test_histogram_buckets_quantiles_and_text(self):
+        """
+        Verify observations land in cumulative buckets, quantiles interpolate, and the text format is Prometheus'
+        """
+        registry = MetricsRegistry()
+        latency = registry.histogram("op_seconds", "Op latency.", ("op",), buckets=(0.01, 0.1, 1.0))
+        child = latency.labels("read")
+        for value in [0.005] * 50 + [0.05] * 45 + [0.5] * 4 + [5.0]:
+            child.observe(value)
+        cumulative, count, total = child.snapshot()
+        self.assertEqual(cumulative, [50, 95, 99, 100])
+        self.assertEqual(count, 100)
+        self.assertAlmostEqual(total, 9.5)
+        self.assertAlmostEqual(child.quantile(0.5), 0.01)
+        self.assertAlmostEqual(child.quantile(0.95), 0.1)
+        self.assertAlmostEqual(child.quantile(0.97), 0.55)
+        self.assertEqual(child.quantile(1.0), 1.0)  # the +Inf bucket reports the largest bound
+        self.assertIsNone(latency.labels("write").quantile(0.5))
+
+        text = registry.render()
+        self.assertIn("# TYPE op_seconds histogram", text)
+        self.assertIn('op_seconds_bucket{op="read",le="0.1"} 95', text)
+        self.assertIn('op_seconds_bucket{op="read",le="+Inf"} 100', text)
+        self.assertIn('op_seconds_count{op="read"} 100', text)
+        self.assertIs(registry.histogram("op_seconds", "Op latency.", ("op",)), latency)
+        with self.assertRaises(ValueError):
+            registry.counter("op_seconds", "Not a counter.")
+        with self.assertRaises(ValueError):
+            latency.labels("read", "extra")
+
+    def test_threads_record_without_losing_updates(self):
+        """
+        Verify concurrent increments from many threads all count, each thread writing its own shard
+        """
+        registry = MetricsRegistry()
+        counter = registry.counter("hits_total", "Hits.").labels()
+        gauge = registry.gauge("open", "Open things.").labels()
+
+        def work():
+            for _ in range(20000):
+                counter.inc()
+                gauge.inc()
+                gauge.dec()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(counter.value(), 160000)
+        self.assertEqual(gauge.value(), 0)
+        gauge.set_function(lambda: 42)
+        self.assertIn("open 42", registry.render())
+
+    def test_response_status_reads_both_schemas(self):
+        """
+        Verify error statuses are read from v1 strings and v2 enums, and successes are not errors
+        """
+        self.assertIsNone(response_status(chat_pb2.LoginResponse(status="success")))
+        self.assertEqual(response_status(chat_pb2.LoginResponse(status="error")), "error")
+        self.assertIsNone(response_status(chat_v2_pb2.LoginResponse()))
+        self.assertEqual(response_status(chat_v2_pb2.CreateUserResponse(status=chat_v2_pb2.ALREADY_EXISTS)),
+                         "already_exists")
+        self.assertIsNone(response_status(object()))
+
+    def test_http_endpoint_serves_metrics(self):
+        """
+        Verify GET /metrics returns the registry in the text format and other paths are not found
+        """
+        registry = MetricsRegistry()
+        registry.counter("scrapes_total", "Scrapes.").labels().inc(3)
+        server = start_http_server(registry, "127.0.0.1", 0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(url + "/metrics", timeout=5) as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+                self.assertIn("scrapes_total 3", response.read().decode())
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(url + "/other", timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+class TestMetricsInterceptor(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.interceptor = MetricsInterceptor(self.registry)
+
+    async def intercept(self, handler, method):
+        async def continuation(details):
+            return handler
+        return await self.interceptor.intercept_service(continuation, FakeHandlerCallDetails(method))
+
+    def errors(self, *labels):
+        return self.registry.get("chat_rpc_errors_total").labels(*labels).value()
+
+    async def test_unary_latency_in_flight_and_errors(self):
+        """
+        Verify unary calls are timed, leave nothing in flight, and count error responses, codes and exceptions
+        """
+        in_flight = []
+
+        def login(request, context):
+            in_flight.append(self.registry.get("chat_rpc_in_flight").labels("chat.ChatService", "Login").value())
+            return chat_pb2.LoginResponse(status=request)
+
+        handler = await self.intercept(grpc.unary_unary_rpc_method_handler(login), "/chat.ChatService/Login")
+        handler.unary_unary("success", FakeContext())
+        handler.unary_unary("error", FakeContext())
+
+        def broken(request, context):
+            raise RuntimeError("boom")
+        broken_handler = await self.intercept(grpc.unary_unary_rpc_method_handler(broken), "/chat.ChatService/Login")
+        with self.assertRaises(RuntimeError):
+            broken_handler.unary_unary("success", None)
+        with self.assertRaises(RuntimeError):
+            broken_handler.unary_unary("success", FakeContext(grpc.StatusCode.UNAVAILABLE))  # as after an abort
+
+        self.assertEqual(in_flight, [1, 1])
+        self.assertEqual(self.registry.get("chat_rpc_in_flight").labels("chat.ChatService", "Login").value(), 0)
+        latency = self.registry.get("chat_rpc_duration_seconds").labels("chat.ChatService", "Login")
+        self.assertEqual(latency.snapshot()[1], 4)
+        self.assertEqual(self.errors("chat.ChatService", "Login", "error"), 1)
+        self.assertEqual(self.errors("chat.ChatService", "Login", "UNAVAILABLE"), 1)
+        self.assertEqual(self.errors("chat.ChatService", "Login", "UNKNOWN"), 1)
+
+    async def test_streams_timed_until_closed(self):
+        """
+        Verify sync and async streams stay generators and are timed until they end or are closed early
+        """
+        def chunks(request, context):
+            yield 1
+            yield 2
+
+        async def session(request_iterator, context):
+            yield "ack"
+
+        handler = await self.intercept(grpc.unary_stream_rpc_method_handler(chunks),
+                                       "/chat.ChatService/ReadMessagesStream")
+        self.assertEqual(list(handler.unary_stream(None, FakeContext())), [1, 2])
+        stream = handler.unary_stream(None, FakeContext())
+        next(stream)
+        stream.close()  # the client went away
+        latency = self.registry.get("chat_rpc_duration_seconds").labels("chat.ChatService", "ReadMessagesStream")
+        self.assertEqual(latency.snapshot()[1], 2)
+        self.assertEqual(self.errors("chat.ChatService", "ReadMessagesStream", "CANCELLED"), 1)
+
+        handler = await self.intercept(grpc.stream_stream_rpc_method_handler(session), "/chat.v2.ChatService/Session")
+        self.assertEqual([m async for m in handler.stream_stream(None, FakeContext())], ["ack"])
+        latency = self.registry.get("chat_rpc_duration_seconds").labels("chat.v2.ChatService", "Session")
+        self.assertEqual(latency.snapshot()[1], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import os
+import sys
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from system_main.presence import PresenceTracker
+
+class FakeClock:
+    """
+    A manually advanced clock so expiry can be tested without sleeping.
+    """
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+# The following tests are for the system_main.presence module
+# They test heartbeat bookkeeping and timer-wheel expiry of sessions
+class TestPresenceTracker(unittest.TestCase):
+    def setUp(self):
+        """
+        Runs before each test method, creates a tracker with a 10s TTL on a fake clock
+        """
+        self.clock = FakeClock()
+        self.expired = []
+        self.tracker = PresenceTracker(ttl=10.0, tick=1.0, num_slots=8,
+                                       on_expire=self.expired.append, clock=self.clock)
+
+    def test_touch_creates_session(self):
+        """
+        Verify the first heartbeat creates a session and later ones only extend it
+        """
+        self.assertTrue(self.tracker.touch("alice"))
+        self.assertFalse(self.tracker.touch("alice"))
+        self.assertTrue(self.tracker.is_online("alice"))
+        self.assertEqual(self.tracker.online_count(), 1)
+
+    def test_session_expires_after_ttl(self):
+        """
+        Verify a session without heartbeats expires within one tick of its TTL
+        """
+        self.tracker.touch("alice")
+        self.clock.now += 9.5
+        self.assertEqual(self.tracker.sweep(), [])
+        self.clock.now += 2.0
+        self.assertEqual(self.tracker.sweep(), ["alice"])
+        self.assertEqual(self.expired, ["alice"])
+        self.assertFalse(self.tracker.is_online("alice"))
+
+    def test_heartbeat_extends_session(self):
+        """
+        Verify heartbeats keep a session alive across several TTLs, including
+        TTLs longer than one revolution of the wheel
+        """
+        self.tracker.touch("alice")
+        for _ in range(5):
+            self.clock.now += 7.0
+            self.tracker.touch("alice")
+            self.tracker.sweep()
+        self.assertTrue(self.tracker.is_online("alice"))
+        self.assertEqual(self.expired, [])
+
+        self.clock.now += 12.0
+        self.tracker.sweep()
+        self.assertEqual(self.expired, ["alice"])
+
+    def test_remove_does_not_call_expiry(self):
+        """
+        Verify an explicit removal (logout) drops the session silently
+        """
+        self.tracker.touch("alice")
+        self.assertTrue(self.tracker.remove("alice"))
+        self.assertFalse(self.tracker.remove("alice"))
+        self.clock.now += 30.0
+        self.tracker.sweep()
+        self.assertEqual(self.expired, [])
+
+    def test_memory_bounded_under_churn(self):
+        """
+        Verify that after many users come and go, the wheel only holds live sessions
+        """
+        for i in range(1000):
+            self.tracker.touch(f"user{i}")
+            if i % 2 == 0:
+                self.tracker.remove(f"user{i}")
+            self.clock.now += 0.1
+            self.tracker.sweep()
+        live = self.tracker.online_count()
+        slotted = sum(len(slot) for slot in self.tracker._slots)
+        self.assertEqual(live, slotted)
+        self.assertLessEqual(live, 101)
+
+        self.clock.now += 20.0
+        self.tracker.sweep()
+        self.assertEqual(self.tracker.online_count(), 0)
+        self.assertEqual(sum(len(slot) for slot in self.tracker._slots), 0)
+
+if __name__ == "__main__":
+    unittest.main()
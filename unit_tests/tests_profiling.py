@@ -0,0 +1,124 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+import grpc
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from system_main.profiling import NodeProfiler, ProfilingInterceptor, folded_stack
+
+class FakeHandlerCallDetails:
+    def __init__(self, method):
+        self.method = method
+
+def busy_loop(stop):
+    """A thread the sampler should catch in this function."""
+    while not stop.is_set():
+        sum(range(1000))
+
+# The following tests are for the system_main.profiling module
+class TestNodeProfiler(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="test_profiling_")
+        self.profiler = NodeProfiler(os.path.join(self.temp_dir, "profiles"), name="node1")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_sample_writes_folded_stacks(self):
+        """
+        Verify sampling catches every thread's stack and writes it as folded stacks, one profile at a time
+        """
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+        worker.start()
+        try:
+            path = self.profiler.start("sample", seconds=0.3, interval=0.005)
+            with self.assertRaises(RuntimeError):
+                self.profiler.start("memory", seconds=1)
+            self.assertTrue(self.profiler.wait(10))
+        finally:
+            stop.set()
+            worker.join()
+        self.assertTrue(os.path.basename(path).startswith("node1_sample_") and path.endswith(".folded"))
+        with open(path) as f:
+            lines = f.read().splitlines()
+        stacks = {line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1]) for line in lines}
+        busy = [stack for stack in stacks
+                if stack.startswith("busy-worker;") and "busy_loop (tests_profiling.py" in stack]
+        self.assertTrue(busy)
+        self.assertGreater(sum(stacks[stack] for stack in busy), 5)
+        self.assertIsNone(self.profiler.running())
+
+    def test_memory_diff_names_growing_line(self):
+        """
+        Verify a memory diff lists the line whose allocations grew during the window
+        """
+        hoard = []
+        grow = threading.Timer(0.1, lambda: hoard.extend(bytearray(1024) for _ in range(2000)))
+        grow.start()
+        path = self.profiler.start("memory", seconds=0.5)
+        self.assertTrue(self.profiler.wait(10))
+        with open(path) as f:
+            report = f.read()
+        self.assertTrue(report.startswith("# tracemalloc diff over 0.5s"))
+        self.assertIn("tests_profiling.py", report.splitlines()[2])
+        self.assertEqual(len(hoard), 2000)
+
+    def test_invalid_requests_rejected(self):
+        """
+        Verify unknown modes, bad lengths and cprofile-only options on other modes are refused
+        """
+        for kwargs in ({"mode": "perf"}, {"mode": "sample", "seconds": 0}, {"mode": "memory", "calls": 5},
+                       {"mode": "cprofile", "calls": -1}):
+            with self.assertRaises(ValueError):
+                self.profiler.start(**kwargs)
+        self.assertIsNone(self.profiler.running())
+
+    def test_folded_stack_is_outermost_first(self):
+        """
+        Verify folded stacks start with the thread name and end with the innermost function
+        """
+        stack = folded_stack("main", sys._getframe())
+        self.assertTrue(stack.startswith("main;"))
+        self.assertTrue(stack.endswith("test_folded_stack_is_outermost_first (tests_profiling.py:"
+                                       f"{self.test_folded_stack_is_outermost_first.__code__.co_firstlineno})"))
+
+class TestProfilingInterceptor(unittest.IsolatedAsyncioTestCase):
+    async def test_wraps_only_while_capturing(self):
+        """
+        Verify handlers are left alone until a cprofile capture runs, and only its method and call count are profiled
+        """
+        temp_dir = tempfile.mkdtemp(prefix="test_profiling_")
+        self.addCleanup(shutil.rmtree, temp_dir)
+        profiler = NodeProfiler(temp_dir)
+        interceptor = ProfilingInterceptor(profiler)
+
+        def heartbeat(request, context):
+            return request
+
+        async def intercept(method):
+            async def continuation(details):
+                return grpc.unary_unary_rpc_method_handler(heartbeat)
+            return await interceptor.intercept_service(continuation, FakeHandlerCallDetails(method))
+
+        self.assertIs((await intercept("/chat.ChatService/Heartbeat")).unary_unary, heartbeat)
+        profiler.start("cprofile", seconds=30, method="Heartbeat", calls=1)
+        other = await intercept("/chat.ChatService/Login")
+        self.assertEqual(other.unary_unary("login", None), "login")
+        self.assertIsNotNone(profiler.running())
+        handler = await intercept("/chat.ChatService/Heartbeat")
+        self.assertEqual(handler.unary_unary("beat", None), "beat")
+        self.assertTrue(profiler.wait(10))
+        self.assertEqual(profiler.last[2], "calls profiled: 1")
+        self.assertIs((await intercept("/chat.ChatService/Heartbeat")).unary_unary, heartbeat)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,620 @@
+import unittest
+import os
+import sys
+import socket
+import tempfile
+import shutil
+import time
+import threading
+import sqlite3
+import itertools
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from system_main.raft_db import RaftDB, DBHelper, raft_conf, CHANGE_LOG_RETENTION
+from system_main.metrics import MetricsRegistry
+from system_main.tracing import Tracer
+
+def get_free_port():
+    """
+    Ask the OS for a free TCP port on localhost.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def executed_query_plan(db, path, read):
+    """
+    Run read() against a DBHelper and return the EXPLAIN QUERY PLAN steps of the SELECTs it executed.
+    """
+    statements = []
+    conn = db._get_connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        read()
+    finally:
+        conn.set_trace_callback(None)
+    selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+    with sqlite3.connect(path) as plan_conn:
+        return [row[-1] for sql in selects for row in plan_conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+# The following tests are for the system_main.raft_db module
+class TestRaftConf(unittest.TestCase):
+    def test_overrides_keep_other_defaults(self):
+        """
+        Verify options can be overridden per node, the rest keep their defaults, and unknown options are refused
+        """
+        conf = raft_conf(appendEntriesPeriod=0.01, appendEntriesUseBatch=False)
+        self.assertEqual((conf.appendEntriesPeriod, conf.appendEntriesUseBatch), (0.01, False))
+        default = raft_conf()
+        self.assertEqual((default.appendEntriesPeriod, default.appendEntriesUseBatch), (0.05, True))
+        self.assertEqual((conf.commandsQueueSize, conf.raftMinTimeout), (default.commandsQueueSize, 1.0))
+        self.assertIsNot(raft_conf(), default)
+        with self.assertRaises(ValueError):
+            raft_conf(appendEntryPeriod=0.01)
+
+# They run a single-node RaftDB so replicated operations commit locally
+class TestRaftDBSingleNode(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Start a one-node Raft cluster backed by a temporary database and wait until it leads
+        """
+        cls.temp_dir = tempfile.mkdtemp(prefix="test_raft_db_")
+        cls.metrics = MetricsRegistry()
+        cls.tracer = Tracer(os.path.join(cls.temp_dir, "trace.json"), sample_rate=1.0, slow_threshold=None)
+        cls.raft_db = RaftDB(f"127.0.0.1:{get_free_port()}", [], os.path.join(cls.temp_dir, "node.db"),
+                             metrics=cls.metrics, tracer=cls.tracer)
+        deadline = time.time() + 20
+        while cls.raft_db.getStatus()["state"] != 2:
+            if time.time() > deadline:
+                raise Exception("Single-node cluster did not elect itself leader")
+            time.sleep(0.1)
+
+        cls.raft_db.create_user("alice", "pw", "Alice", sync=True, timeout=10)
+        cls.raft_db.create_user("bob", "pw", "Bob", sync=True, timeout=10)
+        cls.raft_db.create_user("carol", "pw", "Carol", sync=True, timeout=10)
+        for name in ("team_x", "team_y", "team_z"):
+            cls.raft_db.create_user(name, "pw", name, sync=True, timeout=10)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.raft_db.destroy()
+        cls.raft_db.close()
+        shutil.rmtree(cls.temp_dir)
+
+    def test_message_listener_fires_on_apply(self):
+        """
+        Verify that applying create_message notifies listeners with the stored message id
+        """
+        received = []
+        self.raft_db.add_message_listener(lambda *args: received.append(args))
+        message_id = self.raft_db.create_message("alice", "bob", "hi bob", 1234, sync=True, timeout=10)
+        self.assertTrue(message_id)
+        self.assertEqual(received, [([("bob", "alice", "hi bob", message_id, 1234, self.raft_db.get_push_seq("bob"))],)])
+
+    def test_commit_and_apply_latency_recorded(self):
+        """
+        Verify a synchronous command is timed from submission to result and its apply under its name
+        """
+        commit = self.metrics.get("chat_raft_commit_seconds").labels()
+        apply = self.metrics.get("chat_raft_apply_seconds").labels("create_user")
+        commits_before, applies_before = commit.snapshot()[1], apply.snapshot()[1]
+        self.assertTrue(self.raft_db.create_user("timed_user", "pw", "Timed", sync=True, timeout=10))
+        self.assertEqual(commit.snapshot()[1], commits_before + 1)
+        self.assertEqual(apply.snapshot()[1], applies_before + 1)
+        self.assertGreaterEqual(commit.quantile(1.0), apply.quantile(0.0))
+        self.assertIn('chat_raft_apply_seconds_count{command="create_user"}', self.metrics.render())
+
+    def test_raft_status_splits_write_latency(self):
+        """
+        Verify raft_status reports the log and the latency split from pysyncobj's public status
+        """
+        submit_to_apply = self.metrics.get("chat_raft_submit_to_apply_seconds").labels()
+        before = submit_to_apply.snapshot()[1]
+        self.assertTrue(self.raft_db.create_user("status_user", "pw", "Status", sync=True, timeout=10))
+        self.assertEqual(submit_to_apply.snapshot()[1], before + 1)
+        self.assertLessEqual(submit_to_apply.quantile(0.0), self.metrics.get("chat_raft_commit_seconds")
+                             .labels().quantile(1.0))
+
+        status = self.raft_db.raft_status()
+        self.assertEqual(status["role"], "leader")
+        self.assertEqual(status["leader"], self.raft_db.node_address)
+        self.assertEqual(status["last_applied"], status["commit_index"])
+        self.assertEqual(status["log_entries"], self.raft_db.getStatus()["log_len"])
+        self.assertGreater(status["log_entries"], 0)
+        self.assertEqual(status["peers"], {})
+        names = [summary[0] for summary in status["latencies"]]
+        for name in ("submit_to_result", "submit_to_apply", "apply:create_user"):
+            self.assertIn(name, names)
+
+        text = self.metrics.render()
+        self.assertIn(f"chat_raft_commit_index {self.raft_db.raftCommitIndex}", text)
+        self.assertIn(f"chat_raft_log_entries {status['log_entries']}", text)
+        self.assertIn('chat_raft_apply_seconds_count{command="delete_user"}', text)  # every command has a series
+
+    def test_traced_write_is_split_into_phases(self):
+        """
+        Verify a write submitted in a trace records its replication, apply, commit and push phases in order
+        """
+        root = self.tracer.start_trace("SendMessage")
+        with root:
+            self.assertTrue(self.raft_db.create_message("alice", "carol", "traced", int(time.time() * 1000),
+                                                        sync=True, timeout=10))
+        spans = {span.name: span for span in self.tracer.spans if span.trace is root.trace}
+        phases = ["raft.replicate", "raft.apply"]
+        self.assertEqual(set(spans), {"SendMessage", "sqlite.commit", "push.notify", *phases})
+        for name in phases:
+            self.assertEqual(spans[name].parent_id, root.span_id)
+        self.assertEqual(spans["raft.apply"].args["command"], "create_message")
+        self.assertEqual(spans["sqlite.commit"].parent_id, spans["raft.apply"].span_id)
+        self.assertEqual(spans["push.notify"].parent_id, spans["raft.apply"].span_id)
+        for before, after in zip(phases, phases[1:]):
+            self.assertLessEqual(spans[before].end, spans[after].start)
+        self.assertLessEqual(spans["raft.apply"].end, root.end)
+        self.assertEqual(self.raft_db._traced_pending, 0)
+
+        recorded = len(self.tracer.spans)
+        self.assertTrue(self.raft_db.create_message("alice", "carol", "untraced", int(time.time() * 1000),
+                                                    sync=True, timeout=10))
+        self.assertEqual(len(self.tracer.spans), recorded)
+
+    def test_identical_commands_keep_their_traces(self):
+        """
+        Verify two identical commands in flight each add their own apply to the trace that submitted them
+        """
+        self.raft_db.create_user("frank", "pw", "Frank", sync=True, timeout=10)
+        message_id = self.raft_db.create_message("alice", "frank", "read twice", int(time.time() * 1000),
+                                                 sync=True, timeout=10)
+        answered = threading.Semaphore(0)
+        roots = []
+        for name in ("FirstRead", "SecondRead"):
+            with self.tracer.start_trace(name) as root:
+                self.raft_db.mark_messages_read([message_id], "frank",
+                                                callback=lambda result, error: answered.release())
+            roots.append(root)
+        for _ in roots:
+            self.assertTrue(answered.acquire(timeout=10))
+
+        applies = []
+        for root in roots:
+            spans = {span.name: span for span in self.tracer.spans if span.trace is root.trace}
+            self.assertEqual(set(spans), {root.name, "raft.replicate", "raft.apply", "sqlite.commit"})
+            self.assertEqual(spans["raft.apply"].parent_id, root.span_id)
+            self.assertLessEqual(spans["raft.replicate"].end, spans["raft.apply"].start)
+            applies.append(spans["raft.apply"])
+        self.assertLess(applies[0].end, applies[1].start)
+        self.assertEqual(self.raft_db._traced_pending, 0)
+
+    def test_unknown_receiver_does_not_notify(self):
+        """
+        Verify that a rejected message does not reach the listeners
+        """
+        received = []
+        self.raft_db.add_message_listener(lambda *args: received.append(args))
+        result = self.raft_db.create_message("alice", "nobody", "hello?", int(time.time() * 1000), sync=True,
+                                             timeout=10)
+        self.assertFalse(result)
+        self.assertEqual(received, [])
+
+    def test_session_expiry_respects_owner(self):
+        """
+        Verify an expiry reported by a node that no longer owns the session is ignored
+        """
+        self.raft_db.user_login("alice", "node-a", sync=True, timeout=10)
+        self.raft_db.claim_session("alice", "node-b", sync=True, timeout=10)
+        self.assertFalse(self.raft_db.expire_session("alice", "node-a", sync=True, timeout=10))
+        self.assertTrue(self.raft_db.is_user_active("alice"))
+        self.assertTrue(self.raft_db.expire_session("alice", "node-b", sync=True, timeout=10))
+        self.assertFalse(self.raft_db.is_user_active("alice"))
+
+    def test_push_outbox_replays_after_offset(self):
+        """
+        Verify pushes get consecutive per-receiver sequence numbers and replay after an offset
+        """
+        self.assertEqual(self.raft_db.get_push_seq("carol"), 0)
+        ids = [self.raft_db.create_message("alice", "carol", f"m{i}", 100 + i, sync=True, timeout=10)
+               for i in range(3)]
+        self.assertEqual(self.raft_db.get_push_seq("carol"), 3)
+
+        rows, oldest_seq = self.raft_db.get_pushes_since("carol", 1)
+        self.assertEqual(oldest_seq, 1)
+        self.assertEqual([(r["seq"], r["message_id"], r["content"], r["sender_username"], r["sent_at_ms"])
+                          for r in rows],
+                         [(2, ids[1], "m1", "alice", 101), (3, ids[2], "m2", "alice", 102)])
+
+        # A deleted message is no longer replayed
+        self.raft_db.delete_message(ids[1], "carol", sync=True, timeout=10)
+        rows, _ = self.raft_db.get_pushes_since("carol", 1)
+        self.assertEqual([r["seq"] for r in rows], [3])
+
+    def test_fanout_send_is_one_batch(self):
+        """
+        Verify a multi-recipient send stores one row per receiver, sharing the body, and notifies once
+        """
+        received = []
+        self.raft_db.add_message_listener(lambda messages: received.append(messages))
+        result = self.raft_db.create_messages(
+            "team_x", ["alice", "ghost", "alice"], "team_*", "standup at 10", 55, sync=True, timeout=10)
+        self.assertEqual(result, {"delivered": ["alice", "team_y", "team_z"], "unknown": ["ghost"]})
+        self.assertEqual(len(received), 1)
+        self.assertEqual([(m[0], m[1], m[2], m[4]) for m in received[0]],
+                         [(name, "team_x", "standup at 10", 55) for name in ("alice", "team_y", "team_z")])
+
+        inbox = self.raft_db.get_messages_for_user("team_y")
+        self.assertEqual([row["content"] for row in inbox], ["standup at 10"])
+        rows, _ = self.raft_db.get_pushes_since("team_z", 0)
+        self.assertEqual([(r["seq"], r["content"]) for r in rows], [(1, "standup at 10")])
+
+        # The shared body survives until the last recipient row is deleted
+        for message in received[0][:2]:
+            self.raft_db.delete_message(message[3], message[0], sync=True, timeout=10)
+        self.assertEqual(self.raft_db.get_messages_for_user("team_z")[0]["content"], "standup at 10")
+
+    def test_changes_since_cursor_are_folded(self):
+        """
+        Verify get_changes_since returns only the net changes for the user after the cursor
+        """
+        self.raft_db.create_user("dana", "pw", "Dana", sync=True, timeout=10)
+        now_ms = int(time.time() * 1000)
+        older = self.raft_db.create_message("alice", "dana", "before the cursor", now_ms, sync=True, timeout=10)
+        cursor = self.raft_db.get_change_cursor()
+
+        kept = self.raft_db.create_message("alice", "dana", "kept", now_ms, sync=True, timeout=10)
+        gone = self.raft_db.create_message("bob", "dana", "gone", now_ms, sync=True, timeout=10)
+        self.raft_db.create_message("alice", "bob", "not for dana", now_ms, sync=True, timeout=10)
+        self.raft_db.mark_messages_read([older, kept], "dana", sync=True, timeout=10)
+        self.raft_db.delete_message(gone, "dana", sync=True, timeout=10)
+        self.raft_db.create_user("erin", "pw", "Erin", sync=True, timeout=10)
+
+        changes = self.raft_db.get_changes_since("dana", cursor)
+        self.assertFalse(changes["reset"] or changes["has_more"])
+        self.assertEqual([(r["id"], r["content"], r["read_status"]) for r in changes["messages"]], [(kept, "kept", 1)])
+        self.assertEqual((changes["read_ids"], changes["deleted_ids"]), ([older], [gone]))
+        self.assertEqual(changes["users"], [("erin", "Erin")])
+        self.assertEqual(changes["cursor"], self.raft_db.get_change_cursor())
+
+        # Paging stops at the limit and resumes from the returned cursor
+        first = self.raft_db.get_changes_since("dana", cursor, limit=2)
+        self.assertTrue(first["has_more"])
+        rest = self.raft_db.get_changes_since("dana", first["cursor"])
+        self.assertEqual([r["id"] for r in first["messages"] + rest["messages"]], [kept])
+
+        self.raft_db.delete_user("erin", sync=True, timeout=10)
+        changes = self.raft_db.get_changes_since("dana", changes["cursor"])
+        self.assertEqual((changes["users"], changes["deleted_users"]), ([], ["erin"]))
+        self.assertTrue(self.raft_db.get_changes_since("dana", 0)["reset"])
+        self.assertIsNone(self.raft_db.get_changes_since("nobody", cursor))
+
+    def test_trimmed_change_log_resets_old_cursors(self):
+        """
+        Verify the change_log keeps its newest CHANGE_LOG_RETENTION entries and trimmed cursors get reset
+        """
+        cursor = self.raft_db.get_change_cursor()
+        self.assertFalse(self.raft_db.get_changes_since("alice", cursor)["reset"])
+        # Skip the seqs ahead so the next entry pushes the cursor's successor out of the window
+        with sqlite3.connect(os.path.join(self.temp_dir, "node.db")) as conn:
+            conn.execute("UPDATE sqlite_sequence SET seq = seq + ? WHERE name = 'change_log'", (CHANGE_LOG_RETENTION,))
+        self.raft_db.create_user("gina", "pw", "Gina", sync=True, timeout=10)
+
+        newest = self.raft_db.get_change_cursor()
+        self.assertEqual(newest, cursor + CHANGE_LOG_RETENTION + 1)
+        with sqlite3.connect(os.path.join(self.temp_dir, "node.db")) as conn:
+            self.assertEqual(conn.execute("SELECT MIN(seq) FROM change_log").fetchone()[0], newest)
+        changes = self.raft_db.get_changes_since("alice", cursor)
+        self.assertTrue(changes["reset"])
+        self.assertEqual(changes["cursor"], newest)
+        self.assertFalse(self.raft_db.get_changes_since("alice", newest - 1)["reset"])
+
+class DBHelperTestCase(unittest.TestCase):
+    """
+    Gives every test a fresh DBHelper database, in a directory named after its class, with users alice and bob.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix=f"test_{type(self).__name__}_")
+        self.path = os.path.join(self.temp_dir, "node.db")
+        self.db = DBHelper(self.path)
+        self.db.insert_user("alice", "pw", "Alice")
+        self.db.insert_user("bob", "pw", "Bob")
+        self.alice = self.db.get_user_by_username("alice")["id"]
+        self.bob = self.db.get_user_by_username("bob")["id"]
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+class TestRaftDBHelper(DBHelperTestCase):
+    def test_outbox_keeps_newest_entries(self):
+        """
+        Verify the outbox trims old entries while sequence numbers keep increasing
+        """
+        for i in range(5):
+            _, seq = self.db.insert_message_with_push(self.alice, self.bob, f"m{i}", 0, 2)
+            self.assertEqual(seq, i + 1)
+        rows, oldest_seq = self.db.get_pushes_since(self.bob, 0, 100)
+        self.assertEqual(oldest_seq, 4)
+        self.assertEqual([r["seq"] for r in rows], [4, 5])
+        self.assertEqual(self.db.get_push_seq(self.alice), 0)
+
+    def test_fanout_body_released_with_last_row(self):
+        """
+        Verify a shared message body is deleted together with its last recipient row
+        """
+        delivered = self.db.insert_fanout_messages(self.alice, [(self.bob, "bob"), (self.alice, "alice")], "hi all", 0, 10)
+        self.assertEqual([(name, seq) for name, _, seq in delivered], [("bob", 1), ("alice", 1)])
+        self.assertTrue(self.db.delete_message(delivered[0][1], self.bob))
+        self.assertEqual(self.db.get_messages_for_user(self.alice)[0]["content"], "hi all")
+        self.assertTrue(self.db.delete_message(delivered[1][1], self.alice))
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM message_bodies").fetchone()[0], 0)
+
+    def test_message_pages_walk_inbox_newest_first(self):
+        """
+        Verify message pages continue below the last ID seen and are read through the receiver index
+        """
+        ids = [self.db.insert_message(self.alice, self.bob, f"m{i}") for i in range(5)]
+        self.db.insert_message(self.bob, self.alice, "not for bob")
+        first = self.db.get_message_page(self.bob, limit=2)
+        second = self.db.get_message_page(self.bob, before_id=first[-1]["id"], limit=10)
+        self.assertEqual([r["id"] for r in first + second], ids[::-1])
+
+        self.assertEqual(self.db.mark_messages_read(ids[3:] + [ids[0] + 100], self.bob), 2)
+        unread = self.db.get_message_page(self.bob, only_unread=True, limit=10)
+        self.assertEqual([r["content"] for r in unread], ["m2", "m1", "m0"])
+
+        with sqlite3.connect(self.path) as conn:
+            plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM messages m WHERE m.receiver_id = ? AND m.id < ? ORDER BY m.id DESC",
+                (self.bob, 10)))
+        self.assertIn("idx_messages_receiver", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+class TestReadWatermarks(DBHelperTestCase):
+    def test_read_range_moves_watermark(self):
+        """
+        Verify an in-order read range only moves the watermark, and an out-of-order one sets flags
+        """
+        ids = [self.db.insert_message(self.alice, self.bob, f"m{i}") for i in range(6)]
+
+        # The newest two first: older messages are still unread, so their flags are set
+        self.assertTrue(self.db.mark_read_range(self.bob, ids[4], ids[5]))
+        self.assertEqual(self.db.get_read_watermark(self.bob), 0)
+        self.assertEqual(self.db.get_unread_count(self.bob), 4)
+        # Then the rest: the watermark moves past the flagged messages too
+        self.assertTrue(self.db.mark_read_range(self.bob, ids[0], ids[3]))
+        self.assertEqual(self.db.get_read_watermark(self.bob), ids[5])
+        with sqlite3.connect(self.path) as conn:
+            flagged = conn.execute("SELECT COUNT(*) FROM messages WHERE read_status = 1").fetchone()[0]
+        self.assertEqual(flagged, 2)
+
+        newer = self.db.insert_message(self.alice, self.bob, "new")
+        self.assertEqual(self.db.get_unread_count(self.bob), 1)
+        unread = self.db.get_message_page(self.bob, only_unread=True, limit=10)
+        self.assertEqual([(r["id"], r["read_status"]) for r in unread], [(newer, 0)])
+        self.assertEqual({r["read_status"] for r in self.db.get_messages_for_user(self.bob)[1:]}, {1})
+
+        with sqlite3.connect(self.path) as conn:
+            plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM messages WHERE receiver_id = ? AND read_status = 0 AND id > ?",
+                (self.bob, 0)))
+        self.assertIn("idx_messages_unread", plan)
+
+    def test_marking_read_messages_logs_no_change(self):
+        """
+        Verify mark_messages_read only updates unread messages above the watermark, but counts every one it was given
+        """
+        ids = [self.db.insert_message(self.alice, self.bob, f"m{i}") for i in range(4)]
+        self.assertTrue(self.db.mark_read_range(self.bob, ids[0], ids[1]))
+        self.assertEqual(self.db.mark_messages_read([ids[3]], self.bob), 1)
+        with sqlite3.connect(self.path) as conn:
+            logged = conn.execute("SELECT COUNT(*) FROM change_log WHERE kind = 'read'").fetchone()[0]
+        self.assertEqual(logged, 1)
+
+        # Below the watermark or already flagged: nothing is written, so nothing is logged
+        self.assertEqual(self.db.mark_messages_read([ids[0], ids[1], ids[3]], self.bob), 3)
+        self.assertEqual(self.db.mark_messages_read([ids[2], ids[3]], self.bob), 2)
+        with sqlite3.connect(self.path) as conn:
+            logged = conn.execute("SELECT COUNT(*) FROM change_log WHERE kind = 'read'").fetchone()[0]
+            flagged = conn.execute("SELECT COUNT(*) FROM messages WHERE read_status = 1").fetchone()[0]
+        self.assertEqual((logged, flagged), (2, 2))
+        self.assertEqual(self.db.get_unread_count(self.bob), 0)
+
+    def test_read_flags_migrate_to_watermarks(self):
+        """
+        Verify opening a database without read_watermarks derives them from the read flags
+        """
+        ids = [self.db.insert_message(self.alice, self.bob, f"m{i}") for i in range(4)]
+        self.db.close()
+        with sqlite3.connect(self.path) as conn:
+            # Make it look like a database from before read watermarks and conversations
+            for (trigger,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+                conn.execute(f"DROP TRIGGER {trigger}")
+            conn.execute("DROP TABLE read_watermarks")
+            conn.execute("DROP TABLE conversations")
+            conn.execute("UPDATE messages SET read_status = 1 WHERE id IN (?, ?, ?)", (ids[0], ids[1], ids[3]))
+
+        self.db = DBHelper(self.path)
+        self.assertEqual(self.db.get_read_watermark(self.bob), ids[1])
+        self.assertEqual(self.db.get_unread_count(self.bob), 1)
+        self.assertEqual([r["content"] for r in self.db.get_messages_for_user(self.bob, only_unread=True)], ["m2"])
+
+class TestConversations(DBHelperTestCase):
+    def test_conversations_follow_writes(self):
+        """
+        Verify the conversations table tracks the last message and unread count through sends, reads and deletes
+        """
+        self.db.insert_user("carol", "pw", "Carol")
+        carol = self.db.get_user_by_username("carol")["id"]
+
+        def conversations(user_id):
+            return [(r["peer_username"], r["last_content"], r["unread_count"])
+                    for r in self.db.get_conversations(user_id)]
+
+        to_bob = [self.db.insert_message(self.alice, self.bob, f"a{i}") for i in range(3)]
+        self.db.insert_message(carol, self.bob, "from carol")
+        reply = self.db.insert_message(self.bob, self.alice, "reply")
+        self.assertEqual(conversations(self.bob), [("alice", "reply", 3), ("carol", "from carol", 1)])
+        self.assertEqual(conversations(self.alice), [("bob", "reply", 1)])
+        self.assertEqual(conversations(carol), [("bob", "from carol", 0)])
+
+        # Out-of-order read, then a watermark move over the rest
+        self.db.mark_read_range(self.bob, to_bob[2], to_bob[2])
+        self.assertEqual(conversations(self.bob)[0][2], 2)
+        self.db.mark_read_range(self.bob, to_bob[0], to_bob[1])
+        self.assertEqual(conversations(self.bob), [("alice", "reply", 0), ("carol", "from carol", 1)])
+
+        # Deleting the newest message falls back to the previous one, and the last one drops the conversation
+        self.db.delete_message(reply, self.bob)
+        self.assertEqual(conversations(self.alice), [("bob", "a2", 0)])
+        self.db.delete_message(self.db.get_conversations(carol)[0]["last_message_id"], carol)
+        self.assertEqual(conversations(self.bob), [("alice", "a2", 0)])
+        self.assertEqual(self.db.get_conversations(self.bob, before_message_id=to_bob[2]), [])
+
+    def test_conversations_built_for_existing_messages(self):
+        """
+        Verify opening a database without a conversations table builds it from the messages
+        """
+        ids = [self.db.insert_message(self.alice, self.bob, f"m{i}") for i in range(3)]
+        self.db.mark_read_range(self.bob, ids[0], ids[0])
+        self.db.insert_message(self.bob, self.bob, "note to self")
+        self.db.close()
+        with sqlite3.connect(self.path) as conn:
+            for (trigger,) in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_conversations_%'").fetchall():
+                conn.execute(f"DROP TRIGGER {trigger}")
+            conn.execute("DROP TABLE conversations")
+
+        self.db = DBHelper(self.path)
+        rows = self.db.get_conversations(self.bob)
+        self.assertEqual([(r["peer_username"], r["last_content"], r["unread_count"]) for r in rows],
+                         [("bob", "note to self", 1), ("alice", "m2", 2)])
+        self.assertEqual([r["unread_count"] for r in self.db.get_conversations(self.alice)], [0])
+
+class TestConversationPages(DBHelperTestCase):
+    def test_conversation_page_interleaves_both_directions(self):
+        """
+        Verify a conversation page holds both directions newest first, pages by ID and uses the pair index
+        """
+        self.db.insert_user("carol", "pw", "Carol")
+        carol = self.db.get_user_by_username("carol")["id"]
+        ids = []
+        for i in range(3):
+            ids.append(self.db.insert_message(self.alice, self.bob, f"a{i}"))
+            self.db.insert_message(carol, self.bob, f"c{i}")
+            ids.append(self.db.insert_message(self.bob, self.alice, f"b{i}"))
+
+        first = self.db.get_conversation_page(self.bob, self.alice, limit=4)
+        self.assertEqual([r["content"] for r in first], ["b2", "a2", "b1", "a1"])
+        second = self.db.get_conversation_page(self.alice, self.bob, before_id=first[-1]["id"], limit=4)
+        self.assertEqual([r["content"] for r in second], ["b0", "a0"])
+        self.assertEqual([r["id"] for r in first + second], ids[::-1])
+
+        plan = " ".join(executed_query_plan(
+            self.db, self.path,
+            lambda: self.db.get_conversation_page(self.alice, self.bob, before_id=ids[-1], limit=10)))
+        self.assertIn("idx_messages_pair", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+class TestSentPages(DBHelperTestCase):
+    def test_sent_page_walks_sender_index(self):
+        """
+        Verify sent pages list only the sender's messages newest first, with receivers and read state
+        """
+        self.db.insert_user("carol", "pw", "Carol")
+        carol = self.db.get_user_by_username("carol")["id"]
+        ids = [self.db.insert_message(self.alice, receiver, f"s{i}")
+               for i, receiver in enumerate((self.bob, carol, self.bob))]
+        self.db.insert_message(self.bob, self.alice, "not sent by alice")
+        self.db.mark_read_range(self.bob, ids[0], ids[0])
+
+        first = self.db.get_sent_page(self.alice, limit=2)
+        second = self.db.get_sent_page(self.alice, before_id=first[-1]["id"], limit=2)
+        self.assertEqual([(r["id"], r["receiver_username"]) for r in first + second],
+                         [(ids[2], "bob"), (ids[1], "carol"), (ids[0], "bob")])
+        self.assertEqual([r["read_status"] for r in first + second], [0, 0, 1])
+
+        plan = " ".join(executed_query_plan(
+            self.db, self.path,
+            lambda: self.db.get_sent_page(self.alice, before_id=ids[-1], limit=10)))
+        self.assertIn("idx_messages_sender", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+class TestReadFilters(DBHelperTestCase):
+    def test_read_filters_select_sender_and_window(self):
+        """
+        Verify sender and time filters, and that created_ms never decreases as IDs grow
+        """
+        self.db.insert_user("carol", "pw", "Carol")
+        carol = self.db.get_user_by_username("carol")["id"]
+        sends = [(self.alice, 1000), (carol, 2000), (self.alice, 3000), (carol, 2500), (self.alice, 4000)]
+        ids = [self.db.insert_message_with_push(sender, self.bob, f"m{i}", sent_at_ms, 10)[0]
+               for i, (sender, sent_at_ms) in enumerate(sends)]
+
+        def contents(**filters):
+            return [r["content"] for r in self.db.get_messages_for_user(self.bob, **filters)]
+
+        self.assertEqual(contents(sender_id=self.alice), ["m4", "m2", "m0"])
+        # m3 was sent with an earlier clock than m2 and is stamped 3000 like it
+        self.assertEqual(contents(since_ms=2000, until_ms=4000), ["m3", "m2", "m1"])
+        self.assertEqual(contents(sender_id=carol, since_ms=3000), ["m3"])
+        self.assertEqual(contents(since_ms=5000), [])
+        self.assertEqual(contents(until_ms=1000), [])
+        self.db.mark_read_range(self.bob, ids[3], ids[4])
+        self.assertEqual(contents(sender_id=carol, only_unread=True, until_ms=3500), ["m1"])
+
+    def test_filtered_reads_never_scan(self):
+        """
+        Verify every combination of read filters is an index range without a sort
+        """
+        for only_unread, sender_id, since_ms, until_ms, before_id in itertools.product(
+                (False, True), (None, self.alice), (None, 1000), (None, 2000), (None, 50)):
+            query, params = self.db._inbox_query(self.bob, only_unread, before_id, 10, sender_id, since_ms, until_ms)
+            with sqlite3.connect(self.path) as conn:
+                plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+            for step in plan:
+                self.assertFalse(step.startswith("SCAN"), (only_unread, sender_id, since_ms, until_ms, plan))
+                self.assertNotIn("TEMP B-TREE", step)
+
+    def test_inserts_stamp_the_submit_time(self):
+        """
+        Verify replicated inserts stamp the submit time they are given, and only insert_message reads the clock
+        """
+        before = int(time.time() * 1000)
+        self.db.insert_message(self.alice, self.bob, "local")
+        after = int(time.time() * 1000)
+        sent_at_ms = after + 60000  # ahead of this node's clock, as another replica's may be
+        self.db.insert_message_with_push(self.alice, self.bob, "pushed", sent_at_ms, 10)
+        self.db.insert_fanout_messages(self.alice, [(self.bob, "bob")], "fanned out", sent_at_ms + 1, 10)
+        with sqlite3.connect(self.path) as conn:
+            created = [row[0] for row in conn.execute("SELECT created_ms FROM messages ORDER BY id")]
+        self.assertTrue(before <= created[0] <= after)
+        self.assertEqual(created[1:], [sent_at_ms, sent_at_ms + 1])
+
+    def test_created_ms_backfilled_from_timestamps(self):
+        """
+        Verify opening a database without created_ms fills it from the stored timestamps
+        """
+        for i in range(3):
+            self.db.insert_message(self.alice, self.bob, f"m{i}")
+        self.db.close()
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("DROP INDEX idx_messages_created")
+            conn.execute("ALTER TABLE messages DROP COLUMN created_ms")
+            conn.execute("UPDATE messages SET timestamp = '2025-01-01T00:00:00-05:00' WHERE content = 'm1'")
+
+        self.db = DBHelper(self.path)
+        with sqlite3.connect(self.path) as conn:
+            created = [row[0] for row in conn.execute("SELECT created_ms FROM messages ORDER BY id")]
+        self.assertGreater(created[0], 1735707600000)
+        self.assertEqual(created, sorted(created))
+        self.assertEqual([r["content"] for r in self.db.get_messages_for_user(self.bob, since_ms=created[0])],
+                         ["m2", "m1", "m0"])
+
+if __name__ == "__main__":
+    unittest.main()
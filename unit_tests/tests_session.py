@@ -0,0 +1,98 @@
+import unittest
+import asyncio
+import os
+import sys
+import time
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from unit_tests.server_fixture import SingleNodeServerTestCase
+import chat_pb2
+from ft_server_grpc import SESSION_MAX_IN_FLIGHT
+from session_client import ChatSession, SessionError
+
+# The following tests are for the Session RPC of system_main.ft_server_grpc
+# and the system_main.session_client module, against a single-node server
+class TestSessionStream(SingleNodeServerTestCase):
+    def test_pipelined_operations_and_pushes(self):
+        """
+        Verify pipelined operations are all answered and a subscription on the same stream gets pushes
+        """
+        pushes = []
+        session = ChatSession(self.channel, on_push=pushes.append)
+        for name in ("sam", "kim"):
+            session.call("create_user", chat_pb2.CreateUserRequest(
+                username=name, hashed_password="pw", display_name=name), timeout=10)
+            login = session.call("login", chat_pb2.LoginRequest(username=name, hashed_password="pw"), timeout=10)
+            self.assertEqual(login.status, "success")
+        session.subscribe("kim", resume_from=login.push_seq)
+
+        sends = [session.submit("send_message", chat_pb2.SendMessageRequest(
+            sender="sam", receiver="kim", content=f"m{i}")) for i in range(10)]
+        beats = [session.submit("heartbeat", chat_pb2.HeartbeatRequest(username="sam")) for _ in range(10)]
+        self.assertTrue(all(f.result(10).status == "success" for f in sends + beats))
+
+        deadline = time.time() + 5
+        while len(pushes) < 10 and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(sorted(p.content for p in pushes), sorted(f"m{i}" for i in range(10)))
+        self.assertEqual(sorted(p.seq for p in pushes), list(range(1, 11)))
+        session.close()
+
+    def test_close_fails_later_operations(self):
+        """
+        Verify operations already sent are answered on close and new ones are refused
+        """
+        session = ChatSession(self.channel)
+        future = session.submit("list_users", chat_pb2.ListUsersRequest(username="nobody", pattern="*"))
+        session.close()
+        self.assertEqual(future.result(5).status, "error")
+        with self.assertRaises(SessionError):
+            session.submit("list_users", chat_pb2.ListUsersRequest(username="nobody", pattern="*"))
+
+    def test_refused_subscribe_waits_for_full_queue(self):
+        """
+        Verify a refused subscribe is still answered, and later requests served, while finished
+        operations fill the session's outgoing queue
+        """
+        total = SESSION_MAX_IN_FLIGHT + 8
+
+        async def drive():
+            release = asyncio.Event()
+            written = []
+
+            class StalledContext:
+                """A client that reads nothing until release is set."""
+                def disable_next_message_compression(self):
+                    pass
+
+                async def write(self, response):
+                    await release.wait()
+                    written.append(response)
+
+            async def requests():
+                for i in range(total):
+                    yield chat_pb2.SessionRequest(request_id=i, heartbeat=chat_pb2.HeartbeatRequest(username="nobody"))
+                await asyncio.sleep(0.5)  # let the heartbeats finish and fill the queue
+                yield chat_pb2.SessionRequest(request_id=total, subscribe=chat_pb2.SubscribeRequest(username="nobody"))
+                yield chat_pb2.SessionRequest(request_id=total + 1,
+                                              heartbeat=chat_pb2.HeartbeatRequest(username="nobody"))
+
+            session = asyncio.ensure_future(self.servicer.Session(requests(), StalledContext()))
+            await asyncio.sleep(1.0)
+            release.set()
+            await asyncio.wait_for(session, 10)
+            return written
+
+        written = asyncio.run_coroutine_threadsafe(drive(), self.loop).result(20)
+        by_id = {response.request_id: response for response in written}
+        self.assertEqual(sorted(by_id), list(range(total + 2)))
+        self.assertEqual(by_id[total].error, "User is not logged in.")
+        self.assertEqual(by_id[total + 1].heartbeat.status, "error")
+
+
+if __name__ == "__main__":
+    unittest.main()
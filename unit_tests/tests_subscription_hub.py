@@ -0,0 +1,125 @@
+import unittest
+import asyncio
+import os
+import sys
+import threading
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from system_main.subscription_hub import (
+    SubscriptionHub, CoalescedNotice, OVERFLOW_COALESCE, OVERFLOW_DISCONNECT
+)
+
+# The following tests are for the system_main.subscription_hub module
+# They test delivery and teardown of Subscribe streams on the event loop
+class TestSubscriptionHub(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        """
+        Runs before each test method, binds a fresh hub to the test's event loop
+        """
+        self.hub = SubscriptionHub()
+        self.hub.bind(asyncio.get_running_loop())
+
+    async def test_publish_delivers_to_open_stream(self):
+        """
+        Verify a published item reaches the user's stream and other users see nothing
+        """
+        alice = self.hub.open("alice")
+        bob = self.hub.open("bob")
+        self.hub.publish("alice", ("bob", "hi"))
+        self.assertEqual(await asyncio.wait_for(alice.get(), 1), ("bob", "hi"))
+        self.assertEqual(bob.depth(), 0)
+
+    async def test_publish_from_other_thread(self):
+        """
+        Verify producers on other threads (e.g. the Raft apply thread) wake the stream
+        """
+        stream = self.hub.open("alice")
+        threading.Thread(target=self.hub.publish, args=("alice", "ping")).start()
+        self.assertEqual(await asyncio.wait_for(stream.get(), 1), "ping")
+
+    async def test_close_user_ends_stream(self):
+        """
+        Verify closing a user's subscription makes a waiting get() return None
+        """
+        stream = self.hub.open("alice")
+        waiter = asyncio.ensure_future(stream.get())
+        await asyncio.sleep(0)
+        threading.Thread(target=self.hub.close_user, args=("alice",)).start()
+        self.assertIsNone(await asyncio.wait_for(waiter, 1))
+        self.assertEqual(self.hub.stream_count(), 0)
+
+    async def test_reopen_replaces_previous_stream(self):
+        """
+        Verify a second Subscribe for the same user closes the first and keeps one registration
+        """
+        first = self.hub.open("alice")
+        second = self.hub.open("alice")
+        self.assertTrue(first.closed)
+        self.assertEqual(self.hub.stream_count(), 1)
+
+        # Tearing down the stale stream must not drop the new registration
+        self.hub.unregister(first)
+        self.assertEqual(self.hub.stream_count(), 1)
+        self.hub.publish("alice", "still here")
+        self.assertEqual(await asyncio.wait_for(second.get(), 1), "still here")
+
+        self.hub.unregister(second)
+        self.assertEqual(self.hub.stream_count(), 0)
+
+    async def test_drop_oldest_bounds_buffer(self):
+        """
+        Verify a full buffer discards its oldest items and counts the drops
+        """
+        hub = SubscriptionHub(max_depth=3)
+        hub.bind(asyncio.get_running_loop())
+        stream = hub.open("alice")
+        for i in range(5):
+            hub.publish("alice", i)
+        self.assertEqual(stream.depth(), 3)
+        self.assertEqual([await stream.get() for _ in range(3)], [2, 3, 4])
+        self.assertEqual(hub.totals()["dropped"], 2)
+        self.assertEqual(stream.stats()["high_water"], 3)
+
+    async def test_coalesce_collapses_backlog(self):
+        """
+        Verify the coalesce policy replaces the backlog with one notice delivered first
+        """
+        hub = SubscriptionHub(max_depth=3, policy=OVERFLOW_COALESCE)
+        hub.bind(asyncio.get_running_loop())
+        stream = hub.open("alice")
+        for i in range(5):
+            hub.publish("alice", i)
+        self.assertEqual(await stream.get(), CoalescedNotice(3))
+        self.assertEqual([await stream.get() for _ in range(2)], [3, 4])
+        self.assertEqual(hub.totals()["coalesced"], 3)
+
+    async def test_disconnect_closes_overflowed_stream(self):
+        """
+        Verify the disconnect policy closes the stream, forgets it and releases a stalled send
+        """
+        hub = SubscriptionHub(max_depth=2, policy=OVERFLOW_DISCONNECT)
+        hub.bind(asyncio.get_running_loop())
+        stream = hub.open("alice")
+
+        # A write the client never drains
+        stalled = asyncio.get_running_loop().create_future()
+        sender = asyncio.ensure_future(stream.send(stalled))
+        await asyncio.sleep(0)
+        for i in range(3):
+            hub.publish("alice", i)
+
+        self.assertFalse(await asyncio.wait_for(sender, 1))
+        self.assertTrue(stream.overflowed)
+        self.assertIsNone(await stream.get())
+        totals = hub.totals()
+        self.assertEqual(totals["streams"], 0)
+        self.assertEqual(totals["overflow_disconnects"], 1)
+        self.assertEqual(totals["dropped"], 3)
+        stalled.cancel()
+
+if __name__ == "__main__":
+    unittest.main()
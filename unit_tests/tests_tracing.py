@@ -0,0 +1,213 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import time
+
+import grpc
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from system_main.tracing import (
+    Tracer, TracingInterceptor, TracingClientInterceptor, parse_traceparent, format_traceparent, TRACEPARENT,
+)
+
+INCOMING = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+class FakeHandlerCallDetails:
+    def __init__(self, method, metadata=()):
+        self.method = method
+        self.invocation_metadata = metadata
+
+class FakeClientCallDetails:
+    def __init__(self, method, metadata=None):
+        self.method = method
+        self.timeout = None
+        self.metadata = metadata
+        self.credentials = None
+
+class FakeCall:
+    def __init__(self, code):
+        self._code = code
+
+    def code(self):
+        return self._code
+
+    def add_done_callback(self, callback):
+        callback(self)
+
+# The following tests are for the system_main.tracing module
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="test_tracing_")
+        self.path = os.path.join(self.temp_dir, "trace.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_traceparent_round_trip(self):
+        """
+        Verify W3C traceparent values are parsed, malformed ones rejected, and spans formatted back
+        """
+        self.assertEqual(parse_traceparent(INCOMING),
+                         ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True))
+        for value in ("", "garbage", "00-4bf92f35-00f067aa0ba902b7-01", "00-" + "0" * 32 + "-00f067aa0ba902b7-01",
+                      "00-4bf92f3577b34da6a3ce929d0e0e473z-00f067aa0ba902b7-01", None):
+            self.assertIsNone(parse_traceparent(value))
+
+        tracer = Tracer(self.path, sample_rate=0.0, slow_threshold=1.0)
+        root = tracer.start_trace("SendMessage", INCOMING)
+        self.assertEqual((root.trace.trace_id, root.parent_id, root.trace.sampled),
+                         ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True))
+        self.assertEqual(parse_traceparent(format_traceparent(root)),
+                         ("4bf92f3577b34da6a3ce929d0e0e4736", root.span_id, True))
+
+    def test_sampled_and_slow_traces_kept(self):
+        """
+        Verify sampled traces are kept, unsampled ones only when slow, and late spans of a kept trace still count
+        """
+        tracer = Tracer(self.path, sample_rate=0.0, slow_threshold=0.05)
+        with tracer.start_trace("Fast"):
+            with tracer.span("sqlite.commit"):
+                pass
+        self.assertEqual(len(tracer.spans), 0)
+
+        with tracer.start_trace("Slow") as root:
+            with tracer.span("raft.apply", command="create_message") as child:
+                time.sleep(0.06)
+        self.assertEqual([span.name for span in tracer.spans], ["raft.apply", "Slow"])
+        self.assertEqual(child.parent_id, root.span_id)
+        tracer.add_span("push.notify", child.start, child.end, root)  # recorded after the root ended
+        self.assertEqual(len(tracer.spans), 3)
+        self.assertIsNone(tracer.current_span())
+
+        self.assertIsNone(Tracer(self.path, sample_rate=0.0, slow_threshold=None).start_trace("Unsampled"))
+        sampled = Tracer(self.path, sample_rate=1.0, slow_threshold=None)
+        with sampled.start_trace("Sampled"):
+            pass
+        self.assertEqual((len(sampled.spans), sampled.kept), (1, 1))
+
+    def test_file_is_chrome_trace_events(self):
+        """
+        Verify flushes append complete events and thread names, and the file reads as one JSON array
+        """
+        tracer = Tracer(self.path, sample_rate=1.0, slow_threshold=None, process_name="node 1", capacity=4)
+        with tracer.start_trace("Login", username="alice"):
+            pass
+        self.assertEqual(tracer.flush(), 1)
+
+        roots = []
+
+        def worker():
+            with tracer.start_trace("SendMessage") as root:
+                roots.append(root)
+                with tracer.span("sqlite.commit"):
+                    pass
+            with tracer.activate(root):
+                with tracer.span("push.notify"):
+                    pass
+        thread = threading.Thread(target=worker, name="apply-thread")
+        thread.start()
+        thread.join()
+        for _ in range(3):
+            with tracer.start_trace("Heartbeat"):
+                pass
+        self.assertEqual(tracer.dropped, 2)  # the ring buffer holds 4 spans, so the oldest two went
+        self.assertEqual(tracer.flush(), 4)
+        self.assertEqual(tracer.flush(), 0)
+
+        with open(self.path) as f:
+            events = json.loads(f.read() + "]")
+        spans = [event for event in events if event["ph"] == "X"]
+        self.assertEqual([event["name"] for event in spans], ["Login", "push.notify", "Heartbeat", "Heartbeat",
+                                                              "Heartbeat"])
+        self.assertEqual(spans[0]["args"]["username"], "alice")
+        self.assertEqual(spans[1]["args"]["trace_id"], roots[0].trace.trace_id)
+        self.assertEqual(spans[1]["args"]["parent_id"], roots[0].span_id)
+        self.assertEqual((spans[1]["cat"], spans[2]["cat"]), ("push", "rpc"))
+        self.assertAlmostEqual(spans[0]["ts"] / 1e6, time.time(), delta=60)
+        names = {event["args"]["name"] for event in events if event["ph"] == "M"}
+        self.assertEqual(names, {"node 1", threading.current_thread().name, "apply-thread"})
+        self.assertEqual(tracer.written, 5)
+        self.assertEqual(events[0]["args"]["name"], "node 1")
+
+class TestTracingInterceptors(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tracer = Tracer(os.devnull, sample_rate=1.0, slow_threshold=None)
+
+    async def intercept(self, handler, method, metadata=()):
+        async def continuation(details):
+            return handler
+        interceptor = TracingInterceptor(self.tracer)
+        return await interceptor.intercept_service(continuation, FakeHandlerCallDetails(method, metadata))
+
+    async def test_server_continues_caller_trace(self):
+        """
+        Verify unary and streaming handlers run inside a root span that continues the caller's traceparent
+        """
+        seen = []
+
+        def send(request, context):
+            seen.append(self.tracer.current_span())
+            with self.tracer.span("raft.wait_ready"):
+                return request
+
+        handler = await self.intercept(grpc.unary_unary_rpc_method_handler(send), "/chat.ChatService/SendMessage",
+                                       ((TRACEPARENT, INCOMING),))
+        self.assertEqual(handler.unary_unary("ok", None), "ok")
+        root = seen[0]
+        self.assertEqual((root.name, root.args["service"]), ("SendMessage", "chat.ChatService"))
+        self.assertEqual((root.trace.trace_id, root.parent_id), ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"))
+        self.assertEqual([span.name for span in self.tracer.spans], ["raft.wait_ready", "SendMessage"])
+        self.assertIsNone(self.tracer.current_span())
+
+        def chunks(request, context):
+            seen.append(self.tracer.current_span())
+            yield 1
+            seen.append(self.tracer.current_span())
+            yield 2
+
+        handler = await self.intercept(grpc.unary_stream_rpc_method_handler(chunks),
+                                       "/chat.ChatService/ReadMessagesStream")
+        self.assertEqual(list(handler.unary_stream(None, None)), [1, 2])
+        self.assertIs(seen[1], seen[2])
+        self.assertEqual(self.tracer.spans[-1].name, "ReadMessagesStream")
+
+        def broken(request, context):
+            raise RuntimeError("boom")
+        handler = await self.intercept(grpc.unary_unary_rpc_method_handler(broken), "/chat.ChatService/Login")
+        with self.assertRaises(RuntimeError):
+            handler.unary_unary(None, None)
+        self.assertEqual(self.tracer.spans[-1].args["error"], "RuntimeError")
+
+        async def session(request_iterator, context):
+            yield "ack"
+        handler = await self.intercept(grpc.stream_stream_rpc_method_handler(session), "/chat.ChatService/Session")
+        self.assertIs(handler.stream_stream, session)
+
+    def test_client_injects_traceparent(self):
+        """
+        Verify the client interceptor adds a traceparent naming its span and ends the span with the call
+        """
+        interceptor = TracingClientInterceptor(self.tracer)
+        sent = []
+
+        def continuation(details, request):
+            sent.append(dict(details.metadata))
+            return FakeCall(grpc.StatusCode.UNAVAILABLE)
+
+        interceptor.intercept_unary_unary(continuation, FakeClientCallDetails("/chat.ChatService/Login",
+                                                                              [("x-client", "1")]), None)
+        span = self.tracer.spans[-1]
+        self.assertEqual((span.name, span.args["error"]), ("client.Login", "UNAVAILABLE"))
+        self.assertEqual(sent[0]["x-client"], "1")
+        self.assertEqual(parse_traceparent(sent[0][TRACEPARENT]), (span.trace.trace_id, span.span_id, True))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+import grpc
+
+# Add the project root (parent directory of unit_tests) to sys.path so that imports work.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from system_main.wire_accounting import (
+    UsageLog, ByteCount, AccountingInterceptor, AccountingClientInterceptor, LOG_HEADER, MAX_HELD_FLUSHES,
+    message_size
+)
+
+class FakeMessage:
+    def __init__(self, size):
+        self.size = size
+
+    def ByteSize(self):
+        return self.size
+
+class FakeHandlerCallDetails:
+    def __init__(self, method):
+        self.method = method
+
+class FakeClientCallDetails:
+    def __init__(self, method):
+        self.method = method
+
+# The following tests are for the system_main.wire_accounting module
+class TestUsageLog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "usage.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def read_lines(self):
+        with open(self.path) as f:
+            return f.readlines()
+
+    def test_flush_writes_batch_once_with_header(self):
+        """
+        Verify buffered records are written together, the header only once, and sizes resolved when flushed
+        """
+        log = UsageLog(self.path)
+        count = ByteCount()
+        log.record("Login", 15, FakeMessage(41), "chat.ChatService")
+        log.record("ReadMessages", 10, count, "chat.v2.ChatService")
+        count.bytes = 900  # filled in after the record, as a unary response is
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(log.flush(), 2)
+        log.record("Heartbeat", None, 4)
+        self.assertEqual(log.flush(), 1)
+        self.assertEqual(log.flush(), 0)
+        self.assertEqual(self.read_lines(), [
+            LOG_HEADER,
+            "Login,15,41,chat.ChatService\n",
+            "ReadMessages,10,900,chat.v2.ChatService\n",
+            "Heartbeat,0,4,\n",
+        ])
+        self.assertEqual(log.written, 3)
+
+    def test_full_buffer_drops_oldest(self):
+        """
+        Verify a full ring buffer drops and counts its oldest records instead of blocking
+        """
+        log = UsageLog(self.path, capacity=2)
+        for i in range(5):
+            log.record(f"M{i}", i, i)
+        self.assertEqual(log.dropped, 3)
+        log.close()
+        self.assertEqual(self.read_lines()[1:], ["M3,3,3,\n", "M4,4,4,\n"])
+
+    def test_flusher_thread_writes_and_close_drains(self):
+        """
+        Verify the background thread flushes on its own and close() writes what is left
+        """
+        log = UsageLog(self.path, flush_interval=0.05).start()
+        log.record("Login", 1, 2)
+        for _ in range(100):
+            if log.written:
+                break
+            time.sleep(0.02)
+        self.assertEqual(log.written, 1)
+        log.record("Logout", 3, 4)
+        log.close()
+        self.assertEqual(self.read_lines()[1:], ["Login,1,2,\n", "Logout,3,4,\n"])
+
+    def test_helpers(self):
+        """
+        Verify failed or empty values count as zero bytes
+        """
+        self.assertEqual(message_size(None), 0)
+        self.assertEqual(message_size(FakeMessage(7)), 7)
+
+class TestAccountingInterceptor(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.log = UsageLog(os.devnull)
+        self.interceptor = AccountingInterceptor(self.log)
+
+    async def intercept(self, handler, method="/chat.ChatService/ReadMessages"):
+        async def continuation(details):
+            return handler
+        return await self.interceptor.intercept_service(continuation, FakeHandlerCallDetails(method))
+
+    def records(self):
+        return [(m, message_size(req), message_size(resp), s) for m, req, resp, s in self.log.records]
+
+    async def test_unary_counts_serialized_bytes(self):
+        """
+        Verify a unary call is recorded with the bytes its (de)serializers saw, even if the handler fails
+        """
+        handler = await self.intercept(grpc.unary_unary_rpc_method_handler(
+            lambda request, context: request * 3,
+            request_deserializer=bytes.decode, response_serializer=str.encode))
+        request = handler.request_deserializer(b"abcd")
+        response = handler.unary_unary(request, None)
+        self.assertEqual(len(self.log.records), 1)  # recorded before the response is serialized
+        self.assertEqual(handler.response_serializer(response), b"abcd" * 3)
+        self.assertEqual(self.records(), [("ReadMessages", 4, 12, "chat.ChatService")])
+
+        def failing(request, context):
+            raise RuntimeError("boom")
+        handler = await self.intercept(grpc.unary_unary_rpc_method_handler(failing), "/chat.ChatService/Login")
+        with self.assertRaises(RuntimeError):
+            handler.unary_unary(handler.request_deserializer(b"xy"), None)
+        self.assertEqual(self.records()[-1], ("Login", 2, 0, "chat.ChatService"))
+
+    async def test_flush_holds_unary_record_until_serialized(self):
+        """
+        Verify a flush between a unary handler's return and its response's serialization holds the record back,
+        and a response that is never serialized is written after a few flushes
+        """
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, "usage.log")
+        self.interceptor = AccountingInterceptor(UsageLog(path))
+        handler = await self.intercept(grpc.unary_unary_rpc_method_handler(
+            lambda request, context: request * 3,
+            request_deserializer=bytes.decode, response_serializer=str.encode))
+
+        response = handler.unary_unary(handler.request_deserializer(b"abcd"), None)
+        self.assertEqual(self.interceptor.usage_log.flush(), 0)  # the flusher ran before gRPC serialized
+        handler.response_serializer(response)
+        self.assertEqual(self.interceptor.usage_log.flush(), 1)
+
+        handler = await self.intercept(grpc.unary_unary_rpc_method_handler(
+            lambda request, context: request, request_deserializer=bytes.decode))
+        handler.unary_unary(handler.request_deserializer(b"xy"), None)  # e.g. cancelled before serializing
+        for _ in range(MAX_HELD_FLUSHES):
+            self.assertEqual(self.interceptor.usage_log.flush(), 0)
+        self.assertEqual(self.interceptor.usage_log.flush(), 1)
+        with open(path) as f:
+            self.assertEqual(f.readlines()[1:], ["ReadMessages,4,12,chat.ChatService\n",
+                                                 "ReadMessages,2,0,chat.ChatService\n"])
+
+    async def test_streams_keep_handler_kind_and_count_every_message(self):
+        """
+        Verify sync and async streaming handlers stay generators and record once, after the last message
+        """
+        def sync_stream(request, context):
+            yield b"one"
+            yield b"three"
+
+        async def async_stream(request, context):
+            yield b"four"
+
+        handler = await self.intercept(grpc.unary_stream_rpc_method_handler(sync_stream))
+        for message in handler.unary_stream(handler.request_deserializer(b"r"), None):
+            self.assertEqual(len(self.log.records), 0)
+            handler.response_serializer(message)
+        self.assertEqual(self.records(), [("ReadMessages", 1, 8, "chat.ChatService")])
+
+        handler = await self.intercept(grpc.stream_stream_rpc_method_handler(async_stream), "/chat.ChatService/Session")
+        async for message in handler.stream_stream(None, None):
+            handler.response_serializer(message)
+        self.assertEqual(self.records()[-1], ("Session", 0, 4, "chat.ChatService"))
+
+    async def test_unknown_method_passes_through(self):
+        """
+        Verify a method without a handler is left to gRPC
+        """
+        self.assertIsNone(await self.intercept(None))
+
+class TestAccountingClientInterceptor(unittest.TestCase):
+    def test_streamed_responses_recorded_when_consumed(self):
+        """
+        Verify a response stream is recorded once, with the bytes of the messages the caller read
+        """
+        log = UsageLog(os.devnull)
+        interceptor = AccountingClientInterceptor(log)
+        request = FakeMessage(9)
+        stream = interceptor.intercept_unary_stream(
+            lambda details, request: iter([FakeMessage(100), FakeMessage(20)]),
+            FakeClientCallDetails("/chat.v2.ChatService/ReadMessagesStream"), request)
+        self.assertEqual([m.size for m in stream], [100, 20])
+        self.assertEqual(list(stream), [])
+        self.assertEqual([(m, message_size(req), message_size(resp), s) for m, req, resp, s in log.records],
+                         [("ReadMessagesStream", 9, 120, "chat.v2.ChatService")])
+
+if __name__ == "__main__":
+    unittest.main()